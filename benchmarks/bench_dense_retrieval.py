@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark del recuperador denso (LSA + int8): recall@k frente a la búsqueda
+exacta en float32 y latencia por consulta de los índices brute-force e IVF.
+
+Uso:
+    python -m benchmarks.bench_dense_retrieval [--docs N] [--queries N] [--pdf-dir DIR]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chatbot.rag.utils.dense_retriever import LSAEncoder, BruteForceIndex, IVFIndex
+
+TOPICS = {
+    'admisiones': 'admisiones inscripciones aspirantes pregrado puntaje icfes formulario pin convocatoria',
+    'calendario': 'calendario académico semestre fechas clases exámenes cierre notas receso',
+    'matricula': 'matrícula recibo pago liquidación derechos financieros descuento estrato',
+    'planestic': 'planestic aulas virtuales moodle tic docentes formación virtual cursos',
+    'sedes': 'sede macarena tecnológica aduanilla paiba calle carrera dirección campus',
+    'biblioteca': 'biblioteca préstamo libros bases datos repositorio horario consulta',
+    'bienestar': 'bienestar apoyo alimentario salud deporte psicología becas subsidio',
+    'grados': 'grados ceremonia diploma paz salvo requisitos trabajo grado acta',
+}
+FILLER = 'universidad distrital estudiantes proceso información oficina correo página servicio'.split()
+
+def synthetic_corpus(n_docs: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    topics = list(TOPICS.values())
+    docs = []
+    for _ in range(n_docs):
+        words = rng.choice(topics).split()
+        docs.append(' '.join(rng.choice(words) if rng.random() < 0.6 else rng.choice(FILLER) for _ in range(60)))
+    return docs
+
+def pdf_corpus(directory: str) -> list:
+    from chatbot.rag.utils import utils
+    retriever = utils.load_documents_database(directory, 500, 0)
+    return [doc.page_content for doc in retriever.docs]
+
+def measure(index, queries: np.ndarray, exact: list, k: int) -> tuple:
+    latencies, hits = [], 0
+    for query, truth in zip(queries, exact):
+        start = time.perf_counter()
+        found = index.search(query, k)
+        latencies.append((time.perf_counter() - start) * 1e6)
+        hits += len({i for i, _ in found} & truth)
+    latencies.sort()
+    recall = hits / (len(queries) * k)
+    return recall, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95) - 1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--docs', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--components', type=int, default=128)
+    parser.add_argument('--pdf-dir', default=None, help='Usar los fragmentos de los PDFs en lugar del corpus sintético')
+    args = parser.parse_args()
+
+    corpus = pdf_corpus(args.pdf_dir) if args.pdf_dir else synthetic_corpus(args.docs)
+    rng = random.Random(11)
+    query_texts = [' '.join(rng.sample(corpus[rng.randrange(len(corpus))].split(), 6)) for _ in range(args.queries)]
+
+    start = time.perf_counter()
+    encoder = LSAEncoder(n_components=args.components)
+    vectors = encoder.fit_transform(corpus)
+    print(f"Corpus: {len(corpus)} fragmentos, {vectors.shape[1]} dims, ajuste en {time.perf_counter() - start:.2f}s")
+    print(f"Memoria vectores: float32={vectors.nbytes / 1e6:.1f} MB, int8={vectors.size / 1e6:.1f} MB")
+
+    queries = encoder.transform(query_texts)
+    exact = [set(np.argsort(vectors @ q)[::-1][:args.k].tolist()) for q in queries]
+
+    nlist = max(1, int(np.sqrt(len(corpus))))
+    indexes = [('bruteforce int8', BruteForceIndex(vectors))]
+    for nprobe in (4, 8, 16):
+        indexes.append((f'ivf nlist={nlist} nprobe={nprobe}', IVFIndex(vectors, nlist=nlist, nprobe=nprobe)))
+
+    print(f"{'índice':<32}{'recall@' + str(args.k):>10}{'p50 µs':>10}{'p95 µs':>10}")
+    for name, index in indexes:
+        recall, p50, p95 = measure(index, queries, exact, args.k)
+        print(f"{name:<32}{recall:>10.3f}{p50:>10.0f}{p95:>10.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark del almacén de páginas: memoria de la caché de búsquedas con el
+'raw_content' embebido en cada entrada frente a entradas con referencias a
+páginas deduplicadas y comprimidas. Las consultas devuelven páginas de un
+conjunto de páginas populares con distribución Zipf, como ocurre con los
+resultados de Tavily sobre udistrital.edu.co.
+
+Uso:
+    python -m benchmarks.bench_page_store [--queries N] [--pages N] [--results N]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chatbot.rag.cache.backends import MemoryBackend
+from chatbot.rag.cache.pages import PageStore, pack_results, unpack_results
+from chatbot.rag.cache.serialization import encode
+
+WORDS = ('inscripciones admisiones pregrado posgrado calendario académico facultad ingeniería sede '
+         'macarena bosa tecnológica matrícula resolución boletín planestic docentes aspirantes').split()
+
+def make_page(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--pages', type=int, default=300)
+    parser.add_argument('--results', type=int, default=5)
+    parser.add_argument('--page-words', type=int, default=3000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    pages = [(f'https://www.udistrital.edu.co/pagina/{i}', make_page(rng, args.page_words)) for i in range(args.pages)]
+    weights = [1.0 / (rank + 1) for rank in range(args.pages)]
+    searches = []
+    for _ in range(args.queries):
+        chosen = rng.choices(pages, weights=weights, k=args.results)
+        searches.append([{'url': url, 'title': url, 'content': text[:300], 'raw_content': text} for url, text in chosen])
+
+    embedded = sum(len(encode(results)) for results in searches)
+
+    store = PageStore(MemoryBackend(max_entries=10 ** 6, max_bytes=2 ** 40))
+    start = time.perf_counter()
+    packed = [encode(pack_results(results, store)) for results in searches]
+    pack_ms = (time.perf_counter() - start) * 1000
+    referenced = sum(len(entry) for entry in packed)
+    stats = store.stats()
+
+    start = time.perf_counter()
+    sample = unpack_results(pack_results(searches[0], store), store)
+    context_chars = sum(len(result.get('raw_content', '')) for result in sample)
+    resolve_ms = (time.perf_counter() - start) * 1000
+
+    total = referenced + stats['bytes']
+    print(f"consultas: {args.queries}, páginas distintas usadas: {stats['pages']}")
+    print(f"embebido (zlib por entrada):   {embedded / args.queries / 1024:8.1f} KiB/consulta")
+    print(f"referencias + páginas:         {total / args.queries / 1024:8.1f} KiB/consulta "
+          f"({referenced / args.queries:.0f} B de entrada)")
+    print(f"reducción: {embedded / total:.1f}x  dedup_ratio: {stats['dedup_ratio']}  compresión: {stats['compression_ratio']}x")
+    print(f"empaquetado: {pack_ms / args.queries:.2f} ms/consulta, resolución de {len(sample)} páginas "
+          f"({context_chars} caracteres): {resolve_ms:.2f} ms")
+
+if __name__ == '__main__':
+    main()
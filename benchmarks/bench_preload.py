@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la precarga antes del fork: arranca `manage.py serve` con y sin
+--no-preload y compara el tiempo hasta aceptar peticiones, la latencia de
+la primera petición a cada worker y la memoria del grupo de procesos (RSS
+sumada y PSS, que reparte las páginas compartidas copy-on-write entre los
+procesos que las usan). Solo Linux (lee /proc).
+
+Uso:
+    python -m benchmarks.bench_preload [--workers N] [--threads N] [--mode wsgi|asgi] [--port P]
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import subprocess
+import http.client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def children(pid: int) -> list:
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+def memory_kb(pid: int) -> tuple:
+    """
+    Returns:
+        tuple: (RSS, PSS) of a process in KiB, from /proc/<pid>/smaps_rollup.
+    """
+    values = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                if parts and parts[0] in ('Rss:', 'Pss:'):
+                    values[parts[0]] = int(parts[1])
+    except OSError:
+        pass
+    return values.get('Rss:', 0), values.get('Pss:', 0)
+
+def request(port: int, method: str = 'GET', path: str = '/api/health/', body: dict = None) -> tuple:
+    """
+    Returns:
+        tuple: (status, milliseconds).
+    """
+    start = time.perf_counter()
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        payload = json.dumps(body) if body is not None else None
+        connection.request(method, path, body=payload, headers={'Host': 'localhost', 'Content-Type': 'application/json'})
+        status = connection.getresponse().status
+    finally:
+        connection.close()
+    return status, (time.perf_counter() - start) * 1000
+
+def measure(preload: bool, args) -> dict:
+    command = [sys.executable, 'manage.py', 'serve', '--bind', f'127.0.0.1:{args.port}',
+               '--workers', str(args.workers), '--threads', str(args.threads), '--mode', args.mode]
+    if not preload:
+        command.append('--no-preload')
+    env = dict(os.environ, DJANGO_SECRET_KEY=os.environ.get('DJANGO_SECRET_KEY', 'bench-preload'))
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        ready = None
+        while time.perf_counter() - start < args.timeout:
+            try:
+                if request(args.port)[0] == 200:
+                    ready = time.perf_counter() - start
+                    break
+            except OSError:
+                time.sleep(0.05)
+        if ready is None:
+            raise RuntimeError('el servidor no respondió a tiempo')
+        # Primera petición que usa el handler (un saludo no llama al LLM), una por worker
+        first = [request(args.port, 'POST', '/api/send_messages/', {'messages': [f'hola {i}']})[1]
+                 for i in range(args.workers)]
+        time.sleep(0.5)
+        pids = [process.pid] + children(process.pid)
+        usage = [memory_kb(pid) for pid in pids]
+        return {
+            'ready_seconds': ready,
+            'first_request_ms': max(first),
+            'processes': len(pids),
+            'rss_mb': sum(rss for rss, _ in usage) / 1024,
+            'pss_mb': sum(pss for _, pss in usage) / 1024,
+        }
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--mode', choices=['wsgi', 'asgi'], default='wsgi')
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--timeout', type=float, default=120, help='Segundos máximos de arranque')
+    args = parser.parse_args()
+
+    for preload in (False, True):
+        result = measure(preload, args)
+        print(f"{'con precarga' if preload else 'sin precarga':13s} listo en {result['ready_seconds']:.2f}s  "
+              f"primera petición {result['first_request_ms']:.0f} ms  {result['processes']} procesos  "
+              f"RSS {result['rss_mb']:.0f} MiB  PSS {result['pss_mb']:.0f} MiB")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark del límite de peticiones: costo por decisión de los buckets en
+memoria y en SQLite compartido, incluyendo la identificación del cliente.
+Falla (código de salida 1) si el backend en memoria supera el presupuesto.
+
+Uso:
+    python -m benchmarks.bench_rate_limit [--requests N] [--clients N] [--budget-us US]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure(DEFAULT_CHARSET='utf-8')
+
+from chatbot.rag.utils.rate_limit import InMemoryRateLimiter, SQLiteRateLimiter
+from chatbot.request_utils import get_client_key
+
+class FakeRequest:
+    def __init__(self, ip: str, csrf: str):
+        self.META = {'REMOTE_ADDR': ip}
+        self.COOKIES = {settings.CSRF_COOKIE_NAME: csrf}
+
+def measure(limiter, requests: list) -> tuple:
+    latencies = []
+    for request in requests:
+        start = time.perf_counter()
+        limiter.acquire(get_client_key(request))
+        latencies.append((time.perf_counter() - start) * 1e6)
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99) - 1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=50000)
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--budget-us', type=float, default=50.0)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    clients = [FakeRequest(f'10.0.{i // 256}.{i % 256}', f'token{i}') for i in range(args.clients)]
+    requests = [rng.choice(clients) for _ in range(args.requests)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        limiters = [
+            ('memoria', InMemoryRateLimiter(rate=20 / 60, burst=10)),
+            ('sqlite', SQLiteRateLimiter(os.path.join(directory, 'limits.sqlite3'), rate=20 / 60, burst=10)),
+        ]
+        print(f"{'backend':<12}{'p50 µs':>10}{'p99 µs':>10}")
+        results = {}
+        for name, limiter in limiters:
+            results[name] = measure(limiter, requests)
+            print(f"{name:<12}{results[name][0]:>10.1f}{results[name][1]:>10.1f}")
+
+    if results['memoria'][0] > args.budget_us:
+        print(f"ERROR: el backend en memoria supera el presupuesto de {args.budget_us} µs por petición")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
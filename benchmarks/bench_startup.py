@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark del arranque en frío de un worker: para cada bot_type lanza un
+proceso nuevo con `python -X importtime` que configura Django y carga las
+URLs (vistas, handler del proveedor), y mide el tiempo hasta estar listo,
+la memoria residual máxima (RSS) y los módulos pesados importados. Falla
+(código de salida 1) si algún proveedor supera su presupuesto o importa
+dependencias de otro proveedor.
+
+Uso:
+    python -m benchmarks.bench_startup [--bot-types deepseek cohere ...] [--runs N] [--top N]
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Presupuesto por proveedor: segundos hasta cargar las URLs y RSS máxima en MiB
+BUDGETS = {
+    'deepseek': {'seconds': 2.5, 'rss_mb': 120},
+    'llama': {'seconds': 2.5, 'rss_mb': 120},
+    'cohere': {'seconds': 4.0, 'rss_mb': 200},
+    'aws_bedrock': {'seconds': 3.5, 'rss_mb': 170},
+}
+
+# Dependencias pesadas y proveedores que pueden importarlas en el arranque
+# (langchain_cohere depende de langchain_community; AWS Bedrock indexa sus PDFs al iniciar)
+HEAVY_MODULES = {
+    'boto3': {'aws_bedrock'},
+    'langchain_cohere': {'cohere'},
+    'langchain_core': {'cohere', 'aws_bedrock'},
+    'langchain_community': {'cohere', 'aws_bedrock'},
+    'sklearn': {'aws_bedrock'},
+}
+
+CHILD = """
+import os, sys, json, time, resource
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
+os.environ.setdefault('DJANGO_SECRET_KEY', 'bench-startup')
+from chatbot.rag.utils import config_loader
+config_loader.get_config()['bot_type'] = {bot_type!r}
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps({{
+    'seconds': time.perf_counter() - start,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'heavy': sorted(name for name in {heavy!r} if name in sys.modules),
+}}))
+"""
+
+def parse_importtime(stderr: str) -> list:
+    """
+    Returns:
+        list: (cumulative microseconds, module) of the top-level imports, slowest first.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit() and not name[1:].startswith(' '):
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)
+
+def measure(bot_type: str) -> dict:
+    code = CHILD.format(root=ROOT, bot_type=bot_type, heavy=sorted(HEAVY_MODULES))
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, cwd=ROOT,
+        env=dict(os.environ, PYTHONDONTWRITEBYTECODE='1'),
+    )
+    if process.returncode != 0:
+        errors = [line for line in process.stderr.splitlines() if not line.startswith('import time:')]
+        raise RuntimeError('\n'.join(errors[-20:]))
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result['imports'] = parse_importtime(process.stderr)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bot-types', nargs='+', default=list(BUDGETS))
+    parser.add_argument('--runs', type=int, default=3, help='Arranques por proveedor (se toma el más rápido)')
+    parser.add_argument('--top', type=int, default=5, help='Imports más lentos a mostrar')
+    args = parser.parse_args()
+
+    failures = []
+    for bot_type in args.bot_types:
+        try:
+            runs = [measure(bot_type) for _ in range(args.runs)]
+        except RuntimeError as e:
+            error = str(e).strip().splitlines()
+            print(f"{bot_type:12s} no arranca: {error[-1] if error else ''}")
+            failures.append(f"{bot_type}: no arranca")
+            continue
+        best = min(runs, key=lambda run: run['seconds'])
+        rss_mb = max(run['rss_mb'] for run in runs)
+        budget = BUDGETS.get(bot_type, {})
+        print(f"{bot_type:12s} arranque {best['seconds']:.2f}s (máx. {budget.get('seconds', '-')}s)  "
+              f"RSS {rss_mb:.0f} MiB (máx. {budget.get('rss_mb', '-')} MiB)  pesados: {', '.join(best['heavy']) or '-'}")
+        for cumulative, name in best['imports'][:args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+        if budget and best['seconds'] > budget['seconds']:
+            failures.append(f"{bot_type}: arranque {best['seconds']:.2f}s > {budget['seconds']}s")
+        if budget and rss_mb > budget['rss_mb']:
+            failures.append(f"{bot_type}: RSS {rss_mb:.0f} MiB > {budget['rss_mb']} MiB")
+        unexpected = [name for name in best['heavy'] if bot_type not in HEAVY_MODULES[name]]
+        if unexpected:
+            failures.append(f"{bot_type}: importa {', '.join(unexpected)} al arrancar")
+
+    for failure in failures:
+        print(f"FUERA DE PRESUPUESTO: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,67 @@
+from datetime import timedelta
+
 from django.contrib import admin
+from django.db.models import Avg, Count, Max
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+
+from chatbot.models import Interaction
+
+@admin.register(Interaction)
+class InteractionAdmin(admin.ModelAdmin):
+    """
+    Read-only admin for the interaction log, with an aggregate statistics view.
+    """
+    list_display = ('created_at', 'message', 'provider', 'latency_ms', 'cache_hit', 'llm_calls', 'search_calls')
+    list_filter = ('provider', 'cache_hit', 'endpoint')
+    search_fields = ('normalized_question',)
+    readonly_fields = [field.name for field in Interaction._meta.fields]
+    list_per_page = 50
+    # Evita el COUNT(*) completo de la tabla en cada página del listado
+    show_full_result_count = False
+    change_list_template = 'admin/chatbot/interaction/change_list.html'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        custom_urls = [
+            path('stats/', self.admin_site.admin_view(self.stats_view), name='chatbot_interaction_stats'),
+        ]
+        return custom_urls + super().get_urls()
+
+    def stats_view(self, request):
+        """
+        Top questions and slowest answers over the last `days` days. Every query is
+        bounded by the created_at index, so the cost depends on the window, not on
+        the total table size.
+        """
+        try:
+            days = max(1, min(int(request.GET.get('days', 7)), 90))
+        except ValueError:
+            days = 7
+        since = timezone.now() - timedelta(days=days)
+        window = Interaction.objects.filter(created_at__gte=since)
 
-# Register your models here.
+        context = dict(
+            self.admin_site.each_context(request),
+            title=f'Estadísticas de interacciones (últimos {days} días)',
+            opts=self.model._meta,
+            days=days,
+            summary=window.aggregate(
+                total=Count('id'),
+                avg_latency=Avg('latency_ms'),
+                max_latency=Max('latency_ms'),
+            ),
+            cache_hits=window.filter(cache_hit=True).count(),
+            top_questions=window.values('normalized_question')
+                .annotate(total=Count('id'), avg_latency=Avg('latency_ms'))
+                .order_by('-total')[:20],
+            slowest=window.exclude(latency_ms=None).order_by('-latency_ms')
+                .only('created_at', 'message', 'provider', 'latency_ms')[:20],
+        )
+        return TemplateResponse(request, 'admin/chatbot/interaction/stats.html', context)
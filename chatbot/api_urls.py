@@ -5,6 +5,12 @@ from . import api_views
 
 urlpatterns = [
     path('send_message/', api_views.send_message_api, name='api_send_message'),
+    path('send_messages/', api_views.send_messages_api, name='api_send_messages'),
+    path('prefetch/', api_views.prefetch_api, name='api_prefetch'),
     path('system_info/', api_views.system_info, name='api_system_info'),
+    path('system_stats/', api_views.system_stats, name='api_system_stats'),
+    path('cache_purge/', api_views.cache_purge, name='api_cache_purge'),
     path('health/', api_views.health_check, name='api_health_check'),
+    path('ready/', api_views.readiness_check, name='api_readiness_check'),
+    path('metrics/', api_views.metrics_view, name='api_metrics'),
 ]
@@ -1,24 +1,43 @@
 # ./chatbot/api_views.py
 
 import json
-import os
+import logging
 
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-from chatbot.rag.handlers.factory import get_qa_handler
+from chatbot.rag.handlers.factory import get_qa_handler, get_profile_handler, preload_profiles
+from chatbot.rag.handlers.registry import get_registry
 from chatbot.rag.utils.utils import log_message_interaction
+from chatbot.rag.utils.request_context import request_scope
+from chatbot.rag.cache.answers import get_cached_answer, cache_answer
+from chatbot.rag.cache.tiered import cache_stats, get_cache
+from chatbot.rag.cache.pages import page_store_stats, get_page_store
+from chatbot.rag.utils.session_store import get_session_store, record_session_turn, session_stats
+from chatbot.rag.utils.prefetch import get_prefetcher
+from chatbot.rag.utils.deadline import deadline_for, generation_reserve
+from chatbot.rag.utils.interaction_logger import get_interaction_logger
+from chatbot.rag.utils.rate_limit import rate_limited, check_rate_limit
+from chatbot.rag.utils.batch import run_batch, find_duplicates
+from chatbot.rag.utils.config_loader import get_config, get_section
+from chatbot.rag.utils.circuit_breaker import circuit_stats
+from chatbot.rag.utils.health import get_health_monitor
+from chatbot.rag.utils.http_client import pool_stats
+from chatbot.rag.utils.process_stats import process_stats
+from chatbot.rag.utils.usage import usage_stats
+from chatbot.rag.utils.scheduler import get_scheduler, overloaded_response, scheduler_stats, SchedulerOverloaded, PRIORITY_API, PRIORITY_BATCH
+from chatbot.rag.utils import metrics
+from chatbot.request_utils import get_client_key, get_session_id
 
-# Load the configuration file
-CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'rag/config/config.json')
+logger = logging.getLogger(__name__)
 
-with open(CONFIG_PATH, 'r') as config_file:
-    config = json.load(config_file)
+# Configuración compartida (config.json se lee una sola vez por proceso)
+config = get_config()
 
 # Determine the bot type based on the configuration
 BOT_TYPE = config.get('bot_type', 'cohere')  # Default value: "cohere"
@@ -26,8 +45,34 @@ BOT_CONFIG = config.get('bot_config', {}).get(BOT_TYPE, {})
 
 # Inicializar el handler correcto basado en el tipo de bot y sus configuraciones
 qa_handler = get_qa_handler(BOT_TYPE, BOT_CONFIG)
+preload_profiles()
 print(f'INFO: Ejecución tipo {BOT_TYPE}')
 
+def _request_handler(request):
+    """
+    Resuelve el campo opcional 'profile' de la solicitud.
+
+    Returns:
+        tuple: (perfil, bot_type, handler), o None si el perfil no existe.
+    """
+    profile = request.data.get('profile') if isinstance(request.data, dict) else None
+    if not profile:
+        return '', BOT_TYPE, qa_handler
+    try:
+        bot_type, handler = get_profile_handler(str(profile))
+    except ValueError:
+        return None
+    return str(profile), bot_type, handler
+
+def _unknown_profile_response(request) -> Response:
+    return Response({'error': f"Perfil desconocido: {request.data.get('profile')}"}, status=status.HTTP_400_BAD_REQUEST)
+
+profile_schema = openapi.Schema(
+    type=openapi.TYPE_STRING,
+    description='Perfil opcional de config.json (sección `profiles`): proveedor y parámetros del modelo a usar en esta solicitud. Sin perfil se usa `bot_type`.',
+    example='deepseek-preciso'
+)
+
 # Definir los esquemas para la documentación de Swagger
 message_request_schema = openapi.Schema(
     type=openapi.TYPE_OBJECT,
@@ -38,6 +83,7 @@ message_request_schema = openapi.Schema(
             description='El mensaje del usuario que será procesado por el chatbot. Puede contener preguntas, consultas o comandos.',
             example='¿Cuáles son las últimas noticias sobre inteligencia artificial?'
         ),
+        'profile': profile_schema,
     },
     description='Datos requeridos para enviar un mensaje al chatbot'
 )
@@ -50,6 +96,10 @@ message_response_schema = openapi.Schema(
             description='La respuesta generada por el chatbot utilizando RAG y/o búsqueda web',
             example='Basándome en las últimas búsquedas web, aquí tienes las noticias más recientes sobre IA...'
         ),
+        'stale': openapi.Schema(
+            type=openapi.TYPE_BOOLEAN,
+            description='Presente (true) cuando la búsqueda web falló y la respuesta usó resultados guardados vencidos',
+        ),
     },
     description='Respuesta exitosa del chatbot'
 )
@@ -103,6 +153,8 @@ csrf_token_header = openapi.Parameter(
     
     ### Consideraciones de seguridad:
     - Requiere token CSRF válido
+    - Límite de solicitudes por cliente (sesión, token CSRF o IP); al excederlo responde 429 con `Retry-After`
+    - Concurrencia acotada por proveedor: si la cola de espera está llena responde 503 con `Retry-After`
     - Las interacciones son registradas para auditoría
     - Filtros de contenido aplicados automáticamente
     """,
@@ -135,6 +187,16 @@ csrf_token_header = openapi.Parameter(
                 }
             }
         ),
+        429: openapi.Response(
+            description='Demasiadas solicitudes - el cliente agotó su cuota (ver cabecera Retry-After)',
+            schema=error_response_schema,
+            examples={
+                'application/json': {
+                    'error': 'Demasiadas solicitudes. Intenta de nuevo más tarde.',
+                    'retry_after': 3
+                }
+            }
+        ),
         405: openapi.Response(
             description='Método no permitido - Solo se acepta POST',
             schema=error_response_schema,
@@ -152,6 +214,16 @@ csrf_token_header = openapi.Parameter(
                     'error': 'Error interno del servidor'
                 }
             }
+        ),
+        503: openapi.Response(
+            description='Servicio sobrecargado - la cola del proveedor está llena o se agotó la espera (ver cabecera Retry-After)',
+            schema=error_response_schema,
+            examples={
+                'application/json': {
+                    'error': 'El servicio está ocupado. Intenta de nuevo en unos segundos.',
+                    'retry_after': 2
+                }
+            }
         )
     },
     manual_parameters=[csrf_token_header],
@@ -159,6 +231,7 @@ csrf_token_header = openapi.Parameter(
 )
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@rate_limited
 def send_message_api(request):
     """
     Vista de API documentada para enviar mensajes al chatbot.
@@ -183,14 +256,33 @@ def send_message_api(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        response = qa_handler.get_answer(user_message)
-        
-        try:
-            log_message_interaction(str(csrf_token), user_message, response)
-        except Exception as e:
-            print(f"Error logging interaction: {e}")
+        resolved = _request_handler(request)
+        if resolved is None:
+            return _unknown_profile_response(request)
+        profile, bot_type, handler = resolved
+
+        with request_scope(endpoint='send_message_api', client_key=get_client_key(request), session_id=get_session_id(request),
+                           provider=bot_type, model=getattr(handler, 'model', ''), profile=profile,
+                           deadline=deadline_for('send_message_api')) as context:
+            response = get_cached_answer(user_message)
+            if response is None:
+                try:
+                    with get_scheduler(bot_type).admit(PRIORITY_API, timeout=context.deadline.timeout(reserve=generation_reserve())):
+                        response = handler.get_answer(user_message)
+                except SchedulerOverloaded as e:
+                    return overloaded_response(e)
+                cache_answer(user_message, response)
+            record_session_turn(context.session_id, user_message, response)
+
+            try:
+                log_message_interaction(str(csrf_token), user_message, response)
+            except Exception as e:
+                print(f"Error logging interaction: {e}")
         
-        return Response({'response': response}, status=status.HTTP_200_OK)
+        payload = {'response': response}
+        if context.search_stale:
+            payload['stale'] = True
+        return Response(payload, status=status.HTTP_200_OK)
         
     except json.JSONDecodeError:
         return Response(
@@ -204,6 +296,202 @@ def send_message_api(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+batch_request_schema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    required=['messages'],
+    properties={
+        'messages': openapi.Schema(
+            type=openapi.TYPE_ARRAY,
+            items=openapi.Schema(type=openapi.TYPE_STRING),
+            description='Lista de mensajes a responder (máximo configurado en batch.max_messages).',
+            example=['¿Cuándo abren las inscripciones?', '¿Dónde queda la sede Macarena?', '¿cuándo abren las inscripciones']
+        ),
+        'profile': profile_schema,
+    },
+    description='Lote de preguntas para el chatbot'
+)
+
+@swagger_auto_schema(
+    method='post',
+    operation_summary='Enviar un lote de mensajes al chatbot',
+    operation_description="""
+    ## Respuesta por lotes
+    
+    Responde una lista de mensajes en una sola solicitud, pensado para integraciones
+    (importación de preguntas frecuentes, verificaciones nocturnas de calidad).
+    
+    ### Funcionamiento:
+    - **Concurrencia acotada**: los mensajes se responden en paralelo con un número máximo de hilos (`batch.max_workers`)
+    - **Deduplicación**: las preguntas idénticas o casi idénticas (similitud de Jaccard ≥ `batch.near_duplicate_threshold`) se responden una sola vez; la repetida indica `duplicate_of`
+    - **Búsqueda compartida**: las búsquedas web iguales dentro del lote se realizan una sola vez
+    - **Prioridad baja**: el lote cede el paso a las solicitudes interactivas en el planificador
+    
+    ### Formato de respuesta:
+    NDJSON (`application/x-ndjson`): una línea JSON por mensaje, en el mismo orden del lote,
+    enviada en cuanto esa respuesta (y las anteriores) está lista:
+    
+    ```
+    {"index": 0, "message": "¿Cuándo abren las inscripciones?", "response": "..."}
+    {"index": 1, "message": "¿Dónde queda la sede Macarena?", "response": "..."}
+    {"index": 2, "message": "¿cuándo abren las inscripciones", "response": "...", "duplicate_of": 0}
+    ```
+    
+    Si el proveedor está sobrecargado, la línea correspondiente trae `error` y `retry_after`.
+    
+    ### Límite de solicitudes:
+    Cada pregunta distinta del lote consume una unidad de la cuota por cliente del ámbito `batch`.
+    """,
+    request_body=batch_request_schema,
+    responses={
+        200: openapi.Response(description='Respuestas en formato NDJSON, una línea por mensaje'),
+        400: openapi.Response(
+            description='Lote inválido',
+            schema=error_response_schema,
+            examples={
+                'application/json': {
+                    'error': 'El campo messages debe ser una lista de mensajes no vacíos'
+                }
+            }
+        ),
+        429: openapi.Response(
+            description='Demasiadas solicitudes - el cliente agotó su cuota de lotes (ver cabecera Retry-After)',
+            schema=error_response_schema
+        ),
+    },
+    manual_parameters=[csrf_token_header],
+    tags=['Chatbot'],
+)
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def send_messages_api(request):
+    """
+    Vista de API para responder un lote de mensajes, transmitiendo las
+    respuestas en NDJSON en el orden del lote.
+    """
+    batch_config = get_section('batch')
+    messages = request.data.get('messages') if isinstance(request.data, dict) else None
+    if not isinstance(messages, list) or not messages or \
+            not all(isinstance(m, str) and m.strip() for m in messages):
+        return Response(
+            {'error': 'El campo messages debe ser una lista de mensajes no vacíos'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    max_messages = batch_config.get('max_messages', 100)
+    if len(messages) > max_messages:
+        return Response(
+            {'error': f'El lote admite como máximo {max_messages} mensajes'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    resolved = _request_handler(request)
+    if resolved is None:
+        return _unknown_profile_response(request)
+    profile, bot_type, handler = resolved
+
+    near_threshold = batch_config.get('near_duplicate_threshold', 0.9)
+    distinct = len(set(find_duplicates(messages, near_threshold)))
+    limited = check_rate_limit(request, cost=distinct, scope='batch')
+    if limited is not None:
+        return limited
+
+    csrf_token = request.META.get('HTTP_X_CSRFTOKEN', 'No CSRF token found')
+    client_key = get_client_key(request)
+
+    def answer(message):
+        with request_scope(endpoint='send_messages', client_key=client_key, provider=bot_type, profile=profile,
+                           model=getattr(handler, 'model', ''), deadline=deadline_for('send_messages')) as context:
+            response = get_cached_answer(message)
+            if response is None:
+                try:
+                    with get_scheduler(bot_type).admit(PRIORITY_BATCH, timeout=context.deadline.timeout(reserve=generation_reserve())):
+                        response = handler.get_answer(message)
+                except SchedulerOverloaded as e:
+                    return {'error': 'El servicio está ocupado. Intenta de nuevo en unos segundos.', 'retry_after': e.retry_after}
+                cache_answer(message, response)
+            try:
+                log_message_interaction(str(csrf_token), message, response)
+            except Exception as e:
+                print(f"Error logging interaction: {e}")
+            return {'response': response}
+
+    lines = (json.dumps(item, ensure_ascii=False) + '\n' for item in run_batch(messages, answer, near_threshold=near_threshold))
+    return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+prefetch_response_schema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        'status': openapi.Schema(
+            type=openapi.TYPE_STRING,
+            description='scheduled, duplicate, too_short, busy, full, follow_up, no_search o disabled',
+            example='scheduled'
+        ),
+    },
+    description='Resultado de la precarga'
+)
+
+@swagger_auto_schema(
+    method='post',
+    operation_summary='Precargar la búsqueda de una pregunta en curso',
+    operation_description="""
+    ## Precarga mientras el usuario escribe
+    
+    La interfaz web llama a este endpoint cuando el usuario deja de escribir unos instantes
+    (`PREFETCH_DEBOUNCE_MS` en `scripts.js`). El servidor lanza en segundo plano la búsqueda
+    web que haría el proveedor para esa pregunta y guarda los resultados en la caché `search`,
+    así que al enviar el mensaje la búsqueda suele estar resuelta. No genera respuesta.
+    
+    ### Funcionamiento:
+    - **Prioridad baja**: pocos hilos dedicados (`prefetch.max_workers`) y cola acotada (`prefetch.max_pending`); si hay solicitudes esperando al proveedor, la precarga se descarta
+    - **Sin repeticiones**: una pregunta ya en curso no se busca dos veces, y la caché evita consultar Tavily por preguntas ya buscadas
+    - **Filtros**: no se precargan preguntas cortas (`min_chars`, `min_words`), saludos ni preguntas de seguimiento de la sesión
+    
+    ### Límite de solicitudes:
+    Cuota propia por cliente en el ámbito `rate_limit.scopes.prefetch`; al excederla responde 429 y la interfaz pausa la precarga durante `Retry-After` segundos.
+    """,
+    request_body=message_request_schema,
+    responses={
+        202: openapi.Response(description='Precarga aceptada o descartada', schema=prefetch_response_schema),
+        400: openapi.Response(description='Mensaje inválido', schema=error_response_schema),
+        429: openapi.Response(
+            description='Demasiadas solicitudes - el cliente agotó su cuota de precargas (ver cabecera Retry-After)',
+            schema=error_response_schema
+        ),
+    },
+    manual_parameters=[csrf_token_header],
+    tags=['Chatbot'],
+)
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def prefetch_api(request):
+    """
+    Vista de API que precarga en la caché la búsqueda web de una pregunta
+    que el usuario aún está escribiendo.
+    """
+    message = request.data.get('message') if isinstance(request.data, dict) else None
+    if not isinstance(message, str) or not message.strip():
+        return Response({'error': 'El mensaje no puede estar vacío'}, status=status.HTTP_400_BAD_REQUEST)
+    prefetcher = get_prefetcher()
+    if prefetcher is None:
+        return Response({'status': 'disabled'}, status=status.HTTP_202_ACCEPTED)
+    resolved = _request_handler(request)
+    if resolved is None:
+        return _unknown_profile_response(request)
+    _, bot_type, handler = resolved
+    limited = check_rate_limit(request, scope='prefetch')
+    if limited is not None:
+        return limited
+
+    store = get_session_store()
+    session_id = get_session_id(request)
+    web_query = handler.web_query(message.strip())
+    if store is not None and session_id and store.follow_up_context(session_id, message) is not None:
+        result = 'follow_up'
+    elif web_query is None:
+        result = 'no_search'
+    else:
+        result = prefetcher.submit(web_query, busy=get_scheduler(bot_type).stats()['queued'] > 0)
+    return Response({'status': result}, status=status.HTTP_202_ACCEPTED)
+
 @swagger_auto_schema(
     method='get',
     operation_summary='Obtener información del sistema',
@@ -278,6 +566,8 @@ def system_info(request):
     """
     return Response({
         'bot_type': BOT_TYPE,
+        'profiles': sorted(config.get('profiles', {})),
+        'handlers': get_registry().stats(),
         'api_version': 'v1.0',
         'status': 'active',
         'features': [
@@ -294,13 +584,154 @@ def system_info(request):
         ]
     }, status=status.HTTP_200_OK)
 
+@swagger_auto_schema(
+    method='get',
+    operation_summary='Estadísticas en vivo del proceso (administradores)',
+    operation_description="""
+    ## Estadísticas en vivo
+    
+    Números del proceso que atiende la solicitud, para dimensionar el servicio:
+    - `process`: pid, memoria residente actual y máxima, tiempo desde la carga e hilos
+    - `caches`: por caché, tamaño de cada capa, aciertos, fallos, tasa de aciertos y desalojos del L1
+    - `http_pool`: conexiones abiertas y peticiones por host del pool HTTP
+    - `scheduler`: solicitudes activas y en cola por proveedor
+    - `circuits`: estado de los circuit breakers
+    - `interaction_log`: cola pendiente del registro de interacciones
+    - `llm_usage`: por proveedor/modelo, media y p95 de tokens de prompt y de respuesta, latencia y tokens/s de las últimas llamadas, fracción del prompt servida desde la caché del proveedor y costo (si hay precios en `usage.prices`)
+    - `sessions`, `prefetch`, `handlers` y el estado de readiness
+    
+    Cada worker tiene sus propias cachés L1, pools y colas: la respuesta describe solo al worker que la atendió.
+    
+    Requiere un usuario administrador (`is_staff`) autenticado por sesión o HTTP Basic.
+    """,
+    responses={
+        200: openapi.Response(
+            description='Estadísticas del proceso',
+            examples={
+                'application/json': {
+                    'process': {'pid': 4121, 'rss_mb': 118.4, 'max_rss_mb': 131.0, 'uptime_seconds': 86400.0, 'threads': 14},
+                    'caches': {'search': {'l1': {'entries': 120, 'bytes': 96000, 'evictions': 0}, 'hits': 310, 'misses': 95, 'hit_ratio': 0.765, 'l2': {'entries': 850}}},
+                    'http_pool': {'open': True, 'pools': {'https://api.deepseek.com:443': {'connections': 2, 'requests': 57, 'maxsize': 16}}},
+                    'scheduler': {'deepseek': {'active': 1, 'queued': 0, 'max_concurrent': 4, 'max_queue': 32, 'admitted': 310, 'shed': {'queue_full': 0, 'timeout': 0, 'preempted': 0}}},
+                    'circuits': {'tavily': {'state': 'closed', 'failures': 0}},
+                    'interaction_log': {'queue_depth': 0, 'written': 120, 'dropped': 0},
+                    'llm_usage': {'deepseek/deepseek-chat': {'calls': 200, 'prompt_tokens': {'mean': 2310.4, 'p95': 3105}, 'completion_tokens': {'mean': 212.7, 'p95': 418}, 'latency_ms': {'mean': 4120.3, 'p95': 7905.1}, 'tokens_per_second': {'mean': 51.6, 'p95': 63.2}, 'cached_prompt_ratio': 0.412, 'cost_usd': None}},
+                    'readiness': 'ready'
+                }
+            }
+        ),
+        403: openapi.Response(description='Usuario no autenticado o sin permisos de administrador', schema=error_response_schema)
+    },
+    tags=['Sistema'],
+)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def system_stats(request):
+    """
+    Estadísticas en vivo del proceso para administradores.
+    """
+    prefetcher = get_prefetcher()
+    return Response({
+        'process': process_stats(),
+        'caches': dict(cache_stats(), pages=page_store_stats()),
+        'http_pool': pool_stats(),
+        'scheduler': scheduler_stats(),
+        'circuits': circuit_stats(),
+        'interaction_log': get_interaction_logger().stats(),
+        'llm_usage': usage_stats(),
+        'sessions': session_stats(),
+        'prefetch': prefetcher.stats() if prefetcher is not None else {'enabled': False},
+        'handlers': get_registry().stats(),
+        'readiness': get_health_monitor().snapshot()['status'],
+    }, status=status.HTTP_200_OK)
+
+cache_purge_schema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    required=['caches'],
+    properties={
+        'caches': openapi.Schema(
+            type=openapi.TYPE_ARRAY,
+            items=openapi.Schema(type=openapi.TYPE_STRING),
+            description='Cachés a vaciar (`search`, `answer`, `pages`)',
+            example=['answer']
+        ),
+    },
+)
+
+@swagger_auto_schema(
+    method='post',
+    operation_summary='Vaciar cachés (administradores)',
+    operation_description="""
+    ## Vaciar cachés
+    
+    Borra todas las entradas de las cachés indicadas en el L1 de este proceso y en la
+    capa compartida del nodo (SQLite o Redis). Los demás workers conservan su L1
+    hasta que vence (`l1_ttl_seconds`). Útil tras corregir documentos o respuestas.
+    
+    Requiere un usuario administrador (`is_staff`) autenticado por sesión o HTTP Basic.
+    """,
+    request_body=cache_purge_schema,
+    responses={
+        200: openapi.Response(description='Cachés vaciadas', examples={'application/json': {'purged': ['answer']}}),
+        400: openapi.Response(description='Caché desconocida o lista vacía', schema=error_response_schema),
+        403: openapi.Response(description='Usuario no autenticado o sin permisos de administrador', schema=error_response_schema)
+    },
+    tags=['Sistema'],
+)
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def cache_purge(request):
+    """
+    Vacía las cachés indicadas.
+    """
+    names = request.data.get('caches') if isinstance(request.data, dict) else None
+    known = set(get_section('cache').get('caches', {}))
+    if not isinstance(names, list) or not names:
+        return Response({'error': 'El campo caches debe ser una lista no vacía'}, status=status.HTTP_400_BAD_REQUEST)
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        return Response({'error': f"Cachés desconocidas: {', '.join(map(str, unknown))}"}, status=status.HTTP_400_BAD_REQUEST)
+    purged = []
+    for name in dict.fromkeys(names):
+        target = get_page_store() if name == 'pages' else get_cache(name)
+        if target is not None:
+            target.clear()
+            purged.append(name)
+    logger.warning(f"Cachés vaciadas por {request.user}: {', '.join(purged) or '-'}")
+    return Response({'purged': purged}, status=status.HTTP_200_OK)
+
+readiness_schema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        'ready': openapi.Schema(type=openapi.TYPE_BOOLEAN, description='True si todas las dependencias críticas están bien', example=True),
+        'status': openapi.Schema(type=openapi.TYPE_STRING, description='starting, ready o not_ready', example='ready'),
+        'checked_at': openapi.Schema(type=openapi.TYPE_NUMBER, description='Momento (epoch) de la última comprobación', example=1705314600.0),
+        'critical': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING), example=['handler', 'index', 'llm']),
+        'dependencies': openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            description='Resultado por dependencia: `ok`, detalle, `latency_ms` de la comprobación y, si se conocen, `last_success` / `last_error` de las llamadas reales',
+            example={
+                'handler': {'ok': True, 'handlers': {'deepseek:120cd65a4a5b': {'class': 'QA_DeepSeekHandler', 'model': 'deepseek-chat'}}, 'warm': True, 'latency_ms': 0.1},
+                'index': {'ok': True, 'built': True, 'local': True, 'chunks': 412, 'expected_local': True, 'latency_ms': 0.2},
+                'http_pool': {'ok': True, 'open': True, 'pools': {'https://api.deepseek.com:443': {'connections': 2, 'requests': 57, 'maxsize': 16}}, 'latency_ms': 0.1},
+                'llm': {'ok': True, 'hosts': {'https://api.deepseek.com/': True}, 'errors': [], 'latency_ms': 84.0, 'last_success': 1705314590.2},
+                'tavily': {'ok': False, 'circuit': 'open', 'errors': ['circuit_open', 'usage_limit'], 'latency_ms': 0.1,
+                           'last_error': {'at': 1705314550.0, 'error': 'usage_limit'}}
+            }
+        )
+    }
+)
+
 @swagger_auto_schema(
     method='get',
     operation_summary='Health check del sistema',
     operation_description="""
     ## Health Check
     
-    Endpoint simple para verificar que la API está funcionando correctamente.
+    Endpoint simple para verificar que la API está funcionando correctamente
+    (liveness: el proceso responde). Para saber si el nodo puede atender
+    tráfico use `/api/ready/`; el estado interno (cachés, colas, circuitos)
+    está en `/api/system_stats/`, solo para administradores.
     
     ### Uso:
     - Monitoreo de servicios
@@ -340,3 +771,109 @@ def health_check(request):
         'status': 'healthy',
         'timestamp': datetime.now().isoformat()
     }, status=status.HTTP_200_OK)
+
+@swagger_auto_schema(
+    method='get',
+    operation_summary='Readiness del nodo',
+    operation_description="""
+    ## Readiness
+    
+    Indica si este proceso puede atender tráfico: handler inicializado, índice de
+    recuperación cargado, pool HTTP, alcance de la API del LLM y estado de Tavily.
+    
+    Las comprobaciones se ejecutan en segundo plano cada `health.interval_seconds`
+    y las llamadas reales a los servicios informan su último éxito o error; esta
+    consulta solo lee el último resultado, así que cuesta microsegundos.
+    
+    ### Respuestas:
+    - 200 si todas las dependencias de `health.critical` están bien
+    - 503 mientras arranca (`starting`) o si alguna falla (`not_ready`); el balanceador debe dejar de enviar tráfico
+    
+    Tavily no es crítica por defecto: su clave y su cuota son las mismas en todos los
+    nodos y las búsquedas vencidas siguen sirviéndose desde la caché.
+    """,
+    responses={
+        200: openapi.Response(description='Nodo listo', schema=readiness_schema),
+        503: openapi.Response(description='Nodo arrancando o con dependencias críticas caídas', schema=readiness_schema)
+    },
+    tags=['Sistema'],
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def readiness_check(request):
+    """
+    Readiness probe: devuelve el último resultado de las comprobaciones en segundo plano.
+    """
+    snapshot = get_health_monitor().snapshot()
+    return Response(snapshot, status=status.HTTP_200_OK if snapshot['ready'] else status.HTTP_503_SERVICE_UNAVAILABLE)
+
+@swagger_auto_schema(
+    method='get',
+    operation_summary='Métricas del servicio',
+    operation_description="""
+    ## Métricas
+    
+    Contadores, gauges y resúmenes (p50/p95/p99) del proceso que atiende la solicitud.
+    Requiere un usuario administrador (`is_staff`), autenticado por sesión o HTTP Basic
+    (por ejemplo, `basic_auth` en la configuración de scrape de Prometheus).
+    
+    ### Métricas principales:
+    - `scheduler_active` / `scheduler_queue_depth`: solicitudes en curso y en espera por proveedor
+    - `scheduler_wait_ms`: tiempo de espera en la cola por proveedor y prioridad
+    - `scheduler_admitted_total` / `scheduler_shed_total`: solicitudes admitidas y rechazadas (por motivo)
+    - `rate_limit_rejected_total`: solicitudes rechazadas por el límite por cliente
+    - `batch_messages_total`: mensajes recibidos por lotes y respondidos como duplicados
+    - `session_follow_up_reuse_total`: preguntas de seguimiento respondidas con los resultados del turno anterior
+    - `cache_requests_total`: aciertos y fallos por caché (`search`, `answer`) y capa (`l1`, `l2`, `peer`)
+    - `cache_errors_total` / `cache_value_bytes`: errores de la capa compartida y tamaño de los valores guardados
+    - `cache_peer_errors_total` / `cache_peers_down`: fallos de los nodos del anillo de caché y nodos omitidos
+    - `search_stale_served_total` / `search_refresh_total`: búsquedas servidas vencidas (`revalidate`, `error`, `circuit_open`, `deadline`) y refrescos en segundo plano
+    - `circuit_state` / `circuit_rejected_total`: estado del circuito por servicio (0 cerrado, 1 semiabierto, 2 abierto) y llamadas evitadas
+    - `dependency_up`: resultado de la última comprobación de readiness por dependencia (`handler`, `index`, `http_pool`, `llm`, `tavily`)
+    - `prefetch_requests_total`: precargas de búsqueda por resultado (`scheduled`, `duplicate`, `busy`, `full`...)
+    - `page_store_puts_total` / `page_store_dedup_ratio`: páginas nuevas y repetidas en el almacén de páginas por contenido
+    - `llm_tokens_total` / `llm_completion_tokens` / `llm_tokens_per_second`: tokens de prompt y de respuesta por proveedor y modelo, y velocidad de generación
+    - `llm_latency_ms` / `llm_cost_usd_total`: latencia de las llamadas al LLM y costo acumulado (si hay precios en `usage.prices`)
+    - `context_kept_percent` / `context_chars_total` / `context_boilerplate_lines_total`: porcentaje del texto web que conserva la compresión del contexto, caracteres antes y después y líneas de plantilla descartadas; `llm_latency_ms` lleva la etiqueta `context` (`compressed` o `full`)
+    - `query_class_total`: preguntas por clase (`factoid`, `list`, `procedural`, `open`); `llm_completion_tokens` y `llm_latency_ms` llevan la etiqueta `query_class`
+    - `llm_prompt_cache_tokens_total`: tokens de prompt servidos desde la caché de prefijos del proveedor (`hit`) o procesados de nuevo (`miss`); `llm_latency_ms` lleva entonces la etiqueta `prompt_cache`
+    - `llm_ollama_duration_ms` / `llm_ollama_cold_loads_total`: tiempo de Ollama por fase (`load`, `prompt_eval`, `eval`) y llamadas que tuvieron que cargar el modelo
+    - `llm_keep_alive_pings_total`: pings que mantienen cargado el modelo de Ollama por resultado (`warm`, `cold`, `error`)
+    
+    ### Formatos:
+    - JSON (por defecto)
+    - Texto de Prometheus con `?output=prometheus`
+    """,
+    manual_parameters=[
+        openapi.Parameter(
+            'output',
+            openapi.IN_QUERY,
+            description='Formato de salida: json (por defecto) o prometheus',
+            type=openapi.TYPE_STRING,
+            required=False
+        )
+    ],
+    responses={
+        200: openapi.Response(
+            description='Métricas actuales',
+            examples={
+                'application/json': {
+                    'counters': [{'name': 'scheduler_admitted_total', 'labels': {'provider': 'deepseek'}, 'value': 310}],
+                    'gauges': [{'name': 'scheduler_queue_depth', 'labels': {'provider': 'deepseek'}, 'value': 0}],
+                    'summaries': [{'name': 'scheduler_wait_ms', 'labels': {'provider': 'deepseek', 'priority': 'interactive'}, 'value': {'count': 310, 'mean': 12.4, 'p50': 0.0, 'p95': 80.1, 'p99': 250.3, 'max': 410.0}}]
+                }
+            }
+        ),
+        403: openapi.Response(description='Usuario no autenticado o sin permisos de administrador', schema=error_response_schema)
+    },
+    tags=['Sistema'],
+)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics_view(request):
+    """
+    Exporta las métricas del proceso en JSON o en formato Prometheus.
+    """
+    if request.query_params.get('output') == 'prometheus':
+        return HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    return Response(metrics.snapshot(), status=status.HTTP_200_OK)
@@ -1,5 +1,20 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+def enable_sqlite_wal(sender, connection, **kwargs):
+    """
+    Switches SQLite connections to WAL mode so the background interaction
+    flusher can write while requests and admin queries read.
+    """
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=WAL;')
+            cursor.execute('PRAGMA synchronous=NORMAL;')
+            cursor.execute('PRAGMA busy_timeout=5000;')
 
 class ChatbotConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'chatbot'
\ No newline at end of file
+    name = 'chatbot'
+
+    def ready(self):
+        connection_created.connect(enable_sqlite_wal, dispatch_uid='chatbot_sqlite_wal')
@@ -0,0 +1,167 @@
+# ./chatbot/management/commands/chat_stats.py
+
+import os
+import csv
+import sys
+import glob
+import gzip
+import json
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chatbot.rag.utils.config_loader import get_section, resolve_path
+from chatbot.rag.utils.stream_stats import LatencyHistogram, SpaceSaving, CacheHitEstimator
+from chatbot.rag.utils.text_utils import normalize_question
+
+class Command(BaseCommand):
+    help = (
+        'Streams the interaction log (CSV or database) in constant memory and prints JSON with '
+        'per-day p50/p95/p99 latency, top normalized questions, estimated cache hit ratio per TTL, '
+        'Tavily/LLM call counts and the distribution of LLM tokens and generation speed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', choices=['csv', 'db'], default='csv', help='Origen del registro de interacciones.')
+        parser.add_argument('--path', default=None, help='Archivo CSV activo (por defecto el de config.json).')
+        parser.add_argument('--no-rotated', action='store_true', help='Ignorar los archivos rotados .csv.gz.')
+        parser.add_argument('--days', type=int, default=None, help='Analizar solo los últimos N días.')
+        parser.add_argument('--top', type=int, default=20, help='Cantidad de preguntas frecuentes a reportar.')
+        parser.add_argument('--ttl', type=int, action='append', default=None,
+                            help='TTL en segundos a simular para la caché (repetible). Por defecto 300, 3600 y 86400.')
+        parser.add_argument('--max-keys', type=int, default=100000, help='Límite de claves por TTL simulado.')
+        parser.add_argument('--output', default=None, help='Escribir el JSON en un archivo en lugar de stdout.')
+
+    def handle(self, *args, **options):
+        since = datetime.now() - timedelta(days=options['days']) if options['days'] else None
+        ttls = options['ttl'] or [300, 3600, 86400]
+
+        per_day = {}
+        overall = LatencyHistogram()
+        # Distribuciones por solicitud que respondió el LLM (para fijar max_tokens y el presupuesto de contexto)
+        token_histograms = {'prompt_tokens': LatencyHistogram(), 'completion_tokens': LatencyHistogram(),
+                            'llm_ms': LatencyHistogram(), 'tokens_per_second': LatencyHistogram()}
+        top_questions = SpaceSaving(capacity=max(1000, options['top'] * 50))
+        estimators = [CacheHitEstimator(ttl, max_keys=options['max_keys']) for ttl in ttls]
+        totals = {'interactions': 0, 'search_calls': 0, 'llm_calls': 0, 'rows_without_call_counts': 0,
+                  'cache_hits': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+
+        rows = self._db_rows(since) if options['source'] == 'db' else self._csv_rows(options, since)
+        for row in rows:
+            totals['interactions'] += 1
+            question = normalize_question(row['message'])
+            top_questions.add(question)
+            for estimator in estimators:
+                estimator.add(question, row['time'].timestamp())
+
+            latency = row['latency_ms']
+            if latency is not None:
+                day = row['time'].strftime('%Y-%m-%d')
+                if day not in per_day:
+                    per_day[day] = LatencyHistogram()
+                per_day[day].add(latency)
+                overall.add(latency)
+
+            if row['search_calls'] is None:
+                totals['rows_without_call_counts'] += 1
+            else:
+                totals['search_calls'] += row['search_calls']
+                totals['llm_calls'] += row['llm_calls'] or 0
+            totals['cache_hits'] += int(bool(row['cache_hit']))
+            totals['prompt_tokens'] += row['prompt_tokens'] or 0
+            totals['completion_tokens'] += row['completion_tokens'] or 0
+            for name in ('prompt_tokens', 'completion_tokens', 'llm_ms'):
+                if row[name] is not None:
+                    token_histograms[name].add(row[name])
+            if row['completion_tokens'] and row['llm_ms']:
+                token_histograms['tokens_per_second'].add(row['completion_tokens'] / (row['llm_ms'] / 1000))
+
+        report = {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'source': options['source'],
+            'since': since.isoformat(timespec='seconds') if since else None,
+            'totals': totals,
+            'latency_ms': {
+                'overall': overall.summary(),
+                'per_day': {day: per_day[day].summary() for day in sorted(per_day)},
+            },
+            'llm': {name: histogram.summary() for name, histogram in token_histograms.items()},
+            'top_questions': top_questions.top(options['top']),
+            'estimated_cache_hit_ratio': {
+                str(estimator.ttl): {'hits': estimator.hits, 'ratio': estimator.hit_ratio()}
+                for estimator in estimators
+            },
+        }
+
+        payload = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(payload)
+        else:
+            self.stdout.write(payload)
+
+    def _csv_files(self, options) -> list:
+        active = options['path'] or resolve_path(
+            get_section('interaction_log').get('file_path', 'chatbot/rag/database/log_message_interaction.csv'))
+        base, ext = os.path.splitext(active)
+        files = [] if options['no_rotated'] else sorted(glob.glob(f'{base}.*{ext}.gz'))
+        if os.path.exists(active):
+            files.append(active)
+        if not files:
+            raise CommandError(f'No se encontró el registro de interacciones en {active}')
+        return files
+
+    def _csv_rows(self, options, since):
+        csv.field_size_limit(sys.maxsize)
+        for path in self._csv_files(options):
+            opener = gzip.open if path.endswith('.gz') else open
+            with opener(path, 'rt', newline='', encoding='utf-8', errors='replace') as f:
+                for raw in csv.DictReader(f):
+                    try:
+                        time = datetime.strptime(raw.get('Time') or '', '%Y%m%d%H%M%S')
+                    except ValueError:
+                        continue
+                    if since and time < since:
+                        continue
+                    yield {
+                        'time': time,
+                        'message': raw.get('User Message') or '',
+                        'latency_ms': _to_number(raw.get('Latency Ms'), float),
+                        'cache_hit': raw.get('Cache Hit') == '1',
+                        'search_calls': _to_number(raw.get('Search Calls'), int),
+                        'llm_calls': _to_number(raw.get('LLM Calls'), int),
+                        'prompt_tokens': _to_number(raw.get('Prompt Tokens'), int),
+                        'completion_tokens': _to_number(raw.get('Completion Tokens'), int),
+                        'llm_ms': _to_number(raw.get('LLM Ms'), float),
+                    }
+
+    def _db_rows(self, since):
+        from django.utils import timezone
+        from chatbot.models import Interaction
+
+        queryset = Interaction.objects.order_by('created_at')
+        if since:
+            queryset = queryset.filter(created_at__gte=timezone.make_aware(since))
+        fields = ('created_at', 'message', 'latency_ms', 'cache_hit', 'search_calls', 'llm_calls',
+                  'prompt_tokens', 'completion_tokens', 'llm_ms')
+        for created_at, message, latency, cache_hit, search_calls, llm_calls, prompt_tokens, completion_tokens, llm_ms in \
+                queryset.values_list(*fields).iterator(chunk_size=5000):
+            yield {
+                'time': timezone.localtime(created_at).replace(tzinfo=None) if timezone.is_aware(created_at) else created_at,
+                'message': message,
+                'latency_ms': latency,
+                'cache_hit': cache_hit,
+                'search_calls': search_calls,
+                'llm_calls': llm_calls,
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'llm_ms': llm_ms,
+            }
+
+def _to_number(value, cast):
+    if value in (None, ''):
+        return None
+    try:
+        return cast(value)
+    except ValueError:
+        return None
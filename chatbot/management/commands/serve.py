@@ -0,0 +1,113 @@
+# ./chatbot/management/commands/serve.py
+
+import gc
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chatbot.rag.utils.config_loader import get_section
+
+def build_options(server_config: dict, options: dict) -> dict:
+    """
+    Merges the 'server' section of config.json with the command line into
+    gunicorn settings.
+
+    Args:
+        server_config (dict): The 'server' section.
+        options (dict): Parsed command line options (None when not given).
+
+    Returns:
+        dict: gunicorn settings.
+    """
+    def pick(name, default):
+        return options.get(name) if options.get(name) is not None else server_config.get(name, default)
+
+    mode = pick('mode', 'wsgi')
+    threads = pick('threads', 4)
+    if mode == 'asgi':
+        worker_class = 'uvicorn.workers.UvicornWorker'
+    else:
+        worker_class = 'gthread' if threads > 1 else 'sync'
+    return {
+        'bind': pick('bind', '0.0.0.0:5000'),
+        'workers': pick('workers', 2),
+        'threads': threads,
+        'worker_class': worker_class,
+        'timeout': server_config.get('timeout_seconds', 60),
+        'graceful_timeout': server_config.get('graceful_timeout_seconds', 30),
+        'keepalive': server_config.get('keepalive_seconds', 5),
+        'preload_app': not options.get('no_preload') and server_config.get('preload', True),
+        'accesslog': server_config.get('accesslog', '-'),
+    }
+
+class Command(BaseCommand):
+    help = (
+        'Runs the production server (gunicorn, WSGI or ASGI). With preload the handlers, retrieval '
+        'indexes and caches are built once in the master and shared copy-on-write by the forked '
+        'workers; each worker opens its own HTTP pool and accepts connections only once warm.'
+    )
+    # Como gunicorn por sí solo: las comprobaciones de Django se ejecutan con 'check'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default=None, help='Dirección host:puerto (por defecto server.bind).')
+        parser.add_argument('--workers', type=int, default=None, help='Procesos worker (por defecto server.workers).')
+        parser.add_argument('--threads', type=int, default=None, help='Hilos por worker en modo WSGI (por defecto server.threads).')
+        parser.add_argument('--mode', choices=['wsgi', 'asgi'], default=None, help='Interfaz del servidor (por defecto server.mode).')
+        parser.add_argument('--no-preload', action='store_true', help='Construir los handlers en cada worker tras el fork.')
+
+    def handle(self, *args, **options):
+        try:
+            from gunicorn.app.base import BaseApplication
+        except ImportError:
+            raise CommandError('Instale gunicorn para usar serve (pip install gunicorn).')
+        settings = build_options(get_section('server'), options)
+        mode = options['mode'] or get_section('server').get('mode', 'wsgi')
+        if mode == 'asgi':
+            try:
+                import uvicorn.workers  # noqa: F401
+            except ImportError:
+                raise CommandError('El modo asgi requiere uvicorn (pip install uvicorn).')
+
+        class ChatbotServer(BaseApplication):
+            def load_config(self):
+                for key, value in settings.items():
+                    self.cfg.set(key, value)
+                self.cfg.set('post_worker_init', post_worker_init)
+
+            def load(self):
+                if mode == 'asgi':
+                    from project.asgi import application
+                else:
+                    from project.wsgi import application
+                if settings['preload_app']:
+                    preload()
+                return application
+
+        self.stdout.write(
+            f"Sirviendo {mode} en {settings['bind']}: {settings['workers']} workers, {settings['threads']} hilos, "
+            f"precarga {'sí' if settings['preload_app'] else 'no'}"
+        )
+        ChatbotServer().run()
+
+def preload():
+    """
+    Warms the application up in the master, before forking the workers.
+    """
+    from chatbot.rag.cache.tiered import skip_snapshot_save
+    from chatbot.rag.utils.warmup import warm_up_app
+
+    warm_up_app()
+    # Los workers guardan los snapshots: el L1 del maestro queda desactualizado
+    skip_snapshot_save()
+    # Sacar los objetos precargados del recolector: si el GC los recorre en
+    # cada worker, toca sus cabeceras y rompe el copy-on-write
+    gc.collect()
+    gc.freeze()
+
+def post_worker_init(worker):
+    """
+    gunicorn hook: runs in each worker before it accepts connections.
+    """
+    from chatbot.rag.utils.warmup import warm_up_worker
+
+    warm_up_worker()
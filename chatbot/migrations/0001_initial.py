@@ -0,0 +1,38 @@
+# Generated by Django 5.1 on 2026-10-19 10:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Interaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField()),
+                ('message', models.TextField()),
+                ('normalized_question', models.CharField(max_length=500)),
+                ('response', models.TextField(blank=True)),
+                ('endpoint', models.CharField(blank=True, max_length=50)),
+                ('provider', models.CharField(blank=True, max_length=50)),
+                ('model', models.CharField(blank=True, max_length=100)),
+                ('latency_ms', models.FloatField(blank=True, null=True)),
+                ('cache_hit', models.BooleanField(default=False)),
+                ('search_calls', models.PositiveSmallIntegerField(default=0)),
+                ('llm_calls', models.PositiveSmallIntegerField(default=0)),
+                ('prompt_tokens', models.PositiveIntegerField(blank=True, null=True)),
+                ('completion_tokens', models.PositiveIntegerField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at'], name='interaction_created_idx'), models.Index(fields=['normalized_question', 'created_at'], name='interaction_question_idx'), models.Index(fields=['latency_ms'], name='interaction_latency_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-19 11:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interaction',
+            name='llm_ms',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -1,3 +1,33 @@
 from django.db import models
 
-# Create your models here.
+class Interaction(models.Model):
+    """
+    One question/answer exchange with the chatbot, written in batches by the
+    background interaction logger.
+    """
+    token = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField()
+    message = models.TextField()
+    normalized_question = models.CharField(max_length=500)
+    response = models.TextField(blank=True)
+    endpoint = models.CharField(max_length=50, blank=True)
+    provider = models.CharField(max_length=50, blank=True)
+    model = models.CharField(max_length=100, blank=True)
+    latency_ms = models.FloatField(null=True, blank=True)
+    cache_hit = models.BooleanField(default=False)
+    search_calls = models.PositiveSmallIntegerField(default=0)
+    llm_calls = models.PositiveSmallIntegerField(default=0)
+    prompt_tokens = models.PositiveIntegerField(null=True, blank=True)
+    completion_tokens = models.PositiveIntegerField(null=True, blank=True)
+    llm_ms = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='interaction_created_idx'),
+            models.Index(fields=['normalized_question', 'created_at'], name='interaction_question_idx'),
+            models.Index(fields=['latency_ms'], name='interaction_latency_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.created_at:%Y-%m-%d %H:%M:%S} {self.message[:60]}'
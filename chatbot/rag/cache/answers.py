@@ -0,0 +1,72 @@
+# ./chatbot/rag/cache/answers.py
+
+import logging
+
+from chatbot.rag.cache.tiered import get_cache, make_key
+from chatbot.rag.utils.request_context import current_request
+from chatbot.rag.utils.session_store import get_session_store
+from chatbot.rag.utils.text_utils import normalize_question
+
+logger = logging.getLogger(__name__)
+
+# Respuestas de error o sin información: no se guardan para no repetir un fallo transitorio
+UNCACHEABLE_PREFIXES = ('Lo siento',)
+
+def answer_cache_key(message: str, provider: str, model: str, profile: str = '') -> str:
+    """
+    Args:
+        message (str): The user's message.
+        provider (str): Bot type answering the message.
+        model (str): Model name.
+        profile (str): Profile of the request (answers of different profiles are kept apart).
+
+    Returns:
+        str: Cache key of the answer.
+    """
+    if profile:
+        return make_key('answer', provider, model, normalize_question(message), profile)
+    return make_key('answer', provider, model, normalize_question(message))
+
+def _is_follow_up(context, message: str) -> bool:
+    store = get_session_store()
+    return bool(store is not None and context.session_id and store.follow_up_context(context.session_id, message) is not None)
+
+def get_cached_answer(message: str):
+    """
+    Looks up the answer to 'message' for the provider and model of the current
+    request. Follow-up questions are never answered from the cache, since
+    their meaning depends on the session. A hit sets 'cache_hit' on the
+    request context.
+
+    Args:
+        message (str): The user's message.
+
+    Returns:
+        str: The cached answer, or None.
+    """
+    cache = get_cache('answer')
+    context = current_request()
+    if cache is None or context is None or not message or _is_follow_up(context, message):
+        return None
+    answer = cache.get(answer_cache_key(message, context.provider, context.model, context.profile))
+    if answer is not None:
+        context.cache_hit = True
+        logger.info(f"Respuesta desde caché para '{message[:30]}'")
+    return answer
+
+def cache_answer(message: str, answer: str):
+    """
+    Stores the answer to 'message' unless it is an error, answered a follow-up
+    question, was built from stale search results, or came from the cache itself.
+
+    Args:
+        message (str): The user's message.
+        answer (str): The generated answer.
+    """
+    cache = get_cache('answer')
+    context = current_request()
+    if cache is None or context is None or not message or not answer:
+        return
+    if context.cache_hit or context.follow_up_of or context.search_stale or answer.startswith(UNCACHEABLE_PREFIXES):
+        return
+    cache.set(answer_cache_key(message, context.provider, context.model, context.profile), answer)
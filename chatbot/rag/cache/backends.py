@@ -0,0 +1,230 @@
+# ./chatbot/rag/cache/backends.py
+
+import os
+import time
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from chatbot.rag.clients.redis_client import RedisClient
+
+logger = logging.getLogger(__name__)
+
+class MemoryBackend:
+    """
+    In-process LRU of encoded values with per-entry expiry, bounded by number
+    of entries and total bytes. Expiries are wall-clock timestamps so a
+    snapshot stays valid across restarts.
+    """
+
+    def __init__(self, max_entries: int = 2000, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            max_entries (int): Entries kept before the least recently used is evicted.
+            max_bytes (int): Cap on the total size of stored values.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        """
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            bytes: The stored value, or None if missing or expired.
+        """
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str):
+        """
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            tuple: (value, expires_at) or None if missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[0]
+
+    def set(self, key: str, data: bytes, ttl_seconds: float, expires_at: float = None):
+        """
+        Args:
+            key (str): Cache key.
+            data (bytes): Encoded value.
+            ttl_seconds (float): Time to live.
+            expires_at (float): Absolute expiry (epoch seconds), overrides ttl_seconds.
+        """
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (expires_at or time.time() + ttl_seconds, data)
+            self.size += len(data)
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+
+    def clear(self, prefix: str = ''):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._pop(key)
+
+    def _pop(self, key: str):
+        # Se invoca con el lock tomado
+        _, data = self._entries.pop(key)
+        self.size -= len(data)
+
+    def items(self):
+        """
+        Returns:
+            list: (key, expires_at, data) for every live entry, least recently used first.
+        """
+        now = time.time()
+        with self._lock:
+            return [(key, expires_at, data) for key, (expires_at, data) in self._entries.items() if expires_at > now]
+
+    def stats(self) -> dict:
+        return {'entries': len(self._entries), 'bytes': self.size, 'evictions': self.evictions}
+
+class SQLiteBackend:
+    """
+    Node-local shared store: a SQLite file that every worker process on the
+    host reads and writes, and that survives restarts.
+    """
+
+    def __init__(self, path: str, max_rows: int = 100000, prune_every: int = 1000):
+        """
+        Args:
+            path (str): SQLite file shared by the workers.
+            max_rows (int): Bound on stored entries; the ones closest to expiry go first.
+            prune_every (int): Writes between deletions of expired rows.
+        """
+        self.path = path
+        self.max_rows = max_rows
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        # Una conexión por hilo y por proceso (las conexiones no sobreviven a un fork)
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key: str):
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str):
+        row = self._connection().execute(
+            "SELECT value, expires FROM cache WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def set(self, key: str, data: bytes, ttl_seconds: float, expires_at: float = None):
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+            (key, data, expires_at or time.time() + ttl_seconds),
+        )
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self._prune(connection)
+
+    def _prune(self, connection: sqlite3.Connection):
+        connection.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+        excess = connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_rows
+        if excess > 0:
+            connection.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires LIMIT ?)", (excess,)
+            )
+
+    def delete(self, key: str):
+        self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self, prefix: str = ''):
+        # Rango de claves en lugar de LIKE para no interpretar '%' ni '_' del prefijo
+        self._connection().execute("DELETE FROM cache WHERE key >= ? AND key < ?", (prefix, prefix + '\uffff'))
+
+    def stats(self) -> dict:
+        return {'entries': self._connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0]}
+
+class RedisBackend:
+    """
+    Shared store on a Redis-compatible server, for caches shared by several
+    hosts. Keys are namespaced with 'prefix'.
+    """
+
+    def __init__(self, url: str, timeout: float = 0.25, prefix: str = 'chatbot:'):
+        """
+        Args:
+            url (str): redis://[:password@]host:port/db
+            timeout (float): Connect and read timeout in seconds.
+            prefix (str): Namespace prepended to every key.
+        """
+        self.client = RedisClient(url, timeout=timeout)
+        self.prefix = prefix
+
+    def get(self, key: str):
+        return self.client.get(self.prefix + key)
+
+    def get_entry(self, key: str):
+        data = self.client.get(self.prefix + key)
+        if data is None:
+            return None
+        # PTTL: milisegundos restantes (negativo si la clave no vence o ya no existe)
+        remaining = self.client.execute('PTTL', self.prefix + key)
+        return data, (time.time() + remaining / 1000 if remaining and remaining > 0 else None)
+
+    def set(self, key: str, data: bytes, ttl_seconds: float, expires_at: float = None):
+        if expires_at:
+            ttl_seconds = expires_at - time.time()
+            if ttl_seconds <= 0:
+                return
+        self.client.set(self.prefix + key, data, ttl_seconds)
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def clear(self, prefix: str = ''):
+        batch = []
+        for key in self.client.scan_iter(self.prefix + prefix + '*'):
+            batch.append(key)
+            if len(batch) >= 500:
+                self.client.delete(*batch)
+                batch = []
+        self.client.delete(*batch)
+
+    def stats(self) -> dict:
+        return {'url': f'{self.client.host}:{self.client.port}/{self.client.db}'}
@@ -0,0 +1,356 @@
+# ./chatbot/rag/cache/pages.py
+
+import zlib
+import hashlib
+import logging
+import threading
+
+from chatbot.rag.cache.backends import MemoryBackend
+from chatbot.rag.cache.tiered import get_shared_backend
+from chatbot.rag.cache.peers import get_peer_cache
+from chatbot.rag.utils import metrics
+from chatbot.rag.utils.config_loader import get_section
+
+try:
+    import zstandard
+except ImportError:  # zstd es opcional: sin él se usa zlib
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+_page_store = None
+_store_lock = threading.Lock()
+
+# Primer byte de cada página comprimida: códec usado
+_ZSTD = b'Z'
+_ZLIB = b'z'
+
+def compress_page(text: str, codec: str = 'zstd') -> bytes:
+    """
+    Args:
+        text (str): Page content.
+        codec (str): 'zstd' (falls back to zlib when zstandard is not installed) or 'zlib'.
+
+    Returns:
+        bytes: The compressed page with a one-byte codec header.
+    """
+    data = text.encode('utf-8')
+    if codec == 'zstd' and zstandard is not None:
+        return _ZSTD + zstandard.compress(data, 3)
+    return _ZLIB + zlib.compress(data, 6)
+
+def decompress_page(data: bytes) -> str:
+    """
+    Args:
+        data (bytes): A page produced by compress_page().
+
+    Returns:
+        str: The page content.
+
+    Raises:
+        ValueError: If the codec is unknown or unavailable.
+    """
+    header, payload = data[:1], data[1:]
+    if header == _ZLIB:
+        return zlib.decompress(payload).decode('utf-8')
+    if header == _ZSTD and zstandard is not None:
+        return zstandard.decompress(payload).decode('utf-8')
+    raise ValueError(f'Códec de página no disponible: {header!r}')
+
+class PageStore:
+    """
+    Content-addressed store of compressed pages. The same 'raw_content'
+    returned by many searches is kept once, under the hash of its text, in
+    an in-process layer, in the shared cache layer and, in multi-node
+    deployments, on the node owning the page.
+    """
+
+    def __init__(self, l1: MemoryBackend, l2=None, ttl_seconds: float = 43200, codec: str = 'zstd', peers=None):
+        """
+        Args:
+            l1 (MemoryBackend): In-process layer.
+            l2: Shared layer (SQLiteBackend, RedisBackend) or None.
+            ttl_seconds (float): Lifetime of a page; refreshed each time a search returns it.
+                Should exceed the TTL of the search cache, whose entries reference the pages.
+            codec (str): 'zstd' or 'zlib'.
+            peers (PeerCache): Optional layer shared with the other nodes.
+        """
+        self.l1 = l1
+        self.l2 = l2
+        self.ttl_seconds = ttl_seconds
+        self.codec = codec
+        self.peers = peers
+        self.puts = 0
+        self.duplicates = 0
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def page_ref(text: str) -> str:
+        """
+        Args:
+            text (str): Page content.
+
+        Returns:
+            str: The content hash identifying the page.
+        """
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+
+    def put(self, text: str) -> str:
+        """
+        Stores a page (once per distinct content) and refreshes its lifetime.
+
+        Args:
+            text (str): Page content.
+
+        Returns:
+            str: Reference to pass to get().
+        """
+        ref = self.page_ref(text)
+        data = self.l1.get('page:' + ref)
+        duplicate = data is not None
+        if not duplicate:
+            data = compress_page(text, self.codec)
+        self.set_local_bytes(ref, data)
+        if self.peers is not None:
+            self.peers.put('pages', ref, data, self.ttl_seconds)
+        with self._lock:
+            self.puts += 1
+            if duplicate:
+                self.duplicates += 1
+            else:
+                self.raw_bytes += len(text)
+                self.compressed_bytes += len(data)
+            ratio = self.puts / max(self.puts - self.duplicates, 1)
+        metrics.inc('page_store_puts_total', result='duplicate' if duplicate else 'new')
+        metrics.set_gauge('page_store_dedup_ratio', round(ratio, 3))
+        return ref
+
+    def get(self, ref: str):
+        """
+        Args:
+            ref (str): Reference returned by put().
+
+        Returns:
+            str: The page content, or None if it is no longer stored.
+        """
+        data = self.get_local_bytes(ref)
+        if data is None and self.peers is not None:
+            entry = self.peers.get_entry('pages', ref)
+            if entry is not None:
+                data, remaining = entry
+                self.set_local_bytes(ref, data, min(remaining, self.ttl_seconds) if remaining else None)
+        if data is None:
+            metrics.inc('page_store_missing_total')
+            return None
+        try:
+            return decompress_page(data)
+        except (ValueError, zlib.error) as e:
+            logger.warning(f"Página {ref} ilegible en la caché: {e}")
+            return None
+
+    def get_local_bytes(self, ref: str):
+        """
+        Args:
+            ref (str): Page reference.
+
+        Returns:
+            bytes: The compressed page from this node's layers, or None.
+        """
+        entry = self.get_local_entry(ref)
+        return entry[0] if entry is not None else None
+
+    def get_local_entry(self, ref: str):
+        """
+        Args:
+            ref (str): Page reference.
+
+        Returns:
+            tuple: (compressed page, expires_at or None) from this node's layers, or None.
+        """
+        key = 'page:' + ref
+        entry = self.l1.get_entry(key)
+        if entry is None and self.l2 is not None:
+            try:
+                entry = self.l2.get_entry(key)
+            except Exception as e:
+                metrics.inc('cache_errors_total', cache='pages', layer='l2')
+                logger.warning(f"Error al leer una página de la caché compartida: {e}")
+            if entry is not None:
+                self.l1.set(key, entry[0], self.ttl_seconds, expires_at=entry[1])
+        return entry
+
+    def set_local_bytes(self, ref: str, data: bytes, ttl_seconds: float = None):
+        """
+        Args:
+            ref (str): Page reference.
+            data (bytes): Compressed page.
+            ttl_seconds (float): Time to live (defaults to the store's).
+        """
+        key = 'page:' + ref
+        ttl_seconds = ttl_seconds or self.ttl_seconds
+        self.l1.set(key, data, ttl_seconds)
+        if self.l2 is not None:
+            try:
+                self.l2.set(key, data, ttl_seconds)
+            except Exception as e:
+                metrics.inc('cache_errors_total', cache='pages', layer='l2')
+                logger.warning(f"Error al escribir una página en la caché compartida: {e}")
+
+    def clear(self):
+        """Removes every page from the layers of this node."""
+        self.l1.clear('page:')
+        if self.l2 is not None:
+            self.l2.clear('page:')
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Pages held in L1 and, for pages stored by this process, how many
+            references shared a page (dedup_ratio) and raw vs compressed sizes.
+        """
+        with self._lock:
+            return {
+                'pages': self.l1.stats()['entries'],
+                'bytes': self.l1.stats()['bytes'],
+                'puts': self.puts,
+                'duplicates': self.duplicates,
+                'dedup_ratio': round(self.puts / max(self.puts - self.duplicates, 1), 3),
+                'compression_ratio': round(self.raw_bytes / max(self.compressed_bytes, 1), 3),
+            }
+
+class PageRefResult(dict):
+    """
+    Search result whose 'raw_content' lives in the page store and is only
+    decompressed when first read (e.g. while building the prompt context).
+    Copies made with copy() stay lazy.
+    """
+
+    def __init__(self, fields: dict, ref: str, store: PageStore):
+        super().__init__(fields)
+        self._ref = ref
+        self._store = store
+
+    def _load(self) -> bool:
+        # Resuelve la referencia una sola vez; devuelve False si la página ya no existe
+        if self._ref is not None:
+            text = self._store.get(self._ref)
+            self._ref = None
+            if text is not None:
+                dict.__setitem__(self, 'raw_content', text)
+        return dict.__contains__(self, 'raw_content')
+
+    def __missing__(self, key):
+        if key == 'raw_content' and self._load():
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key == 'raw_content' and not self._load():
+            return default
+        return dict.get(self, key, default)
+
+    def __contains__(self, key):
+        if key == 'raw_content':
+            return self._load()
+        return dict.__contains__(self, key)
+
+    def __iter__(self):
+        self._load()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self._load()
+        return dict.__len__(self)
+
+    def keys(self):
+        self._load()
+        return dict.keys(self)
+
+    def items(self):
+        self._load()
+        return dict.items(self)
+
+    def values(self):
+        self._load()
+        return dict.values(self)
+
+    def copy(self):
+        return PageRefResult(dict(dict.items(self)), self._ref, self._store)
+
+def pack_results(results: list, store: PageStore) -> list:
+    """
+    Replaces the 'raw_content' of each result by a reference into the page store.
+
+    Args:
+        results (list): Search result dicts.
+        store (PageStore): The page store.
+
+    Returns:
+        list: New result dicts with 'raw_content_ref' instead of 'raw_content'.
+    """
+    packed = []
+    for result in results:
+        raw_content = result.get('raw_content')
+        if isinstance(raw_content, str) and raw_content:
+            result = {k: v for k, v in result.items() if k != 'raw_content'}
+            result['raw_content_ref'] = store.put(raw_content)
+        packed.append(result)
+    return packed
+
+def unpack_results(packed: list, store: PageStore) -> list:
+    """
+    Args:
+        packed (list): Result dicts produced by pack_results().
+        store (PageStore): The page store.
+
+    Returns:
+        list: Results whose 'raw_content' is resolved lazily from the store.
+    """
+    results = []
+    for result in packed:
+        ref = result.pop('raw_content_ref', None)
+        results.append(PageRefResult(result, ref, store) if ref else result)
+    return results
+
+def get_page_store() -> PageStore:
+    """
+    Returns the process-wide page store configured in 'cache.caches.pages',
+    or None when caching is disabled.
+
+    Returns:
+        PageStore: The shared store.
+    """
+    global _page_store
+    if _page_store is None:
+        with _store_lock:
+            if _page_store is None:
+                cache_config = get_section('cache')
+                options = cache_config.get('caches', {}).get('pages', {})
+                if not cache_config.get('enabled', True) or not options.get('enabled', True):
+                    _page_store = False
+                else:
+                    _page_store = PageStore(
+                        MemoryBackend(
+                            max_entries=options.get('l1_max_entries', 5000),
+                            max_bytes=int(options.get('l1_max_mb', 128) * 1024 * 1024),
+                        ),
+                        get_shared_backend(cache_config),
+                        ttl_seconds=options.get('ttl_seconds', 43200),
+                        codec=options.get('compression', 'zstd'),
+                        peers=get_peer_cache(),
+                    )
+                    if _page_store.codec == 'zstd' and zstandard is None:
+                        logger.info("zstandard no está instalado; las páginas se comprimen con zlib")
+    return _page_store or None
+
+def page_store_stats() -> dict:
+    """
+    Returns:
+        dict: Stats of the page store, or {'enabled': False}.
+    """
+    store = _page_store
+    if not store:
+        return {'enabled': False}
+    return dict(store.stats(), enabled=True)
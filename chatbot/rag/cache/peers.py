@@ -0,0 +1,287 @@
+# ./chatbot/rag/cache/peers.py
+
+import os
+import hmac
+import time
+import bisect
+import hashlib
+import logging
+import threading
+
+import requests
+
+from chatbot.rag.utils import metrics
+from chatbot.rag.utils.config_loader import get_section
+from chatbot.rag.utils.process_local import ProcessExecutor
+
+logger = logging.getLogger(__name__)
+
+_peer_cache = None
+_peer_lock = threading.Lock()
+
+TOKEN_HEADER = 'X-Cache-Token'
+TTL_HEADER = 'X-Cache-TTL'
+
+# Cachés que un nodo acepta servir y recibir de los demás
+PEER_CACHES = ('search', 'answer', 'pages')
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+class HashRing:
+    """
+    Consistent hashing ring: each node owns the keys that fall between its
+    virtual points, so adding or removing a node only moves ~1/n of the keys.
+    """
+
+    def __init__(self, nodes: list, replicas: int = 100):
+        """
+        Args:
+            nodes (list): Node identifiers (base URLs).
+            replicas (int): Virtual points per node (smooths the distribution).
+        """
+        self.nodes = list(nodes)
+        points = sorted((_hash(f'{node}#{i}'), node) for node in self.nodes for i in range(replicas))
+        self._hashes = [h for h, _ in points]
+        self._owners = [node for _, node in points]
+
+    def owner(self, key: str) -> str:
+        """
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            str: The node owning the key (None for an empty ring).
+        """
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+class PeerCache:
+    """
+    Cache layer shared across nodes: every key is owned by one node of the
+    ring and looked up on it through the internal endpoint
+    /api/internal/cache/<name>/<key>/. A peer that fails is skipped for
+    'down_seconds', so a dead node only costs one short timeout.
+    """
+
+    def __init__(self, self_url: str, nodes: list, token: str, timeout: float = 0.3,
+                 down_seconds: float = 30, replicas: int = 100, max_pending_puts: int = 200):
+        """
+        Args:
+            self_url (str): Base URL of this node, as listed in 'nodes'.
+            nodes (list): Base URLs of every node (including this one).
+            token (str): Shared secret sent in the X-Cache-Token header.
+            timeout (float): Timeout of each peer request in seconds.
+            down_seconds (float): Time a failed peer is skipped.
+            replicas (int): Virtual points per node on the ring.
+            max_pending_puts (int): Bound on queued replication requests; extra ones are dropped.
+        """
+        self.self_url = self_url.rstrip('/')
+        self.ring = HashRing([node.rstrip('/') for node in nodes], replicas)
+        self.token = token
+        self.timeout = timeout
+        self.down_seconds = down_seconds
+        self.max_pending_puts = max_pending_puts
+        self._down_until = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._executor = ProcessExecutor(max_workers=2, thread_name_prefix='cache-peer')
+
+    def _session(self) -> requests.Session:
+        # Una sesión por hilo y por proceso (los sockets no se comparten tras un fork)
+        session = getattr(self._local, 'session', None)
+        if session is None or self._local.pid != os.getpid():
+            session = self._local.session = requests.Session()
+            self._local.pid = os.getpid()
+        return session
+
+    def remote_owner(self, name: str, key: str):
+        """
+        Args:
+            name (str): Cache name ('search', 'answer', 'pages').
+            key (str): Cache key.
+
+        Returns:
+            str: Base URL of the owning peer, or None if this node owns the key
+            or the owner is marked down.
+        """
+        owner = self.ring.owner(f'{name}:{key}')
+        if owner is None or owner == self.self_url:
+            return None
+        if self._down_until.get(owner, 0) > time.monotonic():
+            return None
+        return owner
+
+    def _mark_down(self, peer: str, error: Exception):
+        with self._lock:
+            self._down_until[peer] = time.monotonic() + self.down_seconds
+            down = sum(until > time.monotonic() for until in self._down_until.values())
+        metrics.inc('cache_peer_errors_total', peer=peer)
+        metrics.set_gauge('cache_peers_down', down)
+        logger.warning(f"Nodo de caché {peer} no disponible durante {self.down_seconds}s: {error}")
+
+    def _url(self, peer: str, name: str, key: str) -> str:
+        return f'{peer}/api/internal/cache/{name}/{key}/'
+
+    def get(self, name: str, key: str):
+        """
+        Fetches a key from the node that owns it.
+
+        Args:
+            name (str): Cache name.
+            key (str): Cache key.
+
+        Returns:
+            bytes: The encoded value, or None (local key, miss, or peer unavailable).
+        """
+        entry = self.get_entry(name, key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, name: str, key: str):
+        """
+        Like get, with the lifetime the entry has left on the owner.
+
+        Args:
+            name (str): Cache name.
+            key (str): Cache key.
+
+        Returns:
+            tuple: (encoded value, remaining seconds or None if not reported), or None.
+        """
+        peer = self.remote_owner(name, key)
+        if peer is None:
+            return None
+        try:
+            response = self._session().get(self._url(peer, name, key), headers={TOKEN_HEADER: self.token}, timeout=self.timeout)
+        except requests.RequestException as e:
+            self._mark_down(peer, e)
+            return None
+        if response.status_code == 200:
+            try:
+                remaining = float(response.headers.get(TTL_HEADER) or 0) or None
+            except ValueError:
+                remaining = None
+            return response.content, remaining
+        if response.status_code != 404:
+            self._mark_down(peer, f'HTTP {response.status_code}')
+        return None
+
+    def put(self, name: str, key: str, data: bytes, ttl_seconds: float):
+        """
+        Replicates a value to the node that owns the key, in the background.
+
+        Args:
+            name (str): Cache name.
+            key (str): Cache key.
+            data (bytes): Encoded value.
+            ttl_seconds (float): Time to live on the owner.
+        """
+        peer = self.remote_owner(name, key)
+        if peer is None:
+            return
+        with self._lock:
+            if self._pending >= self.max_pending_puts:
+                metrics.inc('cache_peer_puts_dropped_total')
+                return
+            self._pending += 1
+        self._executor.submit(self._put, peer, name, key, data, ttl_seconds)
+
+    def _put(self, peer: str, name: str, key: str, data: bytes, ttl_seconds: float):
+        try:
+            response = self._session().put(
+                self._url(peer, name, key), data=data, timeout=self.timeout,
+                headers={TOKEN_HEADER: self.token, TTL_HEADER: str(int(ttl_seconds)), 'Content-Type': 'application/octet-stream'},
+            )
+            if response.status_code >= 400:
+                self._mark_down(peer, f'HTTP {response.status_code}')
+        except requests.RequestException as e:
+            self._mark_down(peer, e)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def authorized(self, token: str) -> bool:
+        """
+        Args:
+            token (str): Value of the X-Cache-Token header of an incoming request.
+
+        Returns:
+            bool: True if it matches the shared secret.
+        """
+        return bool(self.token) and hmac.compare_digest(self.token.encode('utf-8'), (token or '').encode('utf-8'))
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Ring members and the peers currently skipped.
+        """
+        now = time.monotonic()
+        return {
+            'self': self.self_url,
+            'nodes': self.ring.nodes,
+            'down': sorted(peer for peer, until in self._down_until.items() if until > now),
+        }
+
+def serve_peer_request(store, method: str, key: str, body: bytes = b'', ttl_seconds: float = None):
+    """
+    Answers a peer's lookup or replication request from the local layers only
+    (never forwarding to other peers).
+
+    Args:
+        store: TieredCache or PageStore holding the key.
+        method (str): 'GET' or 'PUT'.
+        key (str): Cache key.
+        body (bytes): Encoded value for PUT.
+        ttl_seconds (float): Time to live for PUT.
+
+    Returns:
+        tuple: (HTTP status, response body, remaining lifetime in seconds of the
+            entry returned by GET, sent in the X-Cache-TTL header, or None).
+    """
+    if method == 'GET':
+        entry = store.get_local_entry(key)
+        if entry is None:
+            return 404, b'', None
+        data, expires_at = entry
+        return 200, data, (max(expires_at - time.time(), 0.001) if expires_at else None)
+    if method == 'PUT':
+        if not body:
+            return 400, b'', None
+        store.set_local_bytes(key, body, ttl_seconds)
+        return 204, b'', None
+    return 405, b'', None
+
+def get_peer_cache() -> PeerCache:
+    """
+    Returns the peer layer configured in 'cache.peers', or None when it is
+    disabled or this node is not part of the ring. The node's own URL comes
+    from the CACHE_PEER_SELF environment variable (or 'cache.peers.self') and
+    the shared secret from CACHE_PEER_TOKEN.
+
+    Returns:
+        PeerCache: The shared peer layer.
+    """
+    global _peer_cache
+    if _peer_cache is None:
+        with _peer_lock:
+            if _peer_cache is None:
+                peer_config = get_section('cache').get('peers', {})
+                self_url = (os.getenv('CACHE_PEER_SELF') or peer_config.get('self') or '').rstrip('/')
+                nodes = [node.rstrip('/') for node in peer_config.get('nodes', [])]
+                token = os.getenv('CACHE_PEER_TOKEN', '')
+                if not peer_config.get('enabled', False):
+                    _peer_cache = False
+                elif self_url not in nodes or not token:
+                    logger.warning("Caché entre nodos deshabilitada: CACHE_PEER_SELF no está en 'cache.peers.nodes' o falta CACHE_PEER_TOKEN")
+                    _peer_cache = False
+                else:
+                    _peer_cache = PeerCache(
+                        self_url, nodes, token,
+                        timeout=peer_config.get('timeout_seconds', 0.3),
+                        down_seconds=peer_config.get('down_seconds', 30),
+                    )
+                    logger.info(f"Caché entre nodos: {self_url} en un anillo de {len(nodes)} nodos")
+    return _peer_cache or None
@@ -0,0 +1,46 @@
+# ./chatbot/rag/cache/serialization.py
+
+import json
+import zlib
+
+# Primer byte de cada valor: formato del resto
+_PLAIN = b'j'
+_ZLIB = b'z'
+
+def encode(value, compress_min_bytes: int = 1024) -> bytes:
+    """
+    Serializes a JSON-compatible value, compressing it with zlib when the
+    encoded form is at least 'compress_min_bytes' long.
+
+    Args:
+        value: Value to store (dicts, lists, strings, numbers...).
+        compress_min_bytes (int): Size from which the payload is compressed.
+
+    Returns:
+        bytes: The encoded value with a one-byte format header.
+    """
+    data = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if len(data) >= compress_min_bytes:
+        return _ZLIB + zlib.compress(data, 6)
+    return _PLAIN + data
+
+def decode(data: bytes):
+    """
+    Args:
+        data (bytes): A value produced by encode().
+
+    Returns:
+        The deserialized value.
+
+    Raises:
+        ValueError: If the header is unknown or the payload is corrupt.
+    """
+    header, payload = data[:1], data[1:]
+    if header == _ZLIB:
+        try:
+            payload = zlib.decompress(payload)
+        except zlib.error as e:
+            raise ValueError(f'Valor comprimido corrupto: {e}') from e
+    elif header != _PLAIN:
+        raise ValueError(f'Formato de caché desconocido: {header!r}')
+    return json.loads(payload)
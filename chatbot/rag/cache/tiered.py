@@ -0,0 +1,383 @@
+# ./chatbot/rag/cache/tiered.py
+
+import os
+import json
+import time
+import atexit
+import struct
+import hashlib
+import logging
+import threading
+
+from chatbot.rag.cache.backends import MemoryBackend, SQLiteBackend, RedisBackend
+from chatbot.rag.cache.serialization import encode, decode
+from chatbot.rag.cache.peers import get_peer_cache
+from chatbot.rag.utils import metrics
+from chatbot.rag.utils.config_loader import get_section, resolve_path
+
+logger = logging.getLogger(__name__)
+
+_caches = {}
+_shared_backend = None
+_cache_lock = threading.Lock()
+# Procesos que no guardan snapshots al salir (el maestro que precarga antes del fork)
+_no_snapshot_pids = set()
+
+# Registro de un snapshot: expiración, longitud de la clave, longitud del valor
+_SNAPSHOT_RECORD = struct.Struct('>dII')
+
+def make_key(*parts) -> str:
+    """
+    Builds a compact, stable cache key from JSON-compatible parts.
+
+    Args:
+        *parts: Values identifying the cached item (query, provider, config...).
+
+    Returns:
+        str: A 32-character hex digest.
+    """
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+class TieredCache:
+    """
+    Two-level cache: an in-process L1 in front of an optional shared L2
+    (SQLite file on the node or a Redis-compatible server), optionally backed
+    by the node that owns the key in a multi-node deployment. Hits in a lower
+    layer are promoted to the upper ones. Failures of the L2 are logged and
+    treated as misses so the cache never breaks a request.
+    """
+
+    def __init__(self, name: str, l1: MemoryBackend, l2=None, ttl_seconds: float = 3600,
+                 l1_ttl_seconds: float = None, compress_min_bytes: int = 1024, peers=None):
+        """
+        Args:
+            name (str): Cache name, used as key namespace and metric label ('search', 'answer').
+            l1 (MemoryBackend): In-process layer.
+            l2: Shared layer (SQLiteBackend, RedisBackend) or None.
+            ttl_seconds (float): Default time to live of an entry.
+            l1_ttl_seconds (float): Cap on the L1 lifetime, so entries cleared in the
+                shared layer do not linger in other workers.
+            compress_min_bytes (int): Encoded size from which values are compressed.
+            peers (PeerCache): Optional layer shared with the other nodes.
+        """
+        self.name = name
+        self.l1 = l1
+        self.l2 = l2
+        self.ttl_seconds = ttl_seconds
+        self.l1_ttl_seconds = l1_ttl_seconds or ttl_seconds
+        self.compress_min_bytes = compress_min_bytes
+        self.peers = peers
+        self.hits = 0
+        self.misses = 0
+        self._prefix = name + ':'
+        self._lock = threading.Lock()
+
+    def _record(self, layer: str, result: str):
+        metrics.inc('cache_requests_total', cache=self.name, layer=layer, result=result)
+
+    def get(self, key: str):
+        """
+        Args:
+            key (str): Cache key (see make_key).
+
+        Returns:
+            The cached value, or None on a miss.
+        """
+        data = self.get_local_bytes(key)
+        if data is None and self.peers is not None:
+            entry = self.peers.get_entry(self.name, key)
+            self._record('peer', 'hit' if entry is not None else 'miss')
+            if entry is not None:
+                data, remaining = entry
+                # No sobrevivir al dueño: la entrada vence aquí cuando vence allá
+                self.set_local_bytes(key, data, min(remaining, self.ttl_seconds) if remaining else self.ttl_seconds)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if data is None:
+            return None
+        try:
+            return decode(data)
+        except ValueError as e:
+            logger.warning(f"Entrada corrupta en la caché '{self.name}': {e}")
+            self.delete(key)
+            return None
+
+    def get_local_bytes(self, key: str):
+        """
+        Looks a key up in the layers of this node only (L1, then L2).
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            bytes: The encoded value, or None.
+        """
+        entry = self.get_local_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_local_entry(self, key: str):
+        """
+        Like get_local_bytes, with the expiry of the entry (as served to the peers).
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            tuple: (encoded value, expires_at or None), or None.
+        """
+        full_key = self._prefix + key
+        entry = self.l1.get_entry(full_key)
+        if entry is not None:
+            self._record('l1', 'hit')
+            return entry
+        self._record('l1', 'miss')
+        if self.l2 is None:
+            return None
+        try:
+            entry = self.l2.get_entry(full_key)
+        except Exception as e:
+            metrics.inc('cache_errors_total', cache=self.name, layer='l2')
+            logger.warning(f"Error al leer la caché compartida '{self.name}': {e}")
+            return None
+        self._record('l2', 'hit' if entry is not None else 'miss')
+        if entry is not None:
+            data, expires_at = entry
+            l1_expires_at = time.time() + self.l1_ttl_seconds
+            self.l1.set(full_key, data, self.l1_ttl_seconds, expires_at=min(expires_at or l1_expires_at, l1_expires_at))
+        return entry
+
+    def set(self, key: str, value, ttl_seconds: float = None):
+        """
+        Stores a value in every layer (the owning peer is updated in the background).
+
+        Args:
+            key (str): Cache key (see make_key).
+            value: JSON-compatible value.
+            ttl_seconds (float): Time to live (defaults to the cache's).
+        """
+        ttl_seconds = ttl_seconds or self.ttl_seconds
+        data = encode(value, self.compress_min_bytes)
+        metrics.observe('cache_value_bytes', len(data), cache=self.name)
+        self.set_local_bytes(key, data, ttl_seconds)
+        if self.peers is not None:
+            self.peers.put(self.name, key, data, ttl_seconds)
+
+    def set_local_bytes(self, key: str, data: bytes, ttl_seconds: float = None):
+        """
+        Stores an encoded value in the layers of this node only.
+
+        Args:
+            key (str): Cache key.
+            data (bytes): Encoded value.
+            ttl_seconds (float): Time to live (defaults to the cache's).
+        """
+        ttl_seconds = ttl_seconds or self.ttl_seconds
+        full_key = self._prefix + key
+        self.l1.set(full_key, data, min(ttl_seconds, self.l1_ttl_seconds))
+        if self.l2 is not None:
+            try:
+                self.l2.set(full_key, data, ttl_seconds)
+            except Exception as e:
+                metrics.inc('cache_errors_total', cache=self.name, layer='l2')
+                logger.warning(f"Error al escribir la caché compartida '{self.name}': {e}")
+
+    def delete(self, key: str):
+        """
+        Args:
+            key (str): Cache key to remove from both layers.
+        """
+        full_key = self._prefix + key
+        self.l1.delete(full_key)
+        if self.l2 is not None:
+            try:
+                self.l2.delete(full_key)
+            except Exception as e:
+                logger.warning(f"Error al borrar de la caché compartida '{self.name}': {e}")
+
+    def clear(self):
+        """Removes every entry of this cache from both layers."""
+        self.l1.clear(self._prefix)
+        if self.l2 is not None:
+            self.l2.clear(self._prefix)
+
+    def snapshot(self, path: str) -> int:
+        """
+        Writes the live L1 entries to 'path' (atomically, via a temporary file).
+
+        Args:
+            path (str): Snapshot file.
+
+        Returns:
+            int: Number of entries written.
+        """
+        entries = [(key, expires_at, data) for key, expires_at, data in self.l1.items() if key.startswith(self._prefix)]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            for key, expires_at, data in entries:
+                raw_key = key.encode('utf-8')
+                f.write(_SNAPSHOT_RECORD.pack(expires_at, len(raw_key), len(data)))
+                f.write(raw_key)
+                f.write(data)
+        os.replace(tmp_path, path)
+        return len(entries)
+
+    def warm(self, path: str) -> int:
+        """
+        Loads the unexpired entries of a snapshot into L1.
+
+        Args:
+            path (str): Snapshot file written by snapshot().
+
+        Returns:
+            int: Number of entries loaded.
+        """
+        if not os.path.exists(path):
+            return 0
+        now = time.time()
+        loaded = 0
+        with open(path, 'rb') as f:
+            while True:
+                header = f.read(_SNAPSHOT_RECORD.size)
+                if len(header) < _SNAPSHOT_RECORD.size:
+                    break
+                expires_at, key_length, data_length = _SNAPSHOT_RECORD.unpack(header)
+                key = f.read(key_length).decode('utf-8')
+                data = f.read(data_length)
+                if len(data) < data_length:
+                    logger.warning(f"Snapshot de caché truncado: {path}")
+                    break
+                if expires_at > now and key.startswith(self._prefix):
+                    self.l1.set(key, data, 0, expires_at=min(expires_at, now + self.l1_ttl_seconds))
+                    loaded += 1
+        return loaded
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Size of each layer and lookups of this process (hits in any layer).
+        """
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        stats = {'l1': self.l1.stats(), 'hits': hits, 'misses': misses,
+                 'hit_ratio': round(hits / lookups, 3) if lookups else None}
+        if self.l2 is not None:
+            try:
+                stats['l2'] = self.l2.stats()
+            except Exception as e:
+                stats['l2'] = {'error': str(e)}
+        return stats
+
+def get_shared_backend(cache_config: dict):
+    """
+    Returns the shared layer configured in 'cache.backend'. There is one per
+    process for every cache; entries are told apart by key prefix.
+
+    Args:
+        cache_config (dict): The 'cache' section of config.json.
+
+    Returns:
+        SQLiteBackend | RedisBackend: The shared layer, or None for 'memory'.
+    """
+    global _shared_backend
+    if _shared_backend is None:
+        backend = cache_config.get('backend', 'sqlite')
+        if backend == 'sqlite':
+            _shared_backend = SQLiteBackend(
+                resolve_path(cache_config.get('sqlite_path', 'chatbot/rag/database/cache.sqlite3')),
+                max_rows=cache_config.get('sqlite_max_rows', 100000),
+            )
+        elif backend == 'redis':
+            _shared_backend = RedisBackend(
+                cache_config.get('redis_url', 'redis://127.0.0.1:6379/0'),
+                timeout=cache_config.get('redis_timeout_seconds', 0.25),
+                prefix=cache_config.get('redis_prefix', 'chatbot:'),
+            )
+        else:
+            _shared_backend = False
+        logger.info(f"Capa compartida de caché: {backend}")
+    return _shared_backend or None
+
+def _snapshot_path(cache_config: dict, name: str) -> str:
+    directory = cache_config.get('snapshot_dir')
+    return os.path.join(resolve_path(directory), f'{name}.snapshot') if directory else None
+
+def get_cache(name: str) -> TieredCache:
+    """
+    Returns the process-wide cache 'name' configured in the 'cache' section of
+    config.json ('cache.caches.<name>' overrides the TTLs), or None when
+    caching is disabled. The L1 is warmed from its snapshot on creation and
+    saved again when the process exits.
+
+    Args:
+        name (str): Cache name ('search', 'answer').
+
+    Returns:
+        TieredCache: The shared cache.
+    """
+    cache = _caches.get(name)
+    if cache is None:
+        with _cache_lock:
+            cache = _caches.get(name)
+            if cache is None:
+                cache_config = get_section('cache')
+                options = cache_config.get('caches', {}).get(name, {})
+                if not cache_config.get('enabled', True) or not options.get('enabled', True):
+                    cache = False
+                else:
+                    cache = TieredCache(
+                        name,
+                        MemoryBackend(
+                            max_entries=options.get('l1_max_entries', cache_config.get('l1_max_entries', 2000)),
+                            max_bytes=int(options.get('l1_max_mb', cache_config.get('l1_max_mb', 64)) * 1024 * 1024),
+                        ),
+                        get_shared_backend(cache_config),
+                        ttl_seconds=options.get('ttl_seconds', 3600),
+                        l1_ttl_seconds=options.get('l1_ttl_seconds', cache_config.get('l1_ttl_seconds')),
+                        compress_min_bytes=cache_config.get('compress_min_bytes', 1024),
+                        peers=get_peer_cache(),
+                    )
+                    path = _snapshot_path(cache_config, name)
+                    if path:
+                        try:
+                            logger.info(f"Caché '{name}': {cache.warm(path)} entradas cargadas desde {path}")
+                        except Exception as e:
+                            logger.warning(f"No se pudo cargar el snapshot de la caché '{name}': {e}")
+                        atexit.register(_save_snapshot, cache, path)
+                _caches[name] = cache
+    return cache or None
+
+def skip_snapshot_save():
+    """
+    Stops the calling process from saving the cache snapshots at exit. Used by
+    the pre-fork master: its L1 is older than its workers' and, exiting last,
+    it would overwrite their snapshots.
+    """
+    _no_snapshot_pids.add(os.getpid())
+
+def _save_snapshot(cache: TieredCache, path: str):
+    if os.getpid() in _no_snapshot_pids:
+        return
+    try:
+        logger.info(f"Caché '{cache.name}': {cache.snapshot(path)} entradas guardadas en {path}")
+    except Exception as e:
+        logger.warning(f"No se pudo guardar el snapshot de la caché '{cache.name}': {e}")
+
+def cache_stats() -> dict:
+    """
+    Returns:
+        dict: Layer sizes of every cache created by this process, by name, and
+        the state of the peer ring when enabled ('peers').
+    """
+    stats = {name: cache.stats() for name, cache in list(_caches.items()) if cache}
+    peers = get_peer_cache()
+    if peers is not None:
+        stats['peers'] = peers.stats()
+    return stats
@@ -0,0 +1,133 @@
+# ./chatbot/rag/clients/redis_client.py
+
+import os
+import socket
+import logging
+import threading
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+class RedisError(Exception):
+    """Error reply or protocol failure from a Redis-compatible server."""
+
+class RedisClient:
+    """
+    Minimal client for Redis-compatible servers (RESP2). Only the commands the
+    cache needs are used, so no extra dependency is required. Connections are
+    kept per thread and per process (they do not survive a fork).
+    """
+
+    def __init__(self, url: str = 'redis://127.0.0.1:6379/0', timeout: float = 0.25):
+        """
+        Args:
+            url (str): redis://[:password@]host:port/db
+            timeout (float): Connect and read timeout in seconds.
+        """
+        parsed = urlparse(url)
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connection = (sock, sock.makefile('rb'))
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+            if self.password:
+                self._send(connection, 'AUTH', self.password)
+            if self.db:
+                self._send(connection, 'SELECT', self.db)
+        return connection
+
+    def _close(self):
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is not None:
+            try:
+                connection[1].close()
+                connection[0].close()
+            except OSError:
+                pass
+
+    def execute(self, *args):
+        """
+        Sends a command and returns its reply. On a connection error the
+        connection is dropped, so the next call reconnects.
+
+        Args:
+            *args: Command name and arguments (str, bytes or numbers).
+
+        Returns:
+            The decoded reply (bytes, int, list or None).
+        """
+        try:
+            return self._send(self._connection(), *args)
+        except (OSError, RedisError):
+            self._close()
+            raise
+
+    def _send(self, connection, *args):
+        sock, reader = connection
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode('utf-8')
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        sock.sendall(b''.join(parts))
+        return self._read_reply(reader)
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise RedisError('Conexión cerrada por el servidor')
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload
+        if kind == b'-':
+            raise RedisError(payload.decode('utf-8', 'replace'))
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(payload)
+            if length < 0:
+                return None
+            return [self._read_reply(reader) for _ in range(length)]
+        raise RedisError(f'Respuesta RESP desconocida: {line[:20]!r}')
+
+    def get(self, key: str):
+        return self.execute('GET', key)
+
+    def set(self, key: str, value: bytes, ttl_seconds: float = None):
+        if ttl_seconds:
+            return self.execute('SET', key, value, 'PX', max(int(ttl_seconds * 1000), 1))
+        return self.execute('SET', key, value)
+
+    def delete(self, *keys) -> int:
+        return self.execute('DEL', *keys) if keys else 0
+
+    def scan_iter(self, match: str, count: int = 500):
+        """
+        Yields the keys matching a glob pattern (SCAN, non-blocking for the server).
+        """
+        cursor = b'0'
+        while True:
+            cursor, keys = self.execute('SCAN', cursor, 'MATCH', match, 'COUNT', count)
+            yield from keys
+            if cursor in (b'0', 0):
+                break
+
+    def ping(self) -> bool:
+        return self.execute('PING') == b'PONG'
@@ -1,12 +1,15 @@
 # ./chatbot/rag/QA_AWS_Bedrock_Handler.py
 
 import re
+import time
 import random
 import logging
-from langchain_core.prompts import PromptTemplate
-from chatbot.rag.utils.singleton_meta import SingletonMeta
+from chatbot.rag.utils.prompt_format import PromptFormat
 from chatbot.rag.handlers.base_handler import BaseQAHandler
-from chatbot.rag.utils import utils
+from chatbot.rag.utils.request_context import count_llm_call
+from chatbot.rag.utils.usage import record_usage, parse_bedrock_usage
+from chatbot.rag.utils.deadline import stage_timeout, min_call_seconds
+from chatbot.rag.utils.compression import compress_results
 from ..clients.aws_client import get_client
 from chatbot.rag.utils.patterns import (
     prompt_template,
@@ -20,30 +23,24 @@ from chatbot.rag.utils.patterns import (
 
 logger = logging.getLogger(__name__)
 
-class QA_AwsBedrockHandler(BaseQAHandler, metaclass=SingletonMeta):
+class QA_AwsBedrockHandler(BaseQAHandler):
     """
-    Singleton class to handle interactions with the AWS Bedrock model
-    for generating responses based on documents retrieved using TF-IDF.
+    Class to handle interactions with the AWS Bedrock model
+    for generating responses based on the hybrid (PDF + web) retrieval.
     """
 
-    def __init__(self, model: str, temperature: float, max_tokens: int, docs_directory: str,
-                 chunk_size: int = 500, chunk_overlap: int = 0):
+    # Presupuesto de caracteres del contexto (la clase de la pregunta puede acortarlo)
+    max_context_length = 4000
+
+    def __init__(self, model: str, temperature: float, max_tokens: int):
         """
-        Initializes the handler with model parameters, prompt template, and document database.
+        Initializes the handler with model parameters and prompt template.
 
         Args:
             model (str): The model ID for the AWS Bedrock model.
             temperature (float): Level of randomness for response generation.
             max_tokens (int): Maximum number of tokens in the generated response.
-            docs_directory (str): Directory path to the documents database.
-            chunk_size (int): Size of the chunks when splitting documents for retrieval.
-            chunk_overlap (int): Size of the overlap between document chunks.
         """
-        # Avoid multiple initializations
-        if hasattr(self, '_initialized') and self._initialized:
-            return
-        self._initialized = True
-
         # Model parameter configuration
         self.model = model
         self.temperature = temperature
@@ -51,9 +48,8 @@ class QA_AwsBedrockHandler(BaseQAHandler, metaclass=SingletonMeta):
         logger.info(f'Temperature: {temperature}')
         logger.info(f'Max Tokens: {max_tokens}')
 
-        # Load prompt template, documents, and AWS client
+        # Load prompt template and AWS client
         self.load_prompt_template()
-        self.tfidf_retriever = utils.load_documents_database(docs_directory, chunk_size, chunk_overlap)
         self.aws_client = get_client()
         
         logger.info('AWS Bedrock Handler creado correctamente.')
@@ -63,27 +59,41 @@ class QA_AwsBedrockHandler(BaseQAHandler, metaclass=SingletonMeta):
         Loads the prompt template for generating queries.
         """
         try:
-            self.prompt = PromptTemplate(
+            self.prompt = PromptFormat(
                 template=prompt_template,
                 input_variables=["context", "question"]
             )
-            logger.info('PromptTemplate cargado correctamente.')
+            logger.info('Plantilla de prompt cargada correctamente.')
         except Exception as e:
-            logger.error('Ha ocurrido un error al cargar el PromptTemplate.', exc_info=True)
+            logger.error('Ha ocurrido un error al cargar la plantilla de prompt.', exc_info=True)
 
-    def get_context(self, query: str) -> str:
+    def get_context(self, results: list, max_context_length: int = None) -> str:
         """
-        Retrieves the most relevant context from the document database for a given query.
+        Builds the prompt context from the retrieved results, within a character budget.
 
         Args:
-            query (str): The user's input or question that needs context.
+            results (list): Results returned by retrieve().
+            max_context_length (int): Character budget (default: max_context_length of the handler).
 
         Returns:
-            str: A concatenated string of the content of the most relevant documents retrieved.
+            str: The results with their source, most relevant first.
         """
-        retrieved_docs = self.tfidf_retriever.invoke(query)
-        context = " ".join(doc.page_content for doc in retrieved_docs)
-        return context
+        max_context_length = max_context_length or self.max_context_length
+        context_parts = []
+        total_length = 0
+        for i, result in enumerate(results):
+            content = result.get('raw_content') or result.get('content', '')
+            if not content:
+                continue
+            source_info = f"[Fuente {i+1}: {result.get('title', 'Sin título')} - {result.get('url', '')}]"
+            remaining_space = max_context_length - total_length - len(source_info) - 2
+            if remaining_space <= 100:
+                break
+            if len(content) > remaining_space:
+                content = content[:remaining_space - 3] + "..."
+            context_parts.append(f"{source_info}\n{content}")
+            total_length += len(source_info) + len(content) + 2
+        return "\n\n".join(context_parts)
         
     def get_answer(self, query: str) -> str:
         """
@@ -103,30 +113,41 @@ class QA_AwsBedrockHandler(BaseQAHandler, metaclass=SingletonMeta):
             elif any(re.match(pattern, query.lower()) for pattern in gratefulness):
                 response_text = random.choice(gratefulness_messages)
             else:
-                # Get Context
-                context = self.get_context(query)
+                # Get Context (PDFs locales y web, o los resultados de la pregunta anterior)
+                results = self.retrieve(query)
+                if not results:
+                    logger.warning(f"No se encontraron resultados para: '{query}'")
+                    return "Lo siento, no pude encontrar información relevante para responder tu consulta."
+                budget = self.generation_budget(query)
+                context = self.get_context(compress_results(results, query), budget.max_context_length)
                 
                 # Build the conversation structure for the AWS Bedrock API
                 conversation = [
                     {
                         "role": "user",
-                        "content": [{"text": self.prompt_template.format(
+                        "content": [{"text": self.prompt.format(
                             context=context,
-                            question=query
+                            question=self.contextualize_question(query)
                         )}]
                     }
                 ]
                 
                 # Call the AWS Bedrock model to get the response
+                if stage_timeout(30) < min_call_seconds():
+                    logger.warning("Plazo de la solicitud agotado antes de llamar a AWS Bedrock")
+                    return "Lo siento, la consulta tardó demasiado tiempo. Intenta nuevamente."
+                count_llm_call()
+                start = time.perf_counter()
                 response = self.aws_client.converse(
                     modelId=self.model,
                     messages=conversation,
                     inferenceConfig={
-                        "maxTokens": self.max_tokens,
+                        "maxTokens": budget.max_tokens,
                         "temperature": self.temperature
                     },
                     additionalModelRequestFields={"k": 0}
                 )
+                record_usage('aws_bedrock', self.model, parse_bedrock_usage(response), (time.perf_counter() - start) * 1000)
 
                 # Extract and return the response generated by the model
                 response_text = response["output"]["message"]["content"][0]["text"]
@@ -1,17 +1,23 @@
 # ./chatbot/rag/base_handler.py
 
+import re
 from abc import ABC, abstractmethod
+from chatbot.rag.utils.hybrid_retriever import get_hybrid_retriever
+from chatbot.rag.utils.request_context import current_request
+from chatbot.rag.utils.query_classifier import generation_budget, GenerationBudget
+from chatbot.rag.utils.session_store import get_session_store, reuse_follow_up_results
+from chatbot.rag.utils.patterns import greetings, farewell, gratefulness
 
 class BaseQAHandler(ABC):
     """
     Abstract base class for QA Handlers. All subclasses should implement the abstract methods.
     """
 
-    @abstractmethod
     def load_prompt_template(self):
         """
-        Abstract method to load the prompt template for generating queries.
-        Must be implemented by subclasses.
+        Loads the prompt template for generating queries. Handlers that build
+        their messages directly (e.g. DeepSeek with its stable prompt prefix)
+        do not need one.
         """
         pass
 
@@ -28,3 +34,89 @@ class BaseQAHandler(ABC):
             str: The response generated by the QA handler.
         """
         pass
+
+    def warm_up(self):
+        """
+        Prepares what the first request would otherwise pay for (called once by
+        the handler registry after construction). The default builds the
+        process-wide hybrid retriever and its local index.
+        """
+        get_hybrid_retriever()
+
+    def start_background_tasks(self):
+        """
+        Starts the per-process background work of the handler, if any (called
+        by each worker once it is warm; threads do not survive a fork).
+        """
+        pass
+
+    def retrieve(self, query: str, web_query: str = None) -> list:
+        """
+        Retrieves context for a query from the local PDF index and the web search,
+        fused by the hybrid retriever. Follow-up questions of a session reuse the
+        results of the previous question instead of searching again.
+
+        Args:
+            query (str): The user's query or question.
+            web_query (str): Optional refined query sent to the web search.
+
+        Returns:
+            list: Result dicts with 'title', 'url' and 'content'/'raw_content'.
+        """
+        context = current_request()
+        session_id = context.session_id if context is not None else ''
+        reused = reuse_follow_up_results(session_id, query)
+        if reused is not None:
+            context.follow_up_of = reused[0]
+            return reused[1]
+
+        results = get_hybrid_retriever().search(query, web_query=web_query)
+        store = get_session_store()
+        if store is not None and session_id and results:
+            store.remember_results(session_id, query, results)
+        return results
+
+    def web_query(self, query: str) -> str:
+        """
+        Returns the query this handler would send to the web search for a
+        question, so its results can be prefetched while the user types.
+
+        Args:
+            query (str): The user's query or question.
+
+        Returns:
+            str: The web search query, or None when the question is answered without searching.
+        """
+        lowered = query.lower()
+        if any(re.match(pattern, lowered) for pattern in greetings + farewell + gratefulness):
+            return None
+        return query
+
+    def generation_budget(self, query: str) -> GenerationBudget:
+        """
+        Picks max_tokens and the context length for a question from its class
+        (factoid, list, procedural, open), within the limits of this handler.
+
+        Args:
+            query (str): The user's query or question.
+
+        Returns:
+            GenerationBudget: The query class, max_tokens and max_context_length to use.
+        """
+        return generation_budget(query, self.max_tokens, getattr(self, 'max_context_length', 0))
+
+    def contextualize_question(self, query: str) -> str:
+        """
+        Prefixes a follow-up question with the question it follows, so the model
+        can resolve references such as "su correo" against the reused context.
+
+        Args:
+            query (str): The user's query or question.
+
+        Returns:
+            str: The question to place in the prompt.
+        """
+        context = current_request()
+        if context is None or not context.follow_up_of:
+            return query
+        return f"(Pregunta anterior: {context.follow_up_of})\n{query}"
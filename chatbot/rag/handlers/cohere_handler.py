@@ -2,13 +2,16 @@
 
 import os
 import re
+import time
 import random
 import logging
 from dotenv import load_dotenv
-from langchain_core.prompts import PromptTemplate
+from chatbot.rag.utils.prompt_format import PromptFormat
 from langchain_cohere.chat_models import ChatCohere
-from chatbot.rag.utils.singleton_meta import SingletonMeta
 from chatbot.rag.handlers.base_handler import BaseQAHandler
+from chatbot.rag.utils.request_context import count_llm_call
+from chatbot.rag.utils.usage import record_usage, parse_langchain_usage
+from chatbot.rag.utils.deadline import stage_timeout, min_call_seconds
 from chatbot.rag.utils.patterns import (
     prompt_template,
     greetings,
@@ -18,13 +21,12 @@ from chatbot.rag.utils.patterns import (
     gratefulness,
     gratefulness_messages,
 )
-from websearch.search import search_web
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-class QA_CohereHandler(BaseQAHandler, metaclass=SingletonMeta):
+class QA_CohereHandler(BaseQAHandler):
     """
     Handler to manage interactions with the Cohere model for generating responses
     based exclusively on web search results using Tavily.
@@ -40,11 +42,6 @@ class QA_CohereHandler(BaseQAHandler, metaclass=SingletonMeta):
             temperature (float): Level of randomness for response generation.
             max_tokens (int): Maximum number of tokens in the generated response.
         """
-        # Avoid multiple initializations
-        if hasattr(self, '_initialized') and self._initialized:
-            return
-        self._initialized = True
-
         # Model parameter configuration
         self.model = model
         self.temperature = temperature
@@ -63,13 +60,13 @@ class QA_CohereHandler(BaseQAHandler, metaclass=SingletonMeta):
         Loads the prompt template for generating queries.
         """
         try:
-            self.prompt = PromptTemplate(
+            self.prompt = PromptFormat(
                 template = prompt_template,
                 input_variables = ["context", "question"]
             )
-            logger.info('PromptTemplate cargado correctamente.')
+            logger.info('Plantilla de prompt cargada correctamente.')
         except Exception as e:
-            logger.error('Ha ocurrido un error al cargar el PromptTemplate.', exc_info=True)
+            logger.error('Ha ocurrido un error al cargar la plantilla de prompt.', exc_info=True)
 
     def load_llm(self):
         """
@@ -147,19 +144,26 @@ class QA_CohereHandler(BaseQAHandler, metaclass=SingletonMeta):
             
             # Búsqueda web optimizada
             logger.info(f"Realizando búsqueda web para: '{query}'")
-            web_results = search_web(query)
+            web_results = self.retrieve(query)
             
             if not web_results:
                 logger.warning(f"No se encontraron resultados web para: '{query}'")
                 return "Lo siento, no pude encontrar información relevante en la web para responder tu consulta."
             
             # Generar respuesta usando el prompt optimizado
-            formatted_prompt = self.prompt.format(context=web_results, question=query)
+            formatted_prompt = self.prompt.format(context=web_results, question=self.contextualize_question(query))
             
             logger.info(f"Generando respuesta con contexto de {len(web_results)} fuente(s)")
-            response = self.llm.invoke(formatted_prompt).content
+            if stage_timeout(30) < min_call_seconds():
+                logger.warning("Plazo de la solicitud agotado antes de llamar a Cohere")
+                return "Lo siento, la consulta tardó demasiado tiempo. Intenta nuevamente."
+            count_llm_call()
+            start = time.perf_counter()
+            # Respuestas más cortas para preguntas puntuales (clase de la pregunta)
+            message = self.llm.invoke(formatted_prompt, max_tokens=self.generation_budget(query).max_tokens)
+            record_usage('cohere', self.model, parse_langchain_usage(message), (time.perf_counter() - start) * 1000)
             
-            return response
+            return message.content
             
         except Exception as e:
             logger.error('Ha ocurrido un error en la ejecución del Query.', exc_info=True)
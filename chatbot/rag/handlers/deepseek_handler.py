@@ -6,12 +6,18 @@ import logging
 import os
 import requests
 import html
+import time
 from dotenv import load_dotenv
-from langchain_core.prompts import PromptTemplate
-from chatbot.rag.utils.singleton_meta import SingletonMeta
 from chatbot.rag.handlers.base_handler import BaseQAHandler
+from chatbot.rag.utils.request_context import count_llm_call
+from chatbot.rag.utils.usage import record_usage, parse_openai_usage
+from chatbot.rag.utils.compression import compress_results
+from chatbot.rag.utils.http_client import get_http_session
+from chatbot.rag.utils.health import report_dependency, http_error_reason
+from chatbot.rag.utils.deadline import stage_timeout, generation_reserve, min_call_seconds
 from chatbot.rag.utils.patterns import (
-    prompt_template,
+    deepseek_system_prompt,
+    deepseek_user_prompt_prefix,
     greetings,
     greeting_messages,
     farewell,
@@ -19,21 +25,24 @@ from chatbot.rag.utils.patterns import (
     gratefulness,
     gratefulness_messages,
 )
-from websearch.search import search_web
 import unicodedata
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
-class QA_DeepSeekHandler(BaseQAHandler, metaclass=SingletonMeta):
+class QA_DeepSeekHandler(BaseQAHandler):
     """
     Handler to manage interactions with DeepSeek chat API
     for generating responses based on web search results using Tavily.
     """
+
+    # Límite algo mayor para mejorar recall (la clase de la pregunta puede reducirlo)
+    max_context_length = 5000
     
     def __init__(self, api_url: str, model: str, temperature: float = 0.3, max_tokens: int = 500):
         """
-        Initializes the handler with API parameters and prompt template.
+        Initializes the handler with API parameters. The prompt is built by
+        build_messages from the patterns module.
 
         Args:
             api_url (str): The DeepSeek chat completions endpoint URL.
@@ -41,11 +50,6 @@ class QA_DeepSeekHandler(BaseQAHandler, metaclass=SingletonMeta):
             temperature (float): Sampling temperature.
             max_tokens (int): Max tokens for the response.
         """
-        # Avoid multiple initializations
-        if hasattr(self, '_initialized') and self._initialized:
-            return
-        self._initialized = True
-
         self.api_url = api_url
         self.model = model
         self.temperature = temperature
@@ -60,36 +64,24 @@ class QA_DeepSeekHandler(BaseQAHandler, metaclass=SingletonMeta):
         logger.info(f'Model: {model}')
         logger.info(f'Temperature: {temperature}')
         logger.info(f'Max Tokens: {max_tokens}')
-
-        # Load prompt template
-        self.load_prompt_template()
         
         logger.info('DeepSeek Handler creado correctamente (búsqueda web + API chat).')
         
-    def load_prompt_template(self):
-        """
-        Loads the prompt template for generating queries.
-        """
-        try:
-            self.prompt = PromptTemplate(
-                template=prompt_template,
-                input_variables=["context", "question"]
-            )
-            logger.info('PromptTemplate cargado correctamente.')
-        except Exception:
-            logger.error('Ha ocurrido un error al cargar el PromptTemplate.', exc_info=True)
-
-    def get_web_context(self, web_results: list) -> str:
+    def get_web_context(self, web_results: list, max_context_length: int = None) -> str:
         """
         Formats the web results into a context string for DeepSeek processing.
         Now includes Markdown-formatted source references with clickable URLs.
+
+        Args:
+            web_results (list): Search results.
+            max_context_length (int): Character budget (default: max_context_length of the handler).
         """
         if not web_results:
             return ""
         
         context_parts = []
         total_length = 0
-        max_context_length = 5000  # Límite algo mayor para mejorar recall
+        max_context_length = max_context_length or self.max_context_length
         top_long_budget = 3000      # Presupuesto mayor para el primer resultado
         
         for i, result in enumerate(web_results):
@@ -116,10 +108,36 @@ class QA_DeepSeekHandler(BaseQAHandler, metaclass=SingletonMeta):
         
         return "\n".join(context_parts)
 
-    def call_deepseek_api(self, system_prompt: str, user_prompt: str) -> str:
+    def build_messages(self, context: str, query: str) -> tuple:
+        """
+        Builds the system and user messages. Everything that does not depend on
+        the request comes first and is byte-identical across requests, so
+        DeepSeek's context caching serves it from cache; the web context and
+        the question come last.
+
+        Args:
+            context (str): Web context from get_web_context.
+            query (str): The user's question.
+
+        Returns:
+            tuple: (system_prompt, user_prompt).
+        """
+        user_prompt = (
+            deepseek_user_prompt_prefix + context + "\n\n"
+            "[PREGUNTA_DEL_USUARIO]\n" + self.contextualize_question(query)
+        )
+        return deepseek_system_prompt, user_prompt
+
+    def call_deepseek_api(self, system_prompt: str, user_prompt: str, deadline=None, max_tokens: int = None) -> str:
         """
         Calls the DeepSeek API (chat completions compatible with OpenAI format).
+        The timeout is the time left on the request deadline (at most 30 s).
+        max_tokens overrides the handler's value for this call.
         """
+        timeout = stage_timeout(30, deadline)
+        if timeout < min_call_seconds():
+            logger.warning("Plazo de la solicitud agotado antes de llamar a la API de DeepSeek")
+            return "Lo siento, la consulta tardó demasiado tiempo. Intenta nuevamente."
         try:
             headers = {
                 "Content-Type": "application/json",
@@ -128,16 +146,20 @@ class QA_DeepSeekHandler(BaseQAHandler, metaclass=SingletonMeta):
             payload = {
                 "model": self.model,
                 "temperature": self.temperature,
-                "max_tokens": self.max_tokens,
+                "max_tokens": max_tokens or self.max_tokens,
                 "messages": [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ]
             }
             logger.info("Enviando petición a API DeepSeek")
-            resp = requests.post(self.api_url, json=payload, headers=headers, timeout=30)
+            count_llm_call()
+            start = time.perf_counter()
+            resp = get_http_session().post(self.api_url, json=payload, headers=headers, timeout=timeout)
             resp.raise_for_status()
+            report_dependency('llm', True)
             data = resp.json()
+            record_usage('deepseek', self.model, parse_openai_usage(data), (time.perf_counter() - start) * 1000)
 
             # Intentar extraer como respuesta estilo OpenAI
             if isinstance(data, dict):
@@ -151,12 +173,15 @@ class QA_DeepSeekHandler(BaseQAHandler, metaclass=SingletonMeta):
             return "Lo siento, recibí una respuesta inesperada del modelo."
         except requests.exceptions.Timeout:
             logger.error("Timeout al conectar con la API de DeepSeek")
+            report_dependency('llm', False, 'timeout')
             return "Lo siento, la consulta tardó demasiado tiempo. Intenta nuevamente."
         except requests.exceptions.ConnectionError:
             logger.error("Error de conexión con la API de DeepSeek")
+            report_dependency('llm', False, 'unreachable')
             return "Lo siento, no pude conectar con el servicio. Verifica la conexión."
         except requests.exceptions.HTTPError as e:
             logger.error(f"Error HTTP en API de DeepSeek: {e}")
+            report_dependency('llm', False, http_error_reason(e.response.status_code if e.response is not None else 0))
             try:
                 logger.error(f"Detalle: {resp.text}")
             except Exception:
@@ -232,6 +257,12 @@ class QA_DeepSeekHandler(BaseQAHandler, metaclass=SingletonMeta):
         return any(re.fullmatch(pattern, cleaned) for pattern in greetings)
 
 
+    def web_query(self, query: str) -> str:
+        lowered = query.lower()
+        if any(re.match(pattern, lowered) for pattern in farewell + gratefulness) or self._is_greeting_only(query):
+            return None
+        return self._refine_query_for_ud_intent(query)
+
     def get_answer(self, query: str) -> str:
         try:
             # Verificar patrones de despedida y agradecimiento (estos sí deben interrumpir)
@@ -247,7 +278,7 @@ class QA_DeepSeekHandler(BaseQAHandler, metaclass=SingletonMeta):
             # Búsqueda web
             effective_query = self._refine_query_for_ud_intent(query)
             logger.info(f"Realizando búsqueda web para: '{effective_query}'")
-            web_results = search_web(effective_query)
+            web_results = self.retrieve(query, web_query=effective_query)
             if not web_results:
                 logger.warning(f"No se encontraron resultados web para: '{query}'")
                 return "Lo siento, no pude encontrar información relevante en la web para responder tu consulta."
@@ -335,8 +366,10 @@ class QA_DeepSeekHandler(BaseQAHandler, metaclass=SingletonMeta):
                 if not name and primary:
                     try:
                         url = primary[0].get('url','')
-                        if url:
-                            resp = requests.get(url, timeout=10)
+                        # La descarga solo usa el tiempo que no se necesita para la generación
+                        fetch_timeout = stage_timeout(10, reserve=generation_reserve())
+                        if url and fetch_timeout >= min_call_seconds():
+                            resp = get_http_session().get(url, timeout=fetch_timeout)
                             if resp.ok and resp.text:
                                 txt = html.unescape(re.sub(r"<[^>]+>", " ", resp.text))
                                 # Encabezado -> siguiente línea
@@ -378,64 +411,21 @@ class QA_DeepSeekHandler(BaseQAHandler, metaclass=SingletonMeta):
                     title = primary[0].get('title','Fuente')
                     return f"El coordinador de PlanEsTIC es {name}. [{title}]({url})"
 
-            # Priorizar resultados antes de construir el contexto
-            web_results = self._prioritize_results(web_results, query)
-
-            # Contexto
-            context = self.get_web_context(web_results)
-            logger.info(f"Contexto web preparado (len={len(context)} chars, fuentes={len(web_results)})")
-
-            # Construir prompt de usuario con 3 secciones: ANALYSIS, CONTEXT, QUESTION
-            formatted_prompt = (
-                "INSTRUCCIONES PARA TI (NO MOSTRAR AL USUARIO):\n"
-                "Primero, decide internamente si la pregunta es sobre la UD. "
-                "No reveles tu análisis; entrega solo la respuesta final.\n\n"
-                "[ANALYSIS]\n"
-                "Tarea: Decide si la pregunta está relacionada con la UD (sí/no) y si menciona otra universidad explícita.\n"
-                "Criterios: Palabras clave, nombres propios, dominio de las fuentes en el contexto, etc.\n\n"
-                "[CONTEXTO_DE_TAVILY]\n" + context + "\n\n"
-                "[PREGUNTA_DEL_USUARIO]\n" + query
-            )
+            # Priorizar resultados y quitarles la plantilla del sitio antes de construir el contexto
+            web_results = compress_results(self._prioritize_results(web_results, query), query)
 
-            logger.debug(f"Prompt final (3-partes) construido (len={len(formatted_prompt)} chars)")
+            # Contexto y longitud de respuesta según la clase de la pregunta
+            budget = self.generation_budget(query)
+            context = self.get_web_context(web_results, budget.max_context_length)
+            logger.info(f"Contexto web preparado (len={len(context)} chars, fuentes={len(web_results)}, clase={budget.query_class})")
 
-            # Construir mensajes: system guía para limpieza y precisión
-            system_prompt = (
-              "Eres un asistente en español especializado en la Universidad Distrital Francisco José de Caldas (UD). "
-              "No tienes navegación web. Debes decidir si la pregunta trata sobre la UD y responder según estas reglas:\n\n"
-              "ENRUTAMIENTO:\n"
-              "1 Si la pregunta menciona explícitamente otra universidad distinta a la UD, responde EXACTAMENTE: "
-              "'Solo puedo responder preguntas relacionadas con la Universidad Distrital Francisco José de Caldas y sus sitios oficiales.'\n"
-              "2 Si la pregunta es ambigua o no especifica universidad, ASUME que se refiere a la UD.\n"
-              "3 Si determinas que no es sobre la UD, usa el mismo mensaje de rechazo anterior.\n\n"
-              "MANEJO DE SALUDOS:\n"
-              "Si el usuario te saluda (hola, buenos días, buenas tardes, buenas noches, qué tal, saludos, hey, qué onda, etc.) "
-              "y también hace una pregunta en el mismo mensaje, debes:\n"
-              "- Responder con un saludo amigable y profesional\n"
-              "- Luego responder la pregunta usando el contexto proporcionado\n"
-              "- Si solo hay saludo sin pregunta, responde solo con el saludo\n"
-              "- Usa variaciones naturales de saludo, no repitas exactamente lo mismo\n\n"
-              "PRIORIDAD DE INFORMACIÓN:\n"
-              "A Usa EXCLUSIVAMENTE el [CONTEXTO_DE_TAVILY] cuando contenga la información solicitada. Cita fuentes usando el formato Markdown exacto como aparecen: [Título](URL).\n"
-              "B EXCEPCIÓN LIMITADA (solo DIRECCIONES/UBICACIONES de sedes/campus UD): si la pregunta es sobre 'dirección', 'ubicación', "
-              "'sede' o 'campus' y el [CONTEXTO_DE_TAVILY] NO trae la dirección concreta, puedes responder con tu conocimiento institucional "
-              "general de la UD. Al usar esta excepción, empieza con 'Referencia conocida:' y entrega la(s) dirección(es). Limítate a sedes/campus "
-              "reconocidos (p. ej., Macarena A/B, Sabio Caldas, Aduanilla de Paiba, Tecnológica). Si no estás seguro, di que no aparece en el contexto "
-              "y sugiere verificar en el directorio oficial.\n"
-              "C Para cualquier otro tipo de dato (autoridades, calendarios, costos, requisitos, etc.), si no está en el contexto, di: "
-              "'No encuentro esa información en el contexto proporcionado.'\n\n"
-              "FORMATO DE RESPUESTA:\n"
-              "- Responde en texto normal y claro, sin formato especial.\n"
-              "- Sé directo y claro. Si se pide una cantidad específica, devuelve exactamente ese número si el contexto lo permite.\n"
-              "- SOLO para citar fuentes del contexto, usa el formato Markdown exacto: [Título](URL).\n"
-              "- Las fuentes deben ser enlaces clicables en formato Markdown. El resto del texto debe ser normal, sin formato Markdown.\n"
-              "- Incluye las citas de fuentes al final de la información relevante.\n"
-              "- No inventes contenido que no esté en el contexto (salvo la excepción B).\n"
-              "- No muestres tu análisis interno ni el enrutamiento; entrega solo la respuesta final."
-          )
+            # Prefijo fijo (sistema + instrucciones) seguido de contexto y pregunta
+            system_prompt, formatted_prompt = self.build_messages(context, query)
+            logger.debug(f"Prompt final (3-partes) construido (len={len(formatted_prompt)} chars)")
 
             # Llamada a DeepSeek con system rules + prompt de 3 partes (análisis, contexto, pregunta)
-            response = self.call_deepseek_api(system_prompt=system_prompt, user_prompt=formatted_prompt)
+            response = self.call_deepseek_api(system_prompt=system_prompt, user_prompt=formatted_prompt,
+                                              max_tokens=budget.max_tokens)
             return response
         except Exception:
             logger.error("Error inesperado en DeepSeekHandler.get_answer", exc_info=True)
@@ -1,37 +1,108 @@
 # ./chatbot/rag/handler_factory.py
 
 import logging
-from chatbot.rag.handlers import aws_bedrock_handler, cohere_handler, llama_handler, deepseek_handler
+import importlib
+
+from chatbot.rag.handlers.registry import get_registry
+from chatbot.rag.utils.config_loader import get_config
 
 logger = logging.getLogger(__name__)
 
-def get_qa_handler(bot_type: str, bot_config: dict):
+# Módulo y clase de cada proveedor: el módulo (y sus dependencias: boto3,
+# langchain_cohere...) solo se importa cuando se pide ese proveedor
+HANDLERS = {
+    'aws_bedrock': ('chatbot.rag.handlers.aws_bedrock_handler', 'QA_AwsBedrockHandler'),
+    'cohere': ('chatbot.rag.handlers.cohere_handler', 'QA_CohereHandler'),
+    'llama': ('chatbot.rag.handlers.llama_handler', 'QA_LlamaHandler'),
+    'deepseek': ('chatbot.rag.handlers.deepseek_handler', 'QA_DeepSeekHandler'),
+}
+
+def get_handler_class(bot_type: str) -> type:
     """
-    Returns the appropriate QA handler based on the bot type.
+    Imports the module of a provider on demand and returns its handler class.
 
     Args:
-        bot_type (str): The type of bot ('aws_bedrock', 'cohere', or 'llama').
-        bot_config (dict): Configuration parameters for initializing the bot handler.
+        bot_type (str): The type of bot ('aws_bedrock', 'cohere', 'llama' or 'deepseek').
 
     Returns:
-        QA_AWS_Bedrock_Handler, QA_Cohere_Handler, or QA_Llama_Handler: An instance of the specified bot handler.
+        type: The handler class.
 
     Raises:
         ValueError: If the bot type is not supported.
     """
-    
-    if bot_type == 'aws_bedrock':
-        logger.info('Inicializando AWS Bedrock Handler...')
-        return aws_bedrock_handler.QA_AwsBedrockHandler(**bot_config)
-    elif bot_type == 'cohere':
-        logger.info('Inicializando Cohere Handler...')
-        return cohere_handler.QA_CohereHandler(**bot_config)
-    elif bot_type == 'llama':
-        logger.info('Inicializando Llama Handler...')
-        return llama_handler.QA_LlamaHandler(**bot_config)
-    elif bot_type == 'deepseek':
-        logger.info('Inicializando DeepSeek Handler...')
-        return deepseek_handler.QA_DeepSeekHandler(**bot_config)
-    else:
+    if bot_type not in HANDLERS:
         logger.error('No se ha podido inicializar ningun Handler.')
         raise ValueError(f"Unsupported bot type: {bot_type}")
+    module_name, class_name = HANDLERS[bot_type]
+    return getattr(importlib.import_module(module_name), class_name)
+
+def get_qa_handler(bot_type: str, bot_config: dict):
+    """
+    Returns the QA handler of a bot type and configuration. Handlers are
+    shared: the same (bot type, configuration) always yields the same
+    instance, built and warmed up once per process.
+
+    Args:
+        bot_type (str): The type of bot ('aws_bedrock', 'cohere', 'llama' or 'deepseek').
+        bot_config (dict): Configuration parameters for initializing the bot handler.
+
+    Returns:
+        QA_AwsBedrockHandler, QA_CohereHandler, QA_LlamaHandler or QA_DeepSeekHandler: An instance of the specified bot handler.
+
+    Raises:
+        ValueError: If the bot type is not supported.
+    """
+    return get_registry().get(bot_type, bot_config)
+
+def resolve_profile(profile: str = None) -> tuple:
+    """
+    Resolves a named profile from the 'profiles' section of config.json: its
+    provider and the provider's 'bot_config' overridden by the profile's
+    'config'. Without a profile, 'bot_type' and its 'bot_config' are used.
+
+    Args:
+        profile (str): Profile name, or None for the default.
+
+    Returns:
+        tuple: (bot_type, bot_config).
+
+    Raises:
+        ValueError: If the profile does not exist.
+    """
+    config = get_config()
+    if not profile:
+        bot_type = config.get('bot_type', 'cohere')
+        return bot_type, config.get('bot_config', {}).get(bot_type, {})
+    options = config.get('profiles', {}).get(profile)
+    if options is None:
+        raise ValueError(f"Perfil desconocido: {profile}")
+    bot_type = options.get('provider', config.get('bot_type', 'cohere'))
+    bot_config = dict(config.get('bot_config', {}).get(bot_type, {}))
+    bot_config.update(options.get('config', {}))
+    return bot_type, bot_config
+
+def get_profile_handler(profile: str = None) -> tuple:
+    """
+    Args:
+        profile (str): Profile name, or None for the default handler.
+
+    Returns:
+        tuple: (bot_type, handler).
+
+    Raises:
+        ValueError: If the profile does not exist or its provider is not supported.
+    """
+    bot_type, bot_config = resolve_profile(profile)
+    return bot_type, get_qa_handler(bot_type, bot_config)
+
+def preload_profiles():
+    """
+    Builds and warms up the profiles marked with "preload": true, so their
+    first request does not pay the initialization.
+    """
+    for name, options in get_config().get('profiles', {}).items():
+        if options.get('preload', False):
+            try:
+                get_profile_handler(name)
+            except Exception:
+                logger.error(f"No se pudo precargar el perfil '{name}'.", exc_info=True)
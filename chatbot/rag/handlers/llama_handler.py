@@ -4,10 +4,19 @@ import re
 import random
 import logging
 import requests
+import os
 import json
-from langchain_core.prompts import PromptTemplate
-from chatbot.rag.utils.singleton_meta import SingletonMeta
+import time
+import threading
+from chatbot.rag.utils.prompt_format import PromptFormat
 from chatbot.rag.handlers.base_handler import BaseQAHandler
+from chatbot.rag.utils import metrics
+from chatbot.rag.utils.request_context import count_llm_call
+from chatbot.rag.utils.usage import record_usage, parse_ollama_usage
+from chatbot.rag.utils.compression import compress_results
+from chatbot.rag.utils.http_client import get_http_session
+from chatbot.rag.utils.health import report_dependency, http_error_reason
+from chatbot.rag.utils.deadline import stage_timeout, min_call_seconds
 from chatbot.rag.utils.patterns import (
     prompt_template,
     greetings,
@@ -17,17 +26,23 @@ from chatbot.rag.utils.patterns import (
     gratefulness,
     gratefulness_messages,
 )
-from websearch.search import search_web
 
 logger = logging.getLogger(__name__)
 
-class QA_LlamaHandler(BaseQAHandler, metaclass=SingletonMeta):
+# Una carga del modelo por encima de este tiempo indica que Ollama lo había descargado
+COLD_LOAD_MS = 500
+
+class QA_LlamaHandler(BaseQAHandler):
     """
     Handler to manage interactions with the Llama model via REST API
     for generating responses based exclusively on web search results using Tavily.
     """
+
+    # Límite para la API de Llama (la clase de la pregunta puede reducirlo)
+    max_context_length = 3000
     
-    def __init__(self, api_url: str, model: str, temperature: float = 0.7, max_tokens: int = 500):
+    def __init__(self, api_url: str, model: str, temperature: float = 0.7, max_tokens: int = 500,
+                 keep_alive: str = '30m', ping_interval_seconds: float = 240):
         """
         Initializes the handler with API parameters and prompt template.
         Uses web search for context retrieval.
@@ -36,23 +51,28 @@ class QA_LlamaHandler(BaseQAHandler, metaclass=SingletonMeta):
             api_url (str): The API endpoint URL for Llama model.
             model (str): The model name to use.
             temperature (float): Level of randomness for response generation.
-            max_tokens (int): Maximum number of tokens in the generated response.
+            max_tokens (int): Maximum number of tokens in the generated response (Ollama's num_predict).
+            keep_alive (str): How long Ollama keeps the model loaded after a call (e.g. '30m', '-1' forever).
+            ping_interval_seconds (float): Idle time after which a background ping
+                refreshes keep_alive (0 disables the ping).
         """
-        # Avoid multiple initializations
-        if hasattr(self, '_initialized') and self._initialized:
-            return
-        self._initialized = True
-
         # API configuration
         self.api_url = api_url
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.keep_alive = keep_alive
+        self.ping_interval_seconds = ping_interval_seconds
+        self._last_call = time.monotonic()
+        self._pinger = None
+        self._pinger_pid = None
+        self._pinger_lock = threading.Lock()
         
         logger.info(f'Llama API URL: {api_url}')
         logger.info(f'Model: {model}')
         logger.info(f'Temperature: {temperature}')
         logger.info(f'Max Tokens: {max_tokens}')
+        logger.info(f'Keep alive: {keep_alive}')
 
         # Load prompt template
         self.load_prompt_template()
@@ -64,20 +84,21 @@ class QA_LlamaHandler(BaseQAHandler, metaclass=SingletonMeta):
         Loads the prompt template for generating queries.
         """
         try:
-            self.prompt = PromptTemplate(
+            self.prompt = PromptFormat(
                 template=prompt_template,
                 input_variables=["context", "question"]
             )
-            logger.info('PromptTemplate cargado correctamente.')
+            logger.info('Plantilla de prompt cargada correctamente.')
         except Exception as e:
-            logger.error('Ha ocurrido un error al cargar el PromptTemplate.', exc_info=True)
+            logger.error('Ha ocurrido un error al cargar la plantilla de prompt.', exc_info=True)
 
-    def get_web_context(self, web_results: list) -> str:
+    def get_web_context(self, web_results: list, max_context_length: int = None) -> str:
         """
         Optimiza el contexto web combinando múltiples resultados de manera inteligente.
         
         Args:
             web_results (list): Lista de resultados de búsqueda web
+            max_context_length (int): Presupuesto de caracteres (por defecto, el del handler)
             
         Returns:
             str: Contexto web optimizado para el prompt
@@ -87,7 +108,7 @@ class QA_LlamaHandler(BaseQAHandler, metaclass=SingletonMeta):
         
         context_parts = []
         total_length = 0
-        max_context_length = 3000  # Límite para la API de Llama
+        max_context_length = max_context_length or self.max_context_length
         
         for i, result in enumerate(web_results):
             # Preferir raw_content sobre content
@@ -112,21 +133,106 @@ class QA_LlamaHandler(BaseQAHandler, metaclass=SingletonMeta):
         
         return "\n".join(context_parts)
 
-    def call_llama_api(self, prompt: str) -> str:
+    def warm_up(self):
+        """
+        Builds the retrieval index and asks Ollama to load the model, so the
+        first question does not pay the model load.
+        """
+        super().warm_up()
+        self.ping()
+
+    def start_background_tasks(self):
+        """
+        Starts the keep-alive ping of this process (threads do not survive a fork).
+        """
+        if not self.ping_interval_seconds:
+            return
+        if self._pinger is not None and self._pinger_pid == os.getpid() and self._pinger.is_alive():
+            return
+        with self._pinger_lock:
+            if self._pinger is None or self._pinger_pid != os.getpid() or not self._pinger.is_alive():
+                self._pinger_pid = os.getpid()
+                self._pinger = threading.Thread(target=self._ping_loop, name='llama-keep-alive', daemon=True)
+                self._pinger.start()
+
+    def _ping_loop(self):
+        while True:
+            idle = time.monotonic() - self._last_call
+            if idle >= self.ping_interval_seconds:
+                self.ping()
+                idle = 0
+            time.sleep(max(self.ping_interval_seconds - idle, 1))
+
+    def ping(self, timeout: float = 10) -> bool:
+        """
+        Sends a request without prompt, which makes Ollama load the model (if
+        needed) and restart its keep_alive timer without generating.
+
+        Args:
+            timeout (float): Seconds allowed for the call.
+
+        Returns:
+            bool: Whether Ollama answered.
+        """
+        self._last_call = time.monotonic()
+        try:
+            response = get_http_session().post(
+                self.api_url,
+                json={"model": self.model, "keep_alive": self.keep_alive, "stream": False},
+                timeout=timeout
+            )
+            response.raise_for_status()
+            load_ms = (response.json().get('load_duration') or 0) / 1e6
+            metrics.inc('llm_keep_alive_pings_total', model=self.model, result='cold' if load_ms >= COLD_LOAD_MS else 'warm')
+            return True
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"No se pudo mantener cargado el modelo {self.model} en Ollama: {e}")
+            metrics.inc('llm_keep_alive_pings_total', model=self.model, result='error')
+            return False
+
+    def record_durations(self, response_data: dict):
+        """
+        Exports the phases Ollama reports for a generation (nanoseconds):
+        model load, prompt evaluation and token generation. A long load means
+        the model had been unloaded since the previous call.
+
+        Args:
+            response_data (dict): The JSON response of /api/generate.
+        """
+        for phase, field in (('load', 'load_duration'), ('prompt_eval', 'prompt_eval_duration'), ('eval', 'eval_duration')):
+            value = response_data.get(field)
+            if isinstance(value, (int, float)):
+                metrics.observe('llm_ollama_duration_ms', value / 1e6, model=self.model, phase=phase)
+        if (response_data.get('load_duration') or 0) / 1e6 >= COLD_LOAD_MS:
+            metrics.inc('llm_ollama_cold_loads_total', model=self.model)
+
+    def call_llama_api(self, prompt: str, deadline=None, max_tokens: int = None) -> str:
         """
         Realiza una llamada a la API REST de Llama.
         
         Args:
             prompt (str): El prompt completo para enviar al modelo
+            deadline (Deadline): Plazo explícito (por defecto, el de la solicitud en curso)
+            max_tokens (int): Límite de tokens de esta llamada (por defecto, el del handler)
             
         Returns:
             str: La respuesta del modelo Llama
         """
+        timeout = stage_timeout(30, deadline)
+        if timeout < min_call_seconds():
+            logger.warning("Plazo de la solicitud agotado antes de llamar a la API de Llama")
+            return "Lo siento, la consulta tardó demasiado tiempo. Intenta nuevamente."
         try:
-            # Preparar el payload
+            # Preparar el payload: respuesta completa (sin streaming) y modelo cargado entre llamadas
             payload = {
                 "model": self.model,
-                "prompt": prompt
+                "prompt": prompt,
+                "stream": False,
+                "keep_alive": self.keep_alive,
+                "options": {
+                    "temperature": self.temperature,
+                    "num_predict": max_tokens or self.max_tokens
+                }
             }
             
             # Headers para la petición
@@ -135,20 +241,27 @@ class QA_LlamaHandler(BaseQAHandler, metaclass=SingletonMeta):
             }
             
             logger.info(f"Enviando petición a API Llama: {self.api_url}")
+            count_llm_call()
+            self.start_background_tasks()
+            self._last_call = time.monotonic()
+            start = time.perf_counter()
             
             # Realizar la petición POST
-            response = requests.post(
+            response = get_http_session().post(
                 self.api_url,
                 json=payload,
                 headers=headers,
-                timeout=30  # 30 segundos de timeout
+                timeout=timeout  # Tiempo restante del plazo (máximo 30 segundos)
             )
             
             # Verificar status code
             response.raise_for_status()
+            report_dependency('llm', True)
             
             # Parsear la respuesta JSON
             response_data = response.json()
+            record_usage('llama', self.model, parse_ollama_usage(response_data), (time.perf_counter() - start) * 1000)
+            self.record_durations(response_data)
             
             # Extraer la respuesta del modelo
             if 'response' in response_data:
@@ -159,14 +272,17 @@ class QA_LlamaHandler(BaseQAHandler, metaclass=SingletonMeta):
                 
         except requests.exceptions.Timeout:
             logger.error("Timeout al conectar con la API de Llama")
+            report_dependency('llm', False, 'timeout')
             return "Lo siento, la consulta tardó demasiado tiempo. Intenta nuevamente."
             
         except requests.exceptions.ConnectionError:
             logger.error("Error de conexión con la API de Llama")
+            report_dependency('llm', False, 'unreachable')
             return "Lo siento, no pude conectar con el servicio. Verifica la conexión."
             
         except requests.exceptions.HTTPError as e:
             logger.error(f"Error HTTP en API de Llama: {e}")
+            report_dependency('llm', False, http_error_reason(e.response.status_code if e.response is not None else 0))
             return "Lo siento, ocurrió un error en el servicio. Intenta más tarde."
             
         except json.JSONDecodeError:
@@ -198,22 +314,23 @@ class QA_LlamaHandler(BaseQAHandler, metaclass=SingletonMeta):
             
             # Búsqueda web optimizada
             logger.info(f"Realizando búsqueda web para: '{query}'")
-            web_results = search_web(query)
+            web_results = self.retrieve(query)
             
             if not web_results:
                 logger.warning(f"No se encontraron resultados web para: '{query}'")
                 return "Lo siento, no pude encontrar información relevante en la web para responder tu consulta."
             
-            # Obtener contexto optimizado
-            context = self.get_web_context(web_results)
+            # Obtener contexto optimizado (sin la plantilla de los sitios)
+            budget = self.generation_budget(query)
+            context = self.get_web_context(compress_results(web_results, query), budget.max_context_length)
             
             # Generar prompt completo
-            formatted_prompt = self.prompt.format(context=context, question=query)
+            formatted_prompt = self.prompt.format(context=context, question=self.contextualize_question(query))
             
             logger.info(f"Generando respuesta con contexto de {len(web_results)} fuente(s)")
             
             # Llamar a la API de Llama
-            response = self.call_llama_api(formatted_prompt)
+            response = self.call_llama_api(formatted_prompt, max_tokens=budget.max_tokens)
             
             return response
             
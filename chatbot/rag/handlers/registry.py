@@ -0,0 +1,105 @@
+# ./chatbot/rag/handlers/registry.py
+
+import json
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def config_key(provider: str, bot_config: dict) -> str:
+    """
+    Args:
+        provider (str): Bot type ('deepseek', 'cohere'...).
+        bot_config (dict): Constructor arguments of the handler.
+
+    Returns:
+        str: Stable identifier of the (provider, configuration) pair.
+    """
+    raw = json.dumps(bot_config, sort_keys=True, separators=(',', ':'), default=str)
+    return f"{provider}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()[:12]}"
+
+class HandlerRegistry:
+    """
+    Process-wide handlers keyed by (provider, configuration hash). Each
+    handler is built and warmed up once, under a lock of its own key, so two
+    concurrent first requests never initialize it twice while other
+    configurations build in parallel. Handlers keep no per-request state and
+    are shared by every thread.
+    """
+
+    def __init__(self, handler_class_for):
+        """
+        Args:
+            handler_class_for (callable): Function bot_type -> handler class (imports it on demand).
+        """
+        self.handler_class_for = handler_class_for
+        self._handlers = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str, bot_config: dict):
+        """
+        Returns the handler of a configuration, building and warming it up on first use.
+
+        Args:
+            provider (str): Bot type.
+            bot_config (dict): Constructor arguments of the handler.
+
+        Returns:
+            BaseQAHandler: The shared handler.
+
+        Raises:
+            ValueError: If the bot type is not supported.
+        """
+        key = config_key(provider, bot_config)
+        handler = self._handlers.get(key)
+        if handler is not None:
+            return handler
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            handler = self._handlers.get(key)
+            if handler is None:
+                handler_class = self.handler_class_for(provider)
+                logger.info(f'Inicializando {handler_class.__name__} ({key})...')
+                handler = handler_class(**bot_config)
+                try:
+                    handler.warm_up()
+                except Exception:
+                    logger.warning(f'Falló el calentamiento de {key}; se continúa sin él.', exc_info=True)
+                self._handlers[key] = handler
+        return handler
+
+    def handlers(self) -> list:
+        """
+        Returns:
+            list: The handlers built so far.
+        """
+        return list(self._handlers.values())
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Class and model of every handler built, keyed by configuration.
+        """
+        return {
+            key: {'class': type(handler).__name__, 'model': getattr(handler, 'model', '')}
+            for key, handler in list(self._handlers.items())
+        }
+
+def get_registry() -> HandlerRegistry:
+    """
+    Returns:
+        HandlerRegistry: The process-wide registry.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                from chatbot.rag.handlers.factory import get_handler_class
+                _registry = HandlerRegistry(get_handler_class)
+    return _registry
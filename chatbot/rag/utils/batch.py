@@ -0,0 +1,120 @@
+# ./chatbot/rag/utils/batch.py
+
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from chatbot.rag.utils import metrics
+from chatbot.rag.utils.config_loader import get_section
+from chatbot.rag.utils.process_local import ProcessExecutor
+from chatbot.rag.utils.search_memo import SearchMemo, run_with_memo
+from chatbot.rag.utils.text_utils import normalize_question
+
+logger = logging.getLogger(__name__)
+
+_batch_executor = None
+_executor_lock = threading.Lock()
+
+def jaccard(a: set, b: set) -> float:
+    """
+    Args:
+        a (set): First token set.
+        b (set): Second token set.
+
+    Returns:
+        float: |a ∩ b| / |a ∪ b| (1.0 for two empty sets).
+    """
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+def find_duplicates(messages: list, near_threshold: float = 0.9) -> list:
+    """
+    Maps every message of a batch to the first message it duplicates:
+    identical once normalized, or with a token Jaccard similarity of at
+    least 'near_threshold'.
+
+    Args:
+        messages (list): The user messages.
+        near_threshold (float): Similarity above which two questions are merged.
+
+    Returns:
+        list: For each position, the index of its canonical message (itself if unique).
+    """
+    canonical = []
+    by_text = {}
+    unique = []
+    for i, message in enumerate(messages):
+        normalized = normalize_question(message)
+        if normalized in by_text:
+            canonical.append(by_text[normalized])
+            continue
+        tokens = set(normalized.split())
+        match = next((j for j, other in unique if jaccard(tokens, other) >= near_threshold), None)
+        if match is None:
+            match = i
+            unique.append((i, tokens))
+        by_text[normalized] = match
+        canonical.append(match)
+    return canonical
+
+def get_batch_executor() -> ProcessExecutor:
+    """
+    Returns the process-wide pool that answers batch messages. Its size
+    bounds the parallelism of every batch served by the process.
+
+    Returns:
+        ProcessExecutor: The shared pool (rebuilt in each forked worker).
+    """
+    global _batch_executor
+    if _batch_executor is None:
+        with _executor_lock:
+            if _batch_executor is None:
+                _batch_executor = ProcessExecutor(
+                    max_workers=get_section('batch').get('max_workers', 4),
+                    thread_name_prefix='batch',
+                )
+    return _batch_executor
+
+def run_batch(messages: list, answer_fn, executor: ThreadPoolExecutor = None, near_threshold: float = 0.9):
+    """
+    Answers a batch concurrently, once per distinct question, sharing web
+    search results across the batch. Results are yielded in input order as
+    soon as each one (and every one before it) is ready.
+
+    Args:
+        messages (list): The user messages.
+        answer_fn (callable): message -> dict with 'response' or 'error' (and optional fields).
+        executor (ThreadPoolExecutor): Pool to use (defaults to the shared batch pool).
+        near_threshold (float): Jaccard similarity for near-duplicate questions.
+
+    Yields:
+        dict: 'index', 'message', the answer_fn fields and 'duplicate_of' for repeated questions.
+    """
+    executor = executor or get_batch_executor()
+    canonical = find_duplicates(messages, near_threshold)
+    memo = SearchMemo()
+    futures = {}
+    for i, j in enumerate(canonical):
+        if j == i:
+            # Cada tarea corre en su propia copia del contexto, con el memo del lote
+            futures[i] = executor.submit(contextvars.copy_context().run, run_with_memo, memo, _safe_answer, answer_fn, messages[i])
+    logger.info(f"Lote de {len(messages)} mensajes: {len(futures)} preguntas distintas")
+    metrics.inc('batch_messages_total', len(messages), kind='received')
+    metrics.inc('batch_messages_total', len(messages) - len(futures), kind='duplicate')
+
+    for i, message in enumerate(messages):
+        item = {'index': i, 'message': message}
+        item.update(futures[canonical[i]].result())
+        if canonical[i] != i:
+            item['duplicate_of'] = canonical[i]
+        yield item
+    logger.info(f"Lote completado: {memo.misses} búsquedas web realizadas, {memo.hits} reutilizadas")
+
+def _safe_answer(answer_fn, message: str) -> dict:
+    try:
+        return answer_fn(message)
+    except Exception:
+        logger.error('Error al responder un mensaje del lote.', exc_info=True)
+        return {'error': 'Error interno del servidor'}
@@ -0,0 +1,122 @@
+# ./chatbot/rag/utils/circuit_breaker.py
+
+import time
+import logging
+import threading
+
+from chatbot.rag.utils import metrics
+from chatbot.rag.utils.config_loader import get_section
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+class CircuitBreaker:
+    """
+    Stops calling an external service after 'failure_threshold' consecutive
+    failures. While open, calls are refused for 'reset_seconds'; then a single
+    trial call is let through (half-open) and its outcome closes or reopens
+    the circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30):
+        """
+        Args:
+            name (str): Service name, used as metric label ('tavily').
+            failure_threshold (int): Consecutive failures that open the circuit.
+            reset_seconds (float): Time the circuit stays open before a trial call.
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            logger.warning(f"Circuito '{self.name}': {self.state} -> {state}")
+            self.state = state
+        metrics.set_gauge('circuit_state', _STATE_VALUES[state], service=self.name)
+
+    def allow(self) -> bool:
+        """
+        Returns:
+            bool: True if a call may be attempted now.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            metrics.inc('circuit_rejected_total', service=self.name)
+            return False
+
+    def record_success(self):
+        """Closes the circuit after a successful call."""
+        with self._lock:
+            self.failures = 0
+            self._trial_in_flight = False
+            self._set_state(CLOSED)
+
+    def record_failure(self):
+        """Counts a failed call; opens the circuit at the threshold or after a failed trial."""
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Current state and consecutive failures.
+        """
+        with self._lock:
+            return {'state': self.state, 'failures': self.failures}
+
+def get_circuit_breaker(service: str) -> CircuitBreaker:
+    """
+    Returns the process-wide breaker of a service, configured from the
+    'circuit_breakers' section of config.json (per-service values override
+    'default').
+
+    Args:
+        service (str): Service name ('tavily').
+
+    Returns:
+        CircuitBreaker: The shared breaker.
+    """
+    breaker = _breakers.get(service)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(service)
+            if breaker is None:
+                breaker_config = get_section('circuit_breakers')
+                options = dict(breaker_config.get('default', {}))
+                options.update(breaker_config.get('services', {}).get(service, {}))
+                breaker = _breakers[service] = CircuitBreaker(
+                    service,
+                    failure_threshold=options.get('failure_threshold', 5),
+                    reset_seconds=options.get('reset_seconds', 30),
+                )
+    return breaker
+
+def circuit_stats() -> dict:
+    """
+    Returns:
+        dict: State of every breaker created in this process, keyed by service.
+    """
+    return {service: breaker.stats() for service, breaker in list(_breakers.items())}
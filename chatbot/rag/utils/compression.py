@@ -0,0 +1,238 @@
+# ./chatbot/rag/utils/compression.py
+
+import re
+import math
+import threading
+
+from chatbot.rag.utils import metrics
+from chatbot.rag.utils.config_loader import get_section
+from chatbot.rag.utils.request_context import current_request
+
+_compressor = None
+_compressor_lock = threading.Lock()
+
+# Líneas de plantilla de los sitios (banners de cookies, pies de página, redes sociales)
+BOILERPLATE_PATTERNS = [
+    r'cookies?',
+    r'pol[ií]tica\s+de\s+(privacidad|tratamiento)',
+    r'derechos\s+reservados',
+    r'copyright|©',
+    r'(saltar|ir)\s+al\s+(contenido|men[uú])',
+    r'iniciar\s+sesi[oó]n|olvid[oó]\s+su\s+contrase[nñ]a',
+    r's[ií]guenos|compartir\s+en',
+    r'\b(facebook|twitter|instagram|youtube|linkedin|tiktok|whatsapp)\b',
+    r'mapa\s+del\s+sitio|volver\s+arriba',
+]
+_boilerplate = re.compile('|'.join(BOILERPLATE_PATTERNS), re.IGNORECASE)
+_image = re.compile(r'!\[[^\]]*\]\([^)]*\)')
+_link = re.compile(r'\[([^\]]*)\]\([^)]*\)')
+_sentence_end = re.compile(r'(?<=[.!?;])\s+(?=[A-ZÁÉÍÓÚÑ¿¡"(])')
+
+STOPWORDS = {
+    'a', 'al', 'como', 'con', 'cual', 'cuales', 'cuando', 'cuanto', 'de', 'del', 'donde', 'el', 'en',
+    'es', 'esta', 'este', 'hay', 'la', 'las', 'lo', 'los', 'me', 'mi', 'para', 'por', 'que', 'quien',
+    'se', 'sobre', 'son', 'su', 'sus', 'un', 'una', 'y', 'o', 'ud', 'universidad', 'distrital',
+}
+
+# Términos que una página usa para responder aunque no repita las palabras de la pregunta
+EXPANSIONS = {
+    'direc': {'carre', 'calle', 'aveni', 'diago', 'trans', 'sede'},
+    'ubica': {'carre', 'calle', 'aveni', 'diago', 'trans', 'sede'},
+    'telef': {'pbx', 'ext', 'celul'},
+    'corre': {'email', 'mail'},
+}
+
+_accents = str.maketrans('áéíóúüñàèìòù', 'aeiouunaeiou')
+_non_word = re.compile(r'[^\w]+')
+
+def _normalize(text: str) -> str:
+    # Como normalize_question, pero con una tabla de traducción: se aplica a cada línea y oración de las páginas
+    return _non_word.sub(' ', text.lower().translate(_accents)).strip()
+
+def _stem(word: str) -> str:
+    # Prefijo fijo: agrupa "admisión", "admisiones" y "admitidos" sin un lematizador
+    return word[:5]
+
+def _terms(normalized: str) -> set:
+    return {_stem(word) for word in normalized.split() if word not in STOPWORDS and len(word) > 2}
+
+def _lines(text: str):
+    # (línea con los enlaces Markdown reducidos a su texto, línea normalizada, si era solo un enlace)
+    for raw in text.splitlines():
+        line = _image.sub('', raw).strip(' \t*-#|>')
+        plain = _link.sub(r'\1', line)
+        yield plain, _normalize(plain), _link.fullmatch(line) is not None
+
+class ContextCompressor:
+    """
+    Extractive compression of web results before they reach the prompt.
+    Drops boilerplate (lines repeated across results or inside a page, menus,
+    cookie banners, footers) and keeps, per page, the sentences that share
+    most terms with the question (idf-weighted over the result set) until
+    'target_ratio' of the page is reached. Kept sentences stay in page order.
+    """
+
+    def __init__(self, target_ratio: float = 0.5, min_chars: int = 1200, max_nav_words: int = 3,
+                 max_page_chars: int = 20000):
+        """
+        Args:
+            target_ratio (float): Fraction of each page's characters to keep.
+            min_chars (int): Pages shorter than this are only cleaned, not reduced.
+            max_nav_words (int): Lines with at most this many words and no question
+                term or digit are treated as menu entries.
+            max_page_chars (int): Only the start of longer pages is read (the
+                prompt context is a few thousand characters anyway).
+        """
+        self.target_ratio = target_ratio
+        self.min_chars = min_chars
+        self.max_nav_words = max_nav_words
+        self.max_page_chars = max_page_chars
+
+    def _clean_lines(self, texts: list, query_terms: set) -> tuple:
+        pages = [list(_lines(text)) for text in texts]
+        # Una línea presente en dos o más páginas es parte de la plantilla del sitio
+        seen_in = {}
+        for index, page in enumerate(pages):
+            for _, key, _ in page:
+                seen_in.setdefault(key, set()).add(index)
+        cleaned, dropped, seen = [], 0, set()
+        for page in pages:
+            lines = []
+            for line, key, link_only in page:
+                if not key:
+                    continue
+                words = key.split()
+                # Las entradas de menú (líneas que son solo un enlace) no cuentan como relevantes
+                relevant = not link_only and bool(query_terms & {_stem(w) for w in words})
+                # Las líneas repetidas que tocan la pregunta (p. ej. la dirección del pie) se conservan una vez
+                if (key in seen or (len(seen_in[key]) > 1 and not relevant)
+                        or (len(line) < 160 and _boilerplate.search(line) and not relevant)
+                        or (len(words) <= self.max_nav_words and not relevant and not re.search(r'\d', key))):
+                    dropped += 1
+                    continue
+                seen.add(key)
+                lines.append(line)
+            cleaned.append(lines)
+        return cleaned, dropped
+
+    def _select(self, sentences: list, weights: dict, budget: int) -> list:
+        scored = []
+        for position, (sentence, terms) in enumerate(sentences):
+            score = sum(weights.get(term, 0) for term in terms)
+            scored.append((-score, position, sentence))
+        kept, used = [], 0
+        for _, position, sentence in sorted(scored):
+            if used >= budget:
+                break
+            kept.append((position, sentence))
+            used += len(sentence) + 1
+        return [sentence for _, sentence in sorted(kept)]
+
+    def compress(self, results: list, query: str) -> tuple:
+        """
+        Args:
+            results (list): Search results ('raw_content' or 'content' is compressed).
+            query (str): The user's question.
+
+        Returns:
+            tuple: (results, stats). New result dicts (the input, which may be
+                cached, is not modified) and 'original_chars', 'compressed_chars',
+                'ratio' and 'boilerplate_lines'.
+        """
+        query_terms = _terms(_normalize(query))
+        for term in list(query_terms):
+            query_terms |= EXPANSIONS.get(term, set())
+        keys = ['raw_content' if result.get('raw_content') else 'content' for result in results]
+        texts = [result.get(key) or '' for result, key in zip(results, keys)]
+        cleaned, dropped = self._clean_lines([text[:self.max_page_chars] for text in texts], query_terms)
+
+        # Oraciones de cada página, sin las repetidas (en la misma página o en otra)
+        pages, seen = [], set()
+        for lines in cleaned:
+            sentences = []
+            for sentence in (s.strip() for line in lines for s in _sentence_end.split(line)):
+                key = _normalize(sentence)
+                if key and key not in seen:
+                    seen.add(key)
+                    sentences.append((sentence, _terms(key)))
+            pages.append(sentences)
+        # Peso idf de cada término de la pregunta sobre todas las oraciones
+        sentence_terms = [terms for page in pages for _, terms in page]
+        total = len(sentence_terms) or 1
+        weights = {
+            term: math.log(1 + total / (1 + sum(term in terms for terms in sentence_terms)))
+            for term in query_terms
+        }
+
+        compressed = []
+        for result, key, text, lines, sentences in zip(results, keys, texts, cleaned, pages):
+            new_result = dict(result.items())
+            if len(text) >= self.min_chars:
+                budget = int(min(len(text), self.max_page_chars) * self.target_ratio)
+                new_result[key] = ' '.join(self._select(sentences, weights, budget))
+            else:
+                new_result[key] = '\n'.join(lines)
+            compressed.append(new_result)
+
+        original_chars = sum(len(text) for text in texts)
+        compressed_chars = sum(len(r[key] or '') for r, key in zip(compressed, keys))
+        stats = {
+            'original_chars': original_chars,
+            'compressed_chars': compressed_chars,
+            'ratio': round(compressed_chars / original_chars, 3) if original_chars else 1.0,
+            'boilerplate_lines': dropped,
+        }
+        return compressed, stats
+
+def get_compressor() -> ContextCompressor:
+    """
+    Returns:
+        ContextCompressor: The process-wide compressor configured in the
+            'compression' section of config.json, or None when disabled.
+    """
+    global _compressor
+    config = get_section('compression')
+    if not config.get('enabled', True):
+        return None
+    if _compressor is None:
+        with _compressor_lock:
+            if _compressor is None:
+                _compressor = ContextCompressor(
+                    target_ratio=config.get('target_ratio', 0.5),
+                    min_chars=config.get('min_chars', 1200),
+                    max_nav_words=config.get('max_nav_words', 3),
+                    max_page_chars=config.get('max_page_chars', 20000),
+                )
+    return _compressor
+
+def compress_results(results: list, query: str) -> list:
+    """
+    Compresses the results with the configured compressor, exports the
+    compression ratio and marks the current request, so the LLM latency of
+    compressed and full contexts can be compared.
+
+    Args:
+        results (list): Search results.
+        query (str): The user's question.
+
+    Returns:
+        list: The compressed results (the same list when compression is disabled).
+    """
+    if not results:
+        return results
+    context = current_request()
+    compressor = get_compressor()
+    if compressor is None:
+        # Sin compresión: la latencia del LLM se etiqueta como contexto completo
+        if context is not None:
+            context.context_compression = 1.0
+        return results
+    compressed, stats = compressor.compress(results, query)
+    # Porcentaje conservado (los resúmenes de métricas agrupan valores desde 1)
+    metrics.observe('context_kept_percent', stats['ratio'] * 100)
+    metrics.inc('context_chars_total', stats['original_chars'], stage='original')
+    metrics.inc('context_chars_total', stats['compressed_chars'], stage='compressed')
+    metrics.inc('context_boilerplate_lines_total', stats['boilerplate_lines'])
+    if context is not None:
+        context.context_compression = stats['ratio']
+    return compressed
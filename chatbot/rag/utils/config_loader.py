@@ -0,0 +1,61 @@
+# ./chatbot/rag/utils/config_loader.py
+
+import os
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'config.json')
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+_config = None
+_config_lock = threading.Lock()
+
+def get_config() -> dict:
+    """
+    Returns the parsed config.json, reading it from disk only once per process.
+
+    Returns:
+        dict: The full configuration dictionary (empty if the file cannot be read).
+    """
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                try:
+                    with open(CONFIG_PATH, 'r', encoding='utf-8') as config_file:
+                        _config = json.load(config_file)
+                    logger.info("Configuración 'config' cargada correctamente.")
+                except Exception as e:
+                    logger.error(f"No se pudo leer la configuración {CONFIG_PATH}: {e}")
+                    _config = {}
+    return _config
+
+def get_section(name: str, default: dict = None) -> dict:
+    """
+    Returns a top-level section of config.json.
+
+    Args:
+        name (str): The section name (e.g. 'retrieval').
+        default (dict): Value returned when the section is missing.
+
+    Returns:
+        dict: The section contents.
+    """
+    return get_config().get(name, default if default is not None else {})
+
+def resolve_path(path: str) -> str:
+    """
+    Resolves a path from config.json relative to the project root.
+
+    Args:
+        path (str): Absolute path or path relative to the project root.
+
+    Returns:
+        str: The absolute path.
+    """
+    if os.path.isabs(path):
+        return path
+    return os.path.join(PROJECT_ROOT, path)
@@ -0,0 +1,112 @@
+# ./chatbot/rag/utils/deadline.py
+
+import time
+
+from chatbot.rag.utils.config_loader import get_section
+from chatbot.rag.utils.request_context import current_request
+
+class Deadline:
+    """
+    Absolute point in time (monotonic clock) by which a request must be
+    answered. Each stage sizes its own timeouts from what is left.
+    """
+
+    def __init__(self, seconds: float):
+        """
+        Args:
+            seconds (float): Budget from now.
+        """
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """
+        Returns:
+            float: Seconds left (0 when expired).
+        """
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """
+        Returns:
+            bool: True when no time is left.
+        """
+        return self.remaining() <= 0
+
+    def timeout(self, cap: float = None, reserve: float = 0.0) -> float:
+        """
+        Timeout for one stage: what is left after keeping 'reserve' seconds
+        for later stages, never more than 'cap'.
+
+        Args:
+            cap (float): The stage's own maximum timeout.
+            reserve (float): Seconds kept for the stages that follow.
+
+        Returns:
+            float: Seconds this stage may use (0 when none are left).
+        """
+        available = max(0.0, self.remaining() - reserve)
+        return available if cap is None else min(cap, available)
+
+def deadline_for(endpoint: str) -> Deadline:
+    """
+    Creates the deadline of a request from the per-endpoint budgets in the
+    'deadlines' section of config.json.
+
+    Args:
+        endpoint (str): Endpoint name (e.g. 'send_message').
+
+    Returns:
+        Deadline: A deadline starting now.
+    """
+    deadlines_config = get_section('deadlines')
+    seconds = deadlines_config.get('endpoints', {}).get(endpoint, deadlines_config.get('default_seconds', 30))
+    return Deadline(seconds)
+
+def current_deadline(deadline: Deadline = None) -> Deadline:
+    """
+    Resolves the deadline a stage should honour: the one passed explicitly or
+    the one of the request being served.
+
+    Args:
+        deadline (Deadline): Explicit deadline, if the caller has one.
+
+    Returns:
+        Deadline: The deadline, or None outside a request without budget.
+    """
+    if deadline is not None:
+        return deadline
+    context = current_request()
+    return context.deadline if context is not None else None
+
+def stage_timeout(default: float, deadline: Deadline = None, reserve: float = 0.0) -> float:
+    """
+    Timeout for an outbound call: the stage default, shortened to the time
+    left on the request deadline (if any).
+
+    Args:
+        default (float): Timeout used when there is no deadline.
+        deadline (Deadline): Explicit deadline (defaults to the request's).
+        reserve (float): Seconds kept for the stages that follow.
+
+    Returns:
+        float: Seconds the call may take (0 when the budget is exhausted).
+    """
+    deadline = current_deadline(deadline)
+    if deadline is None:
+        return default
+    return deadline.timeout(cap=default, reserve=reserve)
+
+def generation_reserve() -> float:
+    """
+    Returns:
+        float: Seconds the retrieval stages must leave for the LLM call.
+    """
+    return get_section('deadlines').get('generation_reserve_seconds', 6)
+
+def min_call_seconds() -> float:
+    """
+    Returns:
+        float: Smallest timeout worth starting an outbound call with.
+    """
+    return get_section('deadlines').get('min_call_seconds', 1.0)
@@ -0,0 +1,265 @@
+# ./chatbot/rag/utils/health.py
+
+import os
+import time
+import logging
+import threading
+from urllib.parse import urlsplit
+
+from chatbot.rag.utils import metrics
+from chatbot.rag.utils.config_loader import get_section
+
+logger = logging.getLogger(__name__)
+
+_health_monitor = None
+_monitor_lock = threading.Lock()
+
+# Errores que no se arreglan reintentando: el nodo no puede atender hasta que cambie la configuración
+FATAL_ERRORS = ('api_key_missing', 'invalid_api_key', 'unauthorized', 'usage_limit')
+
+def http_error_reason(status_code: int) -> str:
+    """
+    Returns:
+        str: Reason reported for an HTTP error of a provider API.
+    """
+    if status_code in (401, 403):
+        return 'unauthorized'
+    if status_code == 402:
+        return 'usage_limit'
+    if status_code == 429:
+        return 'rate_limited'
+    return 'http_error'
+
+class HealthMonitor:
+    """
+    Readiness of the process' dependencies. Each check runs on a background
+    thread every 'interval_seconds' and its result is kept, so a probe only
+    reads a dict. Calls made while serving traffic report their outcome with
+    report(), which keeps the last success and error of each dependency
+    between checks. The node is ready when every critical check passes.
+    """
+
+    def __init__(self, checks: dict, critical: list, interval_seconds: float = 15.0):
+        """
+        Args:
+            checks (dict): Dependency name -> function(monitor) returning a dict with at least 'ok'.
+            critical (list): Dependencies that must pass for the node to be ready.
+            interval_seconds (float): Time between two runs of the checks.
+        """
+        self.checks = checks
+        self.critical = list(critical)
+        self.interval_seconds = interval_seconds
+        self.results = {}
+        self.checked_at = None
+        self._outcomes = {}
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """
+        Starts the checking thread of this process (threads do not survive a fork).
+        """
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='health-monitor', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while True:
+            self.run_checks()
+            if self._stop.wait(self.interval_seconds):
+                return
+
+    def run_checks(self):
+        """
+        Runs every check once and publishes the results.
+        """
+        results = {}
+        for name, check in self.checks.items():
+            start = time.perf_counter()
+            try:
+                result = dict(check(self))
+            except Exception as e:
+                logger.warning(f"Falló la comprobación de '{name}': {e}")
+                result = {'ok': False, 'error': type(e).__name__}
+            result['latency_ms'] = round((time.perf_counter() - start) * 1000, 1)
+            result.update(self.outcome(name))
+            results[name] = result
+            metrics.set_gauge('dependency_up', int(bool(result['ok'])), dependency=name)
+        self.results = results
+        self.checked_at = time.time()
+
+    def report(self, name: str, ok: bool, error: str = None):
+        """
+        Records the outcome of a real call to a dependency.
+
+        Args:
+            name (str): Dependency ('llm', 'tavily').
+            ok (bool): Whether the call succeeded.
+            error (str): Short reason of the failure ('timeout', 'usage_limit'...).
+        """
+        outcome = self._outcomes.setdefault(name, {})
+        if ok:
+            outcome['last_success'] = time.time()
+        else:
+            outcome['last_error'] = {'at': time.time(), 'error': error or 'error'}
+
+    def outcome(self, name: str) -> dict:
+        """
+        Returns:
+            dict: 'last_success' (timestamp) and 'last_error' ({'at', 'error'}) of the dependency, when known.
+        """
+        return dict(self._outcomes.get(name, {}))
+
+    def failing_fatally(self, name: str) -> str:
+        """
+        Returns:
+            str: The last error of the dependency if it is newer than its last
+                success and retrying will not fix it, else None.
+        """
+        outcome = self._outcomes.get(name, {})
+        error = outcome.get('last_error')
+        if error and error['error'] in FATAL_ERRORS and error['at'] > outcome.get('last_success', 0):
+            return error['error']
+        return None
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+            dict: 'ready', 'status' ('starting', 'ready' or 'not_ready'),
+                'checked_at' and the result of each dependency.
+        """
+        results = self.results
+        if self.checked_at is None:
+            return {'ready': False, 'status': 'starting', 'checked_at': None, 'dependencies': {}}
+        ready = all(results.get(name, {}).get('ok', False) for name in self.critical)
+        return {
+            'ready': ready,
+            'status': 'ready' if ready else 'not_ready',
+            'checked_at': self.checked_at,
+            'critical': self.critical,
+            'dependencies': results,
+        }
+
+def check_handlers(monitor: HealthMonitor) -> dict:
+    from chatbot.rag.handlers.registry import get_registry
+    from chatbot.rag.utils.warmup import is_warm
+
+    handlers = get_registry().stats()
+    return {'ok': bool(handlers), 'handlers': handlers, 'warm': is_warm()}
+
+def check_index(monitor: HealthMonitor) -> dict:
+    from chatbot.rag.utils.hybrid_retriever import retriever_stats
+
+    stats = retriever_stats()
+    return dict(stats, ok=stats['built'] and (stats['local'] or not stats['expected_local']))
+
+def check_http_pool(monitor: HealthMonitor) -> dict:
+    from chatbot.rag.utils.http_client import pool_stats
+
+    return dict(pool_stats(), ok=True)
+
+def check_llm(monitor: HealthMonitor) -> dict:
+    """
+    The API key of every handler that needs one is configured and the hosts
+    of their APIs answer (any HTTP status: the host is reachable). The probe
+    goes through the pooled session, which also keeps its connections alive.
+    """
+    import requests
+    from chatbot.rag.handlers.registry import get_registry
+    from chatbot.rag.utils.http_client import get_http_session
+
+    timeout = get_section('health').get('probe_timeout_seconds', 2.0)
+    hosts, errors = {}, []
+    for handler in get_registry().handlers():
+        if hasattr(handler, 'api_key') and not handler.api_key:
+            errors.append('api_key_missing')
+        url = getattr(handler, 'api_url', None)
+        if url:
+            parts = urlsplit(url)
+            host = f'{parts.scheme}://{parts.netloc}/'
+            if host not in hosts:
+                try:
+                    get_http_session().head(host, timeout=timeout)
+                    hosts[host] = True
+                except requests.RequestException:
+                    hosts[host] = False
+                    errors.append('unreachable')
+    fatal = monitor.failing_fatally('llm')
+    if fatal:
+        errors.append(fatal)
+    return {'ok': not errors, 'hosts': hosts, 'errors': sorted(set(errors))}
+
+def check_tavily(monitor: HealthMonitor) -> dict:
+    """
+    Tavily is not probed actively (each search spends quota): the key must be
+    configured, its circuit closed or half open, and the last call must not
+    have failed with an authentication or quota error.
+    """
+    from chatbot.rag.utils.circuit_breaker import get_circuit_breaker
+
+    errors = []
+    if not os.getenv('TAVILY_API_KEY'):
+        errors.append('api_key_missing')
+    circuit = get_circuit_breaker('tavily').stats()['state']
+    if circuit == 'open':
+        errors.append('circuit_open')
+    fatal = monitor.failing_fatally('tavily')
+    if fatal:
+        errors.append(fatal)
+    return {'ok': not errors, 'circuit': circuit, 'errors': sorted(set(errors))}
+
+# El pool se revisa después del LLM, cuya prueba abre sus conexiones
+CHECKS = {
+    'handler': check_handlers,
+    'index': check_index,
+    'llm': check_llm,
+    'tavily': check_tavily,
+    'http_pool': check_http_pool,
+}
+
+def _get_monitor() -> HealthMonitor:
+    global _health_monitor
+    if _health_monitor is None:
+        with _monitor_lock:
+            if _health_monitor is None:
+                health_config = get_section('health')
+                _health_monitor = HealthMonitor(
+                    CHECKS,
+                    critical=health_config.get('critical', ['handler', 'index', 'llm']),
+                    interval_seconds=health_config.get('interval_seconds', 15.0),
+                )
+    return _health_monitor
+
+def get_health_monitor() -> HealthMonitor:
+    """
+    Returns the process-wide monitor configured in the 'health' section of
+    config.json, starting its thread in the current process.
+
+    Returns:
+        HealthMonitor: The shared monitor.
+    """
+    monitor = _get_monitor()
+    monitor.start()
+    return monitor
+
+def report_dependency(name: str, ok: bool, error: str = None):
+    """
+    Records the outcome of a call to a dependency in the process-wide monitor
+    (without starting its thread).
+
+    Args:
+        name (str): Dependency ('llm', 'tavily').
+        ok (bool): Whether the call succeeded.
+        error (str): Short reason of the failure.
+    """
+    _get_monitor().report(name, ok, error)
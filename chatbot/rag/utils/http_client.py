@@ -0,0 +1,86 @@
+# ./chatbot/rag/utils/http_client.py
+
+import os
+import logging
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from chatbot.rag.utils.config_loader import get_section
+
+logger = logging.getLogger(__name__)
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+def get_http_session() -> requests.Session:
+    """
+    Returns the HTTP session of this process, whose connection pool keeps the
+    TLS connections to the LLM APIs open between requests. Sockets must not
+    be shared between processes, so each forked worker builds its own.
+
+    Returns:
+        requests.Session: The session of the current process.
+    """
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        with _session_lock:
+            if _session is None or _session_pid != os.getpid():
+                http_config = get_section('http')
+                adapter = HTTPAdapter(
+                    pool_connections=http_config.get('pool_connections', 4),
+                    pool_maxsize=http_config.get('pool_maxsize', 16),
+                )
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session, _session_pid = session, os.getpid()
+    return _session
+
+def preconnect(urls: list, timeout: float = 2.0) -> int:
+    """
+    Opens a pooled connection to the host of each URL (a HEAD to its root),
+    so the first request of a worker does not pay DNS and TLS handshakes.
+
+    Args:
+        urls (list): URLs whose hosts will be contacted.
+        timeout (float): Seconds allowed per host.
+
+    Returns:
+        int: Hosts that answered.
+    """
+    session = get_http_session()
+    hosts = {f'{parts.scheme}://{parts.netloc}/' for parts in map(urlsplit, urls) if parts.scheme and parts.netloc}
+    connected = 0
+    for host in sorted(hosts):
+        try:
+            session.head(host, timeout=timeout)
+            connected += 1
+        except requests.RequestException as e:
+            logger.warning(f'No se pudo preconectar con {host}: {e}')
+    return connected
+
+def pool_stats() -> dict:
+    """
+    Returns:
+        dict: Connection pools of this process' session per host: connections
+            opened, requests sent and the configured pool size.
+    """
+    session = _session if _session_pid == os.getpid() else None
+    if session is None:
+        return {'open': False, 'pools': {}}
+    pools = {}
+    for adapter in set(session.adapters.values()):
+        manager = adapter.poolmanager
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is not None:
+                pools[f'{pool.scheme}://{pool.host}:{pool.port}'] = {
+                    'connections': pool.num_connections,
+                    'requests': pool.num_requests,
+                    'maxsize': pool.pool.maxsize if pool.pool is not None else 0,
+                }
+    return {'open': True, 'pools': pools}
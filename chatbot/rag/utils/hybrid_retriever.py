@@ -0,0 +1,305 @@
+# ./chatbot/rag/utils/hybrid_retriever.py
+
+import os
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import wait, FIRST_COMPLETED
+from chatbot.rag.utils.config_loader import get_section, resolve_path
+from chatbot.rag.utils.deadline import current_deadline, generation_reserve
+from chatbot.rag.utils.search_memo import memoized
+from chatbot.rag.utils.text_utils import normalize_question
+from chatbot.rag.utils.process_local import ProcessExecutor
+
+logger = logging.getLogger(__name__)
+
+_hybrid_retriever = None
+_hybrid_lock = threading.Lock()
+
+def reciprocal_rank_fusion(result_lists: list, k: int = 60) -> list:
+    """
+    Fuses several ranked result lists with reciprocal-rank fusion (RRF).
+
+    Each result receives sum(1 / (k + rank)) over the lists it appears in; results
+    are identified by their 'chunk_id' (local PDF chunks) or their 'url' (web pages),
+    so the same chunk or page found by two retrievers is merged while different
+    chunks of one PDF page stay apart.
+
+    Args:
+        result_lists (list): Lists of result dicts, each ordered best-first.
+        k (int): RRF smoothing constant.
+
+    Returns:
+        list: Fused result dicts ordered by descending 'rrf_score'.
+    """
+    fused = {}
+    for results in result_lists:
+        for rank, result in enumerate(results or []):
+            if 'chunk_id' in result:
+                key = ('chunk', result['chunk_id'])
+            else:
+                key = result.get('url') or result.get('title') or id(result)
+            entry = fused.get(key)
+            if entry is None:
+                entry = fused[key] = result.copy()
+                entry['rrf_score'] = 0.0
+            else:
+                # Conservar los campos que solo trae la otra lista (p. ej. 'dense_score')
+                for field, value in result.items():
+                    entry.setdefault(field, value)
+            entry['rrf_score'] += 1.0 / (k + rank + 1)
+    return sorted(fused.values(), key=lambda r: r['rrf_score'], reverse=True)
+
+class LocalIndex:
+    """
+    Scored wrapper around the TF-IDF retriever built from the institutional PDFs,
+    optionally complemented by a dense (LSA) retriever over the same chunks.
+    """
+
+    def __init__(self, tfidf_retriever, dense_retriever=None, rrf_k: int = 60):
+        """
+        Args:
+            tfidf_retriever (TFIDFRetriever): Retriever returned by utils.load_documents_database.
+            dense_retriever (DenseRetriever): Optional dense retriever built from the same chunks.
+            rrf_k (int): RRF smoothing constant used to fuse sparse and dense hits.
+        """
+        self.retriever = tfidf_retriever
+        self.dense = dense_retriever
+        self.rrf_k = rrf_k
+
+    def _chunk_result(self, i: int, score: float) -> dict:
+        doc = self.retriever.docs[i]
+        source = os.path.basename(doc.metadata.get('source', 'documento.pdf'))
+        page = doc.metadata.get('page')
+        return {
+            'chunk_id': int(i),
+            'title': source,
+            # Solo para mostrar la fuente: varios fragmentos comparten la misma página
+            'url': f"{source}#page={page + 1}" if isinstance(page, int) else source,
+            'content': doc.page_content,
+            'score': score,
+            'source_type': 'local',
+        }
+
+    def search(self, query: str, top_k: int) -> list:
+        """
+        Returns the top_k chunks for the query as web-search-shaped result dicts.
+
+        Args:
+            query (str): The user's query.
+            top_k (int): Maximum number of chunks to return.
+
+        Returns:
+            list: Result dicts with 'chunk_id', 'title', 'url', 'content', 'score'
+            (TF-IDF cosine) and 'source_type'; dense hits also carry 'dense_score'.
+        """
+        query_vec = self.retriever.vectorizer.transform([query])
+        scores = (self.retriever.tfidf_array @ query_vec.T).toarray().reshape(-1)
+        sparse_results = []
+        for i in scores.argsort()[::-1][:top_k]:
+            if scores[i] <= 0:
+                break
+            sparse_results.append(self._chunk_result(i, float(scores[i])))
+        if self.dense is None:
+            return sparse_results
+
+        dense_results = []
+        for i, dense_score in self.dense.search(query, top_k):
+            result = self._chunk_result(i, float(scores[i]))
+            result['dense_score'] = dense_score
+            dense_results.append(result)
+        # Fusión por índice de fragmento ('chunk_id'), no por página
+        return reciprocal_rank_fusion([sparse_results, dense_results], k=self.rrf_k)[:top_k]
+
+class HybridRetriever:
+    """
+    Queries the local PDF index and the web search concurrently under a shared
+    deadline and fuses both rankings with reciprocal-rank fusion.
+    """
+
+    def __init__(self, local_index, web_search, local_top_k: int = 4, skip_web_score: float = 0.35,
+                 deadline_seconds: float = 8.0, local_grace_seconds: float = 0.05, rrf_k: int = 60,
+                 max_workers: int = 8):
+        """
+        Args:
+            local_index (LocalIndex): Local PDF index, or None when no PDFs are available.
+            web_search (callable): Function query -> list of result dicts (e.g. search_web).
+            local_top_k (int): Number of local chunks to retrieve.
+            skip_web_score (float): Local cosine score above which the web search is skipped.
+            deadline_seconds (float): Shared deadline for both retrievers.
+            local_grace_seconds (float): Time the local index gets before the web search starts.
+            rrf_k (int): RRF smoothing constant.
+            max_workers (int): Size of the retrieval thread pool.
+        """
+        self.local_index = local_index
+        self.web_search = web_search
+        self.local_top_k = local_top_k
+        self.skip_web_score = skip_web_score
+        self.deadline_seconds = deadline_seconds
+        self.local_grace_seconds = local_grace_seconds
+        self.rrf_k = rrf_k
+        self.executor = ProcessExecutor(max_workers=max_workers, thread_name_prefix='hybrid')
+
+    def _submit(self, fn, *args):
+        # Propagar el contexto de la petición (contextvars) al hilo del pool
+        ctx = contextvars.copy_context()
+        return self.executor.submit(ctx.run, fn, *args)
+
+    def _web_search(self, web_query: str) -> list:
+        # Dentro de un lote, las consultas web iguales se resuelven una sola vez
+        results = memoized(('web', normalize_question(web_query)), lambda: self.web_search(web_query))
+        return list(results or [])
+
+    def _local_search(self, query: str) -> list:
+        try:
+            return self.local_index.search(query, self.local_top_k)
+        except Exception:
+            logger.error('Error en la búsqueda local de documentos.', exc_info=True)
+            return []
+
+    def search(self, query: str, web_query: str = None) -> list:
+        """
+        Runs the hybrid retrieval for a query.
+
+        Args:
+            query (str): The user's query, used against the local index.
+            web_query (str): Query sent to the web search (defaults to query).
+
+        Returns:
+            list: Fused result dicts, best first.
+        """
+        web_query = web_query or query
+        if self.local_index is None:
+            return self._web_search(web_query)
+
+        deadline = time.monotonic() + self.deadline_seconds
+        request_deadline = current_deadline()
+        if request_deadline is not None:
+            # La recuperación no puede consumir el tiempo reservado para la generación
+            deadline = min(deadline, request_deadline.expires_at - generation_reserve())
+        local_future = self._submit(self._local_search, query)
+
+        # La búsqueda local es rápida: si termina dentro del margen con puntaje alto, se omite la web
+        try:
+            local_results = local_future.result(timeout=self.local_grace_seconds)
+        except Exception:
+            local_results = None
+        best_local = max((r['score'] for r in local_results or []), default=0.0)
+        if best_local >= self.skip_web_score:
+            logger.info(f"Resultados locales suficientes (score={best_local:.2f}); se omite la búsqueda web")
+            return local_results
+
+        web_future = self._submit(self._web_search, web_query)
+        pending = {web_future} if local_results is not None else {web_future, local_future}
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            _, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+
+        if local_results is None:
+            local_results = local_future.result() if local_future.done() else []
+        web_results = []
+        if web_future.done():
+            try:
+                web_results = web_future.result() or []
+            except Exception:
+                logger.error('Error en la búsqueda web híbrida.', exc_info=True)
+        else:
+            logger.warning("La búsqueda web superó el plazo de recuperación; se usan solo resultados locales")
+
+        if not web_results:
+            return local_results
+        if not local_results:
+            return web_results
+        return reciprocal_rank_fusion([web_results, local_results], k=self.rrf_k)
+
+def get_hybrid_retriever() -> HybridRetriever:
+    """
+    Returns the process-wide hybrid retriever, building the local index on first use.
+
+    Returns:
+        HybridRetriever: The configured retriever (web-only when no PDFs are available).
+    """
+    global _hybrid_retriever
+    if _hybrid_retriever is None:
+        with _hybrid_lock:
+            if _hybrid_retriever is None:
+                from websearch.search import search_web
+                retrieval_config = get_section('retrieval')
+                local_index = None
+                docs_directory = resolve_path(retrieval_config.get('docs_directory', 'chatbot/docs'))
+                if retrieval_config.get('local_enabled', True) and _has_pdfs(docs_directory):
+                    try:
+                        from chatbot.rag.utils import utils
+                        tfidf_retriever = utils.load_documents_database(
+                            docs_directory,
+                            retrieval_config.get('chunk_size', 500),
+                            retrieval_config.get('chunk_overlap', 0),
+                        )
+                        local_index = LocalIndex(
+                            tfidf_retriever,
+                            _build_dense_retriever(tfidf_retriever, retrieval_config.get('dense', {})),
+                            rrf_k=retrieval_config.get('rrf_k', 60),
+                        )
+                    except Exception:
+                        logger.error('No se pudo construir el índice local de PDFs.', exc_info=True)
+                else:
+                    logger.info(f"Sin PDFs en {docs_directory}; la recuperación será solo web")
+                _hybrid_retriever = HybridRetriever(
+                    local_index,
+                    search_web,
+                    local_top_k=retrieval_config.get('local_top_k', 4),
+                    skip_web_score=retrieval_config.get('skip_web_score', 0.35),
+                    deadline_seconds=retrieval_config.get('deadline_seconds', 8.0),
+                    local_grace_seconds=retrieval_config.get('local_grace_seconds', 0.05),
+                    rrf_k=retrieval_config.get('rrf_k', 60),
+                    max_workers=retrieval_config.get('max_workers', 8),
+                )
+    return _hybrid_retriever
+
+def retriever_stats() -> dict:
+    """
+    Reports the state of the retriever without building it.
+
+    Returns:
+        dict: 'built', 'local' (local index loaded), 'chunks' and 'expected_local'
+            (PDFs are configured, so a missing local index means it failed to load).
+    """
+    retrieval_config = get_section('retrieval')
+    expected = bool(retrieval_config.get('local_enabled', True)) and _has_pdfs(
+        resolve_path(retrieval_config.get('docs_directory', 'chatbot/docs')))
+    retriever = _hybrid_retriever
+    local_index = retriever.local_index if retriever is not None else None
+    return {
+        'built': retriever is not None,
+        'local': local_index is not None,
+        'chunks': len(local_index.retriever.docs) if local_index is not None else 0,
+        'expected_local': expected,
+    }
+
+def _has_pdfs(directory: str) -> bool:
+    if not os.path.isdir(directory):
+        return False
+    for _, _, files in os.walk(directory):
+        if any(f.lower().endswith('.pdf') for f in files):
+            return True
+    return False
+
+def _build_dense_retriever(tfidf_retriever, dense_config: dict):
+    if not dense_config.get('enabled', False):
+        return None
+    try:
+        from chatbot.rag.utils.dense_retriever import DenseRetriever
+        return DenseRetriever(
+            [doc.page_content for doc in tfidf_retriever.docs],
+            n_components=dense_config.get('n_components', 128),
+            n_features=dense_config.get('n_features', 2 ** 18),
+            index=dense_config.get('index', 'bruteforce'),
+            nlist=dense_config.get('nlist', 32),
+            nprobe=dense_config.get('nprobe', 4),
+        )
+    except Exception:
+        logger.error('No se pudo construir el índice denso; se usa solo TF-IDF.', exc_info=True)
+        return None
@@ -0,0 +1,328 @@
+# ./chatbot/rag/utils/interaction_logger.py
+
+import os
+import csv
+import gzip
+import time
+import queue
+import atexit
+import shutil
+import logging
+import threading
+from datetime import datetime
+from chatbot.rag.utils.config_loader import get_section, resolve_path
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CSV_HEADER = [
+    'Token', 'Time', 'User Message', 'Response', 'Endpoint', 'Provider', 'Model', 'Latency Ms',
+    'Cache Hit', 'Search Calls', 'LLM Calls', 'Prompt Tokens', 'Completion Tokens', 'LLM Ms',
+]
+
+_interaction_logger = None
+_logger_lock = threading.Lock()
+
+class CsvInteractionSink:
+    """
+    Appends interaction rows to a CSV file under an inter-process file lock,
+    rotating and gzipping the file when it grows too large.
+    """
+
+    name = 'csv'
+
+    def __init__(self, file_path: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 20):
+        """
+        Args:
+            file_path (str): Path of the active CSV file.
+            max_bytes (int): Size at which the active file is rotated and gzipped.
+            backup_count (int): Number of rotated .gz files to keep.
+        """
+        self.file_path = file_path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotations = 0
+        self._header_checked = False
+
+    def _format_row(self, record: dict) -> list:
+        from chatbot.rag.utils.utils import clean_markdown_message
+        return [
+            record.get('token', ''),
+            record.get('time', ''),
+            record.get('user_message', ''),
+            clean_markdown_message(record.get('response') or ''),
+            record.get('endpoint', ''),
+            record.get('provider', ''),
+            record.get('model', ''),
+            _blank_if_none(record.get('latency_ms')),
+            int(bool(record.get('cache_hit'))),
+            record.get('search_calls', 0),
+            record.get('llm_calls', 0),
+            _blank_if_none(record.get('prompt_tokens')),
+            _blank_if_none(record.get('completion_tokens')),
+            _blank_if_none(record.get('llm_ms')),
+        ]
+
+    def write(self, batch: list):
+        """
+        Args:
+            batch (list): Interaction records to append.
+        """
+        rows = [self._format_row(record) for record in batch]
+        rotated = []
+        with open(self.file_path + '.lock', 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # Un archivo con el encabezado antiguo se rota antes de agregar filas con columnas nuevas
+                if not self._header_checked and self._has_stale_header():
+                    rotated.append(self._rotate())
+                self._header_checked = True
+                write_header = not os.path.exists(self.file_path) or os.path.getsize(self.file_path) == 0
+                with open(self.file_path, mode='a', newline='', encoding='utf-8') as file:
+                    writer = csv.writer(file)
+                    if write_header:
+                        writer.writerow(CSV_HEADER)
+                    writer.writerows(rows)
+                if os.path.getsize(self.file_path) >= self.max_bytes:
+                    rotated.append(self._rotate())
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        for path in rotated:
+            self._compress(path)
+
+    def _has_stale_header(self) -> bool:
+        if not os.path.exists(self.file_path) or os.path.getsize(self.file_path) == 0:
+            return False
+        with open(self.file_path, newline='', encoding='utf-8') as file:
+            return next(csv.reader(file), None) != CSV_HEADER
+
+    def _rotate(self) -> str:
+        base, ext = os.path.splitext(self.file_path)
+        rotated = f"{base}.{datetime.now().strftime('%Y%m%d%H%M%S')}.{os.getpid()}.{self.rotations}{ext}"
+        os.replace(self.file_path, rotated)
+        self.rotations += 1
+        return rotated
+
+    def _compress(self, rotated: str):
+        # La compresión se hace fuera del bloqueo para no frenar a los demás procesos
+        try:
+            with open(rotated, 'rb') as src, gzip.open(rotated + '.gz', 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(rotated)
+            self._prune_backups()
+        except Exception as e:
+            logger.error(f"Error al comprimir {rotated}: {e}")
+
+    def _prune_backups(self):
+        directory = os.path.dirname(self.file_path) or '.'
+        prefix = os.path.splitext(os.path.basename(self.file_path))[0] + '.'
+        backups = sorted(
+            os.path.join(directory, f) for f in os.listdir(directory)
+            if f.startswith(prefix) and f.endswith('.gz')
+        )
+        for old in backups[:-self.backup_count] if self.backup_count else []:
+            os.remove(old)
+
+class DatabaseInteractionSink:
+    """
+    Inserts interaction rows into the Interaction model with bulk_create.
+    """
+
+    name = 'database'
+
+    def __init__(self, bulk_batch_size: int = 500):
+        """
+        Args:
+            bulk_batch_size (int): Rows per INSERT statement.
+        """
+        self.bulk_batch_size = bulk_batch_size
+
+    def write(self, batch: list):
+        """
+        Args:
+            batch (list): Interaction records to insert.
+        """
+        from django.db import close_old_connections
+        from django.utils import timezone
+        from chatbot.models import Interaction
+        from chatbot.rag.utils.text_utils import normalize_question
+
+        close_old_connections()
+        rows = []
+        for record in batch:
+            created_at = datetime.strptime(record.get('time'), '%Y%m%d%H%M%S')
+            rows.append(Interaction(
+                token=(record.get('token') or '')[:255],
+                created_at=timezone.make_aware(created_at) if timezone.is_naive(created_at) else created_at,
+                message=record.get('user_message') or '',
+                normalized_question=normalize_question(record.get('user_message')),
+                response=record.get('response') or '',
+                endpoint=record.get('endpoint', ''),
+                provider=record.get('provider', ''),
+                model=record.get('model', '') or '',
+                latency_ms=record.get('latency_ms'),
+                cache_hit=bool(record.get('cache_hit')),
+                search_calls=record.get('search_calls', 0),
+                llm_calls=record.get('llm_calls', 0),
+                prompt_tokens=record.get('prompt_tokens'),
+                completion_tokens=record.get('completion_tokens'),
+                llm_ms=record.get('llm_ms'),
+            ))
+        Interaction.objects.bulk_create(rows, batch_size=self.bulk_batch_size)
+
+class InteractionLogger:
+    """
+    Queue-backed interaction logger. The request thread only enqueues a record;
+    a background thread batches records and hands each batch to the configured
+    sinks (CSV file and/or database).
+    """
+
+    def __init__(self, sinks: list, batch_size: int = 100, flush_interval: float = 2.0, max_queue: int = 10000):
+        """
+        Args:
+            sinks (list): Objects with a write(batch) method and a name.
+            batch_size (int): Records written per flush when the queue is busy.
+            flush_interval (float): Maximum seconds a record waits before being flushed.
+            max_queue (int): Queue capacity; records beyond it are dropped (and counted).
+        """
+        self.sinks = sinks
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = {sink.name: 0 for sink in sinks}
+        self.last_flush = None
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def _ensure_started(self):
+        # El hilo no sobrevive a un fork: se reinicia en cada proceso hijo
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='interaction-logger', daemon=True)
+                self._thread.start()
+
+    def log(self, record: dict) -> bool:
+        """
+        Enqueues a record without blocking the caller.
+
+        Args:
+            record (dict): Keys 'token', 'time', 'user_message', 'response' and
+                optional accounting fields ('latency_ms', 'provider', 'cache_hit'...).
+
+        Returns:
+            bool: False if the queue was full and the record was dropped.
+        """
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _run(self):
+        while True:
+            batch = self._drain(block=True)
+            if batch:
+                self._write_batch(batch)
+
+    def _drain(self, block: bool) -> list:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if block and timeout > 0:
+                    batch.append(self.queue.get(timeout=timeout))
+                else:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self):
+        """
+        Writes every queued record synchronously (used at shutdown).
+        """
+        while True:
+            batch = self._drain(block=False)
+            if not batch:
+                return
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: list):
+        with self._flush_lock:
+            for sink in self.sinks:
+                try:
+                    sink.write(batch)
+                except Exception as e:
+                    self.errors[sink.name] += 1
+                    logger.error(f"Error al guardar {len(batch)} interacciones en el destino '{sink.name}': {e}")
+            self.written += len(batch)
+            self.batches += 1
+            self.last_flush = time.time()
+        logger.debug(f"Registro de interacciones: {len(batch)} filas guardadas")
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Queue depth and write counters of the logger in this process.
+        """
+        return {
+            'queue_depth': self.queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'batches': self.batches,
+            'errors': dict(self.errors),
+            'last_flush': self.last_flush,
+        }
+
+def _blank_if_none(value):
+    return '' if value is None else value
+
+def get_interaction_logger() -> InteractionLogger:
+    """
+    Returns the process-wide interaction logger configured from config.json.
+
+    Returns:
+        InteractionLogger: The shared logger instance.
+    """
+    global _interaction_logger
+    if _interaction_logger is None:
+        with _logger_lock:
+            if _interaction_logger is None:
+                log_config = get_section('interaction_log')
+                sinks = []
+                for sink_name in log_config.get('sinks', ['csv', 'database']):
+                    if sink_name == 'csv':
+                        sinks.append(CsvInteractionSink(
+                            resolve_path(log_config.get('file_path', 'chatbot/rag/database/log_message_interaction.csv')),
+                            max_bytes=log_config.get('max_bytes', 10 * 1024 * 1024),
+                            backup_count=log_config.get('backup_count', 20),
+                        ))
+                    elif sink_name == 'database':
+                        sinks.append(DatabaseInteractionSink(bulk_batch_size=log_config.get('bulk_batch_size', 500)))
+                    else:
+                        logger.warning(f"Destino de registro desconocido: {sink_name}")
+                _interaction_logger = InteractionLogger(
+                    sinks,
+                    batch_size=log_config.get('batch_size', 100),
+                    flush_interval=log_config.get('flush_interval_seconds', 2.0),
+                    max_queue=log_config.get('max_queue', 10000),
+                )
+                atexit.register(_interaction_logger.flush)
+    return _interaction_logger
@@ -0,0 +1,105 @@
+# ./chatbot/rag/utils/metrics.py
+
+import threading
+
+from chatbot.rag.utils.stream_stats import LatencyHistogram
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_summaries = {}
+
+def _key(name: str, labels: dict) -> tuple:
+    return (name, tuple(sorted(labels.items())))
+
+def inc(name: str, value: float = 1, **labels):
+    """
+    Increments a counter.
+
+    Args:
+        name (str): Metric name (e.g. 'scheduler_shed_total').
+        value (float): Amount to add.
+        **labels: Label values (e.g. provider='deepseek').
+    """
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def set_gauge(name: str, value: float, **labels):
+    """
+    Sets a gauge to its current value.
+
+    Args:
+        name (str): Metric name (e.g. 'scheduler_queue_depth').
+        value (float): Current value.
+        **labels: Label values.
+    """
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+def observe(name: str, value: float, **labels):
+    """
+    Records an observation (latency, size...) in a fixed-memory summary.
+
+    Args:
+        name (str): Metric name (e.g. 'scheduler_wait_ms').
+        value (float): Observed value.
+        **labels: Label values.
+    """
+    key = _key(name, labels)
+    with _lock:
+        summary = _summaries.get(key)
+        if summary is None:
+            summary = _summaries[key] = LatencyHistogram()
+        summary.add(value)
+
+def snapshot() -> dict:
+    """
+    Returns:
+        dict: 'counters', 'gauges' and 'summaries', each a list of
+        {'name', 'labels', 'value'} entries (summaries carry count/mean/p50/p95/p99/max).
+    """
+    with _lock:
+        return {
+            'counters': [_entry(key, value) for key, value in sorted(_counters.items())],
+            'gauges': [_entry(key, value) for key, value in sorted(_gauges.items())],
+            'summaries': [_entry(key, summary.summary()) for key, summary in sorted(_summaries.items(), key=lambda kv: kv[0])],
+        }
+
+def render_prometheus() -> str:
+    """
+    Returns:
+        str: The metrics in the Prometheus text exposition format.
+    """
+    data = snapshot()
+    lines = []
+    for kind, entries in (('counter', data['counters']), ('gauge', data['gauges'])):
+        for name in sorted({entry['name'] for entry in entries}):
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(f"{name}{_labels(entry['labels'])} {entry['value']}" for entry in entries if entry['name'] == name)
+    for name in sorted({entry['name'] for entry in data['summaries']}):
+        lines.append(f'# TYPE {name} summary')
+        for entry in (e for e in data['summaries'] if e['name'] == name):
+            value = entry['value']
+            for quantile in ('p50', 'p95', 'p99'):
+                if value[quantile] is not None:
+                    labels = dict(entry['labels'], quantile=str(int(quantile[1:]) / 100))
+                    lines.append(f"{name}{_labels(labels)} {value[quantile]}")
+            lines.append(f"{name}_count{_labels(entry['labels'])} {value['count']}")
+            lines.append(f"{name}_sum{_labels(entry['labels'])} {round((value['mean'] or 0) * value['count'], 1)}")
+    return '\n'.join(lines) + '\n'
+
+def reset():
+    """Clears every metric (used by tests)."""
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _summaries.clear()
+
+def _entry(key: tuple, value) -> dict:
+    return {'name': key[0], 'labels': dict(key[1]), 'value': value}
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in sorted(labels.items())) + '}'
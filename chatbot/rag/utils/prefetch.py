@@ -0,0 +1,113 @@
+# ./chatbot/rag/utils/prefetch.py
+
+import logging
+import threading
+
+from chatbot.rag.utils import metrics
+from chatbot.rag.utils.config_loader import get_section
+from chatbot.rag.utils.process_local import ProcessExecutor
+from chatbot.rag.utils.text_utils import normalize_question
+
+logger = logging.getLogger(__name__)
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+class Prefetcher:
+    """
+    Warms the search cache for questions the user is still typing. Work runs
+    on a small dedicated pool with a bounded backlog, so prefetches never
+    compete with answered requests for retrieval workers: when the backlog is
+    full or the service is busy they are dropped, and identical questions
+    already in flight are not searched twice.
+    """
+
+    def __init__(self, search_fn, max_workers: int = 1, max_pending: int = 16, min_chars: int = 12, min_words: int = 3):
+        """
+        Args:
+            search_fn (callable): Function query -> results that fills the cache (search_web).
+            max_workers (int): Threads running prefetches.
+            max_pending (int): Prefetches queued or running before new ones are dropped.
+            min_chars (int): Shortest question worth prefetching.
+            min_words (int): Fewest words of a question worth prefetching.
+        """
+        self.search_fn = search_fn
+        self.max_pending = max_pending
+        self.min_chars = min_chars
+        self.min_words = min_words
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._executor = ProcessExecutor(max_workers=max_workers, thread_name_prefix='prefetch')
+
+    def submit(self, query: str, busy: bool = False) -> str:
+        """
+        Schedules a cache-warming search for a partial question.
+
+        Args:
+            query (str): The question as typed so far (already refined by the handler).
+            busy (bool): True when requests are waiting for the provider; prefetch yields to them.
+
+        Returns:
+            str: 'scheduled', 'duplicate', 'too_short', 'busy' or 'full'.
+        """
+        key = normalize_question(query)
+        if len(key) < self.min_chars or len(key.split()) < self.min_words:
+            status = 'too_short'
+        elif busy:
+            status = 'busy'
+        else:
+            with self._lock:
+                if key in self._in_flight:
+                    status = 'duplicate'
+                elif len(self._in_flight) >= self.max_pending:
+                    status = 'full'
+                else:
+                    self._in_flight.add(key)
+                    status = 'scheduled'
+            if status == 'scheduled':
+                self._executor.submit(self._run, key, query)
+        metrics.inc('prefetch_requests_total', result=status)
+        return status
+
+    def _run(self, key: str, query: str):
+        try:
+            self.search_fn(query)
+        except Exception as e:
+            logger.warning(f"Error en la precarga de '{query[:30]}': {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(key)
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Prefetches queued or running.
+        """
+        with self._lock:
+            return {'pending': len(self._in_flight), 'max_pending': self.max_pending}
+
+def get_prefetcher() -> Prefetcher:
+    """
+    Returns the process-wide prefetcher configured from the 'prefetch' section
+    of config.json, or None when prefetching is disabled.
+
+    Returns:
+        Prefetcher: The shared prefetcher.
+    """
+    global _prefetcher
+    if _prefetcher is None:
+        with _prefetcher_lock:
+            if _prefetcher is None:
+                prefetch_config = get_section('prefetch')
+                if not prefetch_config.get('enabled', True):
+                    _prefetcher = False
+                else:
+                    from websearch.search import search_web
+                    _prefetcher = Prefetcher(
+                        search_web,
+                        max_workers=prefetch_config.get('max_workers', 1),
+                        max_pending=prefetch_config.get('max_pending', 16),
+                        min_chars=prefetch_config.get('min_chars', 12),
+                        min_words=prefetch_config.get('min_words', 3),
+                    )
+    return _prefetcher or None
@@ -0,0 +1,46 @@
+# ./chatbot/rag/utils/process_local.py
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class ProcessExecutor:
+    """
+    ThreadPoolExecutor created lazily in each process. Threads do not survive
+    a fork: a pool built in the master before forking the workers (warm-up
+    with preload) would keep dead threads in every child and never run the
+    submitted work, so the pool is rebuilt whenever the pid changes.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = ''):
+        """
+        Args:
+            max_workers (int): Threads of the pool.
+            thread_name_prefix (str): Name prefix of the threads.
+        """
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get(self) -> ThreadPoolExecutor:
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix=self.thread_name_prefix)
+                    self._pid = os.getpid()
+        return self._executor
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Returns:
+            concurrent.futures.Future: Future of fn(*args, **kwargs) run in this process' pool.
+        """
+        return self._get().submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=wait)
+        self._executor = None
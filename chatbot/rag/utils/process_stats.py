@@ -0,0 +1,31 @@
+# ./chatbot/rag/utils/process_stats.py
+
+import os
+import time
+import resource
+import threading
+
+# Momento en que se cargó la aplicación en este proceso (en los workers con precarga, el del maestro)
+_loaded_at = time.time()
+
+def _current_rss_mb():
+    # /proc/self/statm: páginas totales y residentes (solo Linux)
+    try:
+        with open('/proc/self/statm') as f:
+            return round(int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 1)
+    except (OSError, ValueError, IndexError):
+        return None
+
+def process_stats() -> dict:
+    """
+    Returns:
+        dict: pid, current and peak resident memory in MiB, seconds since the
+            application was loaded and live threads of this process.
+    """
+    return {
+        'pid': os.getpid(),
+        'rss_mb': _current_rss_mb(),
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'uptime_seconds': round(time.time() - _loaded_at, 1),
+        'threads': threading.active_count(),
+    }
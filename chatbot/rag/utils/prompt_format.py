@@ -0,0 +1,35 @@
+# ./chatbot/rag/utils/prompt_format.py
+
+import string
+
+class PromptFormat:
+    """
+    Drop-in replacement for langchain's PromptTemplate with f-string
+    templates: the placeholders are checked once when the template is loaded
+    and each prompt is built with str.format, without importing langchain.
+    """
+
+    def __init__(self, template: str, input_variables: list):
+        """
+        Args:
+            template (str): Template with {placeholders}.
+            input_variables (list): Names of the placeholders the template must use.
+
+        Raises:
+            ValueError: If the placeholders do not match 'input_variables'.
+        """
+        fields = {name for _, name, _, _ in string.Formatter().parse(template) if name is not None}
+        if fields != set(input_variables):
+            raise ValueError(f'La plantilla usa {sorted(fields)} pero se esperaban {sorted(input_variables)}')
+        self.template = template
+        self.input_variables = list(input_variables)
+
+    def format(self, **kwargs) -> str:
+        """
+        Args:
+            **kwargs: Value of each input variable.
+
+        Returns:
+            str: The formatted prompt.
+        """
+        return self.template.format(**kwargs)
@@ -0,0 +1,95 @@
+# ./chatbot/rag/utils/query_classifier.py
+
+import re
+from dataclasses import dataclass
+
+from chatbot.rag.utils import metrics
+from chatbot.rag.utils.config_loader import get_section
+from chatbot.rag.utils.request_context import current_request
+from chatbot.rag.utils.text_utils import normalize_question
+
+QUERY_CLASSES = ('factoid', 'list', 'procedural', 'open')
+
+# Patrones sobre la pregunta normalizada (minúsculas, sin tildes ni signos), en orden de prioridad
+PROCEDURAL_PATTERNS = [
+    r'^como (me|se|puedo|hago|hacer|debo|solicito|realizo|tramito|obtengo|accedo|ingreso|inscribo|matriculo|pago)\b',
+    r'\b(pasos|procedimiento|proceso|tramite|tramitar|instructivo)\b',
+    r'\brequisitos (para|de)\b',
+    r'\bque (debo|tengo que|necesito) (hacer|presentar|para)\b',
+]
+LIST_PATTERNS = [
+    r'^(cuales|que) (son|programas|carreras|sedes|facultades|maestrias|doctorados|especializaciones|servicios|cursos)\b',
+    r'\b(lista|listado|enumera|menciona|nombra)\b',
+    r'\btod[oa]s l[oa]s\b',
+]
+FACTOID_PATTERNS = [
+    r'^(quien|quienes|cuando|donde|cuanto|cuanta|cuantos|cuantas)\b',
+    r'^(cual|que) es\b',
+    r'^a que hora\b',
+    r'\b(direccion|ubicacion|telefono|correo|email|fecha|horario|costo|valor|precio|extension)\b',
+]
+
+_rules = [
+    ('procedural', re.compile('|'.join(PROCEDURAL_PATTERNS))),
+    ('list', re.compile('|'.join(LIST_PATTERNS))),
+    ('factoid', re.compile('|'.join(FACTOID_PATTERNS))),
+]
+
+@dataclass
+class GenerationBudget:
+    """
+    Generation settings chosen for one question.
+    """
+    query_class: str
+    max_tokens: int
+    max_context_length: int
+
+def classify_query(query: str) -> str:
+    """
+    Classifies a question by the kind of answer it needs, with keyword rules
+    (no model call): 'procedural' (how to, steps, requirements), 'list'
+    (which are, list of...), 'factoid' (who, when, where, address, date...)
+    or 'open' for everything else.
+
+    Args:
+        query (str): The user's question.
+
+    Returns:
+        str: One of QUERY_CLASSES.
+    """
+    text = normalize_question(query)
+    for query_class, pattern in _rules:
+        if pattern.search(text):
+            return query_class
+    return 'open'
+
+def generation_budget(query: str, max_tokens: int, max_context_length: int) -> GenerationBudget:
+    """
+    Picks the generation max_tokens and the context budget for a question
+    from the 'query_classifier.classes' table of config.json. The values of
+    the handler stay the ceiling: a class can only shorten them. Records the
+    class on the current request and in the metrics.
+
+    Args:
+        query (str): The user's question.
+        max_tokens (int): max_tokens configured for the handler.
+        max_context_length (int): Default context length (characters) of the handler.
+
+    Returns:
+        GenerationBudget: The class and the limits to use.
+    """
+    config = get_section('query_classifier')
+    if not config.get('enabled', True):
+        return GenerationBudget('open', max_tokens, max_context_length)
+    query_class = classify_query(query)
+    limits = config.get('classes', {}).get(query_class, {})
+    budget = GenerationBudget(
+        query_class=query_class,
+        max_tokens=min(max_tokens, limits.get('max_tokens', max_tokens)),
+        max_context_length=int(max_context_length * min(1.0, limits.get('context_ratio', 1.0))),
+    )
+    metrics.inc('query_class_total', query_class=query_class)
+    context = current_request()
+    if context is not None:
+        context.query_class = query_class
+    return budget
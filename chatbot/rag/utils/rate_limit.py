@@ -0,0 +1,253 @@
+# ./chatbot/rag/utils/rate_limit.py
+
+import os
+import math
+import time
+import logging
+import sqlite3
+import threading
+from functools import wraps
+from collections import OrderedDict
+
+from django.http import JsonResponse
+
+from chatbot.rag.utils import metrics
+from chatbot.rag.utils.config_loader import get_section, resolve_path
+from chatbot.request_utils import get_client_key, get_client_ip
+
+logger = logging.getLogger(__name__)
+
+_rate_limiters = {}
+_limiter_lock = threading.Lock()
+
+class InMemoryRateLimiter:
+    """
+    Per-process token buckets. Each key holds up to 'burst' tokens that refill
+    at 'rate' tokens per second; a request spends 'cost' tokens.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100000):
+        """
+        Args:
+            rate (float): Tokens added per second.
+            burst (float): Bucket capacity (maximum burst size).
+            max_keys (int): Bound on tracked clients; the least recently seen are evicted.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, cost: float = 1) -> float:
+        """
+        Spends 'cost' tokens from the bucket of 'key' if it has enough.
+
+        Args:
+            key (str): Client identifier.
+            cost (float): Tokens required by the request.
+
+        Returns:
+            float: 0.0 if the request is allowed, otherwise seconds until it would be.
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return 0.0
+            return (cost - bucket[0]) / self.rate
+
+    def refund(self, key: str, cost: float = 1):
+        """
+        Gives back tokens spent by a request that was rejected later on.
+
+        Args:
+            key (str): Client identifier.
+            cost (float): Tokens to return (capped at the burst).
+        """
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket[0] = min(self.burst, bucket[0] + cost)
+
+class SQLiteRateLimiter:
+    """
+    Token buckets stored in a SQLite file so every worker process on the host
+    shares the same limits. Each decision is a single atomic UPSERT.
+    """
+
+    # Una clave nueva parte con el bucket lleno: como en memoria, solo se
+    # inserta si la ráfaga alcanza para el costo
+    _ACQUIRE_SQL = (
+        "INSERT INTO buckets (key, tokens, updated) SELECT ?1, ?2 - ?3, ?4 WHERE ?2 >= ?3 "
+        "ON CONFLICT(key) DO UPDATE SET tokens = MIN(?2, tokens + (?4 - updated) * ?5) - ?3, updated = ?4 "
+        "WHERE MIN(?2, tokens + (?4 - updated) * ?5) >= ?3 "
+        "RETURNING tokens"
+    )
+
+    def __init__(self, path: str, rate: float, burst: float, prune_every: int = 10000):
+        """
+        Args:
+            path (str): SQLite file shared by the workers (ideally on tmpfs, e.g. /dev/shm).
+            rate (float): Tokens added per second.
+            burst (float): Bucket capacity (maximum burst size).
+            prune_every (int): Decisions between deletions of refilled (idle) buckets.
+        """
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._calls = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        # Una conexión por hilo y por proceso (las conexiones no sobreviven a un fork)
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            # El estado de los buckets es desechable: no hace falta fsync
+            connection.execute('PRAGMA synchronous=OFF')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def acquire(self, key: str, cost: float = 1) -> float:
+        """
+        Spends 'cost' tokens from the shared bucket of 'key' if it has enough.
+
+        Args:
+            key (str): Client identifier.
+            cost (float): Tokens required by the request.
+
+        Returns:
+            float: 0.0 if the request is allowed, otherwise seconds until it would be.
+        """
+        connection = self._connection()
+        now = time.time()
+        if connection.execute(self._ACQUIRE_SQL, (key, self.burst, cost, now, self.rate)).fetchone() is not None:
+            self._maybe_prune(connection, now)
+            return 0.0
+        row = connection.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+        tokens = min(self.burst, row[0] + (now - row[1]) * self.rate) if row else self.burst
+        return max((cost - tokens) / self.rate, 0.001)
+
+    def refund(self, key: str, cost: float = 1):
+        """
+        Gives back tokens spent by a request that was rejected later on.
+
+        Args:
+            key (str): Client identifier.
+            cost (float): Tokens to return (capped at the burst).
+        """
+        self._connection().execute("UPDATE buckets SET tokens = MIN(?2, tokens + ?3) WHERE key = ?1", (key, self.burst, cost))
+
+    def _maybe_prune(self, connection: sqlite3.Connection, now: float):
+        self._calls += 1
+        if self._calls % self.prune_every:
+            return
+        # Un bucket inactivo más tiempo del que tarda en llenarse equivale a uno nuevo
+        connection.execute("DELETE FROM buckets WHERE updated < ?", (now - self.burst / self.rate,))
+
+def get_rate_limiter(scope: str = None):
+    """
+    Returns the process-wide rate limiter configured in the 'rate_limit'
+    section of config.json, or None when rate limiting is disabled. A scope
+    (e.g. 'batch') gets its own buckets, with the rate and burst overridden
+    by 'rate_limit.scopes.<scope>'.
+
+    Args:
+        scope (str): Optional bucket scope.
+
+    Returns:
+        InMemoryRateLimiter | SQLiteRateLimiter: The shared limiter.
+    """
+    limiter = _rate_limiters.get(scope)
+    if limiter is None:
+        with _limiter_lock:
+            limiter = _rate_limiters.get(scope)
+            if limiter is None:
+                limit_config = dict(get_section('rate_limit'))
+                limit_config.update(limit_config.get('scopes', {}).get(scope, {}) if scope else {})
+                if not limit_config.get('enabled', True):
+                    limiter = False
+                else:
+                    rate = limit_config.get('requests_per_minute', 20) / 60.0
+                    burst = limit_config.get('burst', 10)
+                    if limit_config.get('backend', 'memory') == 'sqlite':
+                        limiter = SQLiteRateLimiter(
+                            resolve_path(limit_config.get('sqlite_path', 'chatbot/rag/database/rate_limit.sqlite3')),
+                            rate, burst,
+                        )
+                    else:
+                        limiter = InMemoryRateLimiter(rate, burst, max_keys=limit_config.get('max_keys', 100000))
+                    logger.info(f"Límite de peticiones{f' ({scope})' if scope else ''}: {rate * 60:g}/min, ráfaga {burst}")
+                _rate_limiters[scope] = limiter
+    return limiter or None
+
+def check_rate_limit(request, cost: float = 1, scope: str = None):
+    """
+    Charges the request against its client bucket and, when the client is
+    identified by session or CSRF token, against its IP bucket as well (so
+    rotating tokens does not bypass the limit). A request rejected by the IP
+    bucket gets its client tokens back.
+
+    Args:
+        request: Django or DRF request.
+        cost (float): Tokens charged (e.g. the number of messages in a batch).
+        scope (str): Optional bucket scope (see get_rate_limiter).
+
+    Returns:
+        JsonResponse: A 429 response with Retry-After, or None if the request is allowed.
+    """
+    limiter = get_rate_limiter(scope)
+    if limiter is None:
+        return None
+    prefix = f'{scope}|' if scope else ''
+    client_key = get_client_key(request)
+    ip_key = 'ip:' + get_client_ip(request)
+    retry_after = limiter.acquire(prefix + client_key, cost)
+    if not retry_after and client_key != ip_key:
+        retry_after = limiter.acquire(prefix + ip_key, cost / get_section('rate_limit').get('clients_per_ip', 5))
+        if retry_after:
+            # Rechazada por la IP: no se cobra al cliente una solicitud que no se atendió
+            limiter.refund(prefix + client_key, cost)
+    if not retry_after:
+        return None
+
+    metrics.inc('rate_limit_rejected_total', endpoint=request.path)
+    logger.warning(f"Límite de peticiones excedido para {client_key} ({request.path})")
+    response = JsonResponse(
+        {'error': 'Demasiadas solicitudes. Intenta de nuevo más tarde.', 'retry_after': math.ceil(retry_after)},
+        status=429,
+    )
+    response['Retry-After'] = str(math.ceil(retry_after))
+    return response
+
+def rate_limited(view):
+    """
+    View decorator that answers 429 Too Many Requests when the client has
+    exhausted its token bucket. Apply it below @api_view for DRF views.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        limited = check_rate_limit(request)
+        if limited is not None:
+            return limited
+        return view(request, *args, **kwargs)
+    return wrapper
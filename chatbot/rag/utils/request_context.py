@@ -0,0 +1,99 @@
+# ./chatbot/rag/utils/request_context.py
+
+import time
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+_current_request = contextvars.ContextVar('chatbot_request', default=None)
+
+@dataclass
+class RequestContext:
+    """
+    Per-request accounting shared by the view, the retrieval stage and the LLM
+    clients. Propagated through contextvars (also into pool threads that run
+    with a copied context).
+    """
+    endpoint: str = ''
+    client_key: str = ''
+    # Sesión conversacional (vacía para clientes identificados solo por IP)
+    session_id: str = ''
+    provider: str = ''
+    model: str = ''
+    # Perfil de config.json elegido por la solicitud (vacío: bot_type por defecto)
+    profile: str = ''
+    started_at: float = field(default_factory=time.monotonic)
+    cache_hit: bool = False
+    search_calls: int = 0
+    llm_calls: int = 0
+    prompt_tokens: int = None
+    completion_tokens: int = None
+    # Tiempo total en llamadas al LLM (chatbot.rag.utils.usage)
+    llm_ms: float = None
+    # Fracción del contexto web conservada por la compresión (None: sin compresión)
+    context_compression: float = None
+    # Clase de la pregunta (chatbot.rag.utils.query_classifier) que fijó max_tokens y el contexto
+    query_class: str = ''
+    # Deadline (chatbot.rag.utils.deadline) que acota búsqueda y generación
+    deadline: object = None
+    # Pregunta anterior cuando esta se respondió como seguimiento
+    follow_up_of: str = None
+    # Se usaron resultados web vencidos porque Tavily no respondió (stale-if-error)
+    search_stale: bool = False
+
+    def elapsed_ms(self) -> float:
+        """
+        Returns:
+            float: Milliseconds since the request started.
+        """
+        return (time.monotonic() - self.started_at) * 1000
+
+    def add_tokens(self, prompt_tokens: int = None, completion_tokens: int = None):
+        """
+        Accumulates token usage reported by a provider response.
+
+        Args:
+            prompt_tokens (int): Input tokens of the call.
+            completion_tokens (int): Output tokens of the call.
+        """
+        if prompt_tokens is not None:
+            self.prompt_tokens = (self.prompt_tokens or 0) + prompt_tokens
+        if completion_tokens is not None:
+            self.completion_tokens = (self.completion_tokens or 0) + completion_tokens
+
+def current_request() -> RequestContext:
+    """
+    Returns:
+        RequestContext: The context of the request being served, or None outside a request.
+    """
+    return _current_request.get()
+
+@contextmanager
+def request_scope(**kwargs):
+    """
+    Opens a request context for the duration of the block.
+
+    Args:
+        **kwargs: Initial RequestContext fields (endpoint, client_key, provider, model, deadline...).
+
+    Yields:
+        RequestContext: The new context.
+    """
+    context = RequestContext(**kwargs)
+    token = _current_request.set(context)
+    try:
+        yield context
+    finally:
+        _current_request.reset(token)
+
+def count_search_call():
+    """Records an outbound web search call on the current request, if any."""
+    context = _current_request.get()
+    if context is not None:
+        context.search_calls += 1
+
+def count_llm_call():
+    """Records an outbound LLM call on the current request, if any."""
+    context = _current_request.get()
+    if context is not None:
+        context.llm_calls += 1
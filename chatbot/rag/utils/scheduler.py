@@ -0,0 +1,229 @@
+# ./chatbot/rag/utils/scheduler.py
+
+import math
+import time
+import heapq
+import logging
+import itertools
+import threading
+from contextlib import contextmanager
+
+from django.http import JsonResponse
+
+from chatbot.rag.utils import metrics
+from chatbot.rag.utils.config_loader import get_section
+
+logger = logging.getLogger(__name__)
+
+# Menor número = mayor prioridad
+PRIORITY_INTERACTIVE = 0
+PRIORITY_API = 1
+PRIORITY_BATCH = 2
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: 'interactive', PRIORITY_API: 'api', PRIORITY_BATCH: 'batch'}
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+class SchedulerOverloaded(Exception):
+    """
+    Raised when a request is shed instead of admitted.
+
+    Attributes:
+        reason (str): 'queue_full', 'timeout' or 'preempted'.
+        retry_after (int): Suggested seconds before retrying.
+    """
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f'Solicitud rechazada por sobrecarga ({reason})')
+        self.reason = reason
+        self.retry_after = retry_after
+
+class _Waiter:
+    __slots__ = ('priority', 'seq', 'event', 'state')
+
+    def __init__(self, priority: int, seq: int):
+        self.priority = priority
+        self.seq = seq
+        self.event = threading.Event()
+        # 'waiting', 'granted' o 'rejected'
+        self.state = 'waiting'
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+class AdmissionScheduler:
+    """
+    Bounds the number of in-flight requests to one provider. Requests beyond
+    the limit wait in a priority queue (interactive before API before batch)
+    for at most 'max_wait' seconds; when the queue is full a newcomer either
+    preempts the lowest-priority waiter or is rejected immediately.
+    """
+
+    def __init__(self, provider: str, max_concurrent: int = 4, max_queue: int = 32, max_wait: float = 10.0):
+        """
+        Args:
+            provider (str): Provider name used in logs and metric labels.
+            max_concurrent (int): Requests allowed to run at the same time.
+            max_queue (int): Requests allowed to wait for a slot.
+            max_wait (float): Maximum seconds a request waits before being shed.
+        """
+        self.provider = provider
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self.admitted = 0
+        self.shed = {'queue_full': 0, 'timeout': 0, 'preempted': 0}
+        self._queue = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        # Media móvil del tiempo de servicio, para estimar Retry-After
+        self._service_seconds = 1.0
+
+    @contextmanager
+    def admit(self, priority: int = PRIORITY_API, timeout: float = None):
+        """
+        Holds a provider slot for the duration of the block.
+
+        Args:
+            priority (int): PRIORITY_INTERACTIVE, PRIORITY_API or PRIORITY_BATCH.
+            timeout (float): Maximum wait in seconds (defaults to max_wait).
+
+        Raises:
+            SchedulerOverloaded: If the request is shed instead of admitted.
+        """
+        wait_started = time.monotonic()
+        self._acquire(priority, self.max_wait if timeout is None else min(timeout, self.max_wait))
+        started = time.monotonic()
+        metrics.observe('scheduler_wait_ms', (started - wait_started) * 1000,
+                        provider=self.provider, priority=PRIORITY_NAMES.get(priority, str(priority)))
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+    def _acquire(self, priority: int, timeout: float):
+        with self._lock:
+            if self.active < self.max_concurrent and not self._queue:
+                self._grant()
+                return
+            if len(self._queue) >= self.max_queue:
+                victim = max((w for w in self._queue if w.state == 'waiting'), default=None)
+                if victim is None or victim.priority <= priority:
+                    self._reject('queue_full')
+                # El recién llegado tiene más prioridad: se desplaza al último de la cola
+                victim.state = 'rejected'
+                self._queue.remove(victim)
+                heapq.heapify(self._queue)
+                victim.event.set()
+            waiter = _Waiter(priority, next(self._seq))
+            heapq.heappush(self._queue, waiter)
+            self._publish()
+
+        waiter.event.wait(max(timeout, 0))
+
+        with self._lock:
+            if waiter.state == 'granted':
+                return
+            if waiter.state == 'rejected':
+                self._reject('preempted')
+            waiter.state = 'rejected'
+            self._queue.remove(waiter)
+            heapq.heapify(self._queue)
+            self._reject('timeout')
+
+    def _grant(self):
+        self.active += 1
+        self.admitted += 1
+        metrics.inc('scheduler_admitted_total', provider=self.provider)
+        self._publish()
+
+    def _reject(self, reason: str):
+        # Se invoca con el lock tomado
+        self.shed[reason] += 1
+        metrics.inc('scheduler_shed_total', provider=self.provider, reason=reason)
+        self._publish()
+        retry_after = max(1, math.ceil(self._service_seconds * (len(self._queue) + 1) / self.max_concurrent))
+        logger.warning(f"Proveedor {self.provider} sobrecargado: solicitud rechazada ({reason}), "
+                       f"{self.active} activas, {len(self._queue)} en cola")
+        raise SchedulerOverloaded(reason, retry_after)
+
+    def _release(self, service_seconds: float):
+        with self._lock:
+            self._service_seconds = 0.8 * self._service_seconds + 0.2 * service_seconds
+            self.active -= 1
+            while self._queue and self.active < self.max_concurrent:
+                waiter = heapq.heappop(self._queue)
+                if waiter.state == 'waiting':
+                    waiter.state = 'granted'
+                    self._grant()
+                    waiter.event.set()
+            self._publish()
+
+    def _publish(self):
+        metrics.set_gauge('scheduler_active', self.active, provider=self.provider)
+        metrics.set_gauge('scheduler_queue_depth', len(self._queue), provider=self.provider)
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Active and queued requests, limits and admission/shedding counters.
+        """
+        with self._lock:
+            return {
+                'active': self.active,
+                'queued': len(self._queue),
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'admitted': self.admitted,
+                'shed': dict(self.shed),
+            }
+
+def get_scheduler(provider: str) -> AdmissionScheduler:
+    """
+    Returns the process-wide scheduler of a provider, configured from the
+    'scheduler' section of config.json (per-provider values override 'default').
+
+    Args:
+        provider (str): Provider name (bot_type).
+
+    Returns:
+        AdmissionScheduler: The shared scheduler.
+    """
+    scheduler = _schedulers.get(provider)
+    if scheduler is None:
+        with _schedulers_lock:
+            scheduler = _schedulers.get(provider)
+            if scheduler is None:
+                scheduler_config = get_section('scheduler')
+                options = dict(scheduler_config.get('default', {}))
+                options.update(scheduler_config.get('providers', {}).get(provider, {}))
+                scheduler = _schedulers[provider] = AdmissionScheduler(
+                    provider,
+                    max_concurrent=options.get('max_concurrent', 4),
+                    max_queue=options.get('max_queue', 32),
+                    max_wait=options.get('max_wait_seconds', 10.0),
+                )
+    return scheduler
+
+def overloaded_response(error: SchedulerOverloaded) -> JsonResponse:
+    """
+    Args:
+        error (SchedulerOverloaded): The shedding decision.
+
+    Returns:
+        JsonResponse: A 503 response with Retry-After.
+    """
+    response = JsonResponse(
+        {'error': 'El servicio está ocupado. Intenta de nuevo en unos segundos.', 'retry_after': error.retry_after},
+        status=503,
+    )
+    response['Retry-After'] = str(error.retry_after)
+    return response
+
+def scheduler_stats() -> dict:
+    """
+    Returns:
+        dict: Stats of every scheduler created in this process, keyed by provider.
+    """
+    return {provider: scheduler.stats() for provider, scheduler in list(_schedulers.items())}
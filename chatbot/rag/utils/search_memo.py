@@ -0,0 +1,108 @@
+# ./chatbot/rag/utils/search_memo.py
+
+import threading
+import contextvars
+from contextlib import contextmanager
+
+_current_memo = contextvars.ContextVar('chatbot_search_memo', default=None)
+
+class _Entry:
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+class SearchMemo:
+    """
+    Single-flight memo shared by the requests of one batch: the first caller
+    of a key runs the search, concurrent and later callers reuse its result.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, fn):
+        """
+        Args:
+            key: Hashable identifier of the search (e.g. the normalized query).
+            fn (callable): Function computing the result when the key is new.
+
+        Returns:
+            The (possibly shared) result of fn.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            owner = entry is None
+            if owner:
+                entry = self._entries[key] = _Entry()
+                self.misses += 1
+            else:
+                self.hits += 1
+        if owner:
+            try:
+                entry.value = fn()
+            except Exception as e:
+                entry.error = e
+            finally:
+                entry.event.set()
+        else:
+            entry.event.wait()
+        if entry.error is not None:
+            raise entry.error
+        return entry.value
+
+@contextmanager
+def search_memo_scope():
+    """
+    Shares search results among every retrieval started inside the block
+    (including pool threads that run with a copied context).
+
+    Yields:
+        SearchMemo: The memo of the scope.
+    """
+    memo = SearchMemo()
+    token = _current_memo.set(memo)
+    try:
+        yield memo
+    finally:
+        _current_memo.reset(token)
+
+def run_with_memo(memo: SearchMemo, fn, *args):
+    """
+    Calls fn with 'memo' as the current memo (for pool tasks that must share
+    a memo without entering a scope in the submitting thread).
+
+    Args:
+        memo (SearchMemo): The memo to share.
+        fn (callable): Function to run.
+        *args: Arguments for fn.
+
+    Returns:
+        The result of fn.
+    """
+    token = _current_memo.set(memo)
+    try:
+        return fn(*args)
+    finally:
+        _current_memo.reset(token)
+
+def memoized(key, fn):
+    """
+    Runs fn through the memo of the current scope, or directly outside one.
+
+    Args:
+        key: Hashable identifier of the search.
+        fn (callable): Function computing the result.
+
+    Returns:
+        The result of fn.
+    """
+    memo = _current_memo.get()
+    if memo is None:
+        return fn()
+    return memo.get_or_compute(key, fn)
@@ -0,0 +1,310 @@
+# ./chatbot/rag/utils/session_store.py
+
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+
+from chatbot.rag.utils import metrics
+from chatbot.rag.utils.config_loader import get_section
+from chatbot.rag.utils.text_utils import normalize_question
+
+logger = logging.getLogger(__name__)
+
+_session_store = None
+_store_lock = threading.Lock()
+
+# Conectores y referencias que indican que la pregunta depende del turno anterior
+FOLLOW_UP_PREFIXES = ('y ', 'e ', 'tambien ', 'pero ', 'entonces ', 'ademas ', 'igualmente ', 'y si ', 'que hay de ')
+# Sin "su", "esta", "este", "esa"...: sin tildes coinciden con preguntas nuevas ("¿Dónde está...?", "este semestre")
+FOLLOW_UP_REFERENCES = re.compile(
+    r'\b(eso|esto|ello|ella|el mismo|la misma|dicho|dicha|alli|ahi|aquel|aquella|aquellos|aquellas)\b'
+)
+# Un mensaje sin conector solo es un seguimiento si es así de corto ("¿Dónde queda eso?")
+ANAPHORA_MAX_WORDS = 6
+# Palabras que no dicen qué se pregunta: no cuentan al comprobar que los resultados anteriores lo cubren
+FOLLOW_UP_FILLER = {
+    'y', 'e', 'o', 'si', 'tambien', 'pero', 'entonces', 'ademas', 'igualmente', 'que', 'hay', 'de', 'del',
+    'su', 'sus', 'eso', 'esa', 'ese', 'esos', 'esas', 'esto', 'esta', 'este', 'ello', 'ella', 'mismo', 'misma',
+    'dicho', 'dicha', 'alli', 'ahi', 'aquel', 'aquella', 'aquellos', 'aquellas', 'cual', 'cuales', 'cuando',
+    'donde', 'como', 'quien', 'cuanto', 'cuanta', 'cuantos', 'cuantas', 'el', 'la', 'los', 'las', 'lo', 'un',
+    'una', 'al', 'a', 'en', 'para', 'por', 'con', 'es', 'son', 'estan', 'tiene', 'tienen', 'queda', 'quedan',
+    'puedo', 'sabes', 'sobre',
+}
+_accents = str.maketrans('áéíóúüñ', 'aeiouun')
+
+class SessionState:
+    """
+    Compact per-session memory: a ring buffer of the last turns and the
+    results retrieved for the last searched question.
+    """
+
+    __slots__ = ('turns', 'last_query', 'last_results', 'updated_at', 'size')
+
+    def __init__(self, max_turns: int):
+        self.turns = deque(maxlen=max_turns)
+        self.last_query = None
+        self.last_results = None
+        self.updated_at = time.monotonic()
+        self.size = 0
+
+    def _compute_size(self) -> int:
+        size = sum(len(q) + len(a) for q, a in self.turns) + len(self.last_query or '')
+        for result in self.last_results or []:
+            size += sum(len(v) for v in result.values() if isinstance(v, str))
+        return size
+
+class SessionStore:
+    """
+    Bounded in-process session store keyed by session id, with LRU eviction
+    by number of sessions, idle TTL and a global cap on the characters held
+    in turns and results.
+    """
+
+    def __init__(self, max_sessions: int = 5000, max_turns: int = 6, max_chars: int = 32 * 1024 * 1024,
+                 ttl_seconds: float = 1800, max_result_chars: int = 4000, follow_up_max_tokens: int = 12):
+        """
+        Args:
+            max_sessions (int): Sessions kept before the least recently used is evicted.
+            max_turns (int): Turns kept per session (ring buffer).
+            max_chars (int): Global cap on stored characters across all sessions.
+            ttl_seconds (float): Idle time after which a session is forgotten.
+            max_result_chars (int): Characters kept per text field of a stored result.
+            follow_up_max_tokens (int): Longest question still considered a follow-up.
+        """
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.max_chars = max_chars
+        self.ttl_seconds = ttl_seconds
+        self.max_result_chars = max_result_chars
+        self.follow_up_max_tokens = follow_up_max_tokens
+        self.total_chars = 0
+        self.evictions = 0
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _touch(self, session_id: str) -> SessionState:
+        # Se invoca con el lock tomado
+        state = self._sessions.get(session_id)
+        now = time.monotonic()
+        if state is not None and now - state.updated_at > self.ttl_seconds:
+            self._drop(session_id)
+            state = None
+        if state is None:
+            state = self._sessions[session_id] = SessionState(self.max_turns)
+        self._sessions.move_to_end(session_id)
+        state.updated_at = now
+        return state
+
+    def _drop(self, session_id: str):
+        state = self._sessions.pop(session_id)
+        self.total_chars -= state.size
+
+    def _resize(self, state: SessionState):
+        # Se invoca con el lock tomado: recalcula el tamaño y aplica los límites globales
+        new_size = state._compute_size()
+        self.total_chars += new_size - state.size
+        state.size = new_size
+        # La sesión recién escrita está al final y nunca se desaloja a sí misma
+        while len(self._sessions) > 1 and (len(self._sessions) > self.max_sessions or self.total_chars > self.max_chars):
+            oldest = next(iter(self._sessions))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def record_turn(self, session_id: str, question: str, answer: str):
+        """
+        Appends a question/answer pair to the session's ring buffer.
+
+        Args:
+            session_id (str): Session identifier.
+            question (str): The user's message.
+            answer (str): The bot's response.
+        """
+        if not session_id:
+            return
+        with self._lock:
+            state = self._touch(session_id)
+            state.turns.append(((question or '')[:self.max_result_chars], (answer or '')[:self.max_result_chars]))
+            self._resize(state)
+
+    def remember_results(self, session_id: str, query: str, results: list):
+        """
+        Stores the results retrieved for a session's question (compacted).
+
+        Args:
+            session_id (str): Session identifier.
+            query (str): The question the results answer.
+            results (list): Retrieved result dicts.
+        """
+        if not session_id:
+            return
+        compact = [
+            {k: (v[:self.max_result_chars] if isinstance(v, str) else v) for k, v in result.items()}
+            for result in results or []
+        ]
+        with self._lock:
+            state = self._touch(session_id)
+            state.last_query = query
+            state.last_results = compact
+            self._resize(state)
+
+    def follow_up_context(self, session_id: str, question: str):
+        """
+        Returns the previous question and results when 'question' looks like a
+        follow-up of the session's last searched question.
+
+        Args:
+            session_id (str): Session identifier.
+            question (str): The new user message.
+
+        Returns:
+            tuple: (previous question, list of results), or None when it is not a follow-up.
+        """
+        if not session_id:
+            return None
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None or not state.last_results or time.monotonic() - state.updated_at > self.ttl_seconds:
+                return None
+            last_query, last_results = state.last_query, [dict(result) for result in state.last_results]
+        # La comprobación recorre el texto de los resultados: fuera del lock
+        if not is_follow_up(question, last_query, self.follow_up_max_tokens, last_results):
+            return None
+        with self._lock:
+            if session_id in self._sessions:
+                self._sessions.move_to_end(session_id)
+        return last_query, last_results
+
+    def history(self, session_id: str) -> list:
+        """
+        Args:
+            session_id (str): Session identifier.
+
+        Returns:
+            list: (question, answer) tuples, oldest first.
+        """
+        with self._lock:
+            state = self._sessions.get(session_id)
+            return list(state.turns) if state is not None else []
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Number of sessions, stored characters and evictions.
+        """
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'stored_chars': self.total_chars,
+                'max_chars': self.max_chars,
+                'evictions': self.evictions,
+            }
+
+def is_follow_up(question: str, previous_question: str, max_tokens: int = 12, previous_results: list = None) -> bool:
+    """
+    Heuristic follow-up detection: a short message that starts with a
+    connector ("¿y…?", "también…"), or a very short one that refers back
+    with a pronoun ("¿dónde queda eso?"), is not a repeat of the previous
+    question and asks about something the previous question or its results
+    mention ("¿y su horario?" only if the stored pages talk about a horario).
+
+    Args:
+        question (str): The new user message.
+        previous_question (str): The last question of the session.
+        max_tokens (int): Longest message still considered a follow-up.
+        previous_results (list): Results retrieved for the previous question.
+
+    Returns:
+        bool: True if the previous results should be reused.
+    """
+    normalized = normalize_question(question)
+    if not normalized or not previous_question or normalized == normalize_question(previous_question):
+        return False
+    words = normalized.split()
+    if len(words) > max_tokens:
+        return False
+    if not normalized.startswith(FOLLOW_UP_PREFIXES) and not (
+            len(words) <= ANAPHORA_MAX_WORDS and FOLLOW_UP_REFERENCES.search(normalized)):
+        return False
+    # Prefijo fijo como raíz: "horario" cubre "horarios"
+    asked = {word[:5] for word in words if len(word) > 2 and word not in FOLLOW_UP_FILLER}
+    if not asked:
+        # Solo conectores y referencias ("¿y eso?"): depende por completo del turno anterior
+        return True
+    texts = [previous_question] + [
+        value for result in previous_results or [] for key, value in result.items()
+        if key in ('title', 'content', 'raw_content') and isinstance(value, str)
+    ]
+    # normalize_question recorta a 500 caracteres: los resultados se comparan completos
+    covered = ' '.join(texts).lower().translate(_accents)
+    return any(re.search(r'\b' + stem, covered) for stem in asked)
+
+def get_session_store() -> SessionStore:
+    """
+    Returns the process-wide session store configured from the 'sessions'
+    section of config.json, or None when sessions are disabled.
+
+    Returns:
+        SessionStore: The shared store.
+    """
+    global _session_store
+    if _session_store is None:
+        with _store_lock:
+            if _session_store is None:
+                session_config = get_section('sessions')
+                if not session_config.get('enabled', True):
+                    _session_store = False
+                else:
+                    _session_store = SessionStore(
+                        max_sessions=session_config.get('max_sessions', 5000),
+                        max_turns=session_config.get('max_turns', 6),
+                        max_chars=session_config.get('max_chars', 32 * 1024 * 1024),
+                        ttl_seconds=session_config.get('ttl_seconds', 1800),
+                        max_result_chars=session_config.get('max_result_chars', 4000),
+                        follow_up_max_tokens=session_config.get('follow_up_max_tokens', 12),
+                    )
+    return _session_store or None
+
+def reuse_follow_up_results(session_id: str, question: str):
+    """
+    Looks up reusable results for a follow-up question and counts the reuse.
+
+    Args:
+        session_id (str): Session identifier (None for anonymous requests).
+        question (str): The new user message.
+
+    Returns:
+        tuple: (previous question, results) or None.
+    """
+    store = get_session_store()
+    if store is None or not session_id:
+        return None
+    reused = store.follow_up_context(session_id, question)
+    if reused is not None:
+        metrics.inc('session_follow_up_reuse_total')
+        logger.info(f"Pregunta de seguimiento detectada; se reutilizan {len(reused[1])} resultados de '{reused[0][:50]}'")
+    return reused
+
+def session_stats() -> dict:
+    """
+    Returns:
+        dict: Stats of the shared session store, or {'enabled': False}.
+    """
+    store = get_session_store()
+    if store is None:
+        return {'enabled': False}
+    return dict(store.stats(), enabled=True)
+
+def record_session_turn(session_id: str, question: str, answer: str):
+    """
+    Appends a turn to the session's history when sessions are enabled.
+
+    Args:
+        session_id (str): Session identifier (None for anonymous requests).
+        question (str): The user's message.
+        answer (str): The bot's response.
+    """
+    store = get_session_store()
+    if store is not None and session_id:
+        store.record_turn(session_id, question, answer)
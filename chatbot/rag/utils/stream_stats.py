@@ -0,0 +1,167 @@
+# ./chatbot/rag/utils/stream_stats.py
+
+import math
+import heapq
+from collections import OrderedDict
+
+class LatencyHistogram:
+    """
+    Fixed-memory latency histogram with logarithmic buckets. Quantiles are
+    approximated within the bucket growth factor (5% by default).
+    """
+
+    def __init__(self, growth: float = 1.05, min_value: float = 1.0):
+        """
+        Args:
+            growth (float): Ratio between consecutive bucket bounds.
+            min_value (float): Values below this fall into the first bucket.
+        """
+        self.log_growth = math.log(growth)
+        self.growth = growth
+        self.min_value = min_value
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        """
+        Args:
+            value (float): Observed latency (any unit, e.g. ms).
+        """
+        index = 0 if value <= self.min_value else int(math.log(value / self.min_value) / self.log_growth) + 1
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """
+        Args:
+            q (float): Quantile in [0, 1].
+
+        Returns:
+            float: Upper bound of the bucket holding the quantile (None if empty).
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.max, self.min_value * self.growth ** index)
+        return self.max
+
+    def summary(self) -> dict:
+        """
+        Returns:
+            dict: count, mean, p50, p95, p99 and max.
+        """
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 1) if self.count else None,
+            'p50': _round(self.quantile(0.50)),
+            'p95': _round(self.quantile(0.95)),
+            'p99': _round(self.quantile(0.99)),
+            'max': _round(self.max) if self.count else None,
+        }
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitters sketch: tracks the most frequent items with a
+    fixed number of counters. Reported counts overestimate by at most 'error'.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        """
+        Args:
+            capacity (int): Number of counters kept.
+        """
+        self.capacity = capacity
+        self.counters = {}
+        # Heap perezoso de (conteo, item) para encontrar el mínimo en O(log n)
+        self._heap = []
+
+    def add(self, item: str):
+        """
+        Args:
+            item (str): Observed item.
+        """
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += 1
+        elif len(self.counters) < self.capacity:
+            counter = self.counters[item] = [1, 0]
+        else:
+            victim = self._pop_min()
+            count, _ = self.counters.pop(victim)
+            counter = self.counters[item] = [count + 1, count]
+        heapq.heappush(self._heap, (counter[0], item))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c[0], k) for k, c in self.counters.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> str:
+        while True:
+            count, item = heapq.heappop(self._heap)
+            counter = self.counters.get(item)
+            if counter is not None and counter[0] == count:
+                return item
+
+    def top(self, n: int) -> list:
+        """
+        Args:
+            n (int): Number of items to return.
+
+        Returns:
+            list: Dicts with 'item', 'count' and 'error', most frequent first.
+        """
+        ranked = sorted(self.counters.items(), key=lambda kv: kv[1][0], reverse=True)[:n]
+        return [{'item': item, 'count': count, 'error': error} for item, (count, error) in ranked]
+
+class CacheHitEstimator:
+    """
+    Replays a chronological stream of normalized questions against an ideal
+    TTL cache and counts how many would have been served from it.
+    """
+
+    def __init__(self, ttl_seconds: float, max_keys: int = 100000):
+        """
+        Args:
+            ttl_seconds (float): Cache time-to-live being simulated.
+            max_keys (int): Bound on tracked keys (LRU eviction keeps memory constant).
+        """
+        self.ttl = ttl_seconds
+        self.max_keys = max_keys
+        self.cached_at = OrderedDict()
+        self.requests = 0
+        self.hits = 0
+
+    def add(self, key: str, timestamp: float):
+        """
+        Args:
+            key (str): Normalized question.
+            timestamp (float): Epoch seconds of the request.
+        """
+        self.requests += 1
+        cached_at = self.cached_at.get(key)
+        if cached_at is not None and timestamp - cached_at <= self.ttl:
+            self.hits += 1
+            self.cached_at.move_to_end(key)
+            return
+        # Fallo de caché: la respuesta se almacena con esta marca de tiempo
+        self.cached_at[key] = timestamp
+        self.cached_at.move_to_end(key)
+        if len(self.cached_at) > self.max_keys:
+            self.cached_at.popitem(last=False)
+
+    def hit_ratio(self) -> float:
+        """
+        Returns:
+            float: Fraction of requests that would have been cache hits.
+        """
+        return round(self.hits / self.requests, 4) if self.requests else 0.0
+
+def _round(value):
+    return None if value is None else round(value, 1)
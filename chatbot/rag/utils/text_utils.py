@@ -0,0 +1,32 @@
+# ./chatbot/rag/utils/text_utils.py
+
+import re
+import unicodedata
+
+def strip_accents(text: str) -> str:
+    """
+    Removes diacritics from a string.
+
+    Args:
+        text (str): The original text.
+
+    Returns:
+        str: The text without accents.
+    """
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+def normalize_question(question: str) -> str:
+    """
+    Normalizes a user question so equivalent phrasings group together:
+    lowercase, no accents, no punctuation, single spaces.
+
+    Args:
+        question (str): The user's message.
+
+    Returns:
+        str: The normalized question (at most 500 characters).
+    """
+    text = strip_accents((question or '').lower())
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()[:500]
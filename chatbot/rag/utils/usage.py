@@ -0,0 +1,232 @@
+# ./chatbot/rag/utils/usage.py
+
+import threading
+from collections import deque
+from dataclasses import dataclass, asdict
+
+from chatbot.rag.utils import metrics
+from chatbot.rag.utils.config_loader import get_section
+from chatbot.rag.utils.request_context import current_request
+
+_lock = threading.Lock()
+# (proveedor, modelo) -> últimas llamadas (LLMUsage) de este proceso
+_windows = {}
+
+@dataclass
+class LLMUsage:
+    """
+    Token usage and timing of one LLM call, as reported by the provider.
+    Fields the provider did not report are None.
+    """
+    provider: str
+    model: str
+    prompt_tokens: int = None
+    completion_tokens: int = None
+    # Tokens del prompt servidos desde la caché de prefijos del proveedor y, si los informa, los procesados de nuevo
+    cached_prompt_tokens: int = None
+    uncached_prompt_tokens: int = None
+    latency_ms: float = None
+    # Tiempo de generación informado por el proveedor (Ollama), más preciso que la latencia total
+    generation_ms: float = None
+    cost_usd: float = None
+
+    @property
+    def tokens_per_second(self) -> float:
+        """
+        Returns:
+            float: Completion tokens per second of generation (or of the whole
+                call when the provider does not report it), None if unknown.
+        """
+        duration = self.generation_ms or self.latency_ms
+        if not self.completion_tokens or not duration:
+            return None
+        return self.completion_tokens / (duration / 1000)
+
+    def as_dict(self) -> dict:
+        record = asdict(self)
+        record['tokens_per_second'] = self.tokens_per_second
+        return record
+
+def _int_or_none(value):
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def parse_openai_usage(data: dict) -> dict:
+    """
+    DeepSeek (OpenAI chat completions): usage.prompt_tokens, completion_tokens,
+    prompt_cache_hit_tokens and prompt_cache_miss_tokens.
+    """
+    usage = data.get('usage') if isinstance(data, dict) else None
+    if not isinstance(usage, dict):
+        return {}
+    return {
+        'prompt_tokens': _int_or_none(usage.get('prompt_tokens')),
+        'completion_tokens': _int_or_none(usage.get('completion_tokens')),
+        'cached_prompt_tokens': _int_or_none(usage.get('prompt_cache_hit_tokens')),
+        'uncached_prompt_tokens': _int_or_none(usage.get('prompt_cache_miss_tokens')),
+    }
+
+def parse_ollama_usage(data: dict) -> dict:
+    """
+    Llama (Ollama /api/generate): prompt_eval_count, eval_count and
+    eval_duration in nanoseconds.
+    """
+    if not isinstance(data, dict):
+        return {}
+    eval_duration = data.get('eval_duration')
+    return {
+        'prompt_tokens': _int_or_none(data.get('prompt_eval_count')),
+        'completion_tokens': _int_or_none(data.get('eval_count')),
+        'generation_ms': eval_duration / 1e6 if isinstance(eval_duration, (int, float)) else None,
+    }
+
+def parse_bedrock_usage(response: dict) -> dict:
+    """
+    AWS Bedrock converse: usage.inputTokens, outputTokens and
+    cacheReadInputTokens.
+    """
+    usage = response.get('usage') if isinstance(response, dict) else None
+    if not isinstance(usage, dict):
+        return {}
+    return {
+        'prompt_tokens': _int_or_none(usage.get('inputTokens')),
+        'completion_tokens': _int_or_none(usage.get('outputTokens')),
+        'cached_prompt_tokens': _int_or_none(usage.get('cacheReadInputTokens')),
+    }
+
+def parse_langchain_usage(message) -> dict:
+    """
+    Cohere through LangChain: usage_metadata of the returned AIMessage
+    (input_tokens, output_tokens).
+    """
+    usage = getattr(message, 'usage_metadata', None)
+    if not isinstance(usage, dict):
+        return {}
+    return {
+        'prompt_tokens': _int_or_none(usage.get('input_tokens')),
+        'completion_tokens': _int_or_none(usage.get('output_tokens')),
+    }
+
+def _uncached_prompt_tokens(usage: LLMUsage):
+    # El valor informado por el proveedor; si falta, se deduce de los tokens de prompt
+    if usage.uncached_prompt_tokens is not None:
+        return usage.uncached_prompt_tokens
+    if usage.cached_prompt_tokens is not None and usage.prompt_tokens is not None:
+        return max(usage.prompt_tokens - usage.cached_prompt_tokens, 0)
+    return None
+
+def _cost(usage: LLMUsage) -> float:
+    # Precios en USD por millón de tokens (sección usage.prices de config.json)
+    prices = get_section('usage').get('prices', {}).get(usage.model)
+    if not prices or usage.prompt_tokens is None:
+        return None
+    cached = usage.cached_prompt_tokens or 0
+    uncached = _uncached_prompt_tokens(usage)
+    prompt_price = prices.get('prompt_per_million', 0)
+    cost = (uncached if uncached is not None else usage.prompt_tokens) * prompt_price
+    cost += cached * prices.get('cached_prompt_per_million', prompt_price)
+    cost += (usage.completion_tokens or 0) * prices.get('completion_per_million', 0)
+    return cost / 1e6
+
+def record_usage(provider: str, model: str, parsed: dict, latency_ms: float) -> LLMUsage:
+    """
+    Records the usage of one LLM call: adds its tokens to the current request,
+    exports it as metrics and keeps it in the rolling window of its provider
+    and model.
+
+    Args:
+        provider (str): Provider ('deepseek', 'llama', 'aws_bedrock', 'cohere').
+        model (str): Model that served the call.
+        parsed (dict): Output of one of the parse_* functions (may be empty).
+        latency_ms (float): Duration of the call.
+
+    Returns:
+        LLMUsage: The usage record.
+    """
+    usage = LLMUsage(provider=provider, model=model, latency_ms=latency_ms, **parsed)
+    usage.cost_usd = _cost(usage)
+
+    context = current_request()
+    if context is not None:
+        context.add_tokens(usage.prompt_tokens, usage.completion_tokens)
+        context.llm_ms = (context.llm_ms or 0) + latency_ms
+
+    labels = {'provider': provider, 'model': model}
+    # Tokens de respuesta y latencia por clase de pregunta (query_classifier)
+    class_labels = dict(labels)
+    if context is not None and context.query_class:
+        class_labels['query_class'] = context.query_class
+    latency_labels = dict(class_labels)
+    if context is not None and context.context_compression is not None:
+        # Compara la latencia con contexto comprimido y sin compresión
+        latency_labels['context'] = 'compressed' if context.context_compression < 1 else 'full'
+    miss = _uncached_prompt_tokens(usage)
+    if usage.cached_prompt_tokens is not None and miss is not None:
+        hit = usage.cached_prompt_tokens
+        metrics.inc('llm_prompt_cache_tokens_total', hit, result='hit', **labels)
+        metrics.inc('llm_prompt_cache_tokens_total', miss, result='miss', **labels)
+        # Una llamada cuenta como acierto si la mayor parte del prompt salió de la caché
+        latency_labels['prompt_cache'] = 'hit' if hit and hit >= miss else 'miss'
+    metrics.observe('llm_latency_ms', latency_ms, **latency_labels)
+    if usage.prompt_tokens is not None:
+        metrics.inc('llm_tokens_total', usage.prompt_tokens, kind='prompt', **labels)
+    if usage.completion_tokens is not None:
+        metrics.inc('llm_tokens_total', usage.completion_tokens, kind='completion', **labels)
+        metrics.observe('llm_completion_tokens', usage.completion_tokens, **class_labels)
+    if usage.tokens_per_second is not None:
+        metrics.observe('llm_tokens_per_second', usage.tokens_per_second, **labels)
+    if usage.cost_usd is not None:
+        metrics.inc('llm_cost_usd_total', usage.cost_usd, **labels)
+
+    window_size = get_section('usage').get('window', 200)
+    with _lock:
+        window = _windows.get((provider, model))
+        if window is None or window.maxlen != window_size:
+            window = _windows[(provider, model)] = deque(window or (), maxlen=window_size)
+        window.append(usage)
+    return usage
+
+def _mean(values: list):
+    return round(sum(values) / len(values), 1) if values else None
+
+def _p95(values: list):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * 0.95))], 1)
+
+def usage_stats() -> dict:
+    """
+    Returns:
+        dict: Per 'provider/model', aggregates of its last calls in this
+            process: calls, mean and p95 of prompt and completion tokens,
+            latency and tokens per second, the share of prompt tokens served
+            from the provider's cache and the cost (when prices are configured).
+    """
+    with _lock:
+        windows = {key: list(window) for key, window in _windows.items()}
+    stats = {}
+    for (provider, model), calls in windows.items():
+        prompt = [u.prompt_tokens for u in calls if u.prompt_tokens is not None]
+        completion = [u.completion_tokens for u in calls if u.completion_tokens is not None]
+        latency = [u.latency_ms for u in calls if u.latency_ms is not None]
+        speed = [u.tokens_per_second for u in calls if u.tokens_per_second is not None]
+        cached = sum(u.cached_prompt_tokens or 0 for u in calls)
+        costs = [u.cost_usd for u in calls if u.cost_usd is not None]
+        stats[f'{provider}/{model}'] = {
+            'calls': len(calls),
+            'prompt_tokens': {'mean': _mean(prompt), 'p95': _p95(prompt)},
+            'completion_tokens': {'mean': _mean(completion), 'p95': _p95(completion)},
+            'latency_ms': {'mean': _mean(latency), 'p95': _p95(latency)},
+            'tokens_per_second': {'mean': _mean(speed), 'p95': _p95(speed)},
+            'cached_prompt_ratio': round(cached / sum(prompt), 3) if sum(prompt) else None,
+            'cost_usd': round(sum(costs), 6) if costs else None,
+        }
+    return stats
+
+def reset():
+    """Forgets the rolling windows (tests)."""
+    with _lock:
+        _windows.clear()
@@ -1,14 +1,11 @@
 # ./chatbot/rag/utils.py
 
-import os
 import re
-import csv
 import json
 import logging
 from datetime import datetime
-from langchain_community.document_loaders import PyPDFDirectoryLoader
-from langchain_text_splitters.character import RecursiveCharacterTextSplitter
-from langchain_community.retrievers import TFIDFRetriever
+from chatbot.rag.utils.interaction_logger import get_interaction_logger
+from chatbot.rag.utils.request_context import current_request
 
 logger = logging.getLogger(__name__)
 
@@ -26,9 +23,10 @@ def load_config(config_path: str) -> dict:
         logger.info("Configuración 'config' cargada correctamente.")
         return json.load(config_file)
 
-def load_documents_database(directory: str, chunk_size: int, chunk_overlap: int) -> TFIDFRetriever:
+def load_documents_database(directory: str, chunk_size: int, chunk_overlap: int):
     """
-    Loads and prepares the document database for retrieval.
+    Loads and prepares the document database for retrieval. The langchain
+    loaders are imported here, so processes without local PDFs never load them.
 
     Args:
         directory (str): The path to the directory containing the PDF documents.
@@ -38,6 +36,10 @@ def load_documents_database(directory: str, chunk_size: int, chunk_overlap: int)
     Returns:
         TFIDFRetriever: A TFIDFRetriever object for document retrieval.
     """
+    from langchain_community.document_loaders import PyPDFDirectoryLoader
+    from langchain_text_splitters.character import RecursiveCharacterTextSplitter
+    from langchain_community.retrievers import TFIDFRetriever
+
     docs = PyPDFDirectoryLoader(directory).load()
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
@@ -69,25 +71,38 @@ def clean_markdown_message(message: str) -> str:
     
     return message
 
-def log_message_interaction(token: str, user_message: str, response: str):
+def log_message_interaction(token: str, user_message: str, response: str, **extra):
     """
-    Logs the token, current time, user message, and bot response into a CSV file.
+    Queues the token, current time, user message, and bot response for the
+    background interaction logger, together with the accounting collected on
+    the current request (latency, provider, cache hit, call and token counts).
 
     Args:
         token (str): The CSRF token associated with the interaction.
         user_message (str): The message sent by the user.
         response (str): The response generated by the bot.
+        **extra: Accounting fields that override the request context values.
     """
-    file_path = './chatbot/rag/database/log_message_interaction.csv'
-    current_time = datetime.now().strftime('%Y%m%d%H%M%S')
-    
-    try:
-        with open(file_path, mode='a', newline='') as file:
-            writer = csv.writer(file)
-            if not os.path.exists(file_path):
-                writer.writerow(['Token', 'Time', 'User Message', 'Response'])
-            writer.writerow([token,current_time,user_message,clean_markdown_message(response)])
-        
-        logger.info(f"Registro guardado")
-    except Exception as e:
-        logger.error(f"Error al guardar la interacción en {file_path}: {e}")
+    record = {
+        'token': token,
+        'time': datetime.now().strftime('%Y%m%d%H%M%S'),
+        'user_message': user_message,
+        'response': response,
+    }
+    context = current_request()
+    if context is not None:
+        record.update({
+            'endpoint': context.endpoint,
+            'provider': context.provider,
+            'model': context.model,
+            'latency_ms': round(context.elapsed_ms(), 1),
+            'cache_hit': context.cache_hit,
+            'search_calls': context.search_calls,
+            'llm_calls': context.llm_calls,
+            'prompt_tokens': context.prompt_tokens,
+            'completion_tokens': context.completion_tokens,
+            'llm_ms': round(context.llm_ms, 1) if context.llm_ms is not None else None,
+        })
+    record.update(extra)
+    if not get_interaction_logger().log(record):
+        logger.warning("Cola de registro de interacciones llena; registro descartado")
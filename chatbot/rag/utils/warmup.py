@@ -0,0 +1,71 @@
+# ./chatbot/rag/utils/warmup.py
+
+import os
+import time
+import logging
+
+from chatbot.rag.utils.config_loader import get_section
+
+logger = logging.getLogger(__name__)
+
+# Proceso (pid) que terminó su calentamiento y puede recibir tráfico
+_warm_pid = None
+_app_seconds = None
+
+def warm_up_app() -> float:
+    """
+    Builds everything a request needs that can be shared copy-on-write
+    between forked workers: the URLconf (which builds the default handler
+    and the preloaded profiles, with their retrieval indexes) and the
+    caches, whose L1 is loaded from the snapshots. Idempotent.
+
+    Returns:
+        float: Seconds spent (0 when the process was already warm).
+    """
+    global _app_seconds
+    if _app_seconds is not None:
+        return 0.0
+    start = time.perf_counter()
+    from django.urls import get_resolver
+    from chatbot.rag.cache.tiered import get_cache
+    from chatbot.rag.cache.pages import get_page_store
+
+    get_resolver().url_patterns
+    for name in get_section('cache').get('caches', {}):
+        if name != 'pages':
+            get_cache(name)
+    get_page_store()
+    _app_seconds = time.perf_counter() - start
+    logger.info(f'Aplicación precargada en {_app_seconds:.2f}s (pid {os.getpid()}).')
+    return _app_seconds
+
+def warm_up_worker():
+    """
+    Finishes the warm-up of a worker right before it accepts connections:
+    the shared part (when it was not preloaded by the master) and the
+    per-process HTTP pool, connected to the LLM APIs of the built handlers,
+    and the background tasks of those handlers.
+    """
+    global _warm_pid
+    start = time.perf_counter()
+    warm_up_app()
+    from chatbot.rag.handlers.registry import get_registry
+    if get_section('server').get('preconnect', True):
+        from chatbot.rag.utils.http_client import preconnect
+        urls = [handler.api_url for handler in get_registry().handlers() if getattr(handler, 'api_url', None)]
+        preconnect(urls, timeout=get_section('server').get('preconnect_timeout_seconds', 2.0))
+    # Hilos propios de cada handler (p. ej. el ping que mantiene cargado el modelo de Ollama)
+    for handler in get_registry().handlers():
+        handler.start_background_tasks()
+    _warm_pid = os.getpid()
+    # Primera comprobación de dependencias antes de aceptar tráfico
+    from chatbot.rag.utils.health import get_health_monitor
+    get_health_monitor()
+    logger.info(f'Worker {os.getpid()} listo en {time.perf_counter() - start:.2f}s.')
+
+def is_warm() -> bool:
+    """
+    Returns:
+        bool: True once this process finished warm_up_worker().
+    """
+    return _warm_pid == os.getpid()
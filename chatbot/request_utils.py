@@ -0,0 +1,65 @@
+# ./chatbot/request_utils.py
+
+import hashlib
+
+from django.conf import settings
+
+from chatbot.rag.utils.config_loader import get_section
+
+def get_client_ip(request) -> str:
+    """
+    Returns the client IP address. X-Forwarded-For is only honoured when
+    'rate_limit.trusted_proxies' says how many reverse proxies sit in front.
+
+    Args:
+        request: Django or DRF request.
+
+    Returns:
+        str: The client IP (empty string if unknown).
+    """
+    trusted_proxies = get_section('rate_limit').get('trusted_proxies', 0)
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if trusted_proxies and forwarded:
+        hops = [hop.strip() for hop in forwarded.split(',') if hop.strip()]
+        if hops:
+            return hops[-min(trusted_proxies, len(hops))]
+    return request.META.get('REMOTE_ADDR', '')
+
+def get_client_key(request) -> str:
+    """
+    Identifies the client of a request: Django session, then CSRF token
+    (cookie or X-CSRFToken header), then IP address.
+
+    Args:
+        request: Django or DRF request.
+
+    Returns:
+        str: A short key such as 'session:…', 'csrf:…' or 'ip:…'.
+    """
+    session = getattr(request, 'session', None)
+    session_key = getattr(session, 'session_key', None)
+    if session_key:
+        return 'session:' + _digest(session_key)
+    csrf_token = request.COOKIES.get(settings.CSRF_COOKIE_NAME) or request.META.get('HTTP_X_CSRFTOKEN')
+    if csrf_token:
+        return 'csrf:' + _digest(csrf_token)
+    return 'ip:' + get_client_ip(request)
+
+def get_session_id(request) -> str:
+    """
+    Identifies the conversation of a request for the session store. Clients
+    only known by IP get no session, so users behind a shared NAT never see
+    each other's context.
+
+    Args:
+        request: Django or DRF request.
+
+    Returns:
+        str: The session or CSRF client key, or an empty string.
+    """
+    client_key = get_client_key(request)
+    return '' if client_key.startswith('ip:') else client_key
+
+def _digest(value: str) -> str:
+    # Las claves no guardan el token original
+    return hashlib.blake2b(value.encode('utf-8'), digest_size=8).hexdigest()
@@ -86,6 +86,42 @@ function enableSendButton() {
     sendButton.style.cursor = "pointer"; // Restaurar el cursor original
 }
 
+// Precarga de la búsqueda web mientras el usuario escribe
+const PREFETCH_DEBOUNCE_MS = 600; // Pausa al escribir que dispara la precarga
+const PREFETCH_MIN_LENGTH = 12; // Preguntas más cortas no se precargan
+let prefetchTimer = null;
+let lastPrefetched = "";
+let prefetchPausedUntil = 0;
+
+function prefetchQuestion() {
+    const message = document.getElementById("userMessage").value.trim();
+
+    if (message.length < PREFETCH_MIN_LENGTH || message === lastPrefetched || Date.now() < prefetchPausedUntil) return;
+    lastPrefetched = message;
+
+    fetch("/api/prefetch/", {
+        method: "POST",
+        headers: {
+            "Content-Type": "application/json",
+            "X-CSRFToken": getCSRFToken(),
+        },
+        body: JSON.stringify({ message: message }),
+    })
+        .then((response) => {
+            // Cuota de precargas agotada: esperar lo que indique el servidor
+            if (response.status === 429) {
+                const retryAfter = parseInt(response.headers.get("Retry-After") || "30", 10);
+                prefetchPausedUntil = Date.now() + retryAfter * 1000;
+            }
+        })
+        .catch(() => {}); // La precarga es opcional: los errores se ignoran
+}
+
+function schedulePrefetch() {
+    clearTimeout(prefetchTimer);
+    prefetchTimer = setTimeout(prefetchQuestion, PREFETCH_DEBOUNCE_MS);
+}
+
 // Función para enviar el mensaje
 function sendMessage() {
     const userInput = document.getElementById("userMessage");
@@ -93,6 +129,10 @@ function sendMessage() {
 
     if (message === "") return; // No enviar mensajes vacíos
 
+    // Cancelar la precarga pendiente: el envío ya busca
+    clearTimeout(prefetchTimer);
+    lastPrefetched = "";
+
     // Añadir el mensaje del usuario al chat
     appendMessage(message, "user");
 
@@ -139,4 +179,7 @@ document.getElementById("userMessage").addEventListener("keyup", function(event)
     if (event.key === "Enter") {
         sendMessage();
     }
-});
\ No newline at end of file
+});
+
+// Precargar la búsqueda cuando el usuario hace una pausa al escribir
+document.getElementById("userMessage").addEventListener("input", schedulePrefetch);
\ No newline at end of file
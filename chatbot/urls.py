@@ -4,4 +4,5 @@ from . import views
 urlpatterns = [
     path('', views.index),
     path('api/send_message/', views.send_message, name='send_message'),
+    path('api/internal/cache/<str:name>/<str:key>/', views.peer_cache, name='peer_cache'),
 ]
\ No newline at end of file
@@ -1,20 +1,27 @@
 # ./chatbot/views.py
 
 import json
-import os
 
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse
 from django.shortcuts import render
-from django.views.decorators.csrf import csrf_protect
+from django.views.decorators.csrf import csrf_protect, csrf_exempt
 
-from chatbot.rag.handlers.factory import get_qa_handler
+from chatbot.rag.handlers.factory import get_qa_handler, get_profile_handler
 from chatbot.rag.utils.utils import log_message_interaction
+from chatbot.rag.utils.request_context import request_scope
+from chatbot.rag.cache.answers import get_cached_answer, cache_answer
+from chatbot.rag.cache.tiered import get_cache
+from chatbot.rag.cache.pages import get_page_store
+from chatbot.rag.cache.peers import get_peer_cache, serve_peer_request, PEER_CACHES, TOKEN_HEADER, TTL_HEADER
+from chatbot.rag.utils.session_store import record_session_turn
+from chatbot.rag.utils.deadline import deadline_for, generation_reserve
+from chatbot.rag.utils.rate_limit import rate_limited
+from chatbot.rag.utils.scheduler import get_scheduler, overloaded_response, SchedulerOverloaded, PRIORITY_INTERACTIVE
+from chatbot.rag.utils.config_loader import get_config
+from chatbot.request_utils import get_client_key, get_session_id
 
-# Load the configuration file
-CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'rag/config/config.json')
-
-with open(CONFIG_PATH, 'r') as config_file:
-    config = json.load(config_file)
+# Configuración compartida (config.json se lee una sola vez por proceso)
+config = get_config()
 
 # Determine the bot type based on the configuration
 BOT_TYPE = config.get('bot_type', 'cohere')  # Default value: "cohere"
@@ -34,6 +41,7 @@ def index(request):
     return render(request, 'index.html')
 
 @csrf_protect
+@rate_limited
 def send_message(request):
     """
     Handles a POST request to send a message to the chatbot and receive a response.
@@ -45,11 +53,64 @@ def send_message(request):
         csrf_token = request.META.get('HTTP_X_CSRFTOKEN', 'No CSRF token found')
         data = json.loads(request.body)
         user_message = data.get('message')
-        response = qa_handler.get_answer(user_message)
-        try:
-            log_message_interaction(str(csrf_token), user_message, response)
-        except Exception as e:
-            print(e)
+        profile = data.get('profile') or ''
+        bot_type, handler = BOT_TYPE, qa_handler
+        if profile:
+            try:
+                bot_type, handler = get_profile_handler(str(profile))
+            except ValueError as e:
+                return JsonResponse({'error': str(e)}, status=400)
+        with request_scope(endpoint='send_message', client_key=get_client_key(request), session_id=get_session_id(request),
+                           provider=bot_type, model=getattr(handler, 'model', ''), profile=str(profile),
+                           deadline=deadline_for('send_message')) as context:
+            response = get_cached_answer(user_message)
+            if response is None:
+                try:
+                    with get_scheduler(bot_type).admit(PRIORITY_INTERACTIVE, timeout=context.deadline.timeout(reserve=generation_reserve())):
+                        response = handler.get_answer(user_message)
+                except SchedulerOverloaded as e:
+                    return overloaded_response(e)
+                cache_answer(user_message, response)
+            record_session_turn(context.session_id, user_message, response)
+            try:
+                log_message_interaction(str(csrf_token), user_message, response)
+            except Exception as e:
+                print(e)
         return JsonResponse({'response': response})
     
-    return JsonResponse({'error': 'Método no permitido'}, status=405)
\ No newline at end of file
+    return JsonResponse({'error': 'Método no permitido'}, status=405)
+
+@csrf_exempt
+def peer_cache(request, name, key):
+    """
+    Internal endpoint used by the other nodes of the cache ring: GET returns
+    the encoded value of a key held by this node, PUT stores one. Requests
+    must carry the shared X-Cache-Token; without peer caching enabled the
+    endpoint does not exist.
+
+    :param request: HTTP request from a peer node.
+    :param name: Cache name ('search', 'answer' or 'pages').
+    :param key: Cache key.
+    :return: Raw encoded value (200) with its remaining lifetime in X-Cache-TTL,
+        204 after a PUT, or an error status.
+    """
+    peers = get_peer_cache()
+    if peers is None:
+        return HttpResponse(status=404)
+    if not peers.authorized(request.headers.get(TOKEN_HEADER)):
+        return HttpResponse(status=403)
+    if name not in PEER_CACHES:
+        return HttpResponse(status=404)
+    store = get_page_store() if name == 'pages' else get_cache(name)
+    if store is None:
+        return HttpResponse(status=404)
+    try:
+        ttl_seconds = float(request.headers.get(TTL_HEADER) or 0) or None
+    except ValueError:
+        return HttpResponse(status=400)
+    status, body, remaining = serve_peer_request(store, request.method, key, request.body if request.method == 'PUT' else b'', ttl_seconds)
+    response = HttpResponse(body, status=status, content_type='application/octet-stream')
+    if remaining:
+        # Vida restante de la entrada: quien la recibe no la guarda por más tiempo
+        response[TTL_HEADER] = f'{remaining:.3f}'
+    return response
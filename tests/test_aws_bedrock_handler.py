@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para la recuperación y el contexto de QA_AwsBedrockHandler
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+
+from chatbot.rag.handlers.aws_bedrock_handler import QA_AwsBedrockHandler
+from chatbot.rag.utils import metrics
+
+
+class TestQA_AwsBedrockHandler(unittest.TestCase):
+    """Tests del contexto enviado a AWS Bedrock"""
+
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        self.client = Mock()
+        self.client.converse.return_value = {
+            'output': {'message': {'content': [{'text': 'respuesta'}]}},
+            'usage': {'inputTokens': 10, 'outputTokens': 5},
+        }
+        with patch('chatbot.rag.handlers.aws_bedrock_handler.get_client', return_value=self.client):
+            self.handler = QA_AwsBedrockHandler(model='modelo', temperature=0.2, max_tokens=50)
+
+    def test_answer_uses_shared_retrieval(self):
+        """La respuesta usa retrieve() (PDFs y web fusionados), sin índice TF-IDF propio"""
+        results = [
+            {'title': 'Reglamento', 'url': 'reglamento.pdf#p3', 'content': 'La matrícula vence el 15 de marzo.'},
+            {'title': 'Admisiones', 'url': 'https://ejemplo.edu/admisiones', 'content': 'El pago de la matrícula se hace en línea.'},
+        ]
+        with patch.object(QA_AwsBedrockHandler, 'retrieve', return_value=results) as retrieve:
+            self.assertEqual(self.handler.get_answer('¿Cuándo vence la matrícula?'), 'respuesta')
+        retrieve.assert_called_once_with('¿Cuándo vence la matrícula?')
+        self.assertFalse(hasattr(self.handler, 'tfidf_retriever'))
+
+        prompt = self.client.converse.call_args.kwargs['messages'][0]['content'][0]['text']
+        self.assertIn('[Fuente 1: Reglamento - reglamento.pdf#p3]', prompt)
+        self.assertIn('[Fuente 2: Admisiones - https://ejemplo.edu/admisiones]', prompt)
+
+    def test_no_results_skips_model(self):
+        """Sin resultados no se llama al modelo"""
+        with patch.object(QA_AwsBedrockHandler, 'retrieve', return_value=[]):
+            self.assertIn('no pude encontrar', self.handler.get_answer('¿Cuándo vence la matrícula?'))
+        self.client.converse.assert_not_called()
+
+    def test_context_length_limit(self):
+        """El contexto respeta el presupuesto de caracteres"""
+        results = [{'title': f'T{i}', 'url': f'u{i}', 'content': 'x' * 1500} for i in range(5)]
+        context = self.handler.get_context(results, 2000)
+        self.assertLessEqual(len(context), 2000)
+        self.assertIn('[Fuente 1: T0 - u0]', context)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para las respuestas por lotes y la búsqueda compartida
+"""
+
+import time
+import threading
+import unittest
+from unittest.mock import Mock
+from concurrent.futures import ThreadPoolExecutor
+
+from chatbot.rag.utils.batch import find_duplicates, run_batch
+from chatbot.rag.utils.search_memo import SearchMemo, search_memo_scope
+from chatbot.rag.utils.hybrid_retriever import HybridRetriever
+
+
+class TestFindDuplicates(unittest.TestCase):
+    """Tests de la deduplicación de preguntas"""
+
+    def test_identical_and_near_identical_questions(self):
+        """Se agrupan preguntas iguales tras normalizar y casi iguales por Jaccard"""
+        messages = [
+            '¿Cuándo abren las inscripciones de pregrado?',
+            'cuando abren las INSCRIPCIONES de pregrado',
+            '¿Dónde queda la sede Macarena?',
+            'las inscripciones de pregrado cuando abren',
+            '¿Cuándo abren las inscripciones de posgrado?',
+        ]
+        self.assertEqual(find_duplicates(messages), [0, 0, 2, 0, 4])
+        self.assertEqual(find_duplicates(messages, near_threshold=0.6), [0, 0, 2, 0, 0])
+
+
+class TestRunBatch(unittest.TestCase):
+    """Tests de la ejecución concurrente del lote"""
+
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.addCleanup(self.executor.shutdown)
+
+    def test_results_in_order_and_concurrent(self):
+        """Las respuestas salen en orden, cada pregunta distinta se responde una vez y en paralelo"""
+        calls = []
+
+        def answer(message):
+            calls.append(message)
+            time.sleep(0.1)
+            return {'response': message.upper()}
+
+        messages = ['uno', 'dos', 'tres', 'Uno', 'cuatro']
+        start = time.monotonic()
+        items = list(run_batch(messages, answer, executor=self.executor))
+        elapsed = time.monotonic() - start
+
+        self.assertEqual([item['index'] for item in items], [0, 1, 2, 3, 4])
+        self.assertEqual(items[3], {'index': 3, 'message': 'Uno', 'response': 'UNO', 'duplicate_of': 0})
+        self.assertEqual(sorted(calls), ['cuatro', 'dos', 'tres', 'uno'])
+        self.assertLess(elapsed, 0.3)
+
+    def test_errors_are_reported_per_item(self):
+        """Un error en un mensaje no interrumpe el lote"""
+        def answer(message):
+            if message == 'falla':
+                raise RuntimeError('boom')
+            return {'response': 'ok'}
+
+        items = list(run_batch(['falla', 'bien'], answer, executor=self.executor))
+        self.assertEqual(items[0]['error'], 'Error interno del servidor')
+        self.assertEqual(items[1]['response'], 'ok')
+
+    def test_web_search_shared_across_batch(self):
+        """Las búsquedas web iguales del lote se hacen una sola vez"""
+        web_search = Mock(side_effect=lambda q: time.sleep(0.05) or [{'url': 'https://udistrital.edu.co', 'content': q}])
+        retriever = HybridRetriever(None, web_search)
+
+        def answer(message):
+            return {'response': retriever.search(message, web_query='admisiones udistrital')[0]['content']}
+
+        items = list(run_batch(['inscripciones', 'admisiones', 'aspirantes'], answer, executor=self.executor))
+        self.assertEqual(web_search.call_count, 1)
+        self.assertTrue(all(item['response'] == 'admisiones udistrital' for item in items))
+
+
+class TestSearchMemo(unittest.TestCase):
+    """Tests del memo de búsquedas con single-flight"""
+
+    def test_concurrent_callers_share_one_computation(self):
+        """Las llamadas concurrentes a la misma clave esperan al primer cálculo"""
+        memo = SearchMemo()
+        started = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            time.sleep(0.05)
+            return ['resultado']
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(memo.get_or_compute('k', compute))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(1)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [['resultado']] * 5)
+        self.assertEqual((memo.misses, memo.hits), (1, 4))
+
+    def test_errors_are_shared_and_scope_is_isolated(self):
+        """Los errores se propagan a todos y fuera del ámbito no hay memo"""
+        web_search = Mock(return_value=[{'url': 'u'}])
+        retriever = HybridRetriever(None, web_search)
+        with search_memo_scope() as memo:
+            retriever.search('a')
+            retriever.search('A')
+            with self.assertRaises(ValueError):
+                memo.get_or_compute('x', Mock(side_effect=ValueError('x')))
+            with self.assertRaises(ValueError):
+                memo.get_or_compute('x', Mock(return_value=1))
+        retriever.search('a')
+        self.assertEqual(web_search.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
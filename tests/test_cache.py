@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para la caché de dos niveles (L1 en proceso + L2 compartida)
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+import socketserver
+from unittest.mock import Mock, patch
+
+from chatbot.rag.cache import tiered
+from chatbot.rag.cache.serialization import encode, decode
+from chatbot.rag.cache.backends import MemoryBackend, SQLiteBackend, RedisBackend
+from chatbot.rag.cache.tiered import TieredCache, make_key
+from chatbot.rag.cache.answers import get_cached_answer, cache_answer
+from chatbot.rag.cache import pages
+from chatbot.rag.cache.pages import PageStore, PageRefResult, pack_results, unpack_results, compress_page, decompress_page
+from chatbot.rag.utils.hybrid_retriever import reciprocal_rank_fusion
+from chatbot.rag.utils import metrics, session_store
+from chatbot.rag.utils.request_context import request_scope
+from websearch import search
+
+
+class _FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Servidor RESP mínimo (GET, SET PX, PTTL, DEL, SCAN, PING) que sustituye a Redis en los tests"""
+
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            self.wfile.write(self.server.execute(args))
+
+class _FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _FakeRedisHandler)
+        self.data = {}
+
+    def execute(self, args):
+        command = args[0].upper()
+        now = time.time()
+        if command == b'PING':
+            return b'+PONG\r\n'
+        if command == b'SET':
+            expires = now + int(args[4]) / 1000 if len(args) > 4 else None
+            self.data[args[1]] = (args[2], expires)
+            return b'+OK\r\n'
+        if command == b'GET':
+            value, expires = self.data.get(args[1], (None, None))
+            if value is None or (expires and expires <= now):
+                return b'$-1\r\n'
+            return b'$%d\r\n%s\r\n' % (len(value), value)
+        if command == b'PTTL':
+            value, expires = self.data.get(args[1], (None, None))
+            if value is None or (expires and expires <= now):
+                return b':-2\r\n'
+            return b':%d\r\n' % (int((expires - now) * 1000) if expires else -1)
+        if command == b'DEL':
+            removed = sum(self.data.pop(key, None) is not None for key in args[1:])
+            return b':%d\r\n' % removed
+        if command == b'SCAN':
+            prefix = args[3].rstrip(b'*')
+            keys = [key for key in self.data if key.startswith(prefix)]
+            return b'*2\r\n$1\r\n0\r\n*%d\r\n' % len(keys) + b''.join(b'$%d\r\n%s\r\n' % (len(k), k) for k in keys)
+        return b'-ERR unknown command\r\n'
+
+
+class TestSerialization(unittest.TestCase):
+    """Tests de la serialización con compresión"""
+
+    def test_roundtrip_with_and_without_compression(self):
+        """Los valores grandes se comprimen y ambos formatos se recuperan igual"""
+        small = {'url': 'https://udistrital.edu.co', 'content': 'corto'}
+        large = [{'content': 'Inscripciones de pregrado ' * 200}]
+        self.assertEqual(encode(small)[:1], b'j')
+        self.assertEqual(encode(large)[:1], b'z')
+        self.assertLess(len(encode(large)), len(encode(large, compress_min_bytes=10 ** 9)) / 5)
+        self.assertEqual(decode(encode(small)), small)
+        self.assertEqual(decode(encode(large)), large)
+        with self.assertRaises(ValueError):
+            decode(b'x{}')
+        with self.assertRaises(ValueError):
+            decode(encode(large)[:50])
+
+
+class TestMemoryBackend(unittest.TestCase):
+    """Tests de la capa L1"""
+
+    def test_lru_bytes_cap_and_expiry(self):
+        """Se desaloja por número de entradas, por bytes y por expiración"""
+        backend = MemoryBackend(max_entries=2, max_bytes=10)
+        backend.set('a', b'1234', 60)
+        backend.set('b', b'1234', 60)
+        backend.get('a')
+        backend.set('c', b'1234', 60)
+        self.assertIsNone(backend.get('b'))
+        backend.set('d', b'123456', 60)
+        self.assertEqual([key for key, _, _ in backend.items()], ['c', 'd'])
+        backend.set('e', b'1', -1)
+        self.assertIsNone(backend.get('e'))
+        self.assertLessEqual(backend.stats()['bytes'], 10)
+        self.assertEqual(backend.stats()['evictions'], 3)
+
+
+class TestTieredCache(unittest.TestCase):
+    """Tests de la caché de dos niveles"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        self.shared = SQLiteBackend(os.path.join(self.tmpdir, 'cache.sqlite3'))
+
+    def _counter(self, layer, result):
+        for counter in metrics.snapshot()['counters']:
+            if counter['name'] == 'cache_requests_total' and counter['labels'] == {'cache': 'search', 'layer': layer, 'result': result}:
+                return counter['value']
+        return 0
+
+    def test_shared_layer_across_workers(self):
+        """Lo que guarda un worker lo lee otro desde la capa compartida y lo promueve a su L1"""
+        worker_a = TieredCache('search', MemoryBackend(), self.shared)
+        worker_b = TieredCache('search', MemoryBackend(), self.shared)
+        key = make_key('inscripciones', {'topic': 'general'})
+        worker_a.set(key, [{'url': 'u', 'content': 'c' * 2000}])
+
+        self.assertEqual(worker_b.get(key)[0]['url'], 'u')
+        self.assertEqual(worker_b.get(key)[0]['url'], 'u')
+        self.assertIsNone(worker_b.get(make_key('otra consulta')))
+        self.assertEqual((self._counter('l1', 'hit'), self._counter('l2', 'hit'), self._counter('l2', 'miss')), (1, 1, 1))
+        self.assertEqual((worker_b.stats()['hits'], worker_b.stats()['misses'], worker_b.stats()['hit_ratio']), (2, 1, 0.667))
+
+        worker_a.clear()
+        self.assertIsNone(TieredCache('search', MemoryBackend(), self.shared).get(key))
+
+    def test_snapshot_and_warm(self):
+        """El snapshot de L1 se recarga al iniciar, sin las entradas vencidas"""
+        path = os.path.join(self.tmpdir, 'snapshots', 'search.snapshot')
+        cache = TieredCache('search', MemoryBackend())
+        cache.set('vigente', {'a': 1})
+        cache.set('vencida', {'b': 2}, ttl_seconds=0.01)
+        time.sleep(0.02)
+        self.assertEqual(cache.snapshot(path), 1)
+
+        restarted = TieredCache('search', MemoryBackend())
+        self.assertEqual(restarted.warm(path), 1)
+        self.assertEqual(restarted.get('vigente'), {'a': 1})
+        self.assertEqual(TieredCache('answer', MemoryBackend()).warm(path), 0)
+
+    def test_corrupt_entry_is_a_miss(self):
+        """Una entrada comprimida truncada o corrupta se descarta como fallo"""
+        cache = TieredCache('search', MemoryBackend(), self.shared)
+        cache.set('k', [{'content': 'Inscripciones de pregrado ' * 200}])
+        self.shared.set('search:k', b'z' + b'basura', 60)
+        cache.l1.clear()
+        self.assertIsNone(cache.get('k'))
+        self.assertIsNone(self.shared.get('search:k'))
+
+    def test_shared_layer_failure_is_a_miss(self):
+        """Un error de la capa compartida se registra como fallo, sin romper la solicitud"""
+        broken = Mock()
+        broken.get_entry.side_effect = ConnectionRefusedError('caída')
+        broken.set.side_effect = ConnectionRefusedError('caída')
+        cache = TieredCache('search', MemoryBackend(), broken)
+        cache.set('k', 1)
+        cache.l1.clear()
+        self.assertIsNone(cache.get('k'))
+
+
+class TestRedisBackend(unittest.TestCase):
+    """Tests de la capa compartida sobre un servidor compatible con Redis"""
+
+    def setUp(self):
+        self.server = _FakeRedisServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = 'redis://127.0.0.1:%d/0' % self.server.server_address[1]
+
+    def test_get_set_clear(self):
+        """Se guardan valores binarios con TTL y se limpian por prefijo"""
+        backend = RedisBackend(self.url, prefix='test:')
+        self.assertTrue(backend.client.ping())
+        cache = TieredCache('answer', MemoryBackend(), backend)
+        cache.set('k', 'Respuesta ' * 300)
+        self.assertIn(b'test:answer:k', self.server.data)
+        self.assertEqual(TieredCache('answer', MemoryBackend(), backend).get('k'), 'Respuesta ' * 300)
+        _, expires_at = backend.get_entry('answer:k')
+        self.assertAlmostEqual(expires_at, time.time() + cache.ttl_seconds, delta=5)
+        cache.clear()
+        self.assertEqual(self.server.data, {})
+
+    def test_unreachable_server(self):
+        """Sin servidor, la caché responde como fallo"""
+        self.server.shutdown()
+        self.server.server_close()
+        cache = TieredCache('answer', MemoryBackend(), RedisBackend(self.url, timeout=0.1))
+        cache.set('k', 'v')
+        self.assertIsNone(TieredCache('answer', MemoryBackend(), cache.l2).get('k'))
+
+
+class TestPageStore(unittest.TestCase):
+    """Tests del almacén de páginas por contenido"""
+
+    def setUp(self):
+        self.store = PageStore(MemoryBackend())
+        self.page = 'Calendario académico de pregrado. ' * 300
+
+    def test_codecs(self):
+        """Las páginas se comprimen con zstd o zlib y ambos formatos se leen"""
+        for codec in ('zstd', 'zlib'):
+            data = compress_page(self.page, codec)
+            self.assertLess(len(data), len(self.page) / 10)
+            self.assertEqual(decompress_page(data), self.page)
+        with patch.object(pages, 'zstandard', None):
+            self.assertEqual(compress_page(self.page, 'zstd')[:1], b'z')
+
+    def test_pages_are_deduplicated(self):
+        """Una página repetida en varias búsquedas se guarda una sola vez"""
+        first = pack_results([{'url': 'u1', 'content': 'c', 'raw_content': self.page}], self.store)
+        second = pack_results([{'url': 'u1', 'content': 'c', 'raw_content': self.page},
+                               {'url': 'u2', 'content': 'd', 'raw_content': 'Otra página'}], self.store)
+        self.assertNotIn('raw_content', first[0])
+        self.assertEqual(first[0]['raw_content_ref'], second[0]['raw_content_ref'])
+        stats = self.store.stats()
+        self.assertEqual((stats['pages'], stats['puts'], stats['duplicates']), (2, 3, 1))
+        self.assertEqual(stats['dedup_ratio'], 1.5)
+        self.assertGreater(stats['compression_ratio'], 10)
+
+        self.store.clear()
+        self.assertIsNone(self.store.get(first[0]['raw_content_ref']))
+
+    def test_lazy_resolution(self):
+        """El contenido se descomprime solo al leerlo y las copias siguen siendo perezosas"""
+        packed = pack_results([{'url': 'u1', 'content': 'c', 'raw_content': self.page}], self.store)
+        with patch.object(self.store, 'get', wraps=self.store.get) as mock_get:
+            result = unpack_results(packed, self.store)[0]
+            self.assertIsInstance(result, PageRefResult)
+            fused = reciprocal_rank_fusion([[result]])[0]
+            self.assertEqual(fused['url'], 'u1')
+            mock_get.assert_not_called()
+            self.assertEqual(fused.get('raw_content', fused.get('content')), self.page)
+            self.assertEqual(dict(result)['raw_content'], self.page)
+            self.assertEqual(mock_get.call_count, 2)
+
+    def test_missing_page_falls_back_to_content(self):
+        """Si la página ya no existe se usa el fragmento 'content'"""
+        result = unpack_results([{'url': 'u1', 'content': 'fragmento', 'raw_content_ref': 'inexistente'}], self.store)[0]
+        self.assertEqual(result.get('raw_content', result.get('content')), 'fragmento')
+        self.assertNotIn('raw_content', result)
+        with self.assertRaises(KeyError):
+            result['raw_content']
+
+
+class TestCacheIntegration(unittest.TestCase):
+    """Tests del uso de la caché en la búsqueda web y en las respuestas"""
+
+    def setUp(self):
+        caches = {'search': TieredCache('search', MemoryBackend()), 'answer': TieredCache('answer', MemoryBackend())}
+        for p in [
+            patch.object(tiered, '_caches', caches),
+            patch.object(session_store, '_session_store', session_store.SessionStore()),
+            patch.object(pages, '_page_store', PageStore(MemoryBackend())),
+        ]:
+            p.start()
+            self.addCleanup(p.stop)
+
+    @patch.object(search, 'get_search_config', return_value={
+        'include_domains': [], 'country': None, 'max_results': 3, 'chunks_per_source': 3,
+        'search_depth': 'advanced', 'topic': None, 'time_range': None, 'days': None,
+        'start_date': None, 'end_date': None,
+    })
+    @patch.object(search, 'get_tavily_client')
+    def test_repeated_search_uses_cache(self, mock_client, _):
+        """Una consulta repetida (tras normalizar) no vuelve a llamar a Tavily"""
+        page = 'Inscripciones abiertas hasta el 30 de octubre. ' * 100
+        mock_client.return_value.search.return_value = {'results': [{'url': 'u', 'content': 'c', 'raw_content': page}]}
+        self.assertEqual(len(search.search_web('¿Cuándo abren inscripciones?')), 1)
+        cached = search.search_web('cuando abren inscripciones')
+        self.assertEqual(mock_client.return_value.search.call_count, 1)
+        self.assertIsInstance(cached[0], PageRefResult)
+        self.assertEqual(dict(cached[0]), {'url': 'u', 'content': 'c', 'raw_content': page})
+
+        search.search_web('inscripciones pregrado')
+        self.assertEqual(pages.get_page_store().stats()['dedup_ratio'], 2.0)
+
+    def test_answer_cache(self):
+        """Se reutilizan respuestas, salvo errores y preguntas de seguimiento"""
+        with request_scope(provider='deepseek', model='deepseek-chat'):
+            self.assertIsNone(get_cached_answer('¿Dónde queda la sede Macarena?'))
+            cache_answer('¿Dónde queda la sede Macarena?', 'En la carrera 3.')
+            cache_answer('¿Horario de biblioteca?', 'Lo siento, no pude encontrar información relevante.')
+        with request_scope(provider='deepseek', model='deepseek-chat') as context:
+            self.assertEqual(get_cached_answer('donde queda la sede macarena'), 'En la carrera 3.')
+            self.assertTrue(context.cache_hit)
+            self.assertIsNone(get_cached_answer('¿Horario de biblioteca?'))
+        with request_scope(provider='llama', model='llama3'):
+            self.assertIsNone(get_cached_answer('¿Dónde queda la sede Macarena?'))
+
+        session_store.get_session_store().remember_results('session:1', '¿Dónde queda la sede Macarena?', [{'url': 'u'}])
+        with request_scope(provider='deepseek', model='deepseek-chat', session_id='session:1'):
+            self.assertIsNone(get_cached_answer('¿Y su horario?'))
+        with request_scope(provider='deepseek', model='deepseek-chat', follow_up_of='¿Dónde queda la sede Macarena?'):
+            cache_answer('¿Y su horario?', 'De 8 a 5.')
+            self.assertIsNone(get_cached_answer('¿Y su horario?'))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
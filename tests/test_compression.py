@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para la compresión extractiva del contexto web
+"""
+
+import unittest
+
+from chatbot.rag.utils.compression import ContextCompressor
+
+MENU = "* [Inicio](https://www.udistrital.edu.co)\n* [Admisiones](https://www.udistrital.edu.co/admisiones)\n"
+FOOTER = (
+    "Universidad Distrital Francisco José de Caldas - Carrera 7 No. 40B - 53, Bogotá D.C.\n"
+    "Utilizamos cookies para mejorar su experiencia de navegación.\n"
+    "Todos los derechos reservados © 2024\n"
+)
+FILLER = " ".join(f"La noticia número {i} trata de los eventos culturales del campus." for i in range(30))
+
+
+class TestContextCompressor(unittest.TestCase):
+    """Tests de la limpieza de plantilla y de la selección de oraciones"""
+
+    def setUp(self):
+        self.compressor = ContextCompressor(target_ratio=0.3, min_chars=1200)
+        self.results = [
+            {'title': 'Admisiones', 'url': 'https://a',
+             'raw_content': MENU + "# Proceso de admisión\n" + FILLER + " Los aspirantes a pregrado deben "
+                            "inscribirse en línea y presentar la prueba Saber 11 para el proceso de admisión.\n" + FOOTER},
+            {'title': 'Noticias', 'url': 'https://b', 'content': MENU + FILLER.replace('noticia', 'nota') + "\n" + FOOTER},
+        ]
+
+    def test_keeps_question_sentences_and_hits_target(self):
+        """Se conservan las oraciones de la pregunta y se alcanza la razón objetivo"""
+        compressed, stats = self.compressor.compress(self.results, '¿Cómo es el proceso de admisión?')
+        page = compressed[0]['raw_content']
+        self.assertIn('presentar la prueba Saber 11', page)
+        self.assertNotIn('cookies', page)
+        self.assertNotIn('Inicio', page)
+        self.assertNotIn('derechos reservados', page)
+        self.assertLess(stats['ratio'], 0.4)
+        self.assertGreater(stats['boilerplate_lines'], 0)
+        # El resultado original (posiblemente en caché) no se modifica
+        self.assertIn('cookies', self.results[0]['raw_content'])
+        self.assertEqual(compressed[1]['title'], 'Noticias')
+
+    def test_repeated_footer_kept_once_when_relevant(self):
+        """El pie repetido se descarta, salvo que responda la pregunta (una sola vez)"""
+        compressed, _ = self.compressor.compress(self.results, '¿Cuál es la dirección de la sede?')
+        addresses = sum('Carrera 7 No. 40B' in r.get('raw_content', r.get('content')) for r in compressed)
+        self.assertEqual(addresses, 1)
+        compressed, _ = self.compressor.compress(self.results, '¿Cómo es el proceso de admisión?')
+        addresses = sum('Carrera 7 No. 40B' in r.get('raw_content', r.get('content')) for r in compressed)
+        self.assertEqual(addresses, 0)
+
+    def test_short_pages_only_cleaned(self):
+        """Las páginas cortas solo pierden la plantilla"""
+        results = [{'title': 't', 'url': 'u', 'content': MENU + "El calendario académico inicia en febrero.\nMenú"}]
+        compressed, stats = self.compressor.compress(results, '¿Cuándo inicia el calendario?')
+        self.assertEqual(compressed[0]['content'], 'El calendario académico inicia en febrero.')
+        self.assertEqual(self.compressor.compress([], 'x')[1]['ratio'], 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para la propagación del plazo de cada solicitud
+"""
+
+import os
+import unittest
+from unittest.mock import Mock, patch
+
+from httpx import TimeoutException
+
+from chatbot.rag.utils.deadline import Deadline, stage_timeout, current_deadline
+from chatbot.rag.utils.request_context import request_scope
+from chatbot.rag.handlers.deepseek_handler import QA_DeepSeekHandler
+from websearch import search
+
+
+class TestDeadline(unittest.TestCase):
+    """Tests del cálculo de presupuestos por etapa"""
+
+    def test_timeout_respects_cap_and_reserve(self):
+        """El timeout de una etapa no supera su máximo ni invade la reserva"""
+        deadline = Deadline(10)
+        self.assertAlmostEqual(deadline.timeout(cap=30), 10, delta=0.1)
+        self.assertAlmostEqual(deadline.timeout(cap=30, reserve=6), 4, delta=0.1)
+        self.assertEqual(deadline.timeout(cap=2, reserve=6), 2)
+        self.assertEqual(Deadline(1).timeout(reserve=5), 0.0)
+        self.assertTrue(Deadline(0).expired())
+
+    def test_explicit_deadline_wins_over_request_context(self):
+        """Un plazo explícito tiene prioridad sobre el de la solicitud"""
+        self.assertIsNone(current_deadline())
+        self.assertEqual(stage_timeout(30), 30)
+        explicit = Deadline(3)
+        with request_scope(deadline=Deadline(20)) as context:
+            self.assertIs(current_deadline(), context.deadline)
+            self.assertIs(current_deadline(explicit), explicit)
+            self.assertLessEqual(stage_timeout(30), 20)
+
+
+class TestSearchWebDeadline(unittest.TestCase):
+    """Tests de los reintentos de Tavily acotados por el plazo"""
+
+    def setUp(self):
+        self.client = Mock()
+        patches = [
+            patch.object(search, 'get_tavily_client', return_value=self.client),
+            patch.object(search, 'get_search_config', return_value={
+                'include_domains': [], 'country': None, 'max_results': 3, 'chunks_per_source': 3,
+                'search_depth': 'advanced', 'topic': None, 'time_range': None, 'days': None,
+                'start_date': None, 'end_date': None,
+            }),
+            patch.object(search, 'generation_reserve', return_value=6),
+            patch.object(search, 'min_call_seconds', return_value=1.0),
+            patch.object(search, 'get_cache', return_value=None),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_timeout_is_sized_from_remaining_budget(self):
+        """El timeout enviado a Tavily descuenta la reserva para la generación"""
+        self.client.search.return_value = {'results': [{'url': 'u', 'content': 'c'}]}
+        with request_scope(deadline=Deadline(10)):
+            self.assertEqual(len(search.search_web('consulta')), 1)
+        timeout = self.client.search.call_args.kwargs['timeout']
+        self.assertLessEqual(timeout, 4)
+        self.assertGreater(timeout, 3.5)
+
+    @patch.object(search.time, 'sleep')
+    def test_retries_stop_when_budget_runs_out(self, mock_sleep):
+        """No se reintenta si la espera de backoff no deja tiempo para otro intento"""
+        self.client.search.side_effect = TimeoutException('lento')
+        self.assertEqual(search.search_web('consulta', deadline=Deadline(8.5)), [])
+        self.assertEqual(self.client.search.call_count, 2)
+        mock_sleep.assert_called_once_with(1)
+
+    def test_no_call_without_budget(self):
+        """Sin presupuesto restante no se consume cuota de Tavily"""
+        self.assertEqual(search.search_web('consulta', deadline=Deadline(5)), [])
+        self.client.search.assert_not_called()
+
+
+class TestDeepSeekDeadline(unittest.TestCase):
+    """Tests del timeout de la llamada a DeepSeek"""
+
+    def setUp(self):
+        with patch.dict(os.environ, {'DEEPSEEK_API_KEY': 'test_api_key'}):
+            self.handler = QA_DeepSeekHandler(api_url='https://api.deepseek.com/v1/chat/completions', model='deepseek-chat')
+
+    @patch('requests.Session.post')
+    def test_timeout_follows_deadline(self, mock_post):
+        """El timeout HTTP es el tiempo restante del plazo"""
+        mock_post.return_value.json.return_value = {'choices': [{'message': {'content': 'ok'}}]}
+        self.assertEqual(self.handler.call_deepseek_api('system', 'user', deadline=Deadline(5)), 'ok')
+        self.assertLessEqual(mock_post.call_args.kwargs['timeout'], 5)
+
+    @patch('requests.Session.post')
+    def test_expired_deadline_skips_call(self, mock_post):
+        """Con el plazo agotado se responde sin llamar a la API"""
+        result = self.handler.call_deepseek_api('system', 'user', deadline=Deadline(0))
+        self.assertEqual(result, "Lo siento, la consulta tardó demasiado tiempo. Intenta nuevamente.")
+        mock_post.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -18,8 +18,10 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from chatbot.rag.handlers.deepseek_handler import QA_DeepSeekHandler
 from chatbot.rag.utils.patterns import (
     greetings, greeting_messages, farewell, farewell_messages,
-    gratefulness, gratefulness_messages
+    gratefulness, gratefulness_messages, deepseek_system_prompt
 )
+from chatbot.rag.utils import metrics
+from chatbot.rag.utils.request_context import request_scope
 
 
 class TestQA_DeepSeekHandlerSimple(unittest.TestCase):
@@ -27,9 +29,6 @@ class TestQA_DeepSeekHandlerSimple(unittest.TestCase):
 
     def setUp(self):
         """Configuración inicial para cada test"""
-        # Resetear singleton
-        QA_DeepSeekHandler._instances = {}
-        
         # Mock de variables de entorno
         with patch.dict(os.environ, {'DEEPSEEK_API_KEY': 'test_api_key'}):
             self.handler = QA_DeepSeekHandler(
@@ -41,8 +40,6 @@ class TestQA_DeepSeekHandlerSimple(unittest.TestCase):
 
     def test_init_basic(self):
         """Test del constructor básico"""
-        QA_DeepSeekHandler._instances = {}
-        
         with patch.dict(os.environ, {'DEEPSEEK_API_KEY': 'test_key'}):
             handler = QA_DeepSeekHandler(
                 api_url="https://test.com",
@@ -59,8 +56,6 @@ class TestQA_DeepSeekHandlerSimple(unittest.TestCase):
 
     def test_init_without_api_key(self):
         """Test del constructor sin API key"""
-        QA_DeepSeekHandler._instances = {}
-        
         with patch.dict(os.environ, {}, clear=True):
             with patch('chatbot.rag.handlers.deepseek_handler.logger') as mock_logger:
                 handler = QA_DeepSeekHandler(
@@ -71,36 +66,14 @@ class TestQA_DeepSeekHandlerSimple(unittest.TestCase):
                     "DEEPSEEK_API_KEY no configurada; las llamadas a la API fallarán."
                 )
 
-    def test_init_singleton_behavior(self):
-        """Test del comportamiento singleton"""
-        QA_DeepSeekHandler._instances = {}
-        
+    def test_init_independent_instances(self):
+        """Cada construcción directa es independiente (el registro es quien comparte)"""
         with patch.dict(os.environ, {'DEEPSEEK_API_KEY': 'test_key'}):
             handler1 = QA_DeepSeekHandler("url1", "model1")
             handler2 = QA_DeepSeekHandler("url2", "model2")
             
-            # Deberían ser la misma instancia debido al singleton
-            self.assertIs(handler1, handler2)
-
-    def test_load_prompt_template_success(self):
-        """Test de carga exitosa del prompt template"""
-        with patch('chatbot.rag.handlers.deepseek_handler.PromptTemplate') as mock_prompt:
-            mock_instance = Mock()
-            mock_prompt.return_value = mock_instance
-            
-            self.handler.load_prompt_template()
-            
-            mock_prompt.assert_called_once()
-            self.assertEqual(self.handler.prompt, mock_instance)
-
-    def test_load_prompt_template_error(self):
-        """Test de error en carga del prompt template"""
-        with patch('chatbot.rag.handlers.deepseek_handler.PromptTemplate') as mock_prompt:
-            mock_prompt.side_effect = Exception("Template error")
-            
-            with patch('chatbot.rag.handlers.deepseek_handler.logger') as mock_logger:
-                self.handler.load_prompt_template()
-                mock_logger.error.assert_called()
+            self.assertIsNot(handler1, handler2)
+            self.assertEqual(handler2.model, "model2")
 
     def test_get_web_context_empty(self):
         """Test de get_web_context con lista vacía"""
@@ -183,7 +156,7 @@ class TestQA_DeepSeekHandlerSimple(unittest.TestCase):
         self.assertIn('[Sin título](Sin URL)', result)
         self.assertIn('Content 3', result)
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_call_deepseek_api_success(self, mock_post):
         """Test de llamada exitosa a la API"""
         # Mock de respuesta exitosa
@@ -199,7 +172,56 @@ class TestQA_DeepSeekHandlerSimple(unittest.TestCase):
         self.assertEqual(result, 'Test response')
         mock_post.assert_called_once()
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
+    def test_call_deepseek_api_max_tokens_override(self, mock_post):
+        """Test de max_tokens por llamada (clase de la pregunta)"""
+        mock_response = Mock()
+        mock_response.json.return_value = {'choices': [{'message': {'content': 'ok'}}]}
+        mock_post.return_value = mock_response
+
+        self.handler.call_deepseek_api("system", "user", max_tokens=150)
+        self.assertEqual(mock_post.call_args.kwargs['json']['max_tokens'], 150)
+        self.handler.call_deepseek_api("system", "user")
+        self.assertEqual(mock_post.call_args.kwargs['json']['max_tokens'], 500)
+
+    @patch('requests.Session.post')
+    def test_call_deepseek_api_prompt_cache_usage(self, mock_post):
+        """Test de contabilidad de tokens servidos desde la caché de prefijos"""
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        mock_response = Mock()
+        mock_response.json.return_value = {
+            'choices': [{'message': {'content': 'Test response'}}],
+            'usage': {'prompt_tokens': 1200, 'completion_tokens': 80,
+                      'prompt_cache_hit_tokens': 1024, 'prompt_cache_miss_tokens': 176}
+        }
+        mock_response.raise_for_status.return_value = None
+        mock_post.return_value = mock_response
+
+        with request_scope(endpoint='test') as context:
+            self.handler.call_deepseek_api("system", "user")
+        self.assertEqual((context.prompt_tokens, context.completion_tokens), (1200, 80))
+
+        snapshot = metrics.snapshot()
+        tokens = {c['labels']['result']: c['value'] for c in snapshot['counters']
+                  if c['name'] == 'llm_prompt_cache_tokens_total'}
+        self.assertEqual(tokens, {'hit': 1024, 'miss': 176})
+        latency = [s['labels'] for s in snapshot['summaries'] if s['name'] == 'llm_latency_ms']
+        self.assertEqual(latency, [{'provider': 'deepseek', 'model': 'deepseek-chat', 'prompt_cache': 'hit'}])
+
+    def test_build_messages_stable_prefix(self):
+        """Test de que el prefijo del prompt no cambia entre solicitudes"""
+        system_a, user_a = self.handler.build_messages("[A](https://a.udistrital.edu.co)\nuno", "¿Quién es el rector?")
+        system_b, user_b = self.handler.build_messages("[B](https://b.udistrital.edu.co)\ndos", "¿Cuándo son las inscripciones?")
+        self.assertEqual(system_a, system_b)
+        self.assertEqual(system_a, deepseek_system_prompt)
+        prefix = user_a[:user_a.index("[CONTEXTO_DE_TAVILY]\n") + len("[CONTEXTO_DE_TAVILY]\n")]
+        self.assertTrue(user_b.startswith(prefix))
+        # Lo variable va al final: contexto y luego pregunta
+        self.assertLess(user_a.index("uno"), user_a.index("[PREGUNTA_DEL_USUARIO]"))
+        self.assertTrue(user_a.endswith("¿Quién es el rector?"))
+
+    @patch('requests.Session.post')
     def test_call_deepseek_api_timeout(self, mock_post):
         """Test de timeout en la API"""
         mock_post.side_effect = requests.exceptions.Timeout()
@@ -208,7 +230,7 @@ class TestQA_DeepSeekHandlerSimple(unittest.TestCase):
         
         self.assertEqual(result, "Lo siento, la consulta tardó demasiado tiempo. Intenta nuevamente.")
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_call_deepseek_api_connection_error(self, mock_post):
         """Test de error de conexión en la API"""
         mock_post.side_effect = requests.exceptions.ConnectionError()
@@ -217,7 +239,7 @@ class TestQA_DeepSeekHandlerSimple(unittest.TestCase):
         
         self.assertEqual(result, "Lo siento, no pude conectar con el servicio. Verifica la conexión.")
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_call_deepseek_api_http_error(self, mock_post):
         """Test de error HTTP en la API"""
         mock_response = Mock()
@@ -228,7 +250,7 @@ class TestQA_DeepSeekHandlerSimple(unittest.TestCase):
         
         self.assertEqual(result, "Lo siento, ocurrió un error en el servicio. Intenta más tarde.")
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_call_deepseek_api_unexpected_response(self, mock_post):
         """Test de respuesta inesperada de la API"""
         mock_response = Mock()
@@ -240,7 +262,7 @@ class TestQA_DeepSeekHandlerSimple(unittest.TestCase):
         
         self.assertEqual(result, "Lo siento, recibí una respuesta inesperada del modelo.")
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_call_deepseek_api_general_exception(self, mock_post):
         """Test de excepción general en la API"""
         mock_post.side_effect = Exception("General error")
@@ -436,6 +458,7 @@ class TestQA_DeepSeekHandlerSimple(unittest.TestCase):
         self.assertIn("ENRUTAMIENTO", system_prompt)
         self.assertIn("PRIORIDAD DE INFORMACIÓN", system_prompt)
         self.assertIn("FORMATO DE RESPUESTA", system_prompt)
+        self.assertEqual(system_prompt, deepseek_system_prompt)
 
     def test_web_context_formatting(self):
         """Test de formato del contexto web"""
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para el recuperador denso (LSA + int8)
+"""
+
+import unittest
+import numpy as np
+
+from chatbot.rag.utils.dense_retriever import quantize_int8, BruteForceIndex, IVFIndex, DenseRetriever
+
+
+CORPUS = [
+    "proceso de admisiones e inscripciones para aspirantes de pregrado",
+    "calendario académico con las fechas de inicio de clases del semestre",
+    "dirección de la sede macarena y de la sede tecnológica",
+    "aulas virtuales moodle para docentes ofrecidas por planestic",
+    "pago de matrícula y liquidación de derechos financieros",
+    "préstamo de libros y horario de la biblioteca central",
+]
+
+
+class TestQuantization(unittest.TestCase):
+    """Tests de la cuantización int8"""
+
+    def test_roundtrip_error_is_small(self):
+        """La reconstrucción int8 conserva los valores con error acotado"""
+        vectors = np.random.default_rng(0).normal(size=(10, 16)).astype(np.float32)
+        codes, scales = quantize_int8(vectors)
+
+        self.assertEqual(codes.dtype, np.int8)
+        np.testing.assert_allclose(codes * scales[:, None], vectors, atol=scales.max())
+
+    def test_zero_vector(self):
+        """Un vector nulo no produce divisiones por cero"""
+        codes, scales = quantize_int8(np.zeros((1, 4)))
+        self.assertTrue(np.all(codes == 0))
+        self.assertTrue(np.all(np.isfinite(scales)))
+
+
+class TestIndexes(unittest.TestCase):
+    """Tests de los índices brute-force e IVF"""
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        vectors = rng.normal(size=(200, 32)).astype(np.float32)
+        self.vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def test_bruteforce_finds_itself(self):
+        """Cada vector es su propio vecino más cercano"""
+        index = BruteForceIndex(self.vectors)
+        for i in (0, 57, 199):
+            self.assertEqual(index.search(self.vectors[i], 1)[0][0], i)
+
+    def test_ivf_with_all_probes_matches_bruteforce(self):
+        """IVF revisando todas las listas equivale a la búsqueda exhaustiva"""
+        brute = BruteForceIndex(self.vectors)
+        ivf = IVFIndex(self.vectors, nlist=8, nprobe=8)
+        query = self.vectors[3]
+
+        self.assertEqual([i for i, _ in ivf.search(query, 5)], [i for i, _ in brute.search(query, 5)])
+
+
+class TestDenseRetriever(unittest.TestCase):
+    """Tests del recuperador denso de extremo a extremo"""
+
+    def test_search_ranks_related_chunk_first(self):
+        """La consulta recupera el fragmento con vocabulario compartido"""
+        retriever = DenseRetriever(CORPUS, n_components=4, n_features=2 ** 12)
+        results = retriever.search("fechas del calendario académico", top_k=2)
+
+        self.assertEqual(results[0][0], 1)
+        self.assertEqual(len(results), 2)
+
+    def test_unsupported_index(self):
+        """Un tipo de índice desconocido genera ValueError"""
+        with self.assertRaises(ValueError):
+            DenseRetriever(CORPUS, n_components=2, n_features=2 ** 10, index='hnsw')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para la carga diferida de handlers y las plantillas de prompt
+"""
+
+import sys
+import subprocess
+import unittest
+
+from chatbot.rag.handlers.factory import get_handler_class, HANDLERS
+from chatbot.rag.utils.patterns import prompt_template
+from chatbot.rag.utils.prompt_format import PromptFormat
+
+
+class TestHandlerFactory(unittest.TestCase):
+    """Tests del registro de proveedores"""
+
+    def test_import_is_lazy(self):
+        """Importar la fábrica no importa ningún proveedor ni sus dependencias"""
+        code = (
+            "import sys; import chatbot.rag.handlers.factory; "
+            "print(sorted(m for m in sys.modules if m.endswith('_handler') or m.split('.')[0] in "
+            "('boto3', 'langchain_cohere', 'langchain_core', 'langchain_community')))"
+        )
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), '[]')
+
+    def test_resolves_registered_classes(self):
+        """Cada bot_type registrado resuelve a su clase y uno desconocido falla"""
+        self.assertEqual(get_handler_class('deepseek').__name__, HANDLERS['deepseek'][1])
+        with self.assertRaises(ValueError):
+            get_handler_class('gpt')
+
+
+class TestPromptFormat(unittest.TestCase):
+    """Tests del reemplazo de PromptTemplate"""
+
+    def test_formats_like_prompt_template(self):
+        """Formatea con str.format y valida las variables de la plantilla"""
+        prompt = PromptFormat(template=prompt_template, input_variables=['context', 'question'])
+        formatted = prompt.format(context='Sede Macarena: carrera 3', question='¿Dónde queda?')
+        self.assertIn('Sede Macarena: carrera 3', formatted)
+        self.assertIn('¿Dónde queda?', formatted)
+        with self.assertRaises(ValueError):
+            PromptFormat(template='Contexto: {context}', input_variables=['context', 'question'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
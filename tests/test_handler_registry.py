@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para el registro de handlers por (proveedor, configuración)
+"""
+
+import time
+import threading
+import unittest
+from unittest.mock import patch
+
+from chatbot.rag.handlers import factory
+from chatbot.rag.handlers.registry import HandlerRegistry, config_key
+
+
+class FakeHandler:
+    """Handler de prueba: cuenta construcciones y calentamientos"""
+
+    built = 0
+    warmed = 0
+    fail_warm_up = False
+
+    def __init__(self, model='m', temperature=0.3):
+        time.sleep(0.05)
+        FakeHandler.built += 1
+        self.model = model
+        self.temperature = temperature
+
+    def warm_up(self):
+        FakeHandler.warmed += 1
+        if FakeHandler.fail_warm_up:
+            raise RuntimeError('índice no disponible')
+
+
+class TestHandlerRegistry(unittest.TestCase):
+    """Tests del registro de handlers"""
+
+    def setUp(self):
+        FakeHandler.built = FakeHandler.warmed = 0
+        FakeHandler.fail_warm_up = False
+        self.registry = HandlerRegistry(lambda provider: FakeHandler)
+
+    def test_same_config_same_instance(self):
+        """La misma configuración comparte instancia y una distinta crea otra"""
+        first = self.registry.get('deepseek', {'model': 'a', 'temperature': 0.3})
+        again = self.registry.get('deepseek', {'temperature': 0.3, 'model': 'a'})
+        other = self.registry.get('deepseek', {'model': 'a', 'temperature': 0.1})
+        self.assertIs(first, again)
+        self.assertIsNot(first, other)
+        self.assertEqual(len(self.registry.stats()), 2)
+        self.assertNotEqual(config_key('deepseek', {'model': 'a'}), config_key('llama', {'model': 'a'}))
+
+    def test_concurrent_first_use_builds_once(self):
+        """Varias solicitudes simultáneas construyen y calientan el handler una sola vez"""
+        handlers = []
+        threads = [threading.Thread(target=lambda: handlers.append(self.registry.get('deepseek', {'model': 'a'})))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(FakeHandler.built, 1)
+        self.assertEqual(FakeHandler.warmed, 1)
+        self.assertTrue(all(handler is handlers[0] for handler in handlers))
+
+    def test_warm_up_failure_is_tolerated(self):
+        """Si el calentamiento falla el handler se registra igualmente"""
+        FakeHandler.fail_warm_up = True
+        handler = self.registry.get('deepseek', {'model': 'a'})
+        self.assertIs(self.registry.get('deepseek', {'model': 'a'}), handler)
+        self.assertEqual(FakeHandler.built, 1)
+
+
+class TestProfiles(unittest.TestCase):
+    """Tests de la resolución de perfiles de config.json"""
+
+    CONFIG = {
+        'bot_type': 'deepseek',
+        'bot_config': {'deepseek': {'model': 'deepseek-chat', 'temperature': 0.3}, 'llama': {'model': 'llama3'}},
+        'profiles': {
+            'preciso': {'provider': 'deepseek', 'config': {'temperature': 0.1}},
+            'local': {'provider': 'llama'},
+        },
+    }
+
+    def test_resolve_profile(self):
+        """Un perfil sobreescribe la configuración de su proveedor; uno desconocido falla"""
+        with patch.object(factory, 'get_config', return_value=self.CONFIG):
+            self.assertEqual(factory.resolve_profile(), ('deepseek', {'model': 'deepseek-chat', 'temperature': 0.3}))
+            self.assertEqual(factory.resolve_profile('preciso'), ('deepseek', {'model': 'deepseek-chat', 'temperature': 0.1}))
+            self.assertEqual(factory.resolve_profile('local'), ('llama', {'model': 'llama3'}))
+            with self.assertRaises(ValueError):
+                factory.resolve_profile('inexistente')
+        self.assertEqual(self.CONFIG['bot_config']['deepseek']['temperature'], 0.3)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
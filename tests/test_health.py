@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para el monitor de readiness
+"""
+
+import unittest
+
+from chatbot.rag.utils.health import HealthMonitor, http_error_reason
+
+
+def failing_check(monitor):
+    raise RuntimeError('sin conexión')
+
+
+class TestHealthMonitor(unittest.TestCase):
+    """Tests de las comprobaciones en segundo plano y del resultado publicado"""
+
+    def test_ready_depends_on_critical_checks(self):
+        """Solo las dependencias críticas deciden si el nodo está listo"""
+        monitor = HealthMonitor({
+            'handler': lambda m: {'ok': True},
+            'tavily': lambda m: {'ok': False, 'errors': ['usage_limit']},
+            'llm': failing_check,
+        }, critical=['handler'])
+        self.assertEqual(monitor.snapshot()['status'], 'starting')
+        monitor.run_checks()
+        snapshot = monitor.snapshot()
+        self.assertTrue(snapshot['ready'])
+        self.assertFalse(snapshot['dependencies']['tavily']['ok'])
+        self.assertFalse(snapshot['dependencies']['llm']['ok'])
+        self.assertEqual(snapshot['dependencies']['llm']['error'], 'RuntimeError')
+
+        monitor.critical = ['handler', 'llm']
+        self.assertEqual(monitor.snapshot()['status'], 'not_ready')
+
+    def test_fatal_errors_until_next_success(self):
+        """Un error de cuota o de clave cuenta hasta el siguiente éxito; un timeout no"""
+        monitor = HealthMonitor({}, critical=[])
+        monitor.report('tavily', True)
+        monitor.report('tavily', False, 'timeout')
+        self.assertIsNone(monitor.failing_fatally('tavily'))
+        monitor.report('tavily', False, 'usage_limit')
+        self.assertEqual(monitor.failing_fatally('tavily'), 'usage_limit')
+        self.assertEqual(monitor.outcome('tavily')['last_error']['error'], 'usage_limit')
+        monitor.report('tavily', True)
+        self.assertIsNone(monitor.failing_fatally('tavily'))
+
+    def test_http_error_reason(self):
+        """Los códigos HTTP de los proveedores se traducen a motivos"""
+        self.assertEqual(http_error_reason(401), 'unauthorized')
+        self.assertEqual(http_error_reason(402), 'usage_limit')
+        self.assertEqual(http_error_reason(429), 'rate_limited')
+        self.assertEqual(http_error_reason(500), 'http_error')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
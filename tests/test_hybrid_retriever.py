@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para la recuperación híbrida (PDF local + búsqueda web)
+"""
+
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from chatbot.rag.utils.hybrid_retriever import HybridRetriever, LocalIndex, reciprocal_rank_fusion
+
+
+def _local(score, url='reglamento.pdf#page=1'):
+    return {'title': 'reglamento.pdf', 'url': url, 'content': 'Contenido local', 'score': score, 'source_type': 'local'}
+
+
+class TestReciprocalRankFusion(unittest.TestCase):
+    """Tests de la fusión por rango recíproco"""
+
+    def test_fusion_merges_duplicates(self):
+        """Un resultado presente en ambas listas suma ambos aportes"""
+        web = [{'url': 'a'}, {'url': 'b'}]
+        local = [{'url': 'b'}, {'url': 'c'}]
+        fused = reciprocal_rank_fusion([web, local], k=60)
+
+        self.assertEqual([r['url'] for r in fused][0], 'b')
+        self.assertEqual(len(fused), 3)
+
+    def test_fusion_keeps_chunks_of_same_page(self):
+        """Dos fragmentos de la misma página no se fusionan entre sí"""
+        local = [dict(_local(0.3), chunk_id=0), dict(_local(0.2), chunk_id=1), dict(_local(0.1, 'otro.pdf#page=2'), chunk_id=2)]
+        fused = reciprocal_rank_fusion([[{'url': 'https://udistrital.edu.co'}], local], k=60)
+
+        self.assertEqual(len(fused), 4)
+        self.assertEqual(sorted(r['chunk_id'] for r in fused if 'chunk_id' in r), [0, 1, 2])
+        self.assertEqual(fused[1]['rrf_score'], 1.0 / 61)
+
+    def test_fusion_empty(self):
+        """Listas vacías producen una lista vacía"""
+        self.assertEqual(reciprocal_rank_fusion([[], None]), [])
+
+
+class TestLocalIndex(unittest.TestCase):
+    """Tests del índice local de PDFs"""
+
+    def test_dense_fusion_keeps_chunks_of_same_page(self):
+        """La fusión TF-IDF + denso identifica los fragmentos por índice, no por página"""
+        texts = ['requisitos de admision pregrado', 'admision inscripcion aspirantes pregrado', 'horario biblioteca']
+        docs = [SimpleNamespace(page_content=t, metadata={'source': 'docs/reglamento.pdf', 'page': p})
+                for t, p in zip(texts, [0, 0, 1])]
+        vectorizer = TfidfVectorizer()
+        retriever = SimpleNamespace(docs=docs, vectorizer=vectorizer, tfidf_array=vectorizer.fit_transform(texts))
+        dense = Mock()
+        dense.search.return_value = [(1, 0.9), (0, 0.8)]
+
+        results = LocalIndex(retriever, dense).search('admision pregrado', top_k=3)
+        self.assertEqual(sorted(r['chunk_id'] for r in results), [0, 1])
+        self.assertEqual({r['url'] for r in results}, {'reglamento.pdf#page=1'})
+        self.assertTrue(all(r['dense_score'] > 0 for r in results))
+
+
+class TestHybridRetriever(unittest.TestCase):
+    """Tests del recuperador híbrido"""
+
+    def test_without_local_index_uses_web_only(self):
+        """Sin índice local se delega directamente en la búsqueda web"""
+        web_search = Mock(return_value=[{'url': 'https://udistrital.edu.co'}])
+        retriever = HybridRetriever(None, web_search)
+
+        result = retriever.search('admisiones', web_query='admisiones site:udistrital.edu.co')
+
+        web_search.assert_called_once_with('admisiones site:udistrital.edu.co')
+        self.assertEqual(result, [{'url': 'https://udistrital.edu.co'}])
+
+    def test_high_local_score_skips_web(self):
+        """Un puntaje local alto evita la llamada a la web"""
+        local_index = Mock()
+        local_index.search.return_value = [_local(0.8)]
+        web_search = Mock(return_value=[])
+        retriever = HybridRetriever(local_index, web_search, skip_web_score=0.35, local_grace_seconds=1)
+
+        result = retriever.search('reglamento estudiantil')
+
+        web_search.assert_not_called()
+        self.assertEqual(result[0]['source_type'], 'local')
+
+    def test_low_local_score_fuses_with_web(self):
+        """Con puntaje local bajo se fusionan ambos resultados"""
+        local_index = Mock()
+        local_index.search.return_value = [_local(0.1)]
+        web_search = Mock(return_value=[{'url': 'https://udistrital.edu.co', 'content': 'web'}])
+        retriever = HybridRetriever(local_index, web_search, local_grace_seconds=1)
+
+        result = retriever.search('calendario')
+
+        urls = {r['url'] for r in result}
+        self.assertEqual(urls, {'https://udistrital.edu.co', 'reglamento.pdf#page=1'})
+        self.assertTrue(all('rrf_score' in r for r in result))
+
+    def test_web_deadline_returns_local(self):
+        """Si la web supera el plazo compartido se devuelven los resultados locales"""
+        local_index = Mock()
+        local_index.search.return_value = [_local(0.1)]
+
+        def slow_web(query):
+            time.sleep(0.5)
+            return [{'url': 'https://udistrital.edu.co'}]
+
+        retriever = HybridRetriever(local_index, slow_web, deadline_seconds=0.1, local_grace_seconds=1)
+
+        start = time.monotonic()
+        result = retriever.search('calendario')
+
+        self.assertLess(time.monotonic() - start, 0.4)
+        self.assertEqual([r['url'] for r in result], ['reglamento.pdf#page=1'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
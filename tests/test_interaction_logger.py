@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para el registro de interacciones en segundo plano
+"""
+
+import os
+import csv
+import gzip
+import shutil
+import tempfile
+import unittest
+
+from chatbot.rag.utils.interaction_logger import InteractionLogger, CsvInteractionSink, CSV_HEADER
+
+
+def _record(i):
+    return {'token': f't{i}', 'time': '20250101120000', 'user_message': f'pregunta {i}', 'response': f'# **Respuesta** {i} 🎉'}
+
+
+class TestInteractionLogger(unittest.TestCase):
+    """Tests del logger por lotes"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'log.csv')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_flush_writes_header_once_and_cleans_markdown(self):
+        """El encabezado se escribe una sola vez y la respuesta se limpia en el hilo escritor"""
+        interaction_logger = InteractionLogger([CsvInteractionSink(self.path)], flush_interval=60)
+        for i in range(3):
+            interaction_logger.queue.put_nowait(_record(i))
+        interaction_logger.flush()
+        interaction_logger.queue.put_nowait(_record(3))
+        interaction_logger.flush()
+
+        with open(self.path, newline='', encoding='utf-8') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], CSV_HEADER)
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[1][3], 'Respuesta 0')
+        self.assertEqual(interaction_logger.stats()['written'], 4)
+
+    def test_full_queue_drops_records(self):
+        """Con la cola llena el registro se descarta sin bloquear"""
+        interaction_logger = InteractionLogger([CsvInteractionSink(self.path)], max_queue=1)
+        interaction_logger._ensure_started = lambda: None
+        self.assertTrue(interaction_logger.log(_record(0)))
+        self.assertFalse(interaction_logger.log(_record(1)))
+        self.assertEqual(interaction_logger.stats()['dropped'], 1)
+        self.assertEqual(interaction_logger.stats()['queue_depth'], 1)
+
+    def test_rotation_gzips_file(self):
+        """Al superar max_bytes el archivo se rota y se comprime"""
+        interaction_logger = InteractionLogger([CsvInteractionSink(self.path, max_bytes=50, backup_count=5)])
+        interaction_logger.queue.put_nowait(_record(0))
+        interaction_logger.flush()
+
+        backups = [f for f in os.listdir(self.directory) if f.endswith('.csv.gz')]
+        self.assertEqual(len(backups), 1)
+        self.assertFalse(os.path.exists(self.path))
+        with gzip.open(os.path.join(self.directory, backups[0]), 'rt', encoding='utf-8') as f:
+            self.assertIn('pregunta 0', f.read())
+
+    def test_stale_header_is_rotated(self):
+        """Un archivo con el encabezado anterior se rota antes de escribir columnas nuevas"""
+        with open(self.path, 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerow(['Token', 'Time', 'User Message', 'Response'])
+        interaction_logger = InteractionLogger([CsvInteractionSink(self.path)])
+        interaction_logger.queue.put_nowait(dict(_record(0), latency_ms=812.5, provider='deepseek', llm_calls=1))
+        interaction_logger.flush()
+
+        with open(self.path, newline='', encoding='utf-8') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], CSV_HEADER)
+        self.assertEqual(rows[1][CSV_HEADER.index('Latency Ms')], '812.5')
+        self.assertEqual(len([f for f in os.listdir(self.directory) if f.endswith('.csv.gz')]), 1)
+
+    def test_failing_sink_does_not_block_others(self):
+        """Un destino con error se contabiliza y no impide escribir en los demás"""
+        class BrokenSink:
+            name = 'database'
+            def write(self, batch):
+                raise RuntimeError('db caída')
+        interaction_logger = InteractionLogger([BrokenSink(), CsvInteractionSink(self.path)])
+        interaction_logger.queue.put_nowait(_record(0))
+        interaction_logger.flush()
+
+        self.assertEqual(interaction_logger.stats()['errors'], {'database': 1, 'csv': 0})
+        self.assertTrue(os.path.exists(self.path))
+
+    def test_background_thread_flushes(self):
+        """El hilo de fondo escribe los registros tras el intervalo"""
+        import time
+        interaction_logger = InteractionLogger([CsvInteractionSink(self.path)], flush_interval=0.05)
+        interaction_logger.log(_record(0))
+        for _ in range(100):
+            if interaction_logger.stats()['written']:
+                break
+            time.sleep(0.02)
+        self.assertEqual(interaction_logger.stats()['written'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
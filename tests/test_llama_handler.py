@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para las opciones de generación y el keep-alive de QA_LlamaHandler
+"""
+
+import time
+import unittest
+import requests
+from unittest.mock import Mock, patch
+
+from chatbot.rag.handlers.llama_handler import QA_LlamaHandler
+from chatbot.rag.utils import metrics
+
+
+def ollama_response(**data):
+    response = Mock()
+    response.json.return_value = data
+    response.raise_for_status.return_value = None
+    return response
+
+
+class TestQA_LlamaHandler(unittest.TestCase):
+    """Tests del payload enviado a Ollama y de las métricas de carga del modelo"""
+
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        self.handler = QA_LlamaHandler(
+            api_url="http://localhost:11434/api/generate",
+            model="llama3.2:3b",
+            temperature=0.4,
+            max_tokens=500,
+            keep_alive='30m',
+            ping_interval_seconds=0
+        )
+
+    @patch('requests.Session.post')
+    def test_payload_sends_generation_options(self, mock_post):
+        """Se envían stream, keep_alive, temperature y num_predict (por llamada o del handler)"""
+        mock_post.return_value = ollama_response(response='ok')
+
+        self.assertEqual(self.handler.call_llama_api("prompt", max_tokens=150), 'ok')
+        payload = mock_post.call_args.kwargs['json']
+        self.assertFalse(payload['stream'])
+        self.assertEqual(payload['keep_alive'], '30m')
+        self.assertEqual(payload['options'], {'temperature': 0.4, 'num_predict': 150})
+
+        self.handler.call_llama_api("prompt")
+        self.assertEqual(mock_post.call_args.kwargs['json']['options']['num_predict'], 500)
+
+    @patch('requests.Session.post')
+    def test_durations_and_cold_loads(self, mock_post):
+        """Se exporta el tiempo de carga frente al de generación y se cuentan las cargas del modelo"""
+        mock_post.return_value = ollama_response(
+            response='ok', load_duration=2_000_000_000, prompt_eval_duration=300_000_000,
+            eval_duration=1_500_000_000, prompt_eval_count=50, eval_count=30)
+        self.handler.call_llama_api("prompt")
+        mock_post.return_value = ollama_response(response='ok', load_duration=5_000_000, eval_duration=1_000_000_000)
+        self.handler.call_llama_api("prompt")
+
+        snapshot = metrics.snapshot()
+        durations = {s['labels']['phase']: s['value'] for s in snapshot['summaries'] if s['name'] == 'llm_ollama_duration_ms'}
+        self.assertEqual(durations['load']['count'], 2)
+        self.assertEqual(durations['eval']['count'], 2)
+        self.assertEqual(durations['prompt_eval']['count'], 1)
+        cold = [c['value'] for c in snapshot['counters'] if c['name'] == 'llm_ollama_cold_loads_total']
+        self.assertEqual(cold, [1])
+
+    @patch('requests.Session.post')
+    def test_ping_keeps_model_loaded(self, mock_post):
+        """El ping no lleva prompt, renueva keep_alive y no rompe si Ollama no responde"""
+        mock_post.return_value = ollama_response(model='llama3.2:3b', done=True, load_duration=1_000_000)
+        self.handler._last_call = time.monotonic() - 1000
+        self.assertTrue(self.handler.ping())
+        payload = mock_post.call_args.kwargs['json']
+        self.assertNotIn('prompt', payload)
+        self.assertEqual(payload['keep_alive'], '30m')
+        self.assertLess(time.monotonic() - self.handler._last_call, 5)
+
+        mock_post.side_effect = requests.exceptions.ConnectionError('sin conexión')
+        self.assertFalse(self.handler.ping())
+        pings = {c['labels']['result']: c['value'] for c in metrics.snapshot()['counters'] if c['name'] == 'llm_keep_alive_pings_total'}
+        self.assertEqual(pings, {'warm': 1, 'error': 1})
+
+        # Con ping_interval_seconds=0 no se inicia el hilo
+        self.handler.start_background_tasks()
+        self.assertIsNone(self.handler._pinger)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para la caché compartida entre nodos con hashing consistente
+"""
+
+import re
+import time
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from chatbot.rag.cache.backends import MemoryBackend
+from chatbot.rag.cache.pages import PageStore, pack_results, unpack_results
+from chatbot.rag.cache.peers import HashRing, PeerCache, serve_peer_request, TOKEN_HEADER, TTL_HEADER
+from chatbot.rag.cache.tiered import TieredCache
+
+TOKEN = 'secreto-compartido'
+
+
+class _NodeHandler(BaseHTTPRequestHandler):
+    """Atiende /api/internal/cache/<name>/<key>/ como lo hace la vista interna de Django"""
+
+    def _serve(self):
+        match = re.match(r'^/api/internal/cache/([^/]+)/([^/]+)/$', self.path)
+        node = self.server.node
+        remaining = None
+        if match is None:
+            status, body = 404, b''
+        elif not node['peers'].authorized(self.headers.get(TOKEN_HEADER)):
+            status, body = 403, b''
+        else:
+            length = int(self.headers.get('Content-Length') or 0)
+            ttl = float(self.headers.get(TTL_HEADER) or 0) or None
+            status, body, remaining = serve_peer_request(node[match.group(1)], self.command, match.group(2), self.rfile.read(length), ttl)
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        if remaining:
+            self.send_header(TTL_HEADER, f'{remaining:.3f}')
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_PUT = _serve
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHashRing(unittest.TestCase):
+    """Tests del anillo de hashing consistente"""
+
+    def test_balance_and_minimal_movement(self):
+        """Las claves se reparten entre nodos y al agregar uno solo se mueven las que pasan a él"""
+        nodes = ['http://a:8000', 'http://b:8000', 'http://c:8000']
+        keys = [f'search:{i}' for i in range(6000)]
+        ring = HashRing(nodes)
+        owners = {key: ring.owner(key) for key in keys}
+        for node in nodes:
+            share = sum(owner == node for owner in owners.values()) / len(keys)
+            self.assertGreater(share, 0.2)
+            self.assertLess(share, 0.47)
+
+        bigger = HashRing(nodes + ['http://d:8000'])
+        moved = [key for key in keys if bigger.owner(key) != owners[key]]
+        self.assertTrue(all(bigger.owner(key) == 'http://d:8000' for key in moved))
+        self.assertLess(len(moved) / len(keys), 0.35)
+        self.assertIsNone(HashRing([]).owner('x'))
+
+
+class TestPeerCache(unittest.TestCase):
+    """Tests de la consulta y replicación entre dos nodos locales"""
+
+    def setUp(self):
+        self.servers = {}
+        for name in ('a', 'b'):
+            server = ThreadingHTTPServer(('127.0.0.1', 0), _NodeHandler)
+            server.daemon_threads = True
+            self.servers[name] = server
+        self.urls = {name: 'http://127.0.0.1:%d' % server.server_address[1] for name, server in self.servers.items()}
+        self.nodes = {name: self._make_node(name) for name in self.servers}
+        for name, server in self.servers.items():
+            server.node = self.nodes[name]
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self.addCleanup(server.server_close)
+            self.addCleanup(server.shutdown)
+
+    def _make_node(self, name: str, token: str = TOKEN) -> dict:
+        peers = PeerCache(self.urls[name], list(self.urls.values()), token, timeout=0.5, down_seconds=60)
+        return {
+            'peers': peers,
+            'search': TieredCache('search', MemoryBackend(), peers=peers),
+            'pages': PageStore(MemoryBackend(), peers=peers),
+        }
+
+    def _key_owned_by(self, name: str, cache: str = 'search') -> str:
+        ring = self.nodes['a']['peers'].ring
+        return next(f'k{i}' for i in range(1000) if ring.owner(f'{cache}:k{i}') == self.urls[name])
+
+    def _wait_for(self, predicate):
+        deadline = time.monotonic() + 2
+        while not predicate() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return predicate()
+
+    def test_value_is_replicated_to_owner_and_read_back(self):
+        """Un valor guardado en A se replica al dueño B y otro proceso de A lo obtiene de B"""
+        key = self._key_owned_by('b')
+        self.nodes['a']['search'].set(key, [{'url': 'u', 'content': 'resultado'}])
+        self.assertTrue(self._wait_for(lambda: self.nodes['b']['search'].get_local_bytes(key) is not None))
+
+        restarted = self._make_node('a')
+        self.assertEqual(restarted['search'].get(key), [{'url': 'u', 'content': 'resultado'}])
+        self.assertIsNotNone(restarted['search'].get_local_bytes(key))
+
+        own_key = self._key_owned_by('a')
+        self.assertIsNone(restarted['peers'].remote_owner('search', own_key))
+        self.assertIsNone(restarted['search'].get(own_key))
+
+    def test_peer_value_keeps_owner_expiry(self):
+        """Un valor traído de otro nodo vence cuando vence en el dueño, no con el TTL local"""
+        key = self._key_owned_by('b')
+        self.nodes['b']['search'].set_local_bytes(key, b'j"valor"', ttl_seconds=1)
+        node = self._make_node('a')
+        self.assertEqual(node['search'].get(key), 'valor')
+        [(_, expires_at, _)] = [item for item in node['search'].l1.items() if item[0].endswith(':' + key)]
+        self.assertLessEqual(expires_at, time.time() + 1)
+        time.sleep(1.1)
+        self.assertIsNone(node['search'].get_local_bytes(key))
+        self.assertEqual(node['search'].stats()['hits'], 1)
+
+    def test_pages_follow_results_across_nodes(self):
+        """Las páginas referenciadas por un resultado se resuelven desde el nodo que las guardó"""
+        page = 'Boletín de admisiones 2025. ' * 200
+        packed = pack_results([{'url': 'u', 'raw_content': page}], self.nodes['a']['pages'])
+        ref = packed[0]['raw_content_ref']
+        owner = self.nodes['a']['peers'].ring.owner('pages:' + ref)
+        owner_name = 'a' if owner == self.urls['a'] else 'b'
+        self.assertTrue(self._wait_for(lambda: self.nodes[owner_name]['pages'].get_local_bytes(ref) is not None))
+
+        other = 'b' if owner_name == 'a' else 'a'
+        fresh = self._make_node(other)
+        self.assertEqual(unpack_results(packed, fresh['pages'])[0]['raw_content'], page)
+
+    def test_down_peer_is_skipped(self):
+        """Un nodo caído cuesta un solo timeout y luego se omite"""
+        key = self._key_owned_by('b')
+        self.servers['b'].shutdown()
+        self.servers['b'].server_close()
+        node = self._make_node('a')
+        start = time.monotonic()
+        self.assertIsNone(node['search'].get(key))
+        self.assertIsNone(node['search'].get(self._key_owned_by('b')))
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertEqual(node['peers'].stats()['down'], [self.urls['b']])
+        self.assertIsNone(node['peers'].remote_owner('search', key))
+
+    def test_wrong_token_is_rejected(self):
+        """Sin el token compartido el nodo no entrega ni acepta valores"""
+        key = self._key_owned_by('b')
+        self.nodes['b']['search'].set_local_bytes(key, b'j"valor"')
+        intruder = self._make_node('a', token='otro')
+        self.assertIsNone(intruder['search'].get(key))
+        self.assertEqual(self.nodes['a']['search'].get(key), 'valor')
+        self.assertFalse(PeerCache('http://x', ['http://x'], '').authorized(''))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para la precarga de búsquedas mientras el usuario escribe
+"""
+
+import threading
+import unittest
+
+from chatbot.rag.utils.prefetch import Prefetcher
+
+
+class TestPrefetcher(unittest.TestCase):
+    """Tests de la cola de precargas de baja prioridad"""
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.searched = []
+
+        def search(query):
+            self.searched.append(query)
+            self.release.wait(2)
+
+        self.prefetcher = Prefetcher(search, max_workers=1, max_pending=2, min_chars=12, min_words=3)
+        self.addCleanup(self.release.set)
+
+    def _wait_idle(self):
+        self.release.set()
+        self.prefetcher._executor.submit(lambda: None).result(2)
+
+    def test_filters_short_questions_and_busy_service(self):
+        """No se precargan preguntas cortas ni con solicitudes esperando al proveedor"""
+        self.assertEqual(self.prefetcher.submit('¿cuándo'), 'too_short')
+        self.assertEqual(self.prefetcher.submit('inscripcionespregrado'), 'too_short')
+        self.assertEqual(self.prefetcher.submit('¿Cuándo abren inscripciones?', busy=True), 'busy')
+        self._wait_idle()
+        self.assertEqual(self.searched, [])
+
+    def test_deduplicates_and_bounds_backlog(self):
+        """Una pregunta en curso no se repite y la cola acotada descarta el exceso"""
+        self.assertEqual(self.prefetcher.submit('¿Cuándo abren inscripciones?'), 'scheduled')
+        self.assertEqual(self.prefetcher.submit('cuando abren inscripciones'), 'duplicate')
+        self.assertEqual(self.prefetcher.submit('¿Dónde queda la sede Macarena?'), 'scheduled')
+        self.assertEqual(self.prefetcher.submit('¿Cuál es el calendario académico?'), 'full')
+        self.assertEqual(self.prefetcher.stats()['pending'], 2)
+
+        self._wait_idle()
+        self.assertEqual(self.searched, ['¿Cuándo abren inscripciones?', '¿Dónde queda la sede Macarena?'])
+        self.assertEqual(self.prefetcher.stats()['pending'], 0)
+        self.assertEqual(self.prefetcher.submit('¿Cuándo abren inscripciones?'), 'scheduled')
+
+    def test_search_errors_are_contained(self):
+        """Un fallo de la búsqueda no deja la pregunta marcada en curso"""
+        prefetcher = Prefetcher(lambda query: 1 / 0)
+        self.assertEqual(prefetcher.submit('¿Cuándo abren inscripciones?'), 'scheduled')
+        prefetcher._executor.submit(lambda: None).result(2)
+        self.assertEqual(prefetcher.stats()['pending'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para el clasificador de preguntas y el presupuesto de generación
+"""
+
+import unittest
+
+from chatbot.rag.utils.query_classifier import classify_query, generation_budget
+from chatbot.rag.utils.request_context import request_scope
+
+
+class TestQueryClassifier(unittest.TestCase):
+    """Tests de las clases de pregunta y de los límites que eligen"""
+
+    def test_classes(self):
+        """Cada tipo de pregunta cae en su clase"""
+        cases = {
+            '¿Dirección de la sede Macarena?': 'factoid',
+            '¿Quién es el rector?': 'factoid',
+            '¿Cuándo inician las clases?': 'factoid',
+            'Explica el proceso de admisión': 'procedural',
+            '¿Cómo me inscribo a un posgrado?': 'procedural',
+            'Requisitos para transferencia externa': 'procedural',
+            '¿Cuáles son los programas de ingeniería?': 'list',
+            '¿Qué sedes tiene la universidad?': 'list',
+            'Háblame de la historia de la universidad': 'open',
+        }
+        for query, expected in cases.items():
+            self.assertEqual(classify_query(query), expected, query)
+
+    def test_budget_never_exceeds_handler_limits(self):
+        """La clase acorta max_tokens y el contexto, pero no supera los del handler"""
+        with request_scope(endpoint='test') as context:
+            budget = generation_budget('¿Dirección de la sede Macarena?', max_tokens=500, max_context_length=5000)
+        self.assertEqual(context.query_class, 'factoid')
+        self.assertLess(budget.max_tokens, 500)
+        self.assertLess(budget.max_context_length, 5000)
+
+        budget = generation_budget('Explica el proceso de admisión', max_tokens=50, max_context_length=3000)
+        self.assertEqual((budget.query_class, budget.max_tokens, budget.max_context_length), ('procedural', 50, 3000))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
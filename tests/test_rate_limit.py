@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para el límite de peticiones por cliente
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure(DEFAULT_CHARSET='utf-8')
+
+from chatbot.rag.utils import rate_limit
+from chatbot.rag.utils.rate_limit import InMemoryRateLimiter, SQLiteRateLimiter, rate_limited
+from chatbot.request_utils import get_client_key
+
+
+class FakeRequest:
+    def __init__(self, ip='10.0.0.1', csrf=None, forwarded=None):
+        self.META = {'REMOTE_ADDR': ip}
+        if forwarded:
+            self.META['HTTP_X_FORWARDED_FOR'] = forwarded
+        self.COOKIES = {settings.CSRF_COOKIE_NAME: csrf} if csrf else {}
+        self.path = '/api/send_message/'
+
+
+class TestTokenBuckets(unittest.TestCase):
+    """Tests de las implementaciones en memoria y SQLite"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_memory_burst_then_refill(self):
+        """Se permite la ráfaga, luego se informa el tiempo de espera y se recarga"""
+        limiter = InMemoryRateLimiter(rate=10, burst=3)
+        self.assertEqual([limiter.acquire('a') for _ in range(3)], [0.0, 0.0, 0.0])
+        retry_after = limiter.acquire('a')
+        self.assertGreater(retry_after, 0)
+        self.assertLessEqual(retry_after, 0.1)
+        self.assertEqual(limiter.acquire('b'), 0.0)
+
+        with patch('chatbot.rag.utils.rate_limit.time.monotonic', return_value=limiter._buckets['a'][1] + 1):
+            self.assertEqual(limiter.acquire('a', cost=3), 0.0)
+
+    def test_memory_evicts_least_recent_keys(self):
+        """La memoria queda acotada por max_keys"""
+        limiter = InMemoryRateLimiter(rate=1, burst=1, max_keys=2)
+        for key in ('a', 'b', 'c'):
+            limiter.acquire(key)
+        self.assertEqual(list(limiter._buckets), ['b', 'c'])
+
+    def test_sqlite_is_shared_between_instances(self):
+        """Dos limitadores sobre el mismo archivo (dos workers) comparten los buckets"""
+        path = os.path.join(self.directory, 'limits.sqlite3')
+        worker_a = SQLiteRateLimiter(path, rate=0.01, burst=2)
+        worker_b = SQLiteRateLimiter(path, rate=0.01, burst=2)
+        self.assertEqual(worker_a.acquire('client'), 0.0)
+        self.assertEqual(worker_b.acquire('client'), 0.0)
+        self.assertGreater(worker_a.acquire('client'), 50)
+        self.assertGreater(worker_b.acquire('client'), 50)
+        self.assertEqual(worker_b.acquire('other'), 0.0)
+
+    def test_memory_and_sqlite_agree(self):
+        """Ambas implementaciones deciden igual ante la misma secuencia, incluido un costo mayor que la ráfaga"""
+        scenario = [
+            (0.0, 'nuevo', 5), (0.0, 'nuevo', 3), (0.0, 'nuevo', 1),
+            (0.5, 'a', 1), (0.5, 'a', 2), (0.5, 'a', 1),
+            (1.5, 'a', 1), (1.5, 'a', 4), (10.0, 'a', 3), (10.0, 'a', 1),
+        ]
+        limiters = [InMemoryRateLimiter(rate=1, burst=3), SQLiteRateLimiter(os.path.join(self.directory, 'limits.sqlite3'), rate=1, burst=3)]
+        decisions = []
+        for limiter in limiters:
+            outcome = []
+            for now, key, cost in scenario:
+                with patch('chatbot.rag.utils.rate_limit.time.monotonic', return_value=now), \
+                        patch('chatbot.rag.utils.rate_limit.time.time', return_value=now):
+                    outcome.append(round(limiter.acquire(key, cost), 1))
+            decisions.append(outcome)
+        self.assertEqual(decisions[0], decisions[1])
+        self.assertEqual(decisions[0][:3], [2.0, 0.0, 1.0])
+
+
+class TestRateLimitedView(unittest.TestCase):
+    """Tests del decorador de vistas"""
+
+    def setUp(self):
+        self.limiter = InMemoryRateLimiter(rate=1, burst=2)
+        patcher = patch.object(rate_limit, 'get_rate_limiter', return_value=self.limiter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.view = rate_limited(lambda request: 'ok')
+
+    def test_returns_429_with_retry_after(self):
+        """Al agotar la cuota responde 429 con la cabecera Retry-After"""
+        request = FakeRequest()
+        self.assertEqual(self.view(request), 'ok')
+        self.assertEqual(self.view(request), 'ok')
+        response = self.view(request)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_rotating_csrf_tokens_hits_ip_bucket(self):
+        """Cambiar de token CSRF no evita el límite por IP"""
+        statuses = [getattr(self.view(FakeRequest(csrf=f'token{i}')), 'status_code', 200) for i in range(20)]
+        self.assertIn(429, statuses)
+
+    def test_ip_rejection_refunds_client_bucket(self):
+        """Si la IP agota su cuota, el bucket del cliente no pierde tokens"""
+        statuses = [getattr(self.view(FakeRequest(csrf=f'token{i}')), 'status_code', 200) for i in range(20)]
+        rejected = get_client_key(FakeRequest(csrf=f'token{statuses.index(429)}'))
+        self.assertEqual(self.limiter._buckets[rejected][0], self.limiter.burst)
+
+        path = os.path.join(tempfile.mkdtemp(), 'limits.sqlite3')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        shared = SQLiteRateLimiter(path, rate=0.01, burst=2)
+        self.assertEqual(shared.acquire('client', 2), 0.0)
+        shared.refund('client', 2)
+        self.assertEqual(shared.acquire('client', 2), 0.0)
+
+    def test_client_key_prefers_csrf_and_ignores_untrusted_forwarded_for(self):
+        """La clave usa el token CSRF y no confía en X-Forwarded-For por defecto"""
+        self.assertTrue(get_client_key(FakeRequest(csrf='abc')).startswith('csrf:'))
+        self.assertEqual(get_client_key(FakeRequest(ip='10.0.0.9', forwarded='1.2.3.4')), 'ip:10.0.0.9')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para el planificador de admisión por proveedor
+"""
+
+import time
+import threading
+import unittest
+
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure(DEFAULT_CHARSET='utf-8')
+
+from chatbot.rag.utils import metrics
+from chatbot.rag.utils.scheduler import (
+    AdmissionScheduler, SchedulerOverloaded, overloaded_response,
+    PRIORITY_INTERACTIVE, PRIORITY_API, PRIORITY_BATCH,
+)
+
+
+class TestAdmissionScheduler(unittest.TestCase):
+    """Tests de concurrencia, prioridades y descarte de carga"""
+
+    def setUp(self):
+        metrics.reset()
+        self.scheduler = AdmissionScheduler('test', max_concurrent=1, max_queue=2, max_wait=2)
+        self.release = threading.Event()
+        self.order = []
+
+    def _hold_slot(self):
+        started = threading.Event()
+
+        def run():
+            with self.scheduler.admit(PRIORITY_API):
+                started.set()
+                self.release.wait(5)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        started.wait(1)
+        return thread
+
+    def _enqueue(self, name, priority, errors=None):
+        def run():
+            try:
+                with self.scheduler.admit(priority):
+                    self.order.append(name)
+            except SchedulerOverloaded as e:
+                if errors is not None:
+                    errors.append((name, e.reason))
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def _wait_queued(self, count):
+        deadline = time.monotonic() + 1
+        while self.scheduler.stats()['queued'] < count and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    def test_interactive_is_served_before_batch(self):
+        """Al liberarse el cupo pasa primero la solicitud interactiva"""
+        holder = self._hold_slot()
+        batch = self._enqueue('batch', PRIORITY_BATCH)
+        self._wait_queued(1)
+        interactive = self._enqueue('interactive', PRIORITY_INTERACTIVE)
+        self._wait_queued(2)
+        self.release.set()
+        for thread in (holder, batch, interactive):
+            thread.join(2)
+        self.assertEqual(self.order, ['interactive', 'batch'])
+        self.assertEqual(self.scheduler.stats()['active'], 0)
+
+    def test_full_queue_sheds_fast_or_preempts_lower_priority(self):
+        """Con la cola llena se rechaza al instante, salvo que haya alguien de menor prioridad"""
+        holder = self._hold_slot()
+        errors = []
+        waiters = []
+        for i in range(2):
+            waiters.append(self._enqueue(f'batch{i}', PRIORITY_BATCH, errors))
+            self._wait_queued(i + 1)
+
+        start = time.monotonic()
+        with self.assertRaises(SchedulerOverloaded) as shed:
+            with self.scheduler.admit(PRIORITY_BATCH):
+                pass
+        self.assertEqual(shed.exception.reason, 'queue_full')
+        self.assertLess(time.monotonic() - start, 0.1)
+
+        waiters.append(self._enqueue('interactive', PRIORITY_INTERACTIVE, errors))
+        deadline = time.monotonic() + 1
+        while not errors and time.monotonic() < deadline:
+            time.sleep(0.001)
+        self.release.set()
+        for thread in [holder] + waiters:
+            thread.join(2)
+        self.assertEqual(errors, [('batch1', 'preempted')])
+        self.assertEqual(self.order[0], 'interactive')
+        self.assertEqual(self.scheduler.stats()['shed'], {'queue_full': 1, 'timeout': 0, 'preempted': 1})
+
+    def test_wait_timeout_and_metrics(self):
+        """Se descarta al superar la espera máxima y se exportan las métricas"""
+        holder = self._hold_slot()
+        with self.assertRaises(SchedulerOverloaded) as shed:
+            with self.scheduler.admit(PRIORITY_API, timeout=0.05):
+                pass
+        self.release.set()
+        holder.join(2)
+        self.assertEqual(shed.exception.reason, 'timeout')
+        self.assertGreaterEqual(shed.exception.retry_after, 1)
+
+        snapshot = metrics.snapshot()
+        shed_counts = {tuple(sorted(c['labels'].items())): c['value'] for c in snapshot['counters'] if c['name'] == 'scheduler_shed_total'}
+        self.assertEqual(shed_counts, {(('provider', 'test'), ('reason', 'timeout')): 1})
+        self.assertIn('scheduler_wait_ms', {s['name'] for s in snapshot['summaries']})
+        self.assertIn('scheduler_queue_depth{provider="test"} 0', metrics.render_prometheus())
+
+    def test_overloaded_response(self):
+        """La respuesta de sobrecarga es un 503 con Retry-After"""
+        response = overloaded_response(SchedulerOverloaded('queue_full', 3))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '3')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para el servidor con precarga: opciones de gunicorn y
+objetos por proceso que deben reconstruirse tras el fork
+"""
+
+import os
+import unittest
+
+from chatbot.management.commands.serve import build_options
+from chatbot.rag.utils.process_local import ProcessExecutor
+from chatbot.rag.utils import http_client
+
+
+def run_in_child(fn) -> int:
+    """Ejecuta fn en un proceso hijo (fork) y devuelve su código de salida"""
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os._exit(0 if fn() else 1)
+        except BaseException:
+            os._exit(2)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status)
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'requiere fork')
+class TestForkSafety(unittest.TestCase):
+    """Tests de los recursos que no sobreviven a un fork"""
+
+    def test_executor_runs_in_forked_child(self):
+        """Un pool usado antes del fork sigue funcionando en el hijo"""
+        executor = ProcessExecutor(max_workers=2, thread_name_prefix='test')
+        self.addCleanup(executor.shutdown)
+        self.assertEqual(executor.submit(lambda: 'padre').result(2), 'padre')
+        self.assertEqual(run_in_child(lambda: executor.submit(lambda: 'hijo').result(2) == 'hijo'), 0)
+
+    def test_http_session_per_process(self):
+        """Cada proceso tiene su propia sesión HTTP"""
+        parent = http_client.get_http_session()
+        self.assertIs(http_client.get_http_session(), parent)
+        self.assertEqual(run_in_child(lambda: http_client.get_http_session() is not parent), 0)
+
+
+class TestServeOptions(unittest.TestCase):
+    """Tests de la traducción de la sección server a gunicorn"""
+
+    def test_command_line_overrides_config(self):
+        """La línea de comandos gana sobre config.json y elige la clase de worker"""
+        config = {'workers': 3, 'threads': 1, 'mode': 'wsgi', 'preload': True}
+        options = build_options(config, {'workers': None, 'threads': None, 'mode': None, 'no_preload': False})
+        self.assertEqual((options['workers'], options['worker_class'], options['preload_app']), (3, 'sync', True))
+        options = build_options(config, {'workers': 8, 'threads': 4, 'mode': None, 'no_preload': True})
+        self.assertEqual((options['workers'], options['worker_class'], options['preload_app']), (8, 'gthread', False))
+        options = build_options(config, {'mode': 'asgi'})
+        self.assertEqual(options['worker_class'], 'uvicorn.workers.UvicornWorker')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
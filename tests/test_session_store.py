@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para el almacén de sesiones y la reutilización en preguntas de seguimiento
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+
+from chatbot.rag.utils import session_store
+from chatbot.rag.utils.session_store import SessionStore, is_follow_up
+from chatbot.rag.utils.request_context import request_scope
+from chatbot.rag.handlers.base_handler import BaseQAHandler
+
+
+class _Handler(BaseQAHandler):
+    def load_prompt_template(self):
+        pass
+
+    def get_answer(self, query: str):
+        pass
+
+
+class TestFollowUpDetection(unittest.TestCase):
+    """Tests de la heurística de preguntas de seguimiento"""
+
+    def test_follow_up_heuristic(self):
+        """Preguntas cortas con conectores o referencias son seguimientos"""
+        previous = '¿Dónde queda la Facultad de Ingeniería?'
+        results = [{'url': 'u', 'content': 'Sede Calle 40. Horarios de atención: 7 a 21. Biblioteca y correo de la facultad.'}]
+        self.assertTrue(is_follow_up('¿Y cuál es su horario?', previous, previous_results=results))
+        self.assertTrue(is_follow_up('¿También tiene biblioteca?', previous, previous_results=results))
+        self.assertTrue(is_follow_up('¿Y el correo de esa facultad?', previous))
+        self.assertTrue(is_follow_up('¿Dónde queda eso?', previous))
+        self.assertFalse(is_follow_up('¿Cuándo abren las inscripciones de posgrado?', previous))
+        self.assertFalse(is_follow_up('donde queda la facultad de ingenieria', previous))
+        self.assertFalse(is_follow_up('¿Y su horario?', None))
+        long_question = 'y ' + ' '.join(['palabra'] * 20)
+        self.assertFalse(is_follow_up(long_question, previous))
+
+    def test_new_questions_are_not_follow_ups(self):
+        """"está", "este" o "su" no convierten una pregunta nueva en seguimiento"""
+        previous = '¿Quién es el rector de la UD?'
+        results = [{'url': 'u', 'content': 'El rector de la Universidad Distrital fue designado por el Consejo Superior.'}]
+        for question in ['¿Dónde está la biblioteca central?', '¿Cuáles son las fechas de este semestre?', '¿Y su costo?']:
+            self.assertFalse(is_follow_up(question, previous, previous_results=results), question)
+        self.assertFalse(is_follow_up('¿Cuál es el correo de esa facultad?', '¿Dónde queda la Facultad de Ingeniería?'))
+        # El mismo conector sí es un seguimiento si los resultados anteriores hablan de ello
+        self.assertTrue(is_follow_up('¿Y su correo?', previous, previous_results=[{'content': 'Correo: rectoria@udistrital.edu.co'}]))
+
+
+class TestSessionStore(unittest.TestCase):
+    """Tests de los límites del almacén de sesiones"""
+
+    def test_ring_buffer_keeps_last_turns(self):
+        """Cada sesión conserva solo los últimos turnos"""
+        store = SessionStore(max_turns=2)
+        for i in range(4):
+            store.record_turn('s1', f'pregunta {i}', f'respuesta {i}')
+        self.assertEqual(store.history('s1'), [('pregunta 2', 'respuesta 2'), ('pregunta 3', 'respuesta 3')])
+
+    def test_lru_eviction_and_memory_cap(self):
+        """Se desaloja la sesión menos usada al superar el número de sesiones o la memoria"""
+        store = SessionStore(max_sessions=2, max_chars=1000)
+        store.record_turn('a', 'x', 'y')
+        store.record_turn('b', 'x', 'y')
+        store.record_turn('a', 'x', 'y')
+        store.record_turn('c', 'x', 'y')
+        self.assertEqual(store.history('b'), [])
+        self.assertEqual(len(store.history('a')), 2)
+
+        store.remember_results('c', 'pregunta', [{'url': 'u', 'content': 'horario ' + 'z' * 987}])
+        self.assertEqual(store.history('a'), [])
+        self.assertEqual(store.follow_up_context('c', '¿Y su horario?')[0], 'pregunta')
+        self.assertEqual(store.stats()['evictions'], 2)
+
+    def test_results_are_truncated_and_copied(self):
+        """Los resultados se guardan recortados y se devuelven como copias"""
+        store = SessionStore(max_result_chars=5)
+        store.remember_results('s1', '¿Dónde queda la sede?', [{'url': 'u', 'content': 'contenido largo', 'score': 0.5}])
+        question, results = store.follow_up_context('s1', '¿Y el teléfono de la sede?')
+        self.assertEqual(question, '¿Dónde queda la sede?')
+        self.assertEqual(results, [{'url': 'u', 'content': 'conte', 'score': 0.5}])
+        results[0]['content'] = 'modificado'
+        self.assertEqual(store.follow_up_context('s1', '¿Y el correo de la sede?')[1][0]['content'], 'conte')
+
+
+class TestRetrieveReuse(unittest.TestCase):
+    """Tests de la reutilización de resultados en BaseQAHandler.retrieve"""
+
+    def setUp(self):
+        self.retriever = Mock()
+        self.retriever.search.return_value = [{'url': 'https://udistrital.edu.co/ingenieria', 'content': 'Sede Calle 40, horario de 7 a 21'}]
+        for p in [
+            patch.object(session_store, '_session_store', SessionStore()),
+            patch('chatbot.rag.handlers.base_handler.get_hybrid_retriever', return_value=self.retriever),
+        ]:
+            p.start()
+            self.addCleanup(p.stop)
+        self.handler = _Handler()
+
+    def test_follow_up_reuses_previous_results(self):
+        """La pregunta de seguimiento no vuelve a buscar y el prompt incluye la pregunta anterior"""
+        with request_scope(session_id='session:1'):
+            self.handler.retrieve('¿Dónde queda la Facultad de Ingeniería?')
+        with request_scope(session_id='session:1') as context:
+            results = self.handler.retrieve('¿Y cuál es su horario?')
+            question = self.handler.contextualize_question('¿Y cuál es su horario?')
+        self.assertEqual(self.retriever.search.call_count, 1)
+        self.assertEqual(results[0]['content'], 'Sede Calle 40, horario de 7 a 21')
+        self.assertEqual(context.follow_up_of, '¿Dónde queda la Facultad de Ingeniería?')
+        self.assertIn('Pregunta anterior: ¿Dónde queda la Facultad de Ingeniería?', question)
+
+    def test_sessions_are_isolated(self):
+        """Otra sesión o una solicitud anónima siempre busca"""
+        with request_scope(session_id='session:1'):
+            self.handler.retrieve('¿Dónde queda la Facultad de Ingeniería?')
+        with request_scope(session_id='session:2'):
+            self.handler.retrieve('¿Y cuál es su horario?')
+        with request_scope() as context:
+            self.handler.retrieve('¿Y cuál es su horario?')
+            self.assertEqual(self.handler.contextualize_question('hola'), 'hola')
+        self.assertEqual(self.retriever.search.call_count, 3)
+        self.assertIsNone(context.follow_up_of)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
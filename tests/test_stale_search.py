@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para el circuit breaker de Tavily y los resultados de búsqueda vencidos
+"""
+
+import time
+import unittest
+from unittest.mock import patch
+
+from httpx import TimeoutException
+
+from chatbot.rag.cache import tiered, pages
+from chatbot.rag.cache.answers import cache_answer, get_cached_answer
+from chatbot.rag.cache.backends import MemoryBackend
+from chatbot.rag.cache.tiered import TieredCache
+from chatbot.rag.utils import circuit_breaker
+from chatbot.rag.utils.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from chatbot.rag.utils.request_context import request_scope
+from websearch import search
+
+SEARCH_CONFIG = {
+    'include_domains': [], 'country': None, 'max_results': 3, 'chunks_per_source': 3,
+    'search_depth': 'advanced', 'topic': None, 'time_range': None, 'days': None,
+    'start_date': None, 'end_date': None,
+}
+CACHE_CONFIG = {'caches': {'search': {'ttl_seconds': 100, 'hard_ttl_seconds': 1000, 'stale_if_error_seconds': 10000}}}
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Tests de los estados del circuit breaker"""
+
+    def test_opens_after_threshold_and_recovers(self):
+        """Se abre tras N fallos seguidos, deja pasar una prueba y se cierra si tiene éxito"""
+        breaker = CircuitBreaker('tavily', failure_threshold=2, reset_seconds=0.05)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow())
+
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.stats(), {'state': CLOSED, 'failures': 0})
+
+    def test_failed_trial_reopens(self):
+        """Una prueba fallida en semiabierto vuelve a abrir el circuito"""
+        breaker = CircuitBreaker('tavily', failure_threshold=1, reset_seconds=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow())
+
+
+class TestStaleSearch(unittest.TestCase):
+    """Tests de stale-while-revalidate y stale-if-error en search_web"""
+
+    def setUp(self):
+        self.cache = TieredCache('search', MemoryBackend(), ttl_seconds=10000)
+        self.breaker = CircuitBreaker('tavily', failure_threshold=1, reset_seconds=60)
+        for p in [
+            patch.object(tiered, '_caches', {'search': self.cache, 'answer': TieredCache('answer', MemoryBackend())}),
+            patch.object(pages, '_page_store', False),
+            patch.object(circuit_breaker, '_breakers', {'tavily': self.breaker}),
+            patch.object(search, 'get_section', return_value=CACHE_CONFIG),
+            patch.object(search, 'get_search_config', return_value=SEARCH_CONFIG),
+            patch.object(search, 'get_tavily_client'),
+            patch.object(search.time, 'sleep'),
+        ]:
+            self.addCleanup(p.stop)
+            mock = p.start()
+            if p.attribute == 'get_tavily_client':
+                self.client = mock.return_value
+        self.client.search.return_value = {'results': [{'url': 'nuevo', 'content': 'actual'}]}
+
+    def _age_entry(self, query: str, seconds: float):
+        """Guarda en la caché un resultado obtenido hace 'seconds' segundos"""
+        key = search.make_key(search.normalize_question(query), search._resolve_topic_and_time(SEARCH_CONFIG, query), SEARCH_CONFIG)
+        self.cache.set(key, {'results': [{'url': 'viejo', 'content': 'anterior'}], 'fetched_at': time.time() - seconds})
+
+    def _wait_for_refresh(self):
+        deadline = time.monotonic() + 2
+        while search._refreshing and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_fresh_entry_skips_tavily(self):
+        """Antes del TTL soft se responde desde la caché sin llamar a Tavily"""
+        self._age_entry('calendario académico', 50)
+        self.assertEqual(search.search_web('calendario académico')[0]['url'], 'viejo')
+        self.client.search.assert_not_called()
+
+    def test_soft_expired_entry_is_served_and_refreshed(self):
+        """Entre soft y hard se sirve lo guardado y se refresca en segundo plano"""
+        self._age_entry('calendario académico', 500)
+        with request_scope() as context:
+            self.assertEqual(search.search_web('calendario académico')[0]['url'], 'viejo')
+        self.assertFalse(context.search_stale)
+        self._wait_for_refresh()
+        self.assertEqual(self.client.search.call_count, 1)
+        self.assertEqual(context.search_calls, 0)
+        self.assertEqual(search.search_web('calendario académico')[0]['url'], 'nuevo')
+        self.assertEqual(self.client.search.call_count, 1)
+
+    def test_hard_expired_entry_is_refetched(self):
+        """Pasado el TTL hard se consulta Tavily antes de responder"""
+        self._age_entry('calendario académico', 5000)
+        self.assertEqual(search.search_web('calendario académico')[0]['url'], 'nuevo')
+        self.assertEqual(self.client.search.call_count, 1)
+
+    def test_stale_if_error_flags_request(self):
+        """Si Tavily falla se sirven resultados vencidos y la respuesta no se guarda en caché"""
+        self._age_entry('calendario académico', 5000)
+        self.client.search.side_effect = TimeoutException('caído')
+        with request_scope(provider='deepseek', model='deepseek-chat') as context:
+            self.assertEqual(search.search_web('calendario académico')[0]['url'], 'viejo')
+            self.assertTrue(context.search_stale)
+            cache_answer('calendario académico', 'Las clases inician el 3 de febrero.')
+        with request_scope(provider='deepseek', model='deepseek-chat'):
+            self.assertIsNone(get_cached_answer('calendario académico'))
+
+        self.assertEqual(self.breaker.state, OPEN)
+        self.client.search.reset_mock()
+        self.assertEqual(search.search_web('calendario académico')[0]['url'], 'viejo')
+        self.client.search.assert_not_called()
+
+    def test_errors_differ_from_empty_results(self):
+        """Una respuesta vacía de Tavily es [] y un fallo sin resultados guardados también, pero abre el circuito"""
+        self.client.search.return_value = {'results': []}
+        self.assertEqual(search.search_web('sin resultados'), [])
+        self.assertEqual(self.breaker.state, CLOSED)
+
+        self.client.search.side_effect = TimeoutException('caído')
+        self.assertEqual(search.search_web('otra consulta'), [])
+        self.assertEqual(self.breaker.state, OPEN)
+        with self.assertRaises(search.SearchUnavailable) as raised:
+            search._search_tavily(self.client, SEARCH_CONFIG, 'otra consulta')
+        self.assertEqual(raised.exception.reason, 'circuit_open')
+
+    def test_rejected_query_ends_half_open_trial(self):
+        """Una consulta rechazada (ValueError) en la prueba semiabierta no deja el circuito bloqueado"""
+        self.breaker.record_failure()
+        self.breaker.reset_seconds = 0
+        self.client.search.side_effect = ValueError('Query is too long. Max query length is 400 characters.')
+        self.assertEqual(search._search_tavily(self.client, SEARCH_CONFIG, 'consulta larga'), [])
+        self.assertEqual(self.breaker.state, CLOSED)
+
+        self.client.search.side_effect = None
+        self.assertEqual(search._search_tavily(self.client, SEARCH_CONFIG, 'calendario')[0]['url'], 'nuevo')
+
+    def test_very_old_entry_is_not_served(self):
+        """Resultados más viejos que stale_if_error_seconds no se sirven"""
+        self._age_entry('calendario académico', 20000)
+        self.client.search.side_effect = TimeoutException('caído')
+        self.assertEqual(search.search_web('calendario académico'), [])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para las estadísticas en flujo del registro de interacciones
+"""
+
+import io
+import os
+import csv
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+
+from chatbot.rag.utils.stream_stats import LatencyHistogram, SpaceSaving, CacheHitEstimator
+from chatbot.rag.utils.interaction_logger import CSV_HEADER
+from chatbot.management.commands.chat_stats import Command
+
+
+class TestStreamStats(unittest.TestCase):
+    """Tests de los estimadores de memoria constante"""
+
+    def test_histogram_quantiles_within_bucket_error(self):
+        """Los cuantiles aproximados quedan dentro del factor de crecimiento"""
+        histogram = LatencyHistogram()
+        for value in range(1, 1001):
+            histogram.add(value)
+        summary = histogram.summary()
+        self.assertEqual(summary['count'], 1000)
+        self.assertAlmostEqual(summary['p50'], 500, delta=500 * 0.05)
+        self.assertAlmostEqual(summary['p99'], 990, delta=990 * 0.05)
+        self.assertEqual(summary['max'], 1000)
+
+    def test_empty_histogram(self):
+        """Un histograma vacío no reporta cuantiles"""
+        self.assertIsNone(LatencyHistogram().summary()['p95'])
+
+    def test_space_saving_finds_heavy_hitters(self):
+        """Los elementos frecuentes sobreviven aunque haya muchos únicos"""
+        sketch = SpaceSaving(capacity=10)
+        for i in range(2000):
+            sketch.add('horario' if i % 3 == 0 else f'unica {i}')
+            if i % 5 == 0:
+                sketch.add('matricula')
+        top = sketch.top(2)
+        self.assertEqual([entry['item'] for entry in top], ['horario', 'matricula'])
+        self.assertLessEqual(len(sketch.counters), 10)
+        self.assertGreaterEqual(top[0]['count'], 667)
+
+    def test_cache_hit_estimator_respects_ttl(self):
+        """Una repetición dentro del TTL cuenta como acierto y fuera de él no"""
+        estimator = CacheHitEstimator(ttl_seconds=60)
+        estimator.add('q', 0)
+        estimator.add('q', 30)
+        estimator.add('q', 100)
+        estimator.add('q', 130)
+        self.assertEqual(estimator.hits, 2)
+        self.assertEqual(estimator.hit_ratio(), 0.5)
+
+
+class TestChatStatsCommand(unittest.TestCase):
+    """Tests del comando chat_stats sobre archivos CSV"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'log.csv')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _run(self, **options):
+        defaults = {'source': 'csv', 'path': self.path, 'no_rotated': False, 'days': None, 'top': 5,
+                    'ttl': [300], 'max_keys': 1000, 'output': None}
+        defaults.update(options)
+        out = io.StringIO()
+        command = Command(stdout=out)
+        command.handle(**defaults)
+        return json.loads(out.getvalue())
+
+    def test_reads_rotated_and_legacy_files(self):
+        """Combina archivos rotados (incluido el formato antiguo) con el activo"""
+        with gzip.open(os.path.join(self.directory, 'log.20250101000000.1.0.csv.gz'), 'wt', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Token', 'Time', 'User Message', 'Response'])
+            writer.writerow(['t', '20250101100000', '¿Horario?', 'r'])
+        with open(self.path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADER)
+            writer.writerow(['t', '20250101100100', 'horario', 'r', 'send_message', 'deepseek', 'm', '120.5', '0', '1', '2', '', ''])
+            writer.writerow(['t', '20250102100000', 'Matrícula', 'r', 'send_message', 'deepseek', 'm', '300', '0', '0', '1', '10', '5', '250'])
+
+        report = self._run()
+
+        self.assertEqual(report['totals']['interactions'], 3)
+        self.assertEqual(report['totals']['search_calls'], 1)
+        self.assertEqual(report['totals']['llm_calls'], 3)
+        self.assertEqual(report['totals']['rows_without_call_counts'], 1)
+        self.assertEqual(sorted(report['latency_ms']['per_day']), ['2025-01-01', '2025-01-02'])
+        self.assertEqual(report['top_questions'][0], {'item': 'horario', 'count': 2, 'error': 0})
+        self.assertEqual(report['estimated_cache_hit_ratio']['300']['hits'], 1)
+        self.assertEqual(report['llm']['completion_tokens']['count'], 1)
+        self.assertEqual(report['llm']['tokens_per_second']['count'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
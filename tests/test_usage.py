@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests unitarios para la contabilidad de uso de tokens de los LLM
+"""
+
+import unittest
+from types import SimpleNamespace
+
+from chatbot.rag.utils import metrics, usage
+from chatbot.rag.utils.request_context import request_scope
+
+
+class TestUsage(unittest.TestCase):
+    """Tests de los parsers por proveedor y de los agregados por modelo"""
+
+    def setUp(self):
+        metrics.reset()
+        usage.reset()
+        self.addCleanup(metrics.reset)
+        self.addCleanup(usage.reset)
+
+    def test_parsers(self):
+        """Cada proveedor informa el uso con nombres distintos"""
+        self.assertEqual(usage.parse_openai_usage({'usage': {'prompt_tokens': 100, 'completion_tokens': 20,
+                                                             'prompt_cache_hit_tokens': 64, 'prompt_cache_miss_tokens': 36}}),
+                         {'prompt_tokens': 100, 'completion_tokens': 20, 'cached_prompt_tokens': 64,
+                          'uncached_prompt_tokens': 36})
+        self.assertEqual(usage.parse_ollama_usage({'response': 'r', 'prompt_eval_count': 50, 'eval_count': 30,
+                                                   'eval_duration': 1_500_000_000}),
+                         {'prompt_tokens': 50, 'completion_tokens': 30, 'generation_ms': 1500.0})
+        self.assertEqual(usage.parse_bedrock_usage({'usage': {'inputTokens': 40, 'outputTokens': 10, 'totalTokens': 50}}),
+                         {'prompt_tokens': 40, 'completion_tokens': 10, 'cached_prompt_tokens': None})
+        message = SimpleNamespace(content='r', usage_metadata={'input_tokens': 12, 'output_tokens': 3, 'total_tokens': 15})
+        self.assertEqual(usage.parse_langchain_usage(message), {'prompt_tokens': 12, 'completion_tokens': 3})
+        # Respuestas sin uso no rompen la llamada
+        self.assertEqual(usage.parse_openai_usage({'choices': []}), {})
+        self.assertEqual(usage.parse_langchain_usage(SimpleNamespace(content='r')), {})
+
+    def test_record_usage_updates_request_and_metrics(self):
+        """El uso se suma a la solicitud y se exporta por proveedor y modelo"""
+        with request_scope(endpoint='test') as context:
+            record = usage.record_usage('llama', 'llama3.2:3b', usage.parse_ollama_usage(
+                {'prompt_eval_count': 50, 'eval_count': 30, 'eval_duration': 1_500_000_000}), 2000.0)
+            usage.record_usage('llama', 'llama3.2:3b', {'prompt_tokens': 10, 'completion_tokens': 5}, 500.0)
+        self.assertEqual((context.prompt_tokens, context.completion_tokens, context.llm_ms), (60, 35, 2500.0))
+        # Se usa el tiempo de generación informado por Ollama, no la latencia total
+        self.assertEqual(record.tokens_per_second, 20.0)
+
+        tokens = {c['labels']['kind']: c['value'] for c in metrics.snapshot()['counters'] if c['name'] == 'llm_tokens_total'}
+        self.assertEqual(tokens, {'prompt': 60, 'completion': 35})
+
+        stats = usage.usage_stats()['llama/llama3.2:3b']
+        self.assertEqual(stats['calls'], 2)
+        self.assertEqual(stats['completion_tokens']['mean'], 17.5)
+        self.assertIsNone(stats['cost_usd'])
+
+    def test_prompt_cache_miss_reported_or_derived(self):
+        """Se usan los fallos de caché que informa el proveedor y, si faltan, prompt - aciertos"""
+        usage.record_usage('deepseek', 'deepseek-chat', {'cached_prompt_tokens': 64, 'uncached_prompt_tokens': 36}, 100.0)
+        usage.record_usage('deepseek', 'deepseek-chat', {'prompt_tokens': 100, 'cached_prompt_tokens': 90}, 100.0)
+        cache = {c['labels']['result']: c['value'] for c in metrics.snapshot()['counters']
+                 if c['name'] == 'llm_prompt_cache_tokens_total'}
+        self.assertEqual(cache, {'hit': 154, 'miss': 46})
+
+    def test_rolling_window_and_unreported_usage(self):
+        """Solo se conservan las últimas llamadas; las que no informan uso cuentan su latencia"""
+        for i in range(250):
+            usage.record_usage('deepseek', 'deepseek-chat', {'prompt_tokens': i, 'completion_tokens': 1}, 100.0)
+        usage.record_usage('deepseek', 'deepseek-chat', {}, 100.0)
+        stats = usage.usage_stats()['deepseek/deepseek-chat']
+        self.assertEqual(stats['calls'], 200)
+        self.assertEqual(stats['prompt_tokens']['mean'], 150.0)
+        latency = [s for s in metrics.snapshot()['summaries'] if s['name'] == 'llm_latency_ms']
+        self.assertEqual(latency[0]['value']['count'], 251)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -3,16 +3,42 @@ import json
 import logging
 import time
 import re
+import threading
 from datetime import datetime, timezone
 from tavily import TavilyClient, MissingAPIKeyError, InvalidAPIKeyError, UsageLimitExceededError
 from httpx import TimeoutException, HTTPError
+from chatbot.rag.utils import metrics
+from chatbot.rag.utils.request_context import count_search_call, current_request
+from chatbot.rag.utils.circuit_breaker import get_circuit_breaker
+from chatbot.rag.utils.health import report_dependency
+from chatbot.rag.utils.process_local import ProcessExecutor
+from chatbot.rag.utils.deadline import current_deadline, stage_timeout, generation_reserve, min_call_seconds
+from chatbot.rag.utils.config_loader import get_section
+from chatbot.rag.utils.text_utils import normalize_question
+from chatbot.rag.cache.tiered import get_cache, make_key
+from chatbot.rag.cache.pages import get_page_store, pack_results, unpack_results
 
 logger = logging.getLogger(__name__)
 _tavily_client = None
 _SEARCH_CONFIG = None
+_refresh_executor = ProcessExecutor(max_workers=2, thread_name_prefix='search-refresh')
+_refreshing = set()
+_refresh_lock = threading.Lock()
 
 CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'chatbot', 'rag', 'config', 'config.json')
 
+class SearchUnavailable(Exception):
+    """
+    Raised when Tavily could not answer, as opposed to answering with no results.
+
+    Attributes:
+        reason (str): 'error', 'deadline' or 'circuit_open'.
+    """
+
+    def __init__(self, reason: str):
+        super().__init__(f'Búsqueda web no disponible ({reason})')
+        self.reason = reason
+
 # Utilidad para limpiar la consulta
 def clean_query(query: str) -> str:
     """
@@ -65,6 +91,14 @@ def _resolve_topic_and_time(search_config: dict, query: str) -> dict:
         'end_date': end_date,
     }
 
+def _can_wait(wait_time: float, deadline, reserve: float) -> bool:
+    """
+    Indica si tras esperar `wait_time` segundos aún queda plazo para otro intento.
+    """
+    if deadline is None:
+        return True
+    return deadline.timeout(reserve=reserve) - wait_time >= min_call_seconds()
+
 def get_tavily_client():
     global _tavily_client
     if _tavily_client is None:
@@ -113,9 +147,74 @@ def get_search_config():
             }
     return _SEARCH_CONFIG
 
-def search_web(query: str) -> list:
+def _search_ttls(resolved: dict) -> tuple:
+    """
+    TTLs de la caché 'search': (soft, hard, máximo para stale-if-error).
+    Hasta 'soft' el resultado es fresco; hasta 'hard' se sirve mientras se
+    refresca en segundo plano; hasta el máximo solo se sirve si Tavily falla.
+    """
+    options = get_section('cache').get('caches', {}).get('search', {})
+    if resolved.get('topic') == 'news':
+        soft = options.get('news_ttl_seconds', options.get('ttl_seconds', 21600))
+        hard = options.get('news_hard_ttl_seconds', soft)
+    else:
+        soft = options.get('ttl_seconds', 21600)
+        hard = options.get('hard_ttl_seconds', soft)
+    return soft, max(hard, soft), max(options.get('stale_if_error_seconds', hard), hard)
+
+def _store_results(cache, cache_key: str, results: list, ttl: float):
+    # Las páginas (raw_content) se guardan una vez por contenido; la entrada solo guarda referencias
+    page_store = get_page_store()
+    packed = pack_results(results, page_store) if page_store is not None else results
+    cache.set(cache_key, {'results': packed, 'fetched_at': time.time()}, ttl)
+
+def _mark_stale(reason: str, age: float, query: str):
+    metrics.inc('search_stale_served_total', reason=reason)
+    logger.warning(f"Resultados de búsqueda vencidos ({age / 3600:.1f} h) para '{query[:30]}' ({reason})")
+    context = current_request()
+    if context is not None and reason != 'revalidate':
+        context.search_stale = True
+
+def _refresh_in_background(client, search_config: dict, query: str, cache, cache_key: str, ttl: float):
+    """
+    Refresca una entrada vencida sin bloquear a quien la pidió; una sola vez por clave.
+    """
+    with _refresh_lock:
+        if cache_key in _refreshing:
+            return
+        _refreshing.add(cache_key)
+
+    def refresh():
+        try:
+            results = _search_tavily(client, search_config, query)
+            if results:
+                _store_results(cache, cache_key, results, ttl)
+            metrics.inc('search_refresh_total', result='ok')
+        except SearchUnavailable as e:
+            metrics.inc('search_refresh_total', result=e.reason)
+            logger.warning(f"No se pudo refrescar la búsqueda '{query[:30]}': {e}")
+        except Exception as e:
+            metrics.inc('search_refresh_total', result='error')
+            logger.error(f"Error al refrescar la búsqueda '{query[:30]}': {e}")
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(cache_key)
+
+    _refresh_executor.submit(refresh)
+
+def search_web(query: str, deadline=None) -> list:
     """
     Realiza búsqueda web usando las mejores prácticas de Tavily.
+
+    El timeout de cada intento y las esperas entre reintentos se ajustan al
+    tiempo restante del plazo de la solicitud (explícito o del contexto),
+    reservando tiempo para la generación; sin presupuesto se devuelve [].
+    Los resultados no vacíos se guardan en la caché 'search' (L1 del proceso
+    + capa compartida), así que una consulta repetida no consume cuota.
+    Pasado el TTL 'soft' la entrada se sirve igual y se refresca en segundo
+    plano; si Tavily falla o su circuito está abierto, se sirven resultados
+    vencidos hasta 'stale_if_error_seconds' y la solicitud queda marcada
+    ('search_stale').
     """
     query = clean_query(query)
     
@@ -129,13 +228,62 @@ def search_web(query: str) -> list:
     except Exception as e:
         logger.error(f"Error en inicialización: {e}")
         return []
-    
+
+    # Caché de resultados compartida entre workers (clave: consulta normalizada + parámetros)
+    cache = get_cache('search')
+    resolved = _resolve_topic_and_time(search_config, query)
+    cache_key = make_key(normalize_question(query), resolved, search_config)
+    soft_ttl, hard_ttl, max_stale = _search_ttls(resolved)
+    stale = None
+    if cache is not None:
+        entry = cache.get(cache_key)
+        if entry is not None:
+            # Entradas anteriores a los TTL soft/hard: lista sin fecha, se tratan como frescas
+            cached, fetched_at = (entry['results'], entry['fetched_at']) if isinstance(entry, dict) else (entry, time.time())
+            age = time.time() - fetched_at
+            if age < soft_ttl:
+                logger.info(f"Resultados de búsqueda desde caché para '{query[:30]}' ({len(cached)} resultados)")
+                return unpack_results(cached, get_page_store())
+            if age < hard_ttl:
+                _mark_stale('revalidate', age, query)
+                _refresh_in_background(client, search_config, query, cache, cache_key, max_stale)
+                return unpack_results(cached, get_page_store())
+            stale = (cached, age)
+
+    try:
+        results = _search_tavily(client, search_config, query, deadline)
+    except SearchUnavailable as e:
+        if stale is not None and stale[1] < max_stale:
+            _mark_stale(e.reason, stale[1], query)
+            return unpack_results(stale[0], get_page_store())
+        return []
+    if cache is not None and results:
+        _store_results(cache, cache_key, results, max_stale)
+    return results
+
+def _search_tavily(client, search_config: dict, query: str, deadline=None) -> list:
+    """
+    Consulta Tavily con reintentos acotados por el plazo de la solicitud.
+    Devuelve [] solo cuando Tavily responde sin resultados; los fallos, la
+    falta de plazo y el circuito abierto lanzan SearchUnavailable. Cada
+    intento alimenta el circuit breaker 'tavily'.
+    """
     max_retries = 3
     base_wait_time = 1
+    deadline = current_deadline(deadline)
+    reserve = generation_reserve() if deadline is not None else 0.0
+    breaker = get_circuit_breaker('tavily')
     
     for attempt in range(max_retries):
+        timeout = stage_timeout(60, deadline, reserve)
+        if timeout < min_call_seconds():
+            logger.warning(f"Sin tiempo restante para la búsqueda web (intento {attempt + 1}); se continúa sin resultados web")
+            raise SearchUnavailable('deadline' if attempt == 0 else 'error')
+        if not breaker.allow():
+            logger.warning(f"Circuito de Tavily abierto; no se consulta '{query[:30]}'")
+            raise SearchUnavailable('circuit_open')
         try:
-            logger.debug(f"Intento {attempt + 1} de búsqueda para: '{query[:50]}...'")
+            logger.debug(f"Intento {attempt + 1} de búsqueda para: '{query[:50]}...' (timeout={timeout:.1f}s)")
             resolved = _resolve_topic_and_time(search_config, query)
             topic = resolved.get('topic')
             time_range = resolved.get('time_range')
@@ -150,6 +298,7 @@ def search_web(query: str) -> list:
                 'chunks_per_source': search_config['chunks_per_source'],
                 'include_raw_content': True,
                 'include_domains': search_config['include_domains'],
+                'timeout': timeout,
             }
             if topic:
                 search_kwargs['topic'] = topic
@@ -165,7 +314,10 @@ def search_web(query: str) -> list:
                 search_kwargs['end_date'] = end_date
 
             logger.debug(f"Parámetros Tavily resueltos: {search_kwargs}")
+            count_search_call()
             response = client.search(**search_kwargs)
+            breaker.record_success()
+            report_dependency('tavily', True)
             
             results = response.get('results', [])
             response_time = response.get('response_time', 'N/A')
@@ -229,24 +381,35 @@ def search_web(query: str) -> list:
         except (MissingAPIKeyError, InvalidAPIKeyError) as e:
             logger.error(f"Error de autenticación con Tavily API: {e}")
             logger.error("Verifique que TAVILY_API_KEY esté configurada correctamente")
-            return []  # No reintentar errores de API key
+            breaker.record_failure()
+            report_dependency('tavily', False, 'invalid_api_key')
+            raise SearchUnavailable('error')  # No reintentar errores de API key
         
         except UsageLimitExceededError as e:
             logger.error(f"Límite de uso de Tavily API excedido: {e}")
             logger.error("Verifique su plan y límites de API en https://app.tavily.com")
-            return []  # No reintentar límites excedidos
+            breaker.record_failure()
+            report_dependency('tavily', False, 'usage_limit')
+            raise SearchUnavailable('error')  # No reintentar límites excedidos
         
         except (TimeoutException, HTTPError) as e:
+            breaker.record_failure()
+            report_dependency('tavily', False, 'unreachable')
             if attempt == max_retries - 1:
                 logger.error(f"Error de red persistente después de {max_retries} intentos: {e}")
-                return []
+                raise SearchUnavailable('error')
             else:
                 # Backoff exponencial con jitter
                 wait_time = base_wait_time * (2 ** attempt) + (attempt * 0.1)
+                if not _can_wait(wait_time, deadline, reserve):
+                    logger.warning(f"Error de red en intento {attempt + 1} y sin tiempo para reintentar: {e}")
+                    raise SearchUnavailable('error')
                 logger.warning(f"Error de red en intento {attempt + 1}, reintentando en {wait_time:.1f}s: {e}")
                 time.sleep(wait_time)
                 
         except ValueError as e:
+            # Consulta rechazada por el cliente, no una caída: cierra la prueba del circuito semiabierto
+            breaker.record_success()
             if "Query is too long" in str(e):
                 logger.error(f"Consulta demasiado larga: {e}")
                 return []
@@ -255,11 +418,15 @@ def search_web(query: str) -> list:
                 return []
                 
         except Exception as e:
+            breaker.record_failure()
             logger.error(f"Error inesperado en búsqueda web (intento {attempt + 1}): {e}")
             if attempt == max_retries - 1:
                 logger.error("Se agotaron todos los reintentos")
-                return []
+                raise SearchUnavailable('error')
             else:
                 wait_time = base_wait_time * (attempt + 1)
+                if not _can_wait(wait_time, deadline, reserve):
+                    logger.warning("Sin tiempo restante para reintentar la búsqueda web")
+                    raise SearchUnavailable('error')
                 logger.warning(f"Reintentando en {wait_time}s...")
                 time.sleep(wait_time)
\ No newline at end of file